@@ -1,7 +1,10 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -13,17 +16,123 @@ DB_PASSWORD = os.getenv("DB_PASSWORD", "skyeneo4280")
 DB_NAME = os.getenv("DB_NAME", "postgres")
 DB_PORT = os.getenv("DB_PORT", "5432")
 
+# Connection pool settings. Every worker has a sync pool (SQLAlchemy sessions) and an
+# async pool (asyncpg, for the async def endpoints), so size these so that
+#   replicas * workers * (pool size + overflow + async pool size + async overflow)
+# stays under max_connections.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+DB_ASYNC_POOL_SIZE = int(os.getenv("DB_ASYNC_POOL_SIZE", "3"))
+DB_ASYNC_MAX_OVERFLOW = int(os.getenv("DB_ASYNC_MAX_OVERFLOW", "2"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "10"))  # seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # max connection lifetime in seconds
+
 DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+ASYNC_DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+POOL_SETTINGS = dict(
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=True,  # health-check connections on checkout
+)
 
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, **POOL_SETTINGS)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine (asyncpg) for the async def endpoints, with its own pool
+async_engine = create_async_engine(ASYNC_DATABASE_URL, pool_size=DB_ASYNC_POOL_SIZE,
+                                   max_overflow=DB_ASYNC_MAX_OVERFLOW, **POOL_SETTINGS)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
+# Pool counters per engine, updated from SQLAlchemy pool events
+_pool_stats_lock = threading.Lock()
+_pool_stats = {}
+
+
+def _install_pool_metrics(name, sync_engine):
+    """Count connects, checkouts and time held for every connection of ``sync_engine``."""
+    stats = _pool_stats[name] = {
+        "connections_opened": 0,
+        "connections_closed": 0,
+        "connections_invalidated": 0,
+        "checkouts": 0,
+        "checkins": 0,
+        "checkout_seconds_total": 0.0,
+    }
+
+    def bump(counter, amount=1):
+        with _pool_stats_lock:
+            stats[counter] += amount
+
+    @event.listens_for(sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        bump("connections_opened")
+
+    @event.listens_for(sync_engine, "close")
+    def on_close(dbapi_connection, connection_record):
+        bump("connections_closed")
+
+    @event.listens_for(sync_engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        bump("connections_invalidated")
+
+    @event.listens_for(sync_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.monotonic()
+        bump("checkouts")
+
+    @event.listens_for(sync_engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is not None:
+            bump("checkout_seconds_total", time.monotonic() - started)
+        bump("checkins")
+
+
+_install_pool_metrics("sync", engine)
+_install_pool_metrics("async", async_engine.sync_engine)
+
+
+def get_pool_status():
+    """
+    Current state of the sync and async connection pools.
+
+    Returns:
+        dict: Pool configuration plus, per pool, live gauges and lifetime counters
+    """
+    status = {
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+    pools = (
+        ("sync", engine.pool, DB_POOL_SIZE, DB_MAX_OVERFLOW),
+        ("async", async_engine.sync_engine.pool, DB_ASYNC_POOL_SIZE, DB_ASYNC_MAX_OVERFLOW),
+    )
+    for name, pool, pool_size, max_overflow in pools:
+        with _pool_stats_lock:
+            counters = dict(_pool_stats[name])
+        counters["checkout_seconds_total"] = round(counters["checkout_seconds_total"], 3)
+        status[name] = {
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            **counters,
+        }
+    return status
+
 # Dependency to get db session
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Dependency to get an async db session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
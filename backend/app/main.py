@@ -3,7 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional
 
-from app.database import get_db
+from app.database import get_db, get_pool_status
 from app.utils.db_utils import (
     execute_raw_sql, 
     query_to_dataframe,
@@ -14,10 +14,26 @@ from app.utils.db_utils import (
     get_venues,
     get_players
 )
+from app.services.delivery_store import load_delivery_store
+from app.ml.feature_store import load_feature_store
+from app.services.player_index import load_player_index
+from app.services.team_form import load_team_form
+from app.services.head_to_head_matrix import load_head_to_head_matrix
+from app.services.venue_stats import load_venue_stats
+from app.ml.win_probability import load_win_probability_curves
+from app.services.data_version import data_version_watcher
+from app.services.upcoming_matches import upcoming_matches_poller
+from app.utils.http_client import cricapi_client
+from app.services.response_cache import ResponseCacheMiddleware, response_cache
+from app.services.query_metrics import QueryMetricsMiddleware, query_metrics, instrument_engines
+from app.ml.model_registry import model_registry
+from app.ml.season_simulator import stop_simulation_pool
 
 # Import routers
 from app.routers import teams, players, matches, venues, toss, head_to_head, ipl_records, ipl_history
 from app.routers.team_performance import router as team_performance_router
+from app.routers.player_performance import router as player_performance_router
+from app.routers.venue_analysis import router as venue_analysis_router
 # from app.routers.seasonal_performance import router as seasonal_performance_router
 from app.routers import prediction_endpoint
 from app.routers.upcoming_matches import router as upcoming_matches_router
@@ -44,6 +60,55 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Cache historical-data GETs until the next import bumps the data version
+app.add_middleware(ResponseCacheMiddleware, cache=response_cache)
+
+# Time every SQL statement per request; outermost so cache hits are counted too
+instrument_engines()
+app.add_middleware(QueryMetricsMiddleware, metrics=query_metrics)
+
+# Load the ball-by-ball dataset into memory once per worker and rebuild it
+# whenever an import bumps the data version
+@app.on_event("startup")
+def load_analytics_data():
+    """Build the delivery store and the analytics built from it, then watch for imports."""
+    data_version_watcher.record_baseline()
+    for loader in (load_delivery_store, load_feature_store, load_player_index, load_team_form,
+                   load_head_to_head_matrix, load_venue_stats, load_win_probability_curves):
+        loader()
+        data_version_watcher.register(loader)
+    data_version_watcher.start()
+
+@app.on_event("shutdown")
+def stop_analytics_data():
+    data_version_watcher.stop()
+
+# Load the prediction model once and watch for new training runs
+@app.on_event("startup")
+def load_prediction_models():
+    """Load the active model version and start the registry's reload poller."""
+    model_registry.start()
+
+@app.on_event("shutdown")
+def stop_prediction_models():
+    model_registry.stop()
+
+# The season simulation pool (if configured) starts on first use
+@app.on_event("shutdown")
+def stop_season_simulation_workers():
+    stop_simulation_pool()
+
+# Poll cricapi for upcoming matches in the background; requests read the snapshot
+@app.on_event("startup")
+def start_upcoming_matches_poller():
+    """Load the stored upcoming-matches snapshot and start refreshing it from cricapi."""
+    upcoming_matches_poller.start()
+
+@app.on_event("shutdown")
+def stop_upcoming_matches_poller():
+    upcoming_matches_poller.stop()
+    cricapi_client.close()
+
 # Include routers
 app.include_router(prediction_endpoint.router)
 app.include_router(teams.router)
@@ -55,8 +120,10 @@ app.include_router(head_to_head.router)
 app.include_router(ipl_records.router)
 app.include_router(ipl_history.router)
 app.include_router(team_performance_router)
+app.include_router(player_performance_router)
+app.include_router(venue_analysis_router)
 # app.include_router(seasonal_performance_router)  # Add the new seasonal performance router
-# app.include_router(upcoming_matches_router)
+app.include_router(upcoming_matches_router)
 app.include_router(cricket_router)
 
 
@@ -82,6 +149,42 @@ def test_db_connection(db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database connection error: {str(e)}")
 
+# Connection pool metrics
+@app.get("/db-pool")
+def get_db_pool_status():
+    """Return size, usage and lifetime counters of the sync and async database connection pools."""
+    return get_pool_status()
+
+# Version of the imported data the in-memory stores were built from
+@app.get("/data-version")
+def get_data_version_status():
+    """Return the current data version and when the in-memory data was last reloaded."""
+    return data_version_watcher.status()
+
+# Response cache metrics
+@app.get("/cache")
+def get_response_cache_status():
+    """Return hit/miss counters and size of the response cache."""
+    return response_cache.stats()
+
+# Upcoming-matches poller and cricapi call budget
+@app.get("/upcoming-matches-poller")
+def get_upcoming_matches_poller_status():
+    """Return the age of the upcoming-matches snapshot, API calls made and budget left."""
+    return upcoming_matches_poller.status()
+
+# Upstream cricket API latency, error rate and circuit state
+@app.get("/upstream-metrics")
+def get_upstream_metrics():
+    """Return per-endpoint latency histograms, retries and errors for cricapi calls, plus the circuit breaker."""
+    return cricapi_client.metrics()
+
+# Per-route SQL metrics and slow-query log
+@app.get("/db-metrics")
+def get_db_metrics(route_prefix: Optional[str] = None):
+    """Return per-route latency, query-count and DB-time histograms plus the slowest statements."""
+    return query_metrics.snapshot(route_prefix)
+
 # Get basic cricket entities (teams, venues, players)
 @app.get("/entities")
 def get_cricket_entities(db: Session = Depends(get_db)):
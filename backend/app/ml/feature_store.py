@@ -0,0 +1,319 @@
+"""
+Precomputed match-prediction features shared by training and serving.
+
+Training used to rebuild team, venue and head-to-head features with one large
+SQL query, while the prediction endpoint computed a different set per request.
+The feature store computes both from the same ``match_info`` history, once,
+as count arrays keyed by:
+
+    (team, season)   matches, wins, tosses won, chose to bat
+    (venue, season)  matches, team1 wins, toss winner chose to bat
+    team pair        matches, wins of each side (all seasons)
+
+For training, every match gets the counts as they stood *before* that match
+(season-to-date, or the previous season's totals before a team or venue's
+first match of a season), so no feature leaks the result it predicts. For
+serving, a fixture looks up the latest totals for its keys with dictionary
+lookups. Both paths turn counts into features with the same
+``_assemble_features`` call.
+"""
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.delivery_store import MatchEngineSlot
+
+logger = logging.getLogger(__name__)
+
+MATCH_COLUMNS = ["match_date", "season", "venue", "team1", "team2", "toss_winner", "toss_decision", "winner"]
+MATCH_QUERY = f"SELECT {', '.join(MATCH_COLUMNS)} FROM match_info ORDER BY match_date, filename"
+
+TEAM_COUNTS = ["n", "won", "toss_won", "chose_bat"]
+VENUE_COUNTS = ["n", "team1_won", "chose_bat"]
+PAIR_COUNTS = ["n", "low_won", "high_won"]
+
+FEATURE_COLUMNS = [
+    "team1_win_percentage",
+    "team2_win_percentage",
+    "team1_matches_played",
+    "team2_matches_played",
+    "team1_toss_bat_rate",
+    "team2_toss_bat_rate",
+    "venue_team1_win_rate",
+    "venue_bat_first_percentage",
+    "head_to_head_win_percentage",
+    "head_to_head_matches",
+    "toss_advantage",
+    "toss_decision_bat",
+    "team_strength_diff",
+    "venue_bias",
+    "head_to_head_advantage",
+    "toss_venue_interaction",
+    "team_strength_venue_interaction",
+]
+
+
+def _season_year(values: pd.Series) -> pd.Series:
+    """'2007/08' and 2016 style seasons as integer years"""
+    return pd.to_numeric(values.astype(str).str[:4], errors="coerce")
+
+
+def _rate(numerator: np.ndarray, denominator: np.ndarray, default: float = 50.0) -> np.ndarray:
+    """Percentage, or ``default`` where there is no history"""
+    return np.where(denominator > 0, numerator / np.maximum(denominator, 1) * 100.0, default)
+
+
+def _counts_before(frame: pd.DataFrame, keys: List[str], counts: List[str]) -> Tuple[np.ndarray, pd.DataFrame]:
+    """
+    Per-row counts from earlier rows of the same key, plus final totals per key.
+
+    ``frame`` must already be in chronological order and carry an ``n`` column
+    of ones alongside the other 0/1 ``counts`` columns.
+
+    Returns:
+        tuple: (array of shape (len(frame), len(counts)), DataFrame of totals indexed by ``keys``)
+    """
+    values = frame[counts].to_numpy(dtype=np.int64)
+    cumulative = frame.groupby(keys, sort=False)[counts].cumsum().to_numpy(dtype=np.int64)
+    totals = frame.groupby(keys)[counts].sum()
+    return cumulative - values, totals
+
+
+def _with_previous_season(before: np.ndarray, frame: pd.DataFrame, totals: pd.DataFrame, key: str) -> np.ndarray:
+    """Replace empty season-to-date counts with the key's previous-season totals"""
+    counts = list(totals.columns)
+    ordered = totals.reset_index().sort_values([key, "season"])
+    previous = ordered.groupby(key)[counts].shift(1)
+    previous.index = pd.MultiIndex.from_frame(ordered[[key, "season"]])
+    previous = previous.reindex(pd.MultiIndex.from_frame(frame[[key, "season"]])).fillna(0)
+    previous = previous.to_numpy(dtype=np.int64)
+
+    empty = before[:, 0] == 0
+    before = before.copy()
+    before[empty] = previous[empty]
+    return before
+
+
+def _assemble_features(team1: np.ndarray, team2: np.ndarray, venue: np.ndarray, pair: np.ndarray,
+                       toss_advantage: np.ndarray, toss_bat: np.ndarray) -> pd.DataFrame:
+    """
+    Turn count arrays into the model's feature matrix.
+
+    Args:
+        team1, team2: (n, len(TEAM_COUNTS)) counts for each side
+        venue: (n, len(VENUE_COUNTS)) venue counts
+        pair: (n, 2) head-to-head matches and team1 wins
+        toss_advantage: 1 where team1 won the toss
+        toss_bat: 1 where the toss winner chose to bat
+    """
+    n = {name: i for i, name in enumerate(TEAM_COUNTS)}
+    v = {name: i for i, name in enumerate(VENUE_COUNTS)}
+
+    team1_win = _rate(team1[:, n["won"]], team1[:, n["n"]])
+    team2_win = _rate(team2[:, n["won"]], team2[:, n["n"]])
+    venue_team1 = _rate(venue[:, v["team1_won"]], venue[:, v["n"]])
+    head_to_head = _rate(pair[:, 1], pair[:, 0])
+
+    features = pd.DataFrame({
+        "team1_win_percentage": team1_win,
+        "team2_win_percentage": team2_win,
+        "team1_matches_played": team1[:, n["n"]],
+        "team2_matches_played": team2[:, n["n"]],
+        "team1_toss_bat_rate": _rate(team1[:, n["chose_bat"]], team1[:, n["toss_won"]]),
+        "team2_toss_bat_rate": _rate(team2[:, n["chose_bat"]], team2[:, n["toss_won"]]),
+        "venue_team1_win_rate": venue_team1,
+        "venue_bat_first_percentage": _rate(venue[:, v["chose_bat"]], venue[:, v["n"]]),
+        "head_to_head_win_percentage": head_to_head,
+        "head_to_head_matches": pair[:, 0],
+        "toss_advantage": toss_advantage.astype(int),
+        "toss_decision_bat": toss_bat.astype(int),
+    })
+    features["team_strength_diff"] = team1_win - team2_win
+    features["venue_bias"] = venue_team1 - 50
+    features["head_to_head_advantage"] = head_to_head - 50
+    features["toss_venue_interaction"] = features["toss_advantage"] * features["venue_bias"]
+    features["team_strength_venue_interaction"] = features["team_strength_diff"] * features["venue_bias"]
+    return features[FEATURE_COLUMNS]
+
+
+class FeatureStore:
+    """Team, venue and head-to-head count vectors materialized from match history"""
+
+    def __init__(self, matches: pd.DataFrame):
+        matches = matches[MATCH_COLUMNS].copy()
+        matches = matches[matches["team1"].notna() & matches["team2"].notna()]
+        matches["season"] = _season_year(matches["season"])
+        matches = matches[matches["season"].notna()]
+        matches["season"] = matches["season"].astype(int)
+        matches["match_date"] = pd.to_datetime(matches["match_date"], errors="coerce")
+        matches = matches.sort_values("match_date", kind="stable").reset_index(drop=True)
+        self.matches = matches
+
+        toss_bat = (matches["toss_decision"] == "bat").to_numpy()
+        self.toss_advantage = (matches["toss_winner"] == matches["team1"]).to_numpy()
+        self.toss_bat = toss_bat
+
+        # Team: one row per (match, side), in match order
+        sides = []
+        for side in ("team1", "team2"):
+            sides.append(pd.DataFrame({
+                "match_idx": matches.index,
+                "side": side,
+                "team": matches[side],
+                "season": matches["season"],
+                "n": 1,
+                "won": (matches["winner"] == matches[side]).astype(int),
+                "toss_won": (matches["toss_winner"] == matches[side]).astype(int),
+                "chose_bat": ((matches["toss_winner"] == matches[side]) & toss_bat).astype(int),
+            }))
+        team_rows = pd.concat(sides, ignore_index=True).sort_values(["match_idx", "side"], kind="stable")
+        team_before, self.team_totals = _counts_before(team_rows, ["team", "season"], TEAM_COUNTS)
+        team_before = _with_previous_season(team_before, team_rows, self.team_totals, "team")
+        is_team1 = (team_rows["side"] == "team1").to_numpy()
+        order = team_rows["match_idx"].to_numpy()
+        self.team1_before = np.empty((len(matches), len(TEAM_COUNTS)), dtype=np.int64)
+        self.team2_before = np.empty_like(self.team1_before)
+        self.team1_before[order[is_team1]] = team_before[is_team1]
+        self.team2_before[order[~is_team1]] = team_before[~is_team1]
+
+        # Venue: one row per match
+        venue_rows = pd.DataFrame({
+            "venue": matches["venue"].fillna(""),
+            "season": matches["season"],
+            "n": 1,
+            "team1_won": (matches["winner"] == matches["team1"]).astype(int),
+            "chose_bat": toss_bat.astype(int),
+        })
+        venue_before, self.venue_totals = _counts_before(venue_rows, ["venue", "season"], VENUE_COUNTS)
+        self.venue_before = _with_previous_season(venue_before, venue_rows, self.venue_totals, "venue")
+
+        # Head-to-head: unordered pair, all seasons
+        first, second = matches["team1"].astype(str), matches["team2"].astype(str)
+        low = first.where(first <= second, second)
+        high = second.where(first <= second, first)
+        pair_rows = pd.DataFrame({
+            "low": low,
+            "high": high,
+            "n": 1,
+            "low_won": (matches["winner"] == low).astype(int),
+            "high_won": (matches["winner"] == high).astype(int),
+        })
+        pair_before, self.pair_totals = _counts_before(pair_rows, ["low", "high"], PAIR_COUNTS)
+        team1_is_low = (first == low).to_numpy()
+        self.pair_before = np.column_stack([
+            pair_before[:, 0],
+            np.where(team1_is_low, pair_before[:, 1], pair_before[:, 2]),
+        ])
+
+        # Serving lookups: latest totals per key
+        self._team_index = self._latest_index(self.team_totals)
+        self._venue_index = self._latest_index(self.venue_totals)
+        self._pair_index = {key: row for key, row in zip(self.pair_totals.index, self.pair_totals.to_numpy(dtype=np.int64))}
+        self.built_at = pd.Timestamp.utcnow()
+
+    @staticmethod
+    def _latest_index(totals: pd.DataFrame) -> Dict[Any, Any]:
+        """{(key, season): counts} plus {key: [(season, counts), ...]} sorted by season"""
+        exact = {}
+        by_key: Dict[Any, List[Tuple[int, np.ndarray]]] = {}
+        for (key, season), row in zip(totals.index, totals.to_numpy(dtype=np.int64)):
+            exact[(key, season)] = row
+            by_key.setdefault(key, []).append((season, row))
+        for seasons in by_key.values():
+            seasons.sort(key=lambda item: item[0])
+        return {"exact": exact, "by_key": by_key}
+
+    @staticmethod
+    def _lookup(index: Dict[Any, Any], key: Any, season: int, width: int) -> np.ndarray:
+        """Totals for (key, season), else the latest earlier season, else zeros"""
+        row = index["exact"].get((key, season))
+        if row is not None:
+            return row
+        for earlier, row in reversed(index["by_key"].get(key, [])):
+            if earlier < season:
+                return row
+        return np.zeros(width, dtype=np.int64)
+
+    @classmethod
+    def from_database(cls, engine) -> "FeatureStore":
+        return cls(pd.read_sql(MATCH_QUERY, engine))
+
+    @property
+    def n_matches(self) -> int:
+        return len(self.matches)
+
+    def training_frame(self) -> pd.DataFrame:
+        """
+        Point-in-time features for every decided match, plus ``match_result``.
+
+        Returns:
+            pandas.DataFrame: match columns, FEATURE_COLUMNS and match_result (1 if team1 won)
+        """
+        features = _assemble_features(
+            self.team1_before, self.team2_before, self.venue_before, self.pair_before,
+            self.toss_advantage, self.toss_bat,
+        )
+        frame = pd.concat([self.matches.reset_index(drop=True), features], axis=1)
+        decided = (frame["winner"] == frame["team1"]) | (frame["winner"] == frame["team2"])
+        frame = frame[decided].reset_index(drop=True)
+        frame["match_result"] = (frame["winner"] == frame["team1"]).astype(int)
+        return frame
+
+    def features_for(self, fixtures: Sequence[Dict[str, Any]]) -> pd.DataFrame:
+        """
+        Serving features for upcoming fixtures from the latest totals.
+
+        Args:
+            fixtures: Mappings with team1, team2, venue, season, toss_winner, toss_decision
+
+        Returns:
+            pandas.DataFrame: One row of FEATURE_COLUMNS per fixture, in order
+        """
+        size = len(fixtures)
+        team1 = np.empty((size, len(TEAM_COUNTS)), dtype=np.int64)
+        team2 = np.empty_like(team1)
+        venue = np.empty((size, len(VENUE_COUNTS)), dtype=np.int64)
+        pair = np.empty((size, 2), dtype=np.int64)
+        toss_advantage = np.empty(size, dtype=bool)
+        toss_bat = np.empty(size, dtype=bool)
+
+        for i, fixture in enumerate(fixtures):
+            season = int(str(fixture["season"])[:4])
+            team1[i] = self._lookup(self._team_index, fixture["team1"], season, len(TEAM_COUNTS))
+            team2[i] = self._lookup(self._team_index, fixture["team2"], season, len(TEAM_COUNTS))
+            venue[i] = self._lookup(self._venue_index, fixture["venue"], season, len(VENUE_COUNTS))
+
+            low, high = sorted((str(fixture["team1"]), str(fixture["team2"])))
+            totals = self._pair_index.get((low, high), np.zeros(len(PAIR_COUNTS), dtype=np.int64))
+            pair[i] = (totals[0], totals[1] if fixture["team1"] == low else totals[2])
+
+            toss_advantage[i] = fixture.get("toss_winner") == fixture["team1"]
+            toss_bat[i] = str(fixture.get("toss_decision") or "").lower() == "bat"
+
+        return _assemble_features(team1, team2, venue, pair, toss_advantage, toss_bat)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "matches": self.n_matches,
+            "team_seasons": len(self.team_totals),
+            "venue_seasons": len(self.venue_totals),
+            "team_pairs": len(self.pair_totals),
+            "feature_columns": FEATURE_COLUMNS,
+            "built_at": self.built_at.isoformat(),
+        }
+
+
+# Process-wide instance, swapped atomically on reload
+_feature_store = MatchEngineSlot("feature store", FeatureStore, MATCH_COLUMNS)
+
+
+def get_feature_store() -> Optional[FeatureStore]:
+    """Return the loaded feature store, or None if it has not been built."""
+    return _feature_store.get()
+
+
+def load_feature_store(engine=None) -> Optional[FeatureStore]:
+    """(Re)build the process-wide feature store from the current match list."""
+    return _feature_store.load(engine)
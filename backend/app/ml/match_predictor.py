@@ -4,8 +4,8 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report
 
 class IPLMatchPredictor:
-    def __init__(self):
-        self.model = RandomForestClassifier(
+    def __init__(self, model=None):
+        self.model = model if model is not None else RandomForestClassifier(
             n_estimators=100, 
             random_state=42
         )
@@ -30,12 +30,18 @@ class IPLMatchPredictor:
         """
         Predict match outcome
         """
-        probabilities = self.model.predict_proba(match_features)
+        team1_win = self.predict_matches(match_features)
         return {
-            'team1_win_probability': probabilities[0][1],
-            'team2_win_probability': probabilities[0][0]
+            'team1_win_probability': team1_win[0],
+            'team2_win_probability': 1 - team1_win[0]
         }
     
+    def predict_matches(self, match_features):
+        """
+        Team1 win probability for every row, with one predict_proba call
+        """
+        return self.model.predict_proba(match_features)[:, 1]
+    
     def save_model(self, filepath):
         """
         Save trained model
@@ -0,0 +1,246 @@
+"""
+In-process registry of trained match-prediction models.
+
+The prediction endpoints used to ``joblib.load`` the model and its feature
+list on every request. The registry loads them once, keeps every version it
+has loaded keyed by training run, and swaps the active version atomically
+when a newer run appears on disk. Requests only ever read the active
+``ModelVersion`` reference, so a reload never blocks or half-updates them.
+
+Layout under ``MODEL_DIR``::
+
+    models/
+        runs/<run_id>/advanced_ipl_predictor.joblib   # one directory per training run
+        runs/<run_id>/feature_columns.joblib
+        advanced_ipl_predictor.joblib                 # legacy flat artifacts, version "legacy"
+        feature_columns.joblib
+
+Run ids sort chronologically (``save_model_version`` uses a UTC timestamp),
+so the newest run is the active one unless ``MODEL_VERSION`` pins another.
+"""
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import joblib
+
+logger = logging.getLogger(__name__)
+
+MODEL_DIR = os.getenv("MODEL_DIR", "models")
+MODEL_VERSION = os.getenv("MODEL_VERSION")  # pin a run id instead of following the newest
+MODEL_RELOAD_INTERVAL = float(os.getenv("MODEL_RELOAD_INTERVAL", "30"))  # seconds, 0 disables polling
+MODEL_KEEP_VERSIONS = int(os.getenv("MODEL_KEEP_VERSIONS", "3"))
+
+MODEL_FILE = "advanced_ipl_predictor.joblib"
+FEATURES_FILE = "feature_columns.joblib"
+RUNS_DIR = "runs"
+LEGACY_VERSION = "legacy"
+
+
+class ModelNotLoadedError(Exception):
+    """Raised when a prediction is requested before any model version is loaded."""
+
+
+class ModelVersion:
+    """A loaded model together with the feature columns it was trained on"""
+
+    def __init__(self, version: str, path: str, model: Any, feature_columns: List[str], modified_at: float):
+        self.version = version
+        self.path = path
+        self.model = model
+        self.feature_columns = list(feature_columns)
+        self.modified_at = modified_at
+        self.loaded_at = datetime.utcnow()
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "path": self.path,
+            "model_type": type(self.model).__name__,
+            "feature_count": len(self.feature_columns),
+            "trained_at": datetime.utcfromtimestamp(self.modified_at).isoformat(),
+            "loaded_at": self.loaded_at.isoformat(),
+        }
+
+
+def _artifact_mtime(path: str) -> Optional[float]:
+    """Newest mtime of the two artifacts, or None if either is missing"""
+    try:
+        return max(
+            os.path.getmtime(os.path.join(path, MODEL_FILE)),
+            os.path.getmtime(os.path.join(path, FEATURES_FILE)),
+        )
+    except OSError:
+        return None
+
+
+class ModelRegistry:
+    """Loaded model versions plus the one currently serving predictions"""
+
+    def __init__(self, model_dir: str = MODEL_DIR, pinned_version: Optional[str] = MODEL_VERSION,
+                 keep_versions: int = MODEL_KEEP_VERSIONS):
+        self.model_dir = model_dir
+        self.pinned_version = pinned_version
+        self.keep_versions = max(keep_versions, 1)
+        self._versions: Dict[str, ModelVersion] = {}
+        self._active: Optional[ModelVersion] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._poller: Optional[threading.Thread] = None
+        self.last_refresh: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+
+    def discover(self) -> Dict[str, str]:
+        """Map of version -> artifact directory for every complete run on disk"""
+        found = {}
+        runs_dir = os.path.join(self.model_dir, RUNS_DIR)
+        if os.path.isdir(runs_dir):
+            for run_id in os.listdir(runs_dir):
+                path = os.path.join(runs_dir, run_id)
+                if not run_id.startswith(".") and _artifact_mtime(path) is not None:
+                    found[run_id] = path
+        if _artifact_mtime(self.model_dir) is not None:
+            found[LEGACY_VERSION] = self.model_dir
+        return found
+
+    def _load(self, version: str, path: str) -> ModelVersion:
+        modified_at = _artifact_mtime(path)
+        model = joblib.load(os.path.join(path, MODEL_FILE))
+        feature_columns = joblib.load(os.path.join(path, FEATURES_FILE))
+        logger.info(f"Loaded model version {version} from {path}")
+        return ModelVersion(version, path, model, feature_columns, modified_at)
+
+    def _choose(self, available: Dict[str, str]) -> Optional[str]:
+        if self.pinned_version:
+            return self.pinned_version if self.pinned_version in available else None
+        runs = sorted(v for v in available if v != LEGACY_VERSION)
+        if runs:
+            return runs[-1]
+        return LEGACY_VERSION if LEGACY_VERSION in available else None
+
+    def refresh(self) -> Optional[ModelVersion]:
+        """
+        Load the version that should be active if it is new or its artifacts changed.
+
+        Loading happens outside the lock; only the reference swap is locked. A
+        failed load keeps the current version serving.
+
+        Returns:
+            ModelVersion: The active version after the refresh (None if nothing is loadable)
+        """
+        try:
+            available = self.discover()
+            target = self._choose(available)
+            if target is None:
+                if self._active is None:
+                    self.last_error = f"No model artifacts found under {self.model_dir}"
+                return self._active
+
+            current = self._versions.get(target)
+            if current is None or current.modified_at != _artifact_mtime(available[target]):
+                loaded = self._load(target, available[target])
+                with self._lock:
+                    self._versions[target] = loaded
+                    self._active = loaded
+                    self._evict()
+            elif self._active is not current:
+                with self._lock:
+                    self._active = current
+
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"Error refreshing model registry: {str(e)}")
+        finally:
+            self.last_refresh = datetime.utcnow()
+        return self._active
+
+    def _evict(self):
+        """Drop the oldest loaded versions beyond keep_versions (never the active one)"""
+        stale = sorted(v for v in self._versions if self._versions[v] is not self._active)
+        while len(self._versions) > self.keep_versions and stale:
+            del self._versions[stale.pop(0)]
+
+    def activate(self, version: str) -> ModelVersion:
+        """Pin ``version`` (e.g. to roll back) and make it active"""
+        available = self.discover()
+        if version not in available:
+            raise KeyError(f"Unknown model version: {version}")
+        self.pinned_version = version
+        active = self.refresh()
+        if active is None or active.version != version:
+            raise ModelNotLoadedError(self.last_error or f"Could not load model version {version}")
+        return active
+
+    def active(self) -> ModelVersion:
+        """The version serving predictions"""
+        active = self._active
+        if active is None:
+            raise ModelNotLoadedError(self.last_error or "No prediction model is loaded")
+        return active
+
+    def status(self) -> Dict[str, Any]:
+        active = self._active
+        return {
+            "model_dir": self.model_dir,
+            "active": active.describe() if active else None,
+            "pinned_version": self.pinned_version,
+            "loaded_versions": sorted(self._versions),
+            "available_versions": sorted(self.discover()),
+            "reload_interval_seconds": MODEL_RELOAD_INTERVAL,
+            "last_refresh": self.last_refresh.isoformat() if self.last_refresh else None,
+            "last_error": self.last_error,
+        }
+
+    def start(self, interval: float = MODEL_RELOAD_INTERVAL):
+        """Load the active version now and poll for new runs every ``interval`` seconds"""
+        self.refresh()
+        if interval <= 0 or (self._poller and self._poller.is_alive()):
+            return
+        self._stop.clear()
+
+        def poll():
+            while not self._stop.wait(interval):
+                self.refresh()
+
+        self._poller = threading.Thread(target=poll, name="model-registry-poller", daemon=True)
+        self._poller.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+def save_model_version(model: Any, feature_columns: List[str], model_dir: str = MODEL_DIR,
+                       run_id: Optional[str] = None) -> str:
+    """
+    Write a training run's artifacts as a new registry version.
+
+    The files are written to a hidden temporary directory and renamed into
+    ``runs/<run_id>`` so the poller never sees a half-written run.
+
+    Returns:
+        str: The run id
+    """
+    run_id = run_id or datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    runs_dir = os.path.join(model_dir, RUNS_DIR)
+    os.makedirs(runs_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=f".{run_id}-", dir=runs_dir)
+    try:
+        joblib.dump(model, os.path.join(staging, MODEL_FILE))
+        joblib.dump(list(feature_columns), os.path.join(staging, FEATURES_FILE))
+        os.replace(staging, os.path.join(runs_dir, run_id))
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return run_id
+
+
+model_registry = ModelRegistry()
+
+
+def get_model_registry() -> ModelRegistry:
+    return model_registry
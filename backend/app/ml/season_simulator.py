@@ -0,0 +1,396 @@
+"""
+Monte Carlo playoff chances for an IPL league stage.
+
+``season_table`` reads the points table so far from the ``seasons``,
+``matches``, ``teams`` and ``innings`` tables: points, plus the runs and
+balls for and against behind net run rate. The win probability of each
+remaining fixture comes from the prediction model. The toss is not known
+in advance, so ``fixture_probabilities`` averages
+``IPLMatchPredictor.predict_matches`` over both toss winners and
+decisions, with each fixture scored from both sides.
+
+``SeasonSimulator`` then plays out the remaining fixtures ``simulations``
+times as array operations over a (simulations x fixtures) grid:
+
+* results are Bernoulli draws against the fixture probabilities,
+* scores are drawn around the par first-innings total (a losing chase
+  falls short by a random margin, and a winning chase finishes with balls
+  to spare),
+* points and runs/balls for and against are summed per team with one-hot
+  matrix products, and
+* finishing order is one ``argsort`` per simulated table, on points, then
+  net run rate, then a random draw.
+
+Simulations run in chunks of ``SEASON_SIMULATION_CHUNK``, in-process by
+default (100k simulations of a full league stage take well under a
+second). Setting ``SEASON_SIMULATION_WORKERS`` above 1 spreads large runs
+over a process pool of that size, started on first use.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from statistics import NormalDist
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+SEASON_SIMULATIONS = int(os.getenv("SEASON_SIMULATIONS", "100000"))
+MAX_SEASON_SIMULATIONS = int(os.getenv("MAX_SEASON_SIMULATIONS", "1000000"))
+SEASON_SIMULATION_CHUNK = int(os.getenv("SEASON_SIMULATION_CHUNK", "25000"))  # simulations per array batch
+SEASON_SIMULATION_WORKERS = int(os.getenv("SEASON_SIMULATION_WORKERS", "1"))  # 1 runs in-process, without a pool
+SEASON_SIMULATION_PARALLEL_MIN = int(os.getenv("SEASON_SIMULATION_PARALLEL_MIN", "50000"))  # smaller runs stay in-process
+
+PLAYOFF_SPOTS = 4
+INNINGS_BALLS = 120
+POINTS_FOR_WIN = 2
+POINTS_FOR_NO_RESULT = 1
+
+# Score model for simulated matches
+DEFAULT_PAR = 165.0
+FIRST_INNINGS_SD = 25.0
+MEAN_RUN_MARGIN = 22.0      # runs, when the side batting first wins
+MEAN_BALLS_TO_SPARE = 10.0  # when the chase wins
+
+TABLE_COLUMNS = ["played", "won", "lost", "no_result", "points", "runs_for", "balls_faced",
+                 "runs_against", "balls_bowled"]
+
+# Only league-stage results count towards points and net run rate; matches
+# without a match_type are taken to be league matches
+LEAGUE_MATCH = "COALESCE(m.match_type, 'League') = 'League'"
+
+SEASON_MATCHES_QUERY = f"""
+SELECT m.match_id, t1.team_name AS team1, t2.team_name AS team2, w.team_name AS winner
+FROM matches m
+JOIN seasons s ON s.season_id = m.season_id
+JOIN teams t1 ON t1.team_id = m.team1_id
+JOIN teams t2 ON t2.team_id = m.team2_id
+LEFT JOIN teams w ON w.team_id = m.winner_id
+WHERE s.season_year = :season AND {LEAGUE_MATCH}
+"""
+
+SEASON_INNINGS_QUERY = f"""
+SELECT i.match_id, bat.team_name AS batting_team, bowl.team_name AS bowling_team,
+       i.total_runs, i.total_wickets, i.total_overs
+FROM innings i
+JOIN matches m ON m.match_id = i.match_id
+JOIN seasons s ON s.season_id = m.season_id
+JOIN teams bat ON bat.team_id = i.batting_team_id
+JOIN teams bowl ON bowl.team_id = i.bowling_team_id
+WHERE s.season_year = :season AND i.inning_number IN (1, 2) AND m.winner_id IS NOT NULL AND {LEAGUE_MATCH}
+"""
+
+
+def overs_to_balls(overs: Any) -> int:
+    """19.3 overs as 117 balls"""
+    whole = int(float(overs or 0))
+    return whole * 6 + int(round((float(overs or 0) - whole) * 10))
+
+
+def season_table(db, season: int) -> Dict[str, Dict[str, int]]:
+    """
+    Points table of a season so far.
+
+    A side bowled out is charged its full 20 overs, as in the IPL's net run
+    rate. Matches without a winner earn a point each and do not count
+    towards net run rate; super overs are ignored.
+
+    Args:
+        db: SQLAlchemy session or connection
+        season: Season year
+
+    Returns:
+        dict: team -> TABLE_COLUMNS counts
+    """
+    table: Dict[str, Dict[str, int]] = {}
+
+    def row(team: str) -> Dict[str, int]:
+        return table.setdefault(team, dict.fromkeys(TABLE_COLUMNS, 0))
+
+    for match in db.execute(text(SEASON_MATCHES_QUERY), {"season": season}).mappings():
+        for team in (match["team1"], match["team2"]):
+            entry = row(team)
+            entry["played"] += 1
+            if match["winner"] is None:
+                entry["no_result"] += 1
+                entry["points"] += POINTS_FOR_NO_RESULT
+            elif match["winner"] == team:
+                entry["won"] += 1
+                entry["points"] += POINTS_FOR_WIN
+            else:
+                entry["lost"] += 1
+
+    for innings in db.execute(text(SEASON_INNINGS_QUERY), {"season": season}).mappings():
+        runs = int(innings["total_runs"] or 0)
+        balls = INNINGS_BALLS if (innings["total_wickets"] or 0) >= 10 else overs_to_balls(innings["total_overs"])
+        batting, bowling = row(innings["batting_team"]), row(innings["bowling_team"])
+        batting["runs_for"] += runs
+        batting["balls_faced"] += balls
+        bowling["runs_against"] += runs
+        bowling["balls_bowled"] += balls
+    return table
+
+
+def season_par(db, season: int) -> float:
+    """Mean first-innings total of the season so far, or of every season before it"""
+    query = """
+    SELECT AVG(i.total_runs) AS par
+    FROM innings i
+    JOIN matches m ON m.match_id = i.match_id
+    JOIN seasons s ON s.season_id = m.season_id
+    WHERE i.inning_number = 1 AND s.season_year {comparison} :season
+    """
+    for comparison in ("=", "<"):
+        par = db.execute(text(query.format(comparison=comparison)), {"season": season}).scalar()
+        if par:
+            return float(par)
+    return DEFAULT_PAR
+
+
+def fixture_probabilities(feature_store, active, season: int, fixtures: Sequence[Dict[str, Any]]) -> np.ndarray:
+    """
+    Team1 win probability of each fixture, from one predict_proba call.
+
+    Every fixture is scored under all four toss outcomes and from both
+    sides (as team1 and as team2), and the eight estimates are averaged.
+
+    Args:
+        feature_store: FeatureStore for the serving features
+        active: Active ModelVersion
+        season: Season the fixtures belong to
+        fixtures: Mappings with team1, team2 and venue
+
+    Returns:
+        numpy.ndarray: One probability per fixture
+    """
+    from app.ml.match_predictor import IPLMatchPredictor
+
+    rows = []
+    for fixture in fixtures:
+        for first, second in ((fixture["team1"], fixture["team2"]), (fixture["team2"], fixture["team1"])):
+            for toss_winner in (first, second):
+                for toss_decision in ("bat", "field"):
+                    rows.append({"team1": first, "team2": second, "venue": fixture["venue"], "season": season,
+                                 "toss_winner": toss_winner, "toss_decision": toss_decision})
+    if not rows:
+        return np.zeros(0)
+
+    features = feature_store.features_for(rows)
+    missing = [c for c in active.feature_columns if c not in features.columns]
+    if missing:
+        raise ValueError(
+            f"Model version {active.version} expects features the feature store does not provide: {missing}"
+        )
+    team1_win = IPLMatchPredictor(active.model).predict_matches(features[active.feature_columns].values)
+    team1_win = team1_win.reshape(len(fixtures), 2, 4).mean(axis=2)
+    return (team1_win[:, 0] + 1 - team1_win[:, 1]) / 2
+
+
+def _score_tables(par: float):
+    """First-innings totals and unit exponential draws, indexed by random bits"""
+    normal = np.array([NormalDist().inv_cdf((k + 0.5) / 256) for k in range(256)])
+    first_innings = np.clip(np.rint(par + FIRST_INNINGS_SD * normal), 60, 300).astype(np.float32)
+    exponential = (-np.log1p(-(np.arange(128) + 0.5) / 128)).astype(np.float32)
+    return first_innings, exponential
+
+
+def simulate_chunk(team1: np.ndarray, team2: np.ndarray, probability: np.ndarray, base: np.ndarray,
+                   simulations: int, seed, par: float) -> Dict[str, np.ndarray]:
+    """
+    Play out the remaining fixtures ``simulations`` times.
+
+    Each simulated match uses one random 32-bit word: 16 bits for the
+    result, one for who bats first, 8 for the first-innings total and 7 for
+    the margin (run margin or balls to spare, whichever the result needs).
+
+    Args:
+        team1, team2: Team index of each side per fixture
+        probability: Team1 win probability per fixture
+        base: (teams, TABLE_COLUMNS) table so far
+        simulations: Number of seasons to simulate
+        seed: Seed or SeedSequence for this chunk
+        par: Mean first-innings total
+
+    Returns:
+        dict: finish_counts (teams x positions), points_sum and nrr_sum per team
+    """
+    rng = np.random.default_rng(seed)
+    n_teams = len(base)
+    n_fixtures = len(probability)
+    column = {name: i for i, name in enumerate(TABLE_COLUMNS)}
+    first_innings_table, exponential_table = _score_tables(par)
+
+    # One-hot fixture -> team map, team1 in the first n_teams columns and
+    # team2 in the rest, so per-team sums are matrix products
+    sides = np.zeros((n_fixtures, 2 * n_teams), dtype=np.float32)
+    sides[np.arange(n_fixtures), team1] = 1
+    sides[np.arange(n_fixtures), n_teams + team2] = 1
+
+    bits = rng.integers(0, 2 ** 32, size=(simulations, n_fixtures), dtype=np.uint32)
+    team1_wins = (bits & 0xFFFF) < np.rint(probability * 0x10000).astype(np.uint32)
+    team1_bats = ((bits >> 16) & 1).astype(np.float32)
+    first_innings = first_innings_table[(bits >> 17) & 0xFF]
+    exponential = exponential_table[bits >> 25]
+
+    # Arithmetic rather than np.where: the side batting first scores
+    # ``first_innings`` off 120 balls, the chase ``first_innings + chase_runs``
+    # off ``120 - chase_spare`` balls
+    defended = (team1_wins == (team1_bats > 0)).astype(np.float32)
+    chase_runs = 1 - defended * (1 + (MEAN_RUN_MARGIN - 1) * exponential)
+    chase_spare = (1 - defended) * MEAN_BALLS_TO_SPARE * exponential
+    team2_chase_runs = team1_bats * chase_runs
+    team2_chase_spare = team1_bats * chase_spare
+    runs1 = first_innings + chase_runs - team2_chase_runs
+    runs2 = first_innings + team2_chase_runs
+    balls1 = INNINGS_BALLS - chase_spare + team2_chase_spare
+    balls2 = INNINGS_BALLS - team2_chase_spare
+    wins1 = team1_wins.astype(np.float32)
+
+    wins, runs1, runs2, balls1, balls2 = (values @ sides for values in (wins1, runs1, runs2, balls1, balls2))
+    home, away = slice(0, n_teams), slice(n_teams, None)
+    points = base[:, column["points"]] + POINTS_FOR_WIN * (wins[:, home] + sides[:, away].sum(axis=0) - wins[:, away])
+    runs_for = base[:, column["runs_for"]] + runs1[:, home] + runs2[:, away]
+    balls_faced = base[:, column["balls_faced"]] + balls1[:, home] + balls2[:, away]
+    runs_against = base[:, column["runs_against"]] + runs2[:, home] + runs1[:, away]
+    balls_bowled = base[:, column["balls_bowled"]] + balls2[:, home] + balls1[:, away]
+    nrr = 6 * (runs_for / np.maximum(balls_faced, 1) - runs_against / np.maximum(balls_bowled, 1))
+
+    # Points, then net run rate; rates within 0.0001 of each other are
+    # separated at random. Rows of ``order`` list teams from first to last.
+    rank = points * 1e4 + np.clip(nrr, -99, 99) * 10 + rng.random((simulations, n_teams)) * 1e-3
+    order = np.argsort(-rank, axis=1)
+    finish_counts = np.stack([np.bincount(order[:, k], minlength=n_teams) for k in range(n_teams)], axis=1)
+    return {
+        "finish_counts": finish_counts.astype(np.int64),
+        "points_sum": points.sum(axis=0, dtype=np.float64),
+        "nrr_sum": nrr.sum(axis=0, dtype=np.float64),
+    }
+
+
+def _simulate_chunks(team1, team2, probability, base, sizes, seeds, par) -> Dict[str, np.ndarray]:
+    """Worker entry point: run several chunks and add up their counts"""
+    totals = None
+    for size, seed in zip(sizes, seeds):
+        chunk = simulate_chunk(team1, team2, probability, base, size, seed, par)
+        totals = chunk if totals is None else {key: totals[key] + chunk[key] for key in totals}
+    return totals
+
+
+# Spawned (not forked) so workers do not inherit the server's threads and
+# locks. This module keeps its imports to numpy so a worker starts quickly.
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_simulation_pool() -> Optional[ProcessPoolExecutor]:
+    """The shared worker pool, started on first use; None when configured for one worker."""
+    global _pool
+    if SEASON_SIMULATION_WORKERS <= 1:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=SEASON_SIMULATION_WORKERS, mp_context=get_context("spawn"))
+        return _pool
+
+
+def stop_simulation_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+class SeasonSimulator:
+    """
+    Playoff chances from a table so far and the remaining fixtures.
+
+    Args:
+        table: team -> TABLE_COLUMNS counts, as from ``season_table``
+        fixtures: Mappings with team1 and team2
+        probabilities: Team1 win probability per fixture
+        par: Mean first-innings total for simulated scores
+    """
+
+    def __init__(self, table: Dict[str, Dict[str, int]], fixtures: Sequence[Dict[str, Any]],
+                 probabilities: Sequence[float], par: float = DEFAULT_PAR):
+        teams = sorted(set(table) | {f["team1"] for f in fixtures} | {f["team2"] for f in fixtures})
+        index = {team: i for i, team in enumerate(teams)}
+        empty = dict.fromkeys(TABLE_COLUMNS, 0)
+        self.teams = teams
+        self.table = {team: dict(table.get(team, empty)) for team in teams}
+        self.base = np.array([[self.table[team][c] for c in TABLE_COLUMNS] for team in teams],
+                             dtype=np.float64).reshape(len(teams), len(TABLE_COLUMNS))
+        self.team1 = np.array([index[f["team1"]] for f in fixtures], dtype=np.int64)
+        self.team2 = np.array([index[f["team2"]] for f in fixtures], dtype=np.int64)
+        self.probabilities = np.clip(np.asarray(probabilities, dtype=np.float64), 0.0, 1.0)
+        self.par = par
+        if len(self.probabilities) != len(self.team1):
+            raise ValueError("One probability is needed per fixture")
+        if (self.team1 == self.team2).any():
+            raise ValueError("A fixture needs two different teams")
+
+    def run(self, simulations: int = SEASON_SIMULATIONS, playoff_spots: int = PLAYOFF_SPOTS,
+            seed: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Simulate the rest of the league stage.
+
+        Returns:
+            dict: Per-team qualification and finish-position probabilities, sorted by playoff chance
+        """
+        if not 1 <= simulations <= MAX_SEASON_SIMULATIONS:
+            raise ValueError(f"simulations must be between 1 and {MAX_SEASON_SIMULATIONS}")
+        if not 1 <= playoff_spots <= len(self.teams):
+            raise ValueError(f"playoff_spots must be between 1 and {len(self.teams)}")
+
+        started = datetime.utcnow()
+        sizes = [min(SEASON_SIMULATION_CHUNK, simulations - start)
+                 for start in range(0, simulations, SEASON_SIMULATION_CHUNK)]
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        args = (self.team1, self.team2, self.probabilities, self.base)
+
+        pool = get_simulation_pool() if simulations >= SEASON_SIMULATION_PARALLEL_MIN else None
+        if pool is None or len(sizes) == 1:
+            totals = _simulate_chunks(*args, sizes, seeds, self.par)
+            workers = 1
+        else:
+            workers = min(SEASON_SIMULATION_WORKERS, len(sizes))
+            futures = [pool.submit(_simulate_chunks, *args, sizes[w::workers], seeds[w::workers], self.par)
+                       for w in range(workers)]
+            results = [future.result() for future in futures]
+            totals = {key: sum(result[key] for result in results) for key in results[0]}
+
+        finish = totals["finish_counts"] / simulations
+        column = {name: i for i, name in enumerate(TABLE_COLUMNS)}
+        standings = []
+        for i, team in enumerate(self.teams):
+            current = self.table[team]
+            standings.append({
+                "team": team,
+                "played": current["played"],
+                "points": current["points"],
+                "net_run_rate": round(float(6 * (
+                    self.base[i, column["runs_for"]] / max(self.base[i, column["balls_faced"]], 1)
+                    - self.base[i, column["runs_against"]] / max(self.base[i, column["balls_bowled"]], 1)
+                )), 3),
+                "remaining": int((self.team1 == i).sum() + (self.team2 == i).sum()),
+                "expected_points": round(float(totals["points_sum"][i]) / simulations, 2),
+                "expected_net_run_rate": round(float(totals["nrr_sum"][i]) / simulations, 3),
+                "qualification_probability": round(float(finish[i, :playoff_spots].sum()), 4),
+                "top_two_probability": round(float(finish[i, :min(2, playoff_spots)].sum()), 4),
+                "finish_position_probabilities": [round(float(p), 4) for p in finish[i]],
+            })
+        standings.sort(key=lambda row: (-row["qualification_probability"], -row["expected_points"]))
+        return {
+            "simulations": simulations,
+            "playoff_spots": playoff_spots,
+            "remaining_fixtures": len(self.team1),
+            "workers": workers,
+            "elapsed_ms": round((datetime.utcnow() - started).total_seconds() * 1000, 1),
+            "standings": standings,
+        }
@@ -0,0 +1,482 @@
+"""
+Ball-by-ball win probability.
+
+The match predictor only sees pre-match features. This module models the
+in-game state after every delivery of ``innings_data``:
+
+* first innings -- score, balls left and wickets in hand against the
+  venue's par first-innings total, and
+* the chase -- runs needed, balls left and wickets in hand, plus how the
+  target compares with par,
+
+with one logistic regression per innings. The fitted coefficients (and
+feature scaling) are applied with a single matrix product, so the whole
+history is scored in one pass. ``WinProbabilityCurves`` does that whenever
+the delivery store is rebuilt and keeps every match's curve in flat arrays;
+``/api/matches/{filename}`` then only slices them.
+
+Venue par is the venue's mean first-innings total shrunk towards the
+overall mean by ``PAR_PRIOR_MATCHES`` pseudo-matches. During training each
+match is left out of its own venue's par.
+
+Train and save the model (from the backend directory):
+    python -m app.ml.win_probability
+Without a saved model, the curves are built from a model fitted at load time.
+"""
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from app.ml.model_registry import MODEL_DIR
+
+logger = logging.getLogger(__name__)
+
+WIN_PROBABILITY_MODEL_PATH = os.getenv("WIN_PROBABILITY_MODEL_PATH", os.path.join(MODEL_DIR, "win_probability.joblib"))
+
+INNINGS_BALLS = 120
+WICKETS = 10
+PAR_PRIOR_MATCHES = 5
+ILLEGAL_EXTRAS = ("wide", "noball", "no ball")
+
+FIRST_INNINGS_FEATURES = ["runs_vs_par_pace", "balls_left", "wickets_in_hand", "projected_vs_par",
+                          "resources", "venue_par"]
+CHASE_FEATURES = ["runs_needed", "balls_left", "wickets_in_hand", "required_rate", "target_vs_par",
+                  "needed_per_wicket"]
+
+
+def innings_number(innings_type: Any) -> int:
+    """1 or 2 for "1st"/"2nd innings", 0 for anything else (super overs, missing)"""
+    found = re.match(r"\s*(\d+)", str(innings_type or ""))
+    number = int(found.group(1)) if found else 0
+    return number if number in (1, 2) else 0
+
+
+def is_illegal_extra(extras_type: Any) -> bool:
+    """Wides and no-balls do not use up one of the innings' balls"""
+    text = str(extras_type or "").lower()
+    return any(kind in text for kind in ILLEGAL_EXTRAS)
+
+
+def running_totals(group: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Cumulative sum of ``values`` restarting wherever ``group`` changes (groups must be contiguous)"""
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.int64)
+    starts = np.ones(len(group), dtype=bool)
+    starts[1:] = group[1:] != group[:-1]
+    segment = np.cumsum(starts) - 1
+    totals = np.cumsum(values, dtype=np.int64)
+    before = (totals - values)[np.flatnonzero(starts)]
+    return totals - before[segment]
+
+
+def innings_states(match: np.ndarray, innings: np.ndarray, runs: np.ndarray, wicket: np.ndarray,
+                   legal: np.ndarray, first_innings_total: np.ndarray, venue_par: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    State after every delivery, in the same row order.
+
+    Args:
+        match: Match key per delivery; a match's deliveries are contiguous and in order
+        innings: 1 or 2 per delivery
+        runs, wicket, legal: Runs off the ball, whether a wicket fell, whether it was a legal ball
+        first_innings_total: The match's first-innings total per delivery
+        venue_par: The venue's par first-innings total per delivery
+
+    Returns:
+        dict: innings, score, wickets, balls_bowled, balls_left, wickets_in_hand, target, runs_needed, venue_par
+    """
+    group = match.astype(np.int64) * 4 + innings
+    score = running_totals(group, runs.astype(np.int64))
+    wickets = running_totals(group, wicket.astype(np.int64))
+    balls = running_totals(group, legal.astype(np.int64))
+    target = first_innings_total + 1
+    return {
+        "innings": innings,
+        "score": score,
+        "wickets": wickets,
+        "balls_bowled": balls,
+        "balls_left": np.clip(INNINGS_BALLS - balls, 0, INNINGS_BALLS),
+        "wickets_in_hand": np.clip(WICKETS - wickets, 0, WICKETS),
+        "target": target,
+        "runs_needed": target - score,
+        "venue_par": venue_par.astype(np.float64),
+    }
+
+
+def first_innings_features(states: Dict[str, np.ndarray]) -> np.ndarray:
+    balls = states["balls_bowled"].astype(np.float64)
+    score = states["score"].astype(np.float64)
+    par = states["venue_par"]
+    balls_left = states["balls_left"].astype(np.float64)
+    wickets_in_hand = states["wickets_in_hand"].astype(np.float64)
+    run_rate = np.where(balls > 0, score / np.maximum(balls, 1), par / INNINGS_BALLS)
+    return np.column_stack([
+        score - par * balls / INNINGS_BALLS,
+        balls_left,
+        wickets_in_hand,
+        score + run_rate * balls_left - par,
+        wickets_in_hand * balls_left / INNINGS_BALLS,
+        par,
+    ])
+
+
+def chase_features(states: Dict[str, np.ndarray]) -> np.ndarray:
+    needed = np.maximum(states["runs_needed"], 0).astype(np.float64)
+    balls_left = states["balls_left"].astype(np.float64)
+    wickets_in_hand = states["wickets_in_hand"].astype(np.float64)
+    return np.column_stack([
+        needed,
+        balls_left,
+        wickets_in_hand,
+        np.minimum(needed * 6 / np.maximum(balls_left, 1), 36.0),
+        states["target"] - states["venue_par"],
+        needed / np.maximum(wickets_in_hand, 1),
+    ])
+
+
+class WinProbabilityModel:
+    """
+    Two logistic regressions stored as plain coefficients.
+
+    ``score`` returns the probability that the team batting first wins.
+    """
+
+    def __init__(self, first_innings: Dict[str, np.ndarray], chase: Dict[str, np.ndarray],
+                 venue_pars: Dict[str, float], global_par: float, trained_on: int):
+        self.first_innings = first_innings
+        self.chase = chase
+        self.venue_pars = venue_pars
+        self.global_par = global_par
+        self.trained_on = trained_on
+        self.trained_at = datetime.utcnow()
+
+    @staticmethod
+    def _fit_one(features: np.ndarray, labels: np.ndarray) -> Dict[str, np.ndarray]:
+        from sklearn.linear_model import LogisticRegression
+
+        mean = features.mean(axis=0)
+        scale = features.std(axis=0)
+        scale[scale == 0] = 1.0
+        model = LogisticRegression(max_iter=1000, C=1.0)
+        model.fit((features - mean) / scale, labels)
+        return {"mean": mean, "scale": scale, "coef": model.coef_[0], "intercept": float(model.intercept_[0])}
+
+    @classmethod
+    def fit(cls, states: Dict[str, np.ndarray], batting_first_won: np.ndarray,
+            venue_pars: Dict[str, float], global_par: float, n_matches: int) -> "WinProbabilityModel":
+        """
+        Fit both innings models.
+
+        Args:
+            states: ``innings_states`` of decided matches
+            batting_first_won: Label per delivery
+        """
+        first = states["innings"] == 1
+        second = states["innings"] == 2
+        first_model = cls._fit_one(first_innings_features(_subset(states, first)), batting_first_won[first])
+        # The chase model predicts the chasing side, so its label is flipped
+        chase_model = cls._fit_one(chase_features(_subset(states, second)), ~batting_first_won[second])
+        return cls(first_model, chase_model, venue_pars, global_par, n_matches)
+
+    @staticmethod
+    def _apply(params: Dict[str, np.ndarray], features: np.ndarray) -> np.ndarray:
+        logits = ((features - params["mean"]) / params["scale"]) @ params["coef"] + params["intercept"]
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    def venue_par(self, venue: Optional[str]) -> float:
+        return self.venue_pars.get(venue, self.global_par)
+
+    def score(self, states: Dict[str, np.ndarray]) -> np.ndarray:
+        """Probability that the side batting first wins, after each delivery"""
+        innings = states["innings"]
+        probability = np.full(len(innings), np.nan)
+        first = innings == 1
+        second = innings == 2
+        if first.any():
+            probability[first] = self._apply(self.first_innings, first_innings_features(_subset(states, first)))
+        if second.any():
+            chase = _subset(states, second)
+            chasing_wins = self._apply(self.chase, chase_features(chase))
+            # Settled states: target reached, or out of balls or wickets (level scores is a tie)
+            needed = chase["runs_needed"]
+            over = (chase["balls_left"] == 0) | (chase["wickets_in_hand"] == 0)
+            chasing_wins = np.where(needed <= 0, 1.0, chasing_wins)
+            chasing_wins = np.where(over & (needed == 1), 0.5, chasing_wins)
+            chasing_wins = np.where(over & (needed > 1), 0.0, chasing_wins)
+            probability[second] = 1.0 - chasing_wins
+        return probability
+
+    def pre_match(self, venue: Optional[str]) -> float:
+        """Probability for the side batting first before a ball is bowled"""
+        zero = np.zeros(1, dtype=np.int64)
+        states = innings_states(zero, np.ones(1, dtype=np.int64), zero, zero, zero, zero,
+                                np.array([self.venue_par(venue)]))
+        states.update(score=zero, wickets=zero, balls_bowled=zero, balls_left=zero + INNINGS_BALLS,
+                      wickets_in_hand=zero + WICKETS)
+        return float(self.score(states)[0])
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "trained_on_matches": self.trained_on,
+            "trained_at": self.trained_at.isoformat(),
+            "global_par": round(self.global_par, 1),
+            "venues": len(self.venue_pars),
+            "first_innings_features": FIRST_INNINGS_FEATURES,
+            "chase_features": CHASE_FEATURES,
+        }
+
+    def save(self, path: str = WIN_PROBABILITY_MODEL_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path: str = WIN_PROBABILITY_MODEL_PATH) -> "WinProbabilityModel":
+        return joblib.load(path)
+
+
+def _subset(states: Dict[str, np.ndarray], mask: np.ndarray) -> Dict[str, np.ndarray]:
+    return {key: values[mask] for key, values in states.items()}
+
+
+class WinProbabilityCurves:
+    """
+    Win-probability curve of every match in the delivery store, scored in one pass.
+
+    Deliveries are held in (match, innings, ball) order with per-match
+    offsets, so a curve is one slice.
+    """
+
+    def __init__(self, store, model: Optional[WinProbabilityModel] = None):
+        d = store.deliveries
+        extras = store.dictionaries["extras_type"].values
+        innings_types = store.dictionaries["innings_type"].values
+        wicket_values = store.dictionaries["wicket_details"].values
+
+        innings_lookup = np.array([innings_number(value) for value in innings_types] + [0], dtype=np.int64)
+        illegal_lookup = np.array([is_illegal_extra(value) for value in extras] + [False])
+        wicket_lookup = np.array([bool(str(value).strip()) for value in wicket_values] + [False])
+
+        innings = innings_lookup[d["innings_type"]]  # -1 codes index the trailing entry
+        keep = np.flatnonzero((innings > 0) & (d["match_idx"] >= 0))
+        # Stable: keeps the stored ball order inside each innings
+        order = keep[np.lexsort((innings[keep], d["match_idx"][keep]))]
+
+        match = d["match_idx"][order].astype(np.int64)
+        innings = innings[order]
+        runs = d["runs_total"][order].astype(np.int64)
+        wicket = wicket_lookup[d["wicket_details"][order]]
+        legal = ~illegal_lookup[d["extras_type"][order]]
+        batting_team = d["team"][order]
+
+        # First-innings total and batting-first side of every match
+        n_matches = store.n_matches
+        first = innings == 1
+        first_totals = np.bincount(match[first], weights=runs[first], minlength=n_matches).astype(np.int64)
+        has_first = np.bincount(match[first], minlength=n_matches) > 0
+        batting_first = np.full(n_matches, -1, dtype=np.int64)
+        batting_first[match[first][::-1]] = batting_team[first][::-1]
+
+        # Venue par from completed first innings, shrunk towards the global mean
+        venue = store.matches["venue"].astype(np.int64)
+        n_venues = len(store.dictionaries["venue"])
+        counted = has_first & (venue >= 0)
+        global_par = float(first_totals[has_first].mean()) if has_first.any() else 160.0
+        venue_sums = np.bincount(venue[counted], weights=first_totals[counted], minlength=n_venues)
+        venue_counts = np.bincount(venue[counted], minlength=n_venues)
+        venue_pars = (venue_sums + PAR_PRIOR_MATCHES * global_par) / (venue_counts + PAR_PRIOR_MATCHES)
+
+        winner = store.matches["winner"]
+        decided = (winner >= 0) & (batting_first >= 0)
+        if model is None:
+            # Leave each match out of its own venue's par so the label does not leak
+            own = np.where(counted, first_totals, 0)
+            loo_counts = venue_counts[np.maximum(venue, 0)] - counted
+            loo_pars = np.where(
+                venue >= 0,
+                (venue_sums[np.maximum(venue, 0)] - own + PAR_PRIOR_MATCHES * global_par)
+                / (loo_counts + PAR_PRIOR_MATCHES),
+                global_par,
+            )
+            train = decided[match]
+            states = innings_states(match[train], innings[train], runs[train], wicket[train], legal[train],
+                                    first_totals[match[train]], loo_pars[match[train]])
+            labels = (winner == batting_first)[match[train]]
+            names = store.dictionaries["venue"].values
+            model = WinProbabilityModel.fit(
+                states, labels, {names[v]: float(venue_pars[v]) for v in range(n_venues) if venue_counts[v]},
+                global_par, int(decided.sum()),
+            )
+
+        # Score with the model's own pars so a saved model and the curves agree
+        venue_names = store.dictionaries["venue"].decode(venue)
+        match_pars = np.array([model.venue_par(name) for name in venue_names], dtype=np.float64)
+        states = innings_states(match, innings, runs, wicket, legal, first_totals[match], match_pars[match])
+
+        self.model = model
+        self.store = store
+        self.match = match
+        self.innings = innings
+        self.over_ball = d["over_ball"][order]
+        self.score = states["score"]
+        self.wickets = states["wickets"]
+        self.probability = model.score(states)
+        self.first_totals = first_totals
+        self.has_first = has_first
+        self.batting_first = batting_first
+        self.match_pars = match_pars
+        self.starts = np.searchsorted(match, np.arange(n_matches), side="left")
+        self.ends = np.searchsorted(match, np.arange(n_matches), side="right")
+        self._match_rows = {code: row for row, code in enumerate(store.matches["filename"].tolist())}
+        self.n_matches = n_matches
+        self.n_deliveries = len(match)
+        self.built_at = datetime.utcnow()
+
+    def curve(self, filename: str) -> Optional[Dict[str, Any]]:
+        """The match's curve, or None for a match without deliveries"""
+        row = self._match_rows.get(self.store.dictionaries["filename"].code(filename))
+        if row is None or self.ends[row] == self.starts[row]:
+            return None
+        teams = self.store.dictionaries["team"]
+        team1, team2 = teams.decode(np.array([self.store.matches["team1"][row], self.store.matches["team2"][row]]))
+        batting_first = teams.decode(np.array([self.batting_first[row]]))[0]
+        chasing = team2 if batting_first == team1 else team1
+        venue = self.store.dictionaries["venue"].decode(self.store.matches["venue"][row:row + 1])[0]
+        rows = slice(self.starts[row], self.ends[row])
+        return build_curve(
+            self.model, batting_first, chasing, venue, self.match_pars[row],
+            int(self.first_totals[row]) + 1 if self.has_first[row] else None,
+            self.innings[rows], self.over_ball[rows], self.score[rows], self.wickets[rows], self.probability[rows],
+        )
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "matches": self.n_matches,
+            "deliveries": self.n_deliveries,
+            "model": self.model.describe(),
+            "built_at": self.built_at.isoformat(),
+        }
+
+
+def build_curve(model: WinProbabilityModel, batting_first: Optional[str], chasing: Optional[str],
+                venue: Optional[str], venue_par: float, target: Optional[int], innings: np.ndarray,
+                over_ball: np.ndarray, score: np.ndarray, wickets: np.ndarray,
+                probability: np.ndarray) -> Dict[str, Any]:
+    """Response body for one match's curve, starting from the pre-match probability"""
+    points = [{"innings": 1, "over_ball": 0.0, "score": 0, "wickets": 0,
+               "batting_first_win_probability": round(model.pre_match(venue), 4)}]
+    points.extend(
+        {"innings": i, "over_ball": round(o, 1), "score": s, "wickets": w, "batting_first_win_probability": round(p, 4)}
+        for i, o, s, w, p in zip(innings.tolist(), over_ball.tolist(), score.tolist(), wickets.tolist(),
+                                 probability.tolist())
+    )
+    return {
+        "batting_first": batting_first,
+        "chasing": chasing,
+        "target": target,
+        "venue_par": round(float(venue_par), 1),
+        "curve": points,
+    }
+
+
+def curve_from_rows(model: WinProbabilityModel, match_info: Dict[str, Any],
+                    deliveries: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Score one match from its ``innings_data`` rows, for when the delivery store is not loaded"""
+    frame = pd.DataFrame(deliveries)
+    if frame.empty:
+        return None
+    frame["innings"] = frame["innings_type"].map(innings_number)
+    frame = frame[frame["innings"] > 0].sort_values("innings", kind="stable")
+    if frame.empty:
+        return None
+
+    innings = frame["innings"].to_numpy(dtype=np.int64)
+    runs = pd.to_numeric(frame["runs_total"], errors="coerce").fillna(0).to_numpy(dtype=np.int64)
+    wicket = frame["wicket_details"].fillna("").astype(str).str.strip().ne("").to_numpy()
+    legal = ~frame["extras_type"].map(is_illegal_extra).to_numpy(dtype=bool)
+    first_total = int(runs[innings == 1].sum())
+    venue = match_info.get("venue")
+    par = model.venue_par(venue)
+
+    zeros = np.zeros(len(frame), dtype=np.int64)
+    states = innings_states(zeros, innings, runs, wicket, legal, zeros + first_total, np.full(len(frame), par))
+    batting_first = frame.loc[frame["innings"] == 1, "team"].iloc[0] if (innings == 1).any() else None
+    team1, team2 = match_info.get("team1"), match_info.get("team2")
+    chasing = team2 if batting_first == team1 else team1
+    return build_curve(
+        model, batting_first, chasing, venue, par, first_total + 1 if (innings == 1).any() else None,
+        innings, pd.to_numeric(frame["over_ball"], errors="coerce").fillna(0).to_numpy(),
+        states["score"], states["wickets"], model.score(states),
+    )
+
+
+# Process-wide instances, swapped atomically on reload
+_curves: Optional[WinProbabilityCurves] = None
+_model: Optional[WinProbabilityModel] = None
+_curves_lock = threading.Lock()
+
+
+def get_win_probability_curves() -> Optional[WinProbabilityCurves]:
+    """Return the precomputed curves, or None if they have not been built."""
+    return _curves
+
+
+def get_win_probability_model() -> Optional[WinProbabilityModel]:
+    """Return the model behind the curves (or the saved one), or None."""
+    global _model
+    if _model is None and os.path.exists(WIN_PROBABILITY_MODEL_PATH):
+        try:
+            _model = WinProbabilityModel.load(WIN_PROBABILITY_MODEL_PATH)
+        except Exception as e:
+            logger.error(f"Error loading win probability model: {str(e)}")
+    return _model
+
+
+def load_win_probability_curves(model_path: str = WIN_PROBABILITY_MODEL_PATH) -> Optional[WinProbabilityCurves]:
+    """
+    (Re)score every match in the delivery store.
+
+    Uses the model saved at ``model_path`` when there is one, otherwise fits
+    a model on the store. Failures are logged rather than raised.
+
+    Returns:
+        WinProbabilityCurves or None
+    """
+    global _curves, _model
+    from app.services.delivery_store import get_delivery_store
+
+    with _curves_lock:
+        try:
+            store = get_delivery_store()
+            if store is None:
+                logger.warning("Delivery store not loaded; win probability curves not built")
+                return _curves
+            model = WinProbabilityModel.load(model_path) if os.path.exists(model_path) else None
+            curves = WinProbabilityCurves(store, model)
+        except Exception as e:
+            logger.error(f"Error building win probability curves: {str(e)}")
+            return _curves
+        _curves, _model = curves, curves.model
+    logger.info(f"Scored win probability for {curves.n_deliveries} deliveries of {curves.n_matches} matches")
+    return curves
+
+
+def train_win_probability_model(engine=None, model_path: str = WIN_PROBABILITY_MODEL_PATH) -> WinProbabilityModel:
+    """Fit the model on every decided match in the database and save it to ``model_path``"""
+    from app.services.delivery_store import DeliveryStore
+
+    if engine is None:
+        from app.database import engine
+    curves = WinProbabilityCurves(DeliveryStore.from_database(engine))
+    curves.model.save(model_path)
+    print(f"Trained on {curves.model.trained_on} matches; saved to {model_path}")
+    return curves.model
+
+
+if __name__ == "__main__":
+    train_win_probability_model()
@@ -115,4 +115,17 @@ class PlayerPerformanceResponse(BaseModel):
     against_teams: Optional[List[TeamwisePerformance]] = None
     by_season: Optional[List[SeasonalPerformance]] = None
     by_venue: Optional[List[VenuePerformance]] = None
-    by_match_situation: Optional[List[MatchSituationPerformance]] = None
\ No newline at end of file
+    by_match_situation: Optional[List[MatchSituationPerformance]] = None
+
+class PlayerProfileResponse(BaseModel):
+    player_name: str
+    sections: List[str]
+    player_info: Optional[PlayerBasicInfo] = None
+    batting_summary: Optional[BattingPerformanceSummary] = None
+    bowling_summary: Optional[BowlingPerformanceSummary] = None
+    highest_scores: Optional[List[InningsHighlight]] = None
+    best_bowling: Optional[List[BowlingHighlight]] = None
+    against_teams: Optional[List[TeamwisePerformance]] = None
+    by_season: Optional[List[SeasonalPerformance]] = None
+    by_venue: Optional[List[VenuePerformance]] = None
+    by_match_situation: Optional[List[MatchSituationPerformance]] = None
@@ -40,6 +40,7 @@ class WinningStreak(BaseModel):
     team: str
     current_streak: StreakInfo
     longest_winning_streak: int
+    longest_losing_streak: int = 0
 
 class RecentPerformance(BaseModel):
     team: str
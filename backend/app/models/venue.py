@@ -58,6 +58,7 @@ class VenuePitchCharacteristics(BaseModel):
     avg_first_innings_score: float
     avg_second_innings_score: float
     historic_pitch_behavior: str  # Description
+    phase_run_rates: Dict[str, float] = {}  # powerplay, middle, death
 
 
 class VenueMatchList(BaseModel):
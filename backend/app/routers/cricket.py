@@ -1,9 +1,10 @@
 from fastapi import APIRouter, HTTPException, Depends, Query, Path
 from fastapi.responses import JSONResponse
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, Dict, Any, Union
-from app.main import get_db_connection
+from app.database import get_async_db
+from app.utils.db_utils import AsyncDictCursor
+from app.services.player_index import resolve_player_name, search_player_names
 import logging
 
 # Configure logging
@@ -29,11 +30,11 @@ router = APIRouter()
            """)
 async def get_match_statistics(
     season: Optional[str] = Query(None, description="Filter by season (e.g., '2023', '2007/08')"),
-    include_totals: bool = Query(True, description="Include aggregated totals in response")
+    include_totals: bool = Query(True, description="Include aggregated totals in response"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = AsyncDictCursor(db)
         
         # Base query
         query = """
@@ -62,7 +63,7 @@ async def get_match_statistics(
         # Group by season
         query += " GROUP BY s.season_name, s.season_year ORDER BY s.season_year DESC"
         
-        cursor.execute(query, params)
+        await cursor.execute(query, params)
         results = cursor.fetchall()
         
         # Process results
@@ -107,7 +108,6 @@ async def get_match_statistics(
             stats_by_season.append(totals)
         
         cursor.close()
-        conn.close()
         
         return {
             "match_statistics": stats_by_season,
@@ -138,11 +138,11 @@ async def get_match_statistics(
 async def get_toss_analysis(
     season: Optional[str] = Query(None, description="Filter by season (e.g., '2023', '2007/08')"),
     team: Optional[str] = Query(None, description="Filter by team name (exact match)"),
-    include_totals: bool = Query(True, description="Include aggregated totals in response")
+    include_totals: bool = Query(True, description="Include aggregated totals in response"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = AsyncDictCursor(db)
         
         # Base query
         query = """
@@ -179,7 +179,7 @@ async def get_toss_analysis(
         # Group by team and season
         query += " GROUP BY s.season_name, s.season_year, t.team_name ORDER BY s.season_year DESC, t.team_name"
         
-        cursor.execute(query, params)
+        await cursor.execute(query, params)
         results = cursor.fetchall()
         
         toss_analysis = []
@@ -258,7 +258,6 @@ async def get_toss_analysis(
             toss_analysis.append(totals)
         
         cursor.close()
-        conn.close()
         
         return {
             "toss_analysis": toss_analysis,
@@ -292,11 +291,11 @@ async def get_toss_analysis(
 async def get_team_stats(
     team_name: Optional[str] = Query(None, description="Filter by team name (exact match)"),
     season: Optional[str] = Query(None, description="Filter by season (e.g., '2023', '2007/08')"),
-    include_totals: bool = Query(True, description="Include aggregated totals in response")
+    include_totals: bool = Query(True, description="Include aggregated totals in response"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = AsyncDictCursor(db)
         
         # Base query
         query = """
@@ -338,7 +337,7 @@ async def get_team_stats(
         # Order by
         query += " ORDER BY s.season_year DESC, t.team_name"
         
-        cursor.execute(query, params)
+        await cursor.execute(query, params)
         results = cursor.fetchall()
         
         team_stats = []
@@ -422,7 +421,6 @@ async def get_team_stats(
                 team_stats.append(team_totals)
         
         cursor.close()
-        conn.close()
         
         return {
             "team_statistics": team_stats,
@@ -456,11 +454,11 @@ async def get_team_stats(
 async def get_venue_stats(
     venue_name: Optional[str] = Query(None, description="Filter by venue name (exact match)"),
     season: Optional[str] = Query(None, description="Filter by season (e.g., '2023', '2007/08')"),
-    include_totals: bool = Query(True, description="Include aggregated totals in response")
+    include_totals: bool = Query(True, description="Include aggregated totals in response"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = AsyncDictCursor(db)
         
         # Base query for venues
         query = """
@@ -500,7 +498,7 @@ async def get_venue_stats(
         # Group by venue and season
         query += " GROUP BY v.venue_name, v.city, s.season_name, s.season_year ORDER BY v.venue_name, s.season_year DESC"
         
-        cursor.execute(query, params)
+        await cursor.execute(query, params)
         results = cursor.fetchall()
         
         venue_stats = []
@@ -562,7 +560,6 @@ async def get_venue_stats(
                 venue_stats.append(venue_totals)
         
         cursor.close()
-        conn.close()
         
         return {
             "venue_statistics": venue_stats,
@@ -600,20 +597,20 @@ async def get_head_to_head(
     team1: str = Path(..., description="First team name"),
     team2: str = Path(..., description="Second team name"),
     season: Optional[str] = Query(None, description="Filter by season (e.g., '2023', '2007/08')"),
-    include_totals: bool = Query(True, description="Include aggregated totals in response")
+    include_totals: bool = Query(True, description="Include aggregated totals in response"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = AsyncDictCursor(db)
         
         # Get team IDs
-        cursor.execute("SELECT team_id FROM teams WHERE team_name = %s", (team1,))
+        await cursor.execute("SELECT team_id FROM teams WHERE team_name = %s", (team1,))
         team1_result = cursor.fetchone()
         
         if not team1_result:
             raise HTTPException(status_code=404, detail=f"Team '{team1}' not found")
         
-        cursor.execute("SELECT team_id FROM teams WHERE team_name = %s", (team2,))
+        await cursor.execute("SELECT team_id FROM teams WHERE team_name = %s", (team2,))
         team2_result = cursor.fetchone()
         
         if not team2_result:
@@ -662,7 +659,7 @@ async def get_head_to_head(
         # Order by season
         query += " ORDER BY s.season_year DESC"
         
-        cursor.execute(query, params)
+        await cursor.execute(query, params)
         results = cursor.fetchall()
         
         h2h_stats = []
@@ -710,7 +707,6 @@ async def get_head_to_head(
             h2h_stats.append(total_stats)
         
         cursor.close()
-        conn.close()
         
         return {
             "head_to_head_statistics": h2h_stats,
@@ -746,19 +742,22 @@ async def get_head_to_head(
 async def get_player_stats(
     player_name: str = Path(..., description="Name of the player"),
     season: Optional[str] = Query(None, description="Filter by season (e.g., '2023', '2007/08')"),
-    include_totals: bool = Query(True, description="Include career totals in response")
+    include_totals: bool = Query(True, description="Include career totals in response"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = AsyncDictCursor(db)
+        
+        # Map partial or misspelt names to the canonical one with the in-memory index
+        player_name = resolve_player_name(player_name)
         
         # Check if player exists
-        cursor.execute("SELECT player_id,player_name FROM players WHERE player_name = %s", (player_name,))
+        await cursor.execute("SELECT player_id,player_name FROM players WHERE player_name = %s", (player_name,))
         player_result = cursor.fetchone()
         
         if not player_result:
             # If exact match not found, try partial match
-            cursor.execute("SELECT player_id, player_name FROM players WHERE player_name ILIKE %s LIMIT 1", (f"%{player_name}%",))
+            await cursor.execute("SELECT player_id, player_name FROM players WHERE player_name ILIKE %s LIMIT 1", (f"%{player_name}%",))
             player_result = cursor.fetchone()
             
             if not player_result:
@@ -855,10 +854,10 @@ async def get_player_stats(
         bowling_query += " GROUP BY p.player_name, t.team_name, s.season_name, s.season_year ORDER BY s.season_year DESC, t.team_name"
         
         # Execute queries
-        cursor.execute(batting_query, params)
+        await cursor.execute(batting_query, params)
         batting_results = cursor.fetchall()
         
-        cursor.execute(bowling_query, params_bowling)
+        await cursor.execute(bowling_query, params_bowling)
         bowling_results = cursor.fetchall()
         
         # Process batting statistics
@@ -984,7 +983,6 @@ async def get_player_stats(
                 bowling_stats.append(bowling_totals)
         
         cursor.close()
-        conn.close()
         
         return {
             "player_name": player_name,
@@ -1007,15 +1005,14 @@ async def get_player_stats(
 @router.get("/teams", response_model=Dict[str, Any],
           summary="Get list of all teams",
           description="Returns a list of all teams in the IPL from 2008 to present.")
-async def get_teams():
+async def get_teams(db: AsyncSession = Depends(get_async_db)):
     """
     Get list of all teams
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = AsyncDictCursor(db)
         
-        cursor.execute("""
+        await cursor.execute("""
         SELECT t.team_id, t.team_name, t.team_short_name, 
                COUNT(DISTINCT m.match_id) as matches_played,
                COUNT(DISTINCT s.season_id) as seasons_played,
@@ -1032,7 +1029,6 @@ async def get_teams():
         teams = [dict(row) for row in results]
         
         cursor.close()
-        conn.close()
         
         return {
             "teams": teams,
@@ -1050,15 +1046,14 @@ async def get_teams():
 @router.get("/seasons", response_model=Dict[str, Any],
           summary="Get list of all seasons",
           description="Returns a list of all IPL seasons from 2008 to present with basic stats.")
-async def get_seasons():
+async def get_seasons(db: AsyncSession = Depends(get_async_db)):
     """
     Get list of all seasons
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = AsyncDictCursor(db)
         
-        cursor.execute("""
+        await cursor.execute("""
         SELECT s.season_id, s.season_name, s.season_year, 
                COUNT(DISTINCT m.match_id) as matches_played,
                COUNT(DISTINCT m.venue_id) as venues_used,
@@ -1074,7 +1069,6 @@ async def get_seasons():
         seasons = [dict(row) for row in results]
         
         cursor.close()
-        conn.close()
         
         return {
             "seasons": seasons,
@@ -1092,15 +1086,14 @@ async def get_seasons():
 @router.get("/venues", response_model=Dict[str, Any],
           summary="Get list of all venues",
           description="Returns a list of all venues used in the IPL from 2008 to present with basic stats.")
-async def get_venues():
+async def get_venues(db: AsyncSession = Depends(get_async_db)):
     """
     Get list of all venues
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = AsyncDictCursor(db)
         
-        cursor.execute("""
+        await cursor.execute("""
         SELECT v.venue_id, v.venue_name, v.city, 
                COUNT(DISTINCT m.match_id) as matches_hosted,
                COUNT(DISTINCT s.season_id) as seasons_used,
@@ -1117,7 +1110,6 @@ async def get_venues():
         venues = [dict(row) for row in results]
         
         cursor.close()
-        conn.close()
         
         return {
             "venues": venues,
@@ -1145,17 +1137,25 @@ async def get_venues():
            """)
 async def search_players(
     query: str = Query(..., min_length=2, description="Search string (partial player name)"),
-    limit: int = Query(10, ge=1, le=50, description="Maximum number of results to return")
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of results to return"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Search for players by name
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = AsyncDictCursor(db)
+        
+        # Candidate names come from the in-memory index (best match first) so the
+        # aggregate below only touches those players; ILIKE is the fallback
+        matches = search_player_names(query, limit)
+        if matches is not None:
+            names = [match.player_name for match in matches]
+            name_filter, name_param = "p.player_name = ANY(%s)", names
+        else:
+            name_filter, name_param = "p.player_name ILIKE %s", f"%{query}%"
         
-        search_query = f"%{query}%"
-        cursor.execute("""
+        await cursor.execute(f"""
         SELECT 
             p.player_id, 
             p.player_name,
@@ -1168,20 +1168,22 @@ async def search_players(
             LEFT JOIN innings i ON d.inning_id = i.inning_id
             LEFT JOIN matches m ON i.match_id = m.match_id
         WHERE 
-            p.player_name ILIKE %s
+            {name_filter}
         GROUP BY 
             p.player_id, p.player_name
         ORDER BY 
             matches_played DESC, p.player_name
         LIMIT %s
-        """, (search_query, limit))
+        """, (name_param, limit))
         
         results = cursor.fetchall()
         
         players = [dict(row) for row in results]
+        if matches is not None:
+            rank = {name: position for position, name in enumerate(names)}
+            players.sort(key=lambda player: rank.get(player["player_name"], len(rank)))
         
         cursor.close()
-        conn.close()
         
         return {
             "players": players,
@@ -1208,14 +1210,14 @@ async def search_players(
          Returns full match details including scorecard and player performances.
          """)
 async def get_match_details(
-    match_id: int = Path(..., description="ID of the match to retrieve")
+    match_id: int = Path(..., description="ID of the match to retrieve"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = AsyncDictCursor(db)
         
         # Get basic match info
-        cursor.execute("""
+        await cursor.execute("""
         SELECT 
             m.match_id, m.match_date, s.season_name, v.venue_name, v.city,
             t1.team_name as team1_name, t2.team_name as team2_name,
@@ -1243,7 +1245,7 @@ async def get_match_details(
         match_info = dict(match_info)
         
         # Get innings data
-        cursor.execute("""
+        await cursor.execute("""
         SELECT 
             i.inning_id, i.inning_number, 
             t1.team_name as batting_team, t2.team_name as bowling_team,
@@ -1268,7 +1270,7 @@ async def get_match_details(
             inning_id = inning['inning_id']
             
             # Batting performances
-            cursor.execute("""
+            await cursor.execute("""
             WITH player_balls AS (
                 SELECT 
                     d.batsman_id,
@@ -1320,7 +1322,7 @@ async def get_match_details(
             batting_performances.extend(inning_batting)
             
             # Bowling performances
-            cursor.execute("""
+            await cursor.execute("""
             WITH bowler_stats AS (
                 SELECT 
                     d.bowler_id,
@@ -1364,7 +1366,6 @@ async def get_match_details(
             bowling_performances.extend(inning_bowling)
         
         cursor.close()
-        conn.close()
         
         return {
             "match_info": match_info,
@@ -1398,19 +1399,22 @@ async def get_match_details(
 async def get_player_stats(
     player_name: str = Path(..., description="Name of the player"),
     season: Optional[str] = Query(None, description="Filter by season (e.g., '2023', '2007/08')"),
-    include_totals: bool = Query(True, description="Include career totals in response")
+    include_totals: bool = Query(True, description="Include career totals in response"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = AsyncDictCursor(db)
+        
+        # Map partial or misspelt names to the canonical one with the in-memory index
+        player_name = resolve_player_name(player_name)
         
         # Check if player exists
-        cursor.execute("SELECT player_id FROM players WHERE player_name = %s", (player_name,))
+        await cursor.execute("SELECT player_id FROM players WHERE player_name = %s", (player_name,))
         player_result = cursor.fetchone()
         
         if not player_result:
             # If exact match not found, try partial match
-            cursor.execute("SELECT player_id, player_name FROM players WHERE player_name ILIKE %s LIMIT 1", (f"%{player_name}%",))
+            await cursor.execute("SELECT player_id, player_name FROM players WHERE player_name ILIKE %s LIMIT 1", (f"%{player_name}%",))
             player_result = cursor.fetchone()
             
             if not player_result:
@@ -1507,10 +1511,10 @@ async def get_player_stats(
         bowling_query += " GROUP BY p.player_name, t.team_name, s.season_name, s.season_year ORDER BY s.season_year DESC, t.team_name"
         
         # Execute queries
-        cursor.execute(batting_query, params)
+        await cursor.execute(batting_query, params)
         batting_results = cursor.fetchall()
         
-        cursor.execute(bowling_query, params_bowling)
+        await cursor.execute(bowling_query, params_bowling)
         bowling_results = cursor.fetchall()
         
         # Process batting statistics
@@ -1636,7 +1640,6 @@ async def get_player_stats(
                 bowling_stats.append(bowling_totals)
         
         cursor.close()
-        conn.close()
         
         return {
             "player_name": player_name,
@@ -1659,15 +1662,14 @@ async def get_player_stats(
 @router.get("/teams", response_model=Dict[str, Any],
           summary="Get list of all teams",
           description="Returns a list of all teams in the IPL from 2008 to present.")
-async def get_teams():
+async def get_teams(db: AsyncSession = Depends(get_async_db)):
     """
     Get list of all teams
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = AsyncDictCursor(db)
         
-        cursor.execute("""
+        await cursor.execute("""
         SELECT t.team_id, t.team_name, t.team_short_name, 
                COUNT(DISTINCT m.match_id) as matches_played,
                COUNT(DISTINCT s.season_id) as seasons_played,
@@ -1684,7 +1686,6 @@ async def get_teams():
         teams = [dict(row) for row in results]
         
         cursor.close()
-        conn.close()
         
         return {
             "teams": teams,
@@ -1702,15 +1703,14 @@ async def get_teams():
 @router.get("/seasons", response_model=Dict[str, Any],
           summary="Get list of all seasons",
           description="Returns a list of all IPL seasons from 2008 to present with basic stats.")
-async def get_seasons():
+async def get_seasons(db: AsyncSession = Depends(get_async_db)):
     """
     Get list of all seasons
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = AsyncDictCursor(db)
         
-        cursor.execute("""
+        await cursor.execute("""
         SELECT s.season_id, s.season_name, s.season_year, 
                COUNT(DISTINCT m.match_id) as matches_played,
                COUNT(DISTINCT m.venue_id) as venues_used,
@@ -1726,7 +1726,6 @@ async def get_seasons():
         seasons = [dict(row) for row in results]
         
         cursor.close()
-        conn.close()
         
         return {
             "seasons": seasons,
@@ -1744,15 +1743,14 @@ async def get_seasons():
 @router.get("/venues", response_model=Dict[str, Any],
           summary="Get list of all venues",
           description="Returns a list of all venues used in the IPL from 2008 to present with basic stats.")
-async def get_venues():
+async def get_venues(db: AsyncSession = Depends(get_async_db)):
     """
     Get list of all venues
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = AsyncDictCursor(db)
         
-        cursor.execute("""
+        await cursor.execute("""
         SELECT v.venue_id, v.venue_name, v.city, 
                COUNT(DISTINCT m.match_id) as matches_hosted,
                COUNT(DISTINCT s.season_id) as seasons_used,
@@ -1769,7 +1767,6 @@ async def get_venues():
         venues = [dict(row) for row in results]
         
         cursor.close()
-        conn.close()
         
         return {
             "venues": venues,
@@ -1797,17 +1794,25 @@ async def get_venues():
            """)
 async def search_players(
     query: str = Query(..., min_length=2, description="Search string (partial player name)"),
-    limit: int = Query(10, ge=1, le=50, description="Maximum number of results to return")
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of results to return"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Search for players by name
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = AsyncDictCursor(db)
+        
+        # Candidate names come from the in-memory index (best match first) so the
+        # aggregate below only touches those players; ILIKE is the fallback
+        matches = search_player_names(query, limit)
+        if matches is not None:
+            names = [match.player_name for match in matches]
+            name_filter, name_param = "p.player_name = ANY(%s)", names
+        else:
+            name_filter, name_param = "p.player_name ILIKE %s", f"%{query}%"
         
-        search_query = f"%{query}%"
-        cursor.execute("""
+        await cursor.execute(f"""
         SELECT 
             p.player_id, 
             p.player_name,
@@ -1820,20 +1825,22 @@ async def search_players(
             LEFT JOIN innings i ON d.inning_id = i.inning_id
             LEFT JOIN matches m ON i.match_id = m.match_id
         WHERE 
-            p.player_name ILIKE %s
+            {name_filter}
         GROUP BY 
             p.player_id, p.player_name
         ORDER BY 
             matches_played DESC, p.player_name
         LIMIT %s
-        """, (search_query, limit))
+        """, (name_param, limit))
         
         results = cursor.fetchall()
         
         players = [dict(row) for row in results]
+        if matches is not None:
+            rank = {name: position for position, name in enumerate(names)}
+            players.sort(key=lambda player: rank.get(player["player_name"], len(rank)))
         
         cursor.close()
-        conn.close()
         
         return {
             "players": players,
@@ -1860,14 +1867,14 @@ async def search_players(
          Returns full match details including scorecard and player performances.
          """)
 async def get_match_details(
-    match_id: int = Path(..., description="ID of the match to retrieve")
+    match_id: int = Path(..., description="ID of the match to retrieve"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = AsyncDictCursor(db)
         
         # Get basic match info
-        cursor.execute("""
+        await cursor.execute("""
         SELECT 
             m.match_id, m.match_date, s.season_name, v.venue_name, v.city,
             t1.team_name as team1_name, t2.team_name as team2_name,
@@ -1895,7 +1902,7 @@ async def get_match_details(
         match_info = dict(match_info)
         
         # Get innings data
-        cursor.execute("""
+        await cursor.execute("""
         SELECT 
             i.inning_id, i.inning_number, 
             t1.team_name as batting_team, t2.team_name as bowling_team,
@@ -1920,7 +1927,7 @@ async def get_match_details(
             inning_id = inning['inning_id']
             
             # Batting performances
-            cursor.execute("""
+            await cursor.execute("""
             WITH player_balls AS (
                 SELECT 
                     d.batsman_id,
@@ -1972,7 +1979,7 @@ async def get_match_details(
             batting_performances.extend(inning_batting)
             
             # Bowling performances
-            cursor.execute("""
+            await cursor.execute("""
             WITH bowler_stats AS (
                 SELECT 
                     d.bowler_id,
@@ -2016,7 +2023,6 @@ async def get_match_details(
             bowling_performances.extend(inning_bowling)
         
         cursor.close()
-        conn.close()
         
         return {
             "match_info": match_info,
@@ -2043,14 +2049,14 @@ async def get_match_details(
          match summaries, and tournament-wide metrics.
          """)
 async def get_tournament_summary(
-    season: str = Path(..., description="Season name (e.g., '2023', '2007/08')")
+    season: str = Path(..., description="Season name (e.g., '2023', '2007/08')"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = AsyncDictCursor(db)
         
         # Check if season exists
-        cursor.execute("SELECT season_id, season_year FROM seasons WHERE season_name = %s", (season,))
+        await cursor.execute("SELECT season_id, season_year FROM seasons WHERE season_name = %s", (season,))
         season_result = cursor.fetchone()
         
         if not season_result:
@@ -2060,7 +2066,7 @@ async def get_tournament_summary(
         season_year = season_result["season_year"]
         
         # Get tournament summary
-        cursor.execute("""
+        await cursor.execute("""
         SELECT 
             COUNT(DISTINCT m.match_id) as total_matches,
             COUNT(DISTINCT v.venue_id) as venues_used,
@@ -2084,7 +2090,7 @@ async def get_tournament_summary(
         summary = dict(cursor.fetchone())
         
         # Get top teams
-        cursor.execute("""
+        await cursor.execute("""
         SELECT 
             t.team_name,
             ts.matches_played,
@@ -2105,7 +2111,7 @@ async def get_tournament_summary(
         top_teams = [dict(row) for row in cursor.fetchall()]
         
         # Get top batsmen
-        cursor.execute("""
+        await cursor.execute("""
         SELECT 
             p.player_name,
             t.team_name,
@@ -2135,7 +2141,7 @@ async def get_tournament_summary(
         top_batsmen = [dict(row) for row in cursor.fetchall()]
         
         # Get top bowlers
-        cursor.execute("""
+        await cursor.execute("""
         SELECT 
             p.player_name,
             t.team_name,
@@ -2169,7 +2175,7 @@ async def get_tournament_summary(
         top_bowlers = [dict(row) for row in cursor.fetchall()]
         
         # Get venue stats
-        cursor.execute("""
+        await cursor.execute("""
         SELECT 
             v.venue_name,
             v.city,
@@ -2197,7 +2203,7 @@ async def get_tournament_summary(
         venue_stats = [dict(row) for row in cursor.fetchall()]
         
         # Get playoff matches if any
-        cursor.execute("""
+        await cursor.execute("""
         SELECT 
             m.match_id,
             m.match_date,
@@ -2224,7 +2230,6 @@ async def get_tournament_summary(
         playoff_matches = [dict(row) for row in cursor.fetchall()]
         
         cursor.close()
-        conn.close()
         
         # Calculate batting first vs batting second win percentages
         total_completed = summary.get('batting_first_wins', 0) + summary.get('batting_second_wins', 0)
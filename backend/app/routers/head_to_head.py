@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, List, Optional
 import pandas as pd
 
 # Import your database connection
 from app.database import get_db
+from app.services.head_to_head_matrix import HeadToHeadMatrix, get_head_to_head_matrix
 
 # Pydantic models for type hinting and validation
 from pydantic import BaseModel
@@ -45,6 +46,14 @@ class HeadToHeadMarginAnalysis(BaseModel):
     average_margin_team2: Optional[float] = None
     most_dominant_victory_team1: Optional[HeadToHeadMatchDetail] = None
     most_dominant_victory_team2: Optional[HeadToHeadMatchDetail] = None
+    margin_buckets_team1: Dict[str, int] = {}
+    margin_buckets_team2: Dict[str, int] = {}
+
+class HeadToHeadMatrixResponse(BaseModel):
+    season: Optional[int] = None
+    teams: List[str]
+    matches: List[List[int]]
+    wins: List[List[int]]
 
 # Create the router
 router = APIRouter(
@@ -81,6 +90,13 @@ def get_all_matches(db: Session):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching matches: {str(e)}")
 
+def get_matrix(db: Session) -> HeadToHeadMatrix:
+    """The cached head-to-head matrix, or one built from this request's matches if it is not loaded"""
+    matrix = get_head_to_head_matrix()
+    if matrix is not None:
+        return matrix
+    return HeadToHeadMatrix(get_all_matches(db))
+
 @router.get("/summary", response_model=HeadToHeadSummary)
 def get_head_to_head_summary(
     team1: str, 
@@ -88,32 +104,21 @@ def get_head_to_head_summary(
     db: Session = Depends(get_db)
 ):
     """Get comprehensive head-to-head summary between two teams"""
-    matches_df = get_all_matches(db)
+    summary = get_matrix(db).summary(team1, team2)
     
-    # Filter matches between the two teams
-    head_to_head_matches = matches_df[
-        ((matches_df['team1'] == team1) & (matches_df['team2'] == team2)) |
-        ((matches_df['team1'] == team2) & (matches_df['team2'] == team1))
-    ]
-    
-    if head_to_head_matches.empty:
+    if summary is None:
         raise HTTPException(status_code=404, detail=f"No matches found between {team1} and {team2}")
     
-    # Calculate wins for each team
-    team1_wins = len(head_to_head_matches[head_to_head_matches['winner'] == team1])
-    team2_wins = len(head_to_head_matches[head_to_head_matches['winner'] == team2])
-    total_matches = len(head_to_head_matches)
-    draws = total_matches - (team1_wins + team2_wins)
-    
+    total_matches = summary["matches"]
     return {
         "team1": team1,
         "team2": team2,
         "total_matches": total_matches,
-        "team1_wins": team1_wins,
-        "team2_wins": team2_wins,
-        "draws": draws,
-        "team1_win_percentage": calculate_win_percentage(team1_wins, total_matches),
-        "team2_win_percentage": calculate_win_percentage(team2_wins, total_matches)
+        "team1_wins": summary["team1_wins"],
+        "team2_wins": summary["team2_wins"],
+        "draws": summary["no_results"],
+        "team1_win_percentage": calculate_win_percentage(summary["team1_wins"], total_matches),
+        "team2_win_percentage": calculate_win_percentage(summary["team2_wins"], total_matches)
     }
 
 @router.get("/match-details", response_model=List[HeadToHeadMatchDetail])
@@ -124,80 +129,43 @@ def get_head_to_head_match_details(
     db: Session = Depends(get_db)
 ):
     """Get detailed match history between two teams"""
-    matches_df = get_all_matches(db)
-    
-    # Filter matches between the two teams
-    head_to_head_matches = matches_df[
-        ((matches_df['team1'] == team1) & (matches_df['team2'] == team2)) |
-        ((matches_df['team1'] == team2) & (matches_df['team2'] == team1))
-    ]
+    match_details = get_matrix(db).history(team1, team2, limit=limit)
     
-    if head_to_head_matches.empty:
+    if not match_details:
         raise HTTPException(status_code=404, detail=f"No matches found between {team1} and {team2}")
     
-    # Sort by date descending and limit
-    head_to_head_matches['match_date'] = pd.to_datetime(head_to_head_matches['match_date'], errors='coerce')
-    head_to_head_matches = head_to_head_matches.sort_values('match_date', ascending=False).head(limit)
-    
-    match_details = []
-    for _, match in head_to_head_matches.iterrows():
-        match_details.append({
-            "match_id": match['filename'],
-            "date": match['match_date'].strftime("%Y-%m-%d") if not pd.isna(match['match_date']) else None,
-            "venue": match['venue'],
-            "winner": match['winner'],
-            "margin": match['margin'],
-            "season": match['season']
-        })
-    
     return match_details
 
 @router.get("/venue-performance", response_model=HeadToHeadVenuePerformance)
 def get_head_to_head_venue_performance(team1: str, team2: str, db: Session = Depends(get_db)):
     """Analyze venue-wise performance for head-to-head matches"""
-    matches_df = get_all_matches(db)
+    venues = get_matrix(db).by_venue(team1, team2)
     
-    # Filter matches between the two teams
-    head_to_head_matches = matches_df[
-        ((matches_df['team1'] == team1) & (matches_df['team2'] == team2)) |
-        ((matches_df['team1'] == team2) & (matches_df['team2'] == team1))
-    ]
-    
-    if head_to_head_matches.empty:
+    if not venues:
         raise HTTPException(status_code=404, detail=f"No matches found between {team1} and {team2}")
     
-    # Group by venue and calculate performance
-    venue_performance = []
-    venues = head_to_head_matches['venue'].unique()
-    
-    for venue in venues:
-        venue_matches = head_to_head_matches[head_to_head_matches['venue'] == venue]
-        
-        team1_matches = venue_matches[venue_matches['team1'] == team1]
-        team2_matches = venue_matches[venue_matches['team1'] == team2]
-        
-        venue_info = {
-            "venue": venue,
-            "total_matches": len(venue_matches),
+    # Each team's record in the matches where it is listed as team1
+    venue_performance = [
+        {
+            "venue": venue["venue"],
+            "total_matches": venue["matches"],
             team1: {
-                "matches": len(team1_matches),
-                "wins": len(team1_matches[team1_matches['winner'] == team1]),
+                "matches": venue["team1_listed_first"],
+                "wins": venue["team1_listed_first_wins"],
                 "win_percentage": calculate_win_percentage(
-                    len(team1_matches[team1_matches['winner'] == team1]), 
-                    len(team1_matches)
+                    venue["team1_listed_first_wins"], venue["team1_listed_first"]
                 )
             },
             team2: {
-                "matches": len(team2_matches),
-                "wins": len(team2_matches[team2_matches['winner'] == team2]),
+                "matches": venue["team2_listed_first"],
+                "wins": venue["team2_listed_first_wins"],
                 "win_percentage": calculate_win_percentage(
-                    len(team2_matches[team2_matches['winner'] == team2]), 
-                    len(team2_matches)
+                    venue["team2_listed_first_wins"], venue["team2_listed_first"]
                 )
             }
         }
-        
-        venue_performance.append(venue_info)
+        for venue in venues
+    ]
     
     return {
         "team1": team1,
@@ -213,48 +181,25 @@ def get_head_to_head_trend_analysis(
     db: Session = Depends(get_db)
 ):
     """Analyze recent performance trend between two teams"""
-    matches_df = get_all_matches(db)
+    recent_match_details = get_matrix(db).history(team1, team2, limit=recent_matches)
     
-    # Filter matches between the two teams
-    head_to_head_matches = matches_df[
-        ((matches_df['team1'] == team1) & (matches_df['team2'] == team2)) |
-        ((matches_df['team1'] == team2) & (matches_df['team2'] == team1))
-    ]
-    
-    if head_to_head_matches.empty:
+    if not recent_match_details:
         raise HTTPException(status_code=404, detail=f"No matches found between {team1} and {team2}")
     
-    # Sort by date descending and limit
-    head_to_head_matches['match_date'] = pd.to_datetime(head_to_head_matches['match_date'], errors='coerce')
-    recent_matches_df = head_to_head_matches.sort_values('match_date', ascending=False).head(recent_matches)
-    
-    # Prepare recent match details
-    recent_match_details = []
-    for _, match in recent_matches_df.iterrows():
-        recent_match_details.append({
-            "match_id": match['filename'],
-            "date": match['match_date'].strftime("%Y-%m-%d") if not pd.isna(match['match_date']) else None,
-            "venue": match['venue'],
-            "winner": match['winner'],
-            "season": match['season']
-        })
+    total = len(recent_match_details)
+    team1_wins = sum(1 for match in recent_match_details if match["winner"] == team1)
+    team2_wins = sum(1 for match in recent_match_details if match["winner"] == team2)
     
     # Trend analysis
     trend_analysis = {
-        "total_recent_matches": len(recent_matches_df),
+        "total_recent_matches": total,
         team1: {
-            "wins": len(recent_matches_df[recent_matches_df['winner'] == team1]),
-            "win_percentage": calculate_win_percentage(
-                len(recent_matches_df[recent_matches_df['winner'] == team1]), 
-                len(recent_matches_df)
-            )
+            "wins": team1_wins,
+            "win_percentage": calculate_win_percentage(team1_wins, total)
         },
         team2: {
-            "wins": len(recent_matches_df[recent_matches_df['winner'] == team2]),
-            "win_percentage": calculate_win_percentage(
-                len(recent_matches_df[recent_matches_df['winner'] == team2]), 
-                len(recent_matches_df)
-            )
+            "wins": team2_wins,
+            "win_percentage": calculate_win_percentage(team2_wins, total)
         }
     }
     
@@ -268,55 +213,28 @@ def get_head_to_head_trend_analysis(
 @router.get("/margin-analysis", response_model=HeadToHeadMarginAnalysis)
 def get_head_to_head_margin_analysis(team1: str, team2: str, db: Session = Depends(get_db)):
     """Analyze victory margins between two teams"""
-    matches_df = get_all_matches(db)
+    margins = get_matrix(db).margins(team1, team2)
     
-    # Filter matches between the two teams
-    head_to_head_matches = matches_df[
-        ((matches_df['team1'] == team1) & (matches_df['team2'] == team2)) |
-        ((matches_df['team1'] == team2) & (matches_df['team2'] == team1))
-    ]
-    
-    if head_to_head_matches.empty:
+    if margins is None:
         raise HTTPException(status_code=404, detail=f"No matches found between {team1} and {team2}")
     
-    # Parse and convert margins to numeric values (this is a simplified approach)
-    def parse_margin(margin: str) -> float:
-        try:
-            # Remove text and keep only numeric part
-            import re
-            numeric_margin = re.findall(r'\d+', margin)[0]
-            return float(numeric_margin)
-        except:
-            return 0.0
-    
-    # Calculate margins for each team
-    team1_matches = head_to_head_matches[head_to_head_matches['winner'] == team1]
-    team2_matches = head_to_head_matches[head_to_head_matches['winner'] == team2]
-    
-    # Calculate average margins
-    team1_margins = team1_matches['margin'].apply(parse_margin)
-    team2_margins = team2_matches['margin'].apply(parse_margin)
-    
-    # Find most dominant victories
-    def get_most_dominant_victory(team_matches):
-        if team_matches.empty:
-            return None
-        
-        most_dominant = team_matches.loc[team_matches['margin'].apply(parse_margin).idxmax()]
-        return {
-            "match_id": most_dominant['filename'],
-            "date": pd.to_datetime(most_dominant['match_date']).strftime("%Y-%m-%d"),
-            "venue": most_dominant['venue'],
-            "winner": most_dominant['winner'],
-            "margin": most_dominant['margin'],
-            "season": most_dominant['season']
-        }
-    
     return {
         "team1": team1,
         "team2": team2,
-        "average_margin_team1": team1_margins.mean() if not team1_margins.empty else None,
-        "average_margin_team2": team2_margins.mean() if not team2_margins.empty else None,
-        "most_dominant_victory_team1": get_most_dominant_victory(team1_matches),
-        "most_dominant_victory_team2": get_most_dominant_victory(team2_matches)
-    }
\ No newline at end of file
+        "average_margin_team1": margins["team1"]["average_margin"],
+        "average_margin_team2": margins["team2"]["average_margin"],
+        "most_dominant_victory_team1": margins["team1"]["largest"],
+        "most_dominant_victory_team2": margins["team2"]["largest"],
+        "margin_buckets_team1": margins["team1"]["buckets"],
+        "margin_buckets_team2": margins["team2"]["buckets"]
+    }
+
+@router.get("/matrix", response_model=HeadToHeadMatrixResponse)
+def get_head_to_head_matrix_endpoint(season: Optional[int] = None, db: Session = Depends(get_db)):
+    """
+    Head-to-head results for every pair of teams, optionally in one season.
+
+    ``wins[i][j]`` is how often ``teams[i]`` beat ``teams[j]`` and
+    ``matches[i][j]`` how often they met.
+    """
+    return {"season": season, **get_matrix(db).matrix(season)}
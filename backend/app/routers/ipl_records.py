@@ -18,21 +18,14 @@ def get_most_runs(
 ):
     """Get players with most runs in IPL history."""
     query = """
-    WITH player_runs AS (
-        SELECT 
-            batsman as player_name,
-            SUM(runs_batsman) as total_runs,
-            COUNT(DISTINCT filename) as matches_played,
-            ROUND(SUM(runs_batsman)::numeric / COUNT(DISTINCT filename), 2) as batting_average
-        FROM innings_data
-        GROUP BY batsman
-    )
     SELECT 
-        player_name,
-        total_runs,
-        matches_played,
-        batting_average
-    FROM player_runs
+        p.player_name,
+        SUM(s.runs_scored) as total_runs,
+        SUM(s.matches_played) as matches_played,
+        ROUND(SUM(s.runs_scored)::numeric / NULLIF(SUM(s.innings_batted) - SUM(s.not_outs), 0), 2) as batting_average
+    FROM player_season_stats s
+    JOIN players p ON p.player_id = s.player_id
+    GROUP BY p.player_id, p.player_name
     ORDER BY total_runs DESC
     LIMIT :limit
     """
@@ -60,27 +53,14 @@ def get_most_hundreds(
 ):
     """Get players with most hundreds in IPL history."""
     query = """
-    WITH centuries AS (
-        SELECT 
-            batsman,
-            COUNT(*) as hundreds,
-            SUM(runs_batsman) as total_runs
-        FROM (
-            SELECT 
-                batsman, 
-                filename,
-                SUM(runs_batsman) as runs_batsman
-            FROM innings_data
-            GROUP BY batsman, filename
-        ) AS innings
-        WHERE runs_batsman >= 100
-        GROUP BY batsman
-    )
     SELECT 
-        batsman as player_name,
-        hundreds,
-        total_runs
-    FROM centuries
+        p.player_name,
+        SUM(s.hundreds) as hundreds,
+        SUM(s.runs_scored) as total_runs
+    FROM player_season_stats s
+    JOIN players p ON p.player_id = s.player_id
+    GROUP BY p.player_id, p.player_name
+    HAVING SUM(s.hundreds) > 0
     ORDER BY hundreds DESC, total_runs DESC
     LIMIT :limit
     """
@@ -107,27 +87,14 @@ def get_most_fifties(
 ):
     """Get players with most fifties in IPL history."""
     query = """
-    WITH fifties AS (
-        SELECT 
-            batsman,
-            COUNT(*) as fifties,
-            SUM(runs_batsman) as total_runs
-        FROM (
-            SELECT 
-                batsman, 
-                filename,
-                SUM(runs_batsman) as runs_batsman
-            FROM innings_data
-            GROUP BY batsman, filename
-        ) AS innings
-        WHERE runs_batsman >= 50 AND runs_batsman < 100
-        GROUP BY batsman
-    )
     SELECT 
-        batsman as player_name,
-        fifties,
-        total_runs
-    FROM fifties
+        p.player_name,
+        SUM(s.fifties) as fifties,
+        SUM(s.runs_scored) as total_runs
+    FROM player_season_stats s
+    JOIN players p ON p.player_id = s.player_id
+    GROUP BY p.player_id, p.player_name
+    HAVING SUM(s.fifties) > 0
     ORDER BY fifties DESC, total_runs DESC
     LIMIT :limit
     """
@@ -197,23 +164,16 @@ def get_highest_batting_average(
 ):
     """Get players with highest batting average in IPL history."""
     query = """
-    WITH player_stats AS (
-        SELECT 
-            batsman as player_name,
-            COUNT(DISTINCT filename) as matches_played,
-            SUM(runs_batsman) as total_runs,
-            COUNT(*) as total_innings,
-            ROUND(SUM(runs_batsman)::numeric / NULLIF(COUNT(*) - COUNT(CASE WHEN runs_batsman = 0 THEN 1 END), 0), 2) as batting_average
-        FROM innings_data
-        GROUP BY batsman
-        HAVING COUNT(DISTINCT filename) >= :min_matches
-    )
     SELECT 
-        player_name,
-        matches_played,
-        total_runs,
-        batting_average
-    FROM player_stats
+        p.player_name,
+        SUM(s.matches_played) as matches_played,
+        SUM(s.runs_scored) as total_runs,
+        ROUND(SUM(s.runs_scored)::numeric / NULLIF(SUM(s.innings_batted) - SUM(s.not_outs), 0), 2) as batting_average
+    FROM player_season_stats s
+    JOIN players p ON p.player_id = s.player_id
+    GROUP BY p.player_id, p.player_name
+    HAVING SUM(s.matches_played) >= :min_matches
+       AND SUM(s.innings_batted) > SUM(s.not_outs)
     ORDER BY batting_average DESC
     LIMIT :limit
     """
@@ -283,21 +243,15 @@ def get_most_sixes(
 ):
     """Get players with most sixes in IPL history."""
     query = """
-    WITH six_stats AS (
-        SELECT 
-            batsman as player_name,
-            COUNT(*) as total_sixes,
-            COUNT(DISTINCT filename) as matches_played
-        FROM innings_data
-        WHERE runs_batsman = 6
-        GROUP BY batsman
-    )
     SELECT 
-        player_name,
-        total_sixes,
-        matches_played,
-        ROUND(total_sixes::numeric / matches_played, 2) as sixes_per_match
-    FROM six_stats
+        p.player_name,
+        SUM(s.sixes) as total_sixes,
+        SUM(s.matches_played) as matches_played,
+        ROUND(SUM(s.sixes)::numeric / NULLIF(SUM(s.matches_played), 0), 2) as sixes_per_match
+    FROM player_season_stats s
+    JOIN players p ON p.player_id = s.player_id
+    GROUP BY p.player_id, p.player_name
+    HAVING SUM(s.sixes) > 0
     ORDER BY total_sixes DESC
     LIMIT :limit
     """
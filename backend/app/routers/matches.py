@@ -4,6 +4,7 @@ from sqlalchemy import text
 from typing import List, Dict, Any, Optional
 from app.database import get_db
 from app.utils.db_utils import execute_raw_sql, query_to_dataframe
+from app.ml.win_probability import curve_from_rows, get_win_probability_curves, get_win_probability_model
 
 router = APIRouter(
     prefix="/api/matches",
@@ -321,12 +322,23 @@ def get_match_details(
         
         # Extract match metadata
         match_data = match_info[0] if match_info else {}
+
+        # Precomputed curve when the store is loaded, otherwise score the rows just fetched
+        curves = get_win_probability_curves()
+        model = get_win_probability_model()
+        if curves is not None:
+            win_probability = curves.curve(filename)
+        elif model is not None:
+            win_probability = curve_from_rows(model, match_data, first_innings + second_innings)
+        else:
+            win_probability = None
         
         return {
             "match_info": match_data,
             "innings_summary": innings_summary,
             "first_innings": first_innings,
             "second_innings": second_innings,
+            "win_probability": win_probability,
             "match_id": filename
         }
         
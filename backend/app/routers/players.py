@@ -4,6 +4,7 @@ from sqlalchemy import text
 from typing import List, Dict, Any, Optional
 from app.database import get_db
 from app.utils.db_utils import execute_raw_sql, query_to_dataframe
+from app.services.player_index import get_player_index
 
 router = APIRouter(
     prefix="/api/players",
@@ -109,6 +110,15 @@ def search_players(
     db: Session = Depends(get_db)
 ):
     """Search for players by name."""
+    # Served from the in-memory name index (prefix, trigram and typo matching) when loaded
+    index = get_player_index()
+    if index is not None:
+        players = [
+            {"player_name": match.player_name, "total_appearances": match.appearances}
+            for match in index.search(query, limit=20)
+        ]
+        return {"players": players, "count": len(players)}
+    
     try:
         # Simplified search query to avoid potential issues with LIKE or Boolean conversions
         search_query = """
@@ -146,6 +156,59 @@ def search_players(
         print(error_detail)  # Print to server logs for debugging
         raise HTTPException(status_code=500, detail=error_detail)
 
+def find_player_name(db: Session, player_name: str) -> str:
+    """Resolve a partial player name with SQL, for when the name index is not loaded."""
+    # First, let's find the player by partial name with a more flexible approach
+    find_player_query = """
+    WITH player_names AS (
+        SELECT batsman as player_name, COUNT(*) as appearances FROM innings_data GROUP BY batsman
+        UNION ALL
+        SELECT bowler as player_name, COUNT(*) as appearances FROM innings_data GROUP BY bowler
+        UNION ALL
+        SELECT player_of_match as player_name, COUNT(*) as appearances FROM match_info GROUP BY player_of_match
+    )
+    SELECT player_name, SUM(appearances) as total_appearances
+    FROM player_names
+    WHERE 
+        player_name IS NOT NULL 
+        AND (
+            player_name LIKE :exact_match 
+            OR player_name LIKE :first_word_match 
+            OR player_name LIKE :last_name_match
+            OR player_name LIKE :partial_match
+        )
+    GROUP BY player_name
+    ORDER BY 
+        CASE 
+            WHEN LOWER(player_name) = LOWER(:exact_match) THEN 1
+            WHEN LOWER(player_name) LIKE LOWER(:first_word_match) THEN 2
+            WHEN LOWER(player_name) LIKE LOWER(:last_name_match) THEN 3
+            ELSE 4
+        END,
+        total_appearances DESC
+    LIMIT 1
+    """
+    
+    # Split the player name for more flexible matching
+    name_parts = player_name.split()
+    first_name = name_parts[0] if name_parts else ""
+    last_name = name_parts[-1] if len(name_parts) > 1 else ""
+    
+    search_params = {
+        "exact_match": player_name,
+        "first_word_match": f"{first_name}%",
+        "last_name_match": f"%{last_name}",
+        "partial_match": f"%{player_name}%"
+    }
+    
+    players = execute_raw_sql(db, find_player_query, search_params)
+    
+    if not players:
+        raise HTTPException(status_code=404, detail=f"Player not found: {player_name}")
+    
+    # Use the first matching player name from the database
+    return players[0]["player_name"]
+
 @router.get("/{player_name}")
 def get_player_stats(
     player_name: str,
@@ -154,56 +217,13 @@ def get_player_stats(
 ):
     """Get detailed statistics for a specific player."""
     try:
-        # First, let's find the player by partial name with a more flexible approach
-        find_player_query = """
-        WITH player_names AS (
-            SELECT batsman as player_name, COUNT(*) as appearances FROM innings_data GROUP BY batsman
-            UNION ALL
-            SELECT bowler as player_name, COUNT(*) as appearances FROM innings_data GROUP BY bowler
-            UNION ALL
-            SELECT player_of_match as player_name, COUNT(*) as appearances FROM match_info GROUP BY player_of_match
-        )
-        SELECT player_name, SUM(appearances) as total_appearances
-        FROM player_names
-        WHERE 
-            player_name IS NOT NULL 
-            AND (
-                player_name LIKE :exact_match 
-                OR player_name LIKE :first_word_match 
-                OR player_name LIKE :last_name_match
-                OR player_name LIKE :partial_match
-            )
-        GROUP BY player_name
-        ORDER BY 
-            CASE 
-                WHEN LOWER(player_name) = LOWER(:exact_match) THEN 1
-                WHEN LOWER(player_name) LIKE LOWER(:first_word_match) THEN 2
-                WHEN LOWER(player_name) LIKE LOWER(:last_name_match) THEN 3
-                ELSE 4
-            END,
-            total_appearances DESC
-        LIMIT 1
-        """
-        
-        # Split the player name for more flexible matching
-        name_parts = player_name.split()
-        first_name = name_parts[0] if name_parts else ""
-        last_name = name_parts[-1] if len(name_parts) > 1 else ""
-        
-        search_params = {
-            "exact_match": player_name,
-            "first_word_match": f"{first_name}%",
-            "last_name_match": f"%{last_name}",
-            "partial_match": f"%{player_name}%"
-        }
-        
-        players = execute_raw_sql(db, find_player_query, search_params)
-        
-        if not players:
-            raise HTTPException(status_code=404, detail=f"Player not found: {player_name}")
-        
-        # Use the first matching player name from the database
-        exact_player_name = players[0]["player_name"]
+        index = get_player_index()
+        if index is not None:
+            exact_player_name = index.resolve(player_name)
+            if exact_player_name is None:
+                raise HTTPException(status_code=404, detail=f"Player not found: {player_name}")
+        else:
+            exact_player_name = find_player_name(db, player_name)
         print(f"Found player: {exact_player_name} for search: {player_name}")
         
         # Season filter clause
@@ -523,6 +543,130 @@ def get_player_stats(
         print(error_detail)  # Print to server logs for debugging
         raise HTTPException(status_code=500, detail=error_detail)
 
+# Career (or single-season) totals per player from the player_season_stats rollup
+PLAYER_TOTALS_CTE = """
+WITH totals AS (
+    SELECT 
+        p.player_name,
+        SUM(s.matches_played) as matches,
+        SUM(s.innings_batted) as innings_batted,
+        SUM(s.runs_scored) as runs,
+        SUM(s.balls_faced) as balls_faced,
+        SUM(s.fours) as fours,
+        SUM(s.sixes) as sixes,
+        MAX(s.highest_score) as highest_score,
+        SUM(s.fifties) as fifties,
+        SUM(s.hundreds) as hundreds,
+        SUM(s.innings_batted) - SUM(s.not_outs) as dismissals,
+        SUM(s.balls_bowled) as balls_bowled,
+        SUM(s.runs_conceded) as runs_conceded,
+        SUM(s.wickets) as wickets,
+        SUM(s.three_wickets) as three_wickets,
+        SUM(s.five_wickets) as five_wickets
+    FROM player_season_stats s
+    JOIN players p ON p.player_id = s.player_id
+    JOIN seasons se ON se.season_id = s.season_id
+    {season_filter}
+    GROUP BY p.player_id, p.player_name
+)
+"""
+
+TOP_PLAYER_QUERIES = {
+    'runs': """
+    SELECT player_name, matches, runs, highest_score,
+           ROUND(runs::numeric / NULLIF(balls_faced, 0) * 100, 2) as strike_rate
+    FROM totals
+    ORDER BY runs DESC
+    LIMIT :limit
+    """,
+    'fours': """
+    SELECT player_name, matches, fours, runs
+    FROM totals
+    ORDER BY fours DESC
+    LIMIT :limit
+    """,
+    'sixes': """
+    SELECT player_name, matches, sixes, runs
+    FROM totals
+    ORDER BY sixes DESC
+    LIMIT :limit
+    """,
+    'strike_rate': """
+    SELECT player_name, matches, runs, balls_faced,
+           ROUND(runs::numeric / balls_faced * 100, 2) as strike_rate
+    FROM totals
+    WHERE balls_faced >= 60
+    ORDER BY strike_rate DESC
+    LIMIT :limit
+    """,
+    'average': """
+    SELECT player_name, matches, runs, dismissals,
+           ROUND(runs::numeric / dismissals, 2) as average
+    FROM totals
+    WHERE matches >= 5 AND dismissals > 0
+    ORDER BY average DESC
+    LIMIT :limit
+    """,
+    'fifties': """
+    SELECT player_name, matches, fifties, hundreds, runs as total_runs
+    FROM totals
+    ORDER BY fifties DESC, hundreds DESC, total_runs DESC
+    LIMIT :limit
+    """,
+    'hundreds': """
+    SELECT player_name, matches, hundreds, fifties, runs as total_runs
+    FROM totals
+    ORDER BY hundreds DESC, fifties DESC, total_runs DESC
+    LIMIT :limit
+    """,
+    'wickets': """
+    SELECT player_name, matches, wickets, runs_conceded,
+           ROUND(balls_bowled::numeric / 6, 1) as overs
+    FROM totals
+    WHERE balls_bowled > 0
+    ORDER BY wickets DESC
+    LIMIT :limit
+    """,
+    'economy': """
+    SELECT player_name, matches, ROUND(balls_bowled::numeric / 6, 1) as overs, runs_conceded, wickets,
+           ROUND(runs_conceded::numeric / (balls_bowled / 6.0), 2) as economy
+    FROM totals
+    WHERE balls_bowled >= 60
+    ORDER BY economy ASC
+    LIMIT :limit
+    """,
+    'bowling_average': """
+    SELECT player_name, matches, wickets, runs_conceded,
+           ROUND(runs_conceded::numeric / wickets, 2) as bowling_average
+    FROM totals
+    WHERE wickets >= 10
+    ORDER BY bowling_average ASC
+    LIMIT :limit
+    """,
+    'bowling_strike_rate': """
+    SELECT player_name, matches, wickets,
+           ROUND(balls_bowled::numeric / wickets, 2) as bowling_strike_rate
+    FROM totals
+    WHERE wickets >= 10
+    ORDER BY bowling_strike_rate ASC
+    LIMIT :limit
+    """,
+    'three_wickets': """
+    SELECT player_name, matches, three_wickets, five_wickets, wickets as total_wickets
+    FROM totals
+    WHERE balls_bowled > 0
+    ORDER BY three_wickets DESC, five_wickets DESC, total_wickets DESC
+    LIMIT :limit
+    """,
+    'five_wickets': """
+    SELECT player_name, matches, five_wickets, three_wickets, wickets as total_wickets
+    FROM totals
+    WHERE balls_bowled > 0
+    ORDER BY five_wickets DESC, three_wickets DESC, total_wickets DESC
+    LIMIT :limit
+    """,
+}
+
 @router.get("/top/{category}")
 def get_top_players(
     category: str = Path(..., description="Category like 'runs', 'wickets', 'sixes'"),
@@ -532,391 +676,12 @@ def get_top_players(
 ):
     """Get top players by different statistical categories."""
     try:
-        season_filter = "AND m.season = :season" if season else ""
-        
-        if category.lower() == 'runs':
-            query = f"""
-            WITH player_batting AS (
-                SELECT 
-                    i.batsman as player_name,
-                    i.runs_batsman,
-                    i.filename,
-                    i.innings_type,
-                    m.season
-                FROM innings_data i
-                JOIN match_info m ON i.filename = m.filename
-                WHERE 1=1
-                {season_filter}
-            ),
-            player_stats AS (
-                SELECT 
-                    player_name,
-                    COUNT(DISTINCT filename) as matches,
-                    SUM(runs_batsman) as runs,
-                    ROUND(SUM(runs_batsman)::numeric / COUNT(*) * 100, 2) as strike_rate
-                FROM player_batting
-                GROUP BY player_name
-            ),
-            innings_totals AS (
-                SELECT 
-                    player_name,
-                    filename,
-                    innings_type,
-                    SUM(runs_batsman) as innings_runs
-                FROM player_batting
-                GROUP BY player_name, filename, innings_type
-            )
-            SELECT 
-                ps.player_name,
-                ps.matches,
-                ps.runs,
-                COALESCE(MAX(it.innings_runs), 0) as highest_score,
-                ps.strike_rate
-            FROM player_stats ps
-            LEFT JOIN innings_totals it ON ps.player_name = it.player_name
-            GROUP BY ps.player_name, ps.matches, ps.runs, ps.strike_rate
-            ORDER BY ps.runs DESC
-            LIMIT :limit
-            """
-        elif category.lower() == 'fours':
-            query = f"""
-            WITH player_batting AS (
-                SELECT 
-                    i.batsman as player_name,
-                    i.runs_batsman,
-                    i.filename,
-                    m.season
-                FROM innings_data i
-                JOIN match_info m ON i.filename = m.filename
-                WHERE 1=1
-                {season_filter}
-            )
-            SELECT 
-                player_name,
-                COUNT(DISTINCT filename) as matches,
-                SUM(CASE WHEN runs_batsman = 4 THEN 1 ELSE 0 END) as fours,
-                SUM(runs_batsman) as runs
-            FROM player_batting
-            GROUP BY player_name
-            ORDER BY fours DESC
-            LIMIT :limit
-            """
-        elif category.lower() == 'sixes':
-            query = f"""
-            WITH player_batting AS (
-                SELECT 
-                    i.batsman as player_name,
-                    i.runs_batsman,
-                    i.filename,
-                    m.season
-                FROM innings_data i
-                JOIN match_info m ON i.filename = m.filename
-                WHERE 1=1
-                {season_filter}
-            )
-            SELECT 
-                player_name,
-                COUNT(DISTINCT filename) as matches,
-                SUM(CASE WHEN runs_batsman = 6 THEN 1 ELSE 0 END) as sixes,
-                SUM(runs_batsman) as runs
-            FROM player_batting
-            GROUP BY player_name
-            ORDER BY sixes DESC
-            LIMIT :limit
-            """
-        elif category.lower() == 'strike_rate':
-            query = f"""
-            WITH player_batting AS (
-                SELECT 
-                    i.batsman as player_name,
-                    i.runs_batsman,
-                    i.filename,
-                    m.season
-                FROM innings_data i
-                JOIN match_info m ON i.filename = m.filename
-                WHERE 1=1
-                {season_filter}
-            )
-            SELECT 
-                player_name,
-                COUNT(DISTINCT filename) as matches,
-                SUM(runs_batsman) as runs,
-                COUNT(*) as balls_faced,
-                ROUND(SUM(runs_batsman)::numeric / COUNT(*) * 100, 2) as strike_rate
-            FROM player_batting
-            GROUP BY player_name
-            HAVING COUNT(*) >= 60
-            ORDER BY strike_rate DESC
-            LIMIT :limit
-            """
-        elif category.lower() == 'average':
-            query = f"""
-            WITH player_batting AS (
-                SELECT 
-                    i.batsman as player_name,
-                    i.runs_batsman,
-                    i.wicket_details,
-                    i.filename,
-                    i.innings_type,
-                    m.season
-                FROM innings_data i
-                JOIN match_info m ON i.filename = m.filename
-                WHERE 1=1
-                {season_filter}
-            )
-            SELECT 
-                player_name,
-                COUNT(DISTINCT filename) as matches,
-                SUM(runs_batsman) as runs,
-                COUNT(DISTINCT CASE WHEN wicket_details IS NOT NULL AND wicket_details != '' THEN filename || innings_type END) as dismissals,
-                ROUND(SUM(runs_batsman)::numeric / NULLIF(COUNT(DISTINCT CASE WHEN wicket_details IS NOT NULL AND wicket_details != '' THEN filename || innings_type END), 0), 2) as average
-            FROM player_batting
-            GROUP BY player_name
-            HAVING COUNT(DISTINCT filename) >= 5 AND COUNT(DISTINCT CASE WHEN wicket_details IS NOT NULL AND wicket_details != '' THEN filename || innings_type END) > 0
-            ORDER BY average DESC
-            LIMIT :limit
-            """
-        elif category.lower() == 'fifties':
-            query = f"""
-            WITH player_batting AS (
-                SELECT 
-                    i.batsman as player_name,
-                    i.runs_batsman,
-                    i.filename,
-                    i.innings_type,
-                    m.season
-                FROM innings_data i
-                JOIN match_info m ON i.filename = m.filename
-                WHERE 1=1
-                {season_filter}
-            ),
-            innings_totals AS (
-                SELECT 
-                    player_name,
-                    filename,
-                    innings_type,
-                    SUM(runs_batsman) as runs
-                FROM player_batting
-                GROUP BY player_name, filename, innings_type
-            )
-            SELECT 
-                player_name,
-                COUNT(DISTINCT filename) as matches,
-                COUNT(CASE WHEN runs >= 50 AND runs < 100 THEN 1 END) as fifties,
-                COUNT(CASE WHEN runs >= 100 THEN 1 END) as hundreds,
-                SUM(runs) as total_runs
-            FROM innings_totals
-            GROUP BY player_name
-            ORDER BY fifties DESC, hundreds DESC, total_runs DESC
-            LIMIT :limit
-            """
-        elif category.lower() == 'hundreds':
-            query = f"""
-            WITH player_batting AS (
-                SELECT 
-                    i.batsman as player_name,
-                    i.runs_batsman,
-                    i.filename,
-                    i.innings_type,
-                    m.season
-                FROM innings_data i
-                JOIN match_info m ON i.filename = m.filename
-                WHERE 1=1
-                {season_filter}
-            ),
-            innings_totals AS (
-                SELECT 
-                    player_name,
-                    filename,
-                    innings_type,
-                    SUM(runs_batsman) as runs
-                FROM player_batting
-                GROUP BY player_name, filename, innings_type
-            )
-            SELECT 
-                player_name,
-                COUNT(DISTINCT filename) as matches,
-                COUNT(CASE WHEN runs >= 100 THEN 1 END) as hundreds,
-                COUNT(CASE WHEN runs >= 50 AND runs < 100 THEN 1 END) as fifties,
-                SUM(runs) as total_runs
-            FROM innings_totals
-            GROUP BY player_name
-            ORDER BY hundreds DESC, fifties DESC, total_runs DESC
-            LIMIT :limit
-            """
-        elif category.lower() == 'wickets':
-            query = f"""
-            WITH player_bowling AS (
-                SELECT 
-                    i.bowler as player_name,
-                    i.wicket_details,
-                    i.runs_total,
-                    i.filename,
-                    m.season
-                FROM innings_data i
-                JOIN match_info m ON i.filename = m.filename
-                WHERE 1=1
-                {season_filter}
-            )
-            SELECT 
-                player_name,
-                COUNT(DISTINCT filename) as matches,
-                COUNT(CASE WHEN wicket_details IS NOT NULL AND wicket_details != '' THEN 1 END) as wickets,
-                SUM(runs_total) as runs_conceded,
-                ROUND(COUNT(*)::numeric / 6, 1) as overs
-            FROM player_bowling
-            GROUP BY player_name
-            ORDER BY wickets DESC
-            LIMIT :limit
-            """
-        elif category.lower() == 'economy':
-            query = f"""
-            WITH player_bowling AS (
-                SELECT 
-                    i.bowler as player_name,
-                    i.wicket_details,
-                    i.runs_total,
-                    i.filename,
-                    m.season
-                FROM innings_data i
-                JOIN match_info m ON i.filename = m.filename
-                WHERE 1=1
-                {season_filter}
-            )
-            SELECT 
-                player_name,
-                COUNT(DISTINCT filename) as matches,
-                ROUND(COUNT(*)::numeric / 6, 1) as overs,
-                SUM(runs_total) as runs_conceded,
-                COUNT(CASE WHEN wicket_details IS NOT NULL AND wicket_details != '' THEN 1 END) as wickets,
-                ROUND(SUM(runs_total)::numeric / (COUNT(*) / 6.0), 2) as economy
-            FROM player_bowling
-            GROUP BY player_name
-            HAVING COUNT(*) >= 60
-            ORDER BY economy ASC
-            LIMIT :limit
-            """
-        elif category.lower() == 'bowling_average':
-            query = f"""
-            WITH player_bowling AS (
-                SELECT 
-                    i.bowler as player_name,
-                    i.wicket_details,
-                    i.runs_total,
-                    i.filename,
-                    m.season
-                FROM innings_data i
-                JOIN match_info m ON i.filename = m.filename
-                WHERE 1=1
-                {season_filter}
-            )
-            SELECT 
-                player_name,
-                COUNT(DISTINCT filename) as matches,
-                COUNT(CASE WHEN wicket_details IS NOT NULL AND wicket_details != '' THEN 1 END) as wickets,
-                SUM(runs_total) as runs_conceded,
-                ROUND(SUM(runs_total)::numeric / NULLIF(COUNT(CASE WHEN wicket_details IS NOT NULL AND wicket_details != '' THEN 1 END), 0), 2) as bowling_average
-            FROM player_bowling
-            GROUP BY player_name
-            HAVING COUNT(CASE WHEN wicket_details IS NOT NULL AND wicket_details != '' THEN 1 END) >= 10
-            ORDER BY bowling_average ASC
-            LIMIT :limit
-            """
-        elif category.lower() == 'bowling_strike_rate':
-            query = f"""
-            WITH player_bowling AS (
-                SELECT 
-                    i.bowler as player_name,
-                    i.wicket_details,
-                    i.runs_total,
-                    i.filename,
-                    m.season
-                FROM innings_data i
-                JOIN match_info m ON i.filename = m.filename
-                WHERE 1=1
-                {season_filter}
-            )
-            SELECT 
-                player_name,
-                COUNT(DISTINCT filename) as matches,
-                COUNT(CASE WHEN wicket_details IS NOT NULL AND wicket_details != '' THEN 1 END) as wickets,
-                ROUND(COUNT(*)::numeric / NULLIF(COUNT(CASE WHEN wicket_details IS NOT NULL AND wicket_details != '' THEN 1 END), 0), 2) as bowling_strike_rate
-            FROM player_bowling
-            GROUP BY player_name
-            HAVING COUNT(CASE WHEN wicket_details IS NOT NULL AND wicket_details != '' THEN 1 END) >= 10
-            ORDER BY bowling_strike_rate ASC
-            LIMIT :limit
-            """
-        elif category.lower() == 'three_wickets':
-            query = f"""
-            WITH player_bowling AS (
-                SELECT 
-                    i.bowler as player_name,
-                    i.wicket_details,
-                    i.filename,
-                    i.innings_type,
-                    m.season
-                FROM innings_data i
-                JOIN match_info m ON i.filename = m.filename
-                WHERE 1=1
-                {season_filter}
-            ),
-            innings_wickets AS (
-                SELECT 
-                    player_name,
-                    filename,
-                    innings_type,
-                    COUNT(CASE WHEN wicket_details IS NOT NULL AND wicket_details != '' THEN 1 END) as wickets
-                FROM player_bowling
-                GROUP BY player_name, filename, innings_type
-            )
-            SELECT 
-                player_name,
-                COUNT(DISTINCT filename) as matches,
-                COUNT(CASE WHEN wickets >= 3 AND wickets < 5 THEN 1 END) as three_wickets,
-                COUNT(CASE WHEN wickets >= 5 THEN 1 END) as five_wickets,
-                SUM(wickets) as total_wickets
-            FROM innings_wickets
-            GROUP BY player_name
-            ORDER BY three_wickets DESC, five_wickets DESC, total_wickets DESC
-            LIMIT :limit
-            """
-        elif category.lower() == 'five_wickets':
-            query = f"""
-            WITH player_bowling AS (
-                SELECT 
-                    i.bowler as player_name,
-                    i.wicket_details,
-                    i.filename,
-                    i.innings_type,
-                    m.season
-                FROM innings_data i
-                JOIN match_info m ON i.filename = m.filename
-                WHERE 1=1
-                {season_filter}
-            ),
-            innings_wickets AS (
-                SELECT 
-                    player_name,
-                    filename,
-                    innings_type,
-                    COUNT(CASE WHEN wicket_details IS NOT NULL AND wicket_details != '' THEN 1 END) as wickets
-                FROM player_bowling
-                GROUP BY player_name, filename, innings_type
-            )
-            SELECT 
-                player_name,
-                COUNT(DISTINCT filename) as matches,
-                COUNT(CASE WHEN wickets >= 5 THEN 1 END) as five_wickets,
-                COUNT(CASE WHEN wickets >= 3 AND wickets < 5 THEN 1 END) as three_wickets,
-                SUM(wickets) as total_wickets
-            FROM innings_wickets
-            GROUP BY player_name
-            ORDER BY five_wickets DESC, three_wickets DESC, total_wickets DESC
-            LIMIT :limit
-            """
-        else:
+        category_query = TOP_PLAYER_QUERIES.get(category.lower())
+        if category_query is None:
             raise HTTPException(status_code=400, detail=f"Invalid category: {category}")
+
+        season_filter = "WHERE se.season_year = :season" if season else ""
+        query = PLAYER_TOTALS_CTE.format(season_filter=season_filter) + category_query
             
         params = {"limit": limit}
         if season:
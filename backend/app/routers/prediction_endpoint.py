@@ -1,8 +1,8 @@
 # backend/app/routers/prediction_endpoint.py
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
-from typing import List, Dict
-import joblib
+from sqlalchemy.orm import Session
+from typing import List, Dict, Optional
 import numpy as np
 import pandas as pd
 from sklearn.metrics import (
@@ -11,8 +11,17 @@ from sklearn.metrics import (
     classification_report, 
     roc_auc_score
 )
-from sqlalchemy.orm import Session
 from app.database import get_db
+from app.ml.model_registry import ModelRegistry, ModelNotLoadedError, get_model_registry
+from app.ml.feature_store import FeatureStore, get_feature_store
+from app.ml.season_simulator import (
+    PLAYOFF_SPOTS,
+    SEASON_SIMULATIONS,
+    SeasonSimulator,
+    fixture_probabilities,
+    season_par,
+    season_table
+)
 
 router = APIRouter(
     prefix="/api/match-prediction",
@@ -33,142 +42,167 @@ class ModelPerformanceResponse(BaseModel):
     classification_report: Dict[str, Dict[str, float]]
     roc_auc: float
 
+# Upper bound on fixtures per batch request
+MAX_BATCH_FIXTURES = 500
+
+class BatchMatchPredictionRequest(BaseModel):
+    fixtures: List[MatchPredictionRequest]
+
+class SeasonFixture(BaseModel):
+    team1: str
+    team2: str
+    venue: str
+    team1_win_probability: Optional[float] = None  # overrides the model for this fixture
+
+class SeasonSimulationRequest(BaseModel):
+    season: int
+    fixtures: List[SeasonFixture]
+    simulations: int = SEASON_SIMULATIONS
+    playoff_spots: int = PLAYOFF_SPOTS
+    seed: Optional[int] = None
+
+def get_loaded_feature_store() -> FeatureStore:
+    """Dependency returning the feature store, or 503 until it has been built."""
+    store = get_feature_store()
+    if store is None:
+        raise HTTPException(status_code=503, detail="Feature store is not loaded")
+    return store
+
+def select_model_features(features_df: pd.DataFrame, active) -> np.ndarray:
+    """Feature matrix in the column order the active model was trained with."""
+    missing = [c for c in active.feature_columns if c not in features_df.columns]
+    if missing:
+        raise ValueError(
+            f"Model version {active.version} expects features the feature store does not provide: {missing}"
+        )
+    return features_df[active.feature_columns].values
+
+def predict_fixtures(store: FeatureStore, active, fixtures: List[MatchPredictionRequest]) -> List[Dict]:
+    """Look up features for all fixtures and score them with one predict_proba call."""
+    features_df = store.features_for([fixture.model_dump() for fixture in fixtures])
+    probabilities = active.model.predict_proba(select_model_features(features_df, active))
+
+    team1_win = probabilities[:, 1]
+    return [
+        {
+            "team1": fixture.team1,
+            "team2": fixture.team2,
+            "team1_win_probability": float(p1),
+            "team2_win_probability": float(1 - p1),
+            "prediction": fixture.team1 if p1 > 0.5 else fixture.team2,
+            "model_version": active.version
+        }
+        for fixture, p1 in zip(fixtures, team1_win)
+    ]
+
 @router.post("/predict")
 def predict_match_outcome(
     prediction_request: MatchPredictionRequest,
-    db: Session = Depends(get_db)
+    store: FeatureStore = Depends(get_loaded_feature_store),
+    registry: ModelRegistry = Depends(get_model_registry)
 ):
     try:
-        # Load the trained model and feature columns
-        model = joblib.load('models/advanced_ipl_predictor.joblib')
-        feature_columns = joblib.load('models/feature_columns.joblib')
-        
-        # Fetch comprehensive match data for feature engineering
-        query = f"""
-        SELECT 
-            team1_win_percentage, 
-            team2_win_percentage,
-            -- Add other feature columns from your advanced feature engineering
-            COALESCE(team1_recent_win_rate, 0.5) as team1_recent_win_rate,
-            COALESCE(team2_recent_win_rate, 0.5) as team2_recent_win_rate,
-            COALESCE(venue_win_rate, 0.5) as venue_win_rate
-        FROM match_info m
-        LEFT JOIN (
-            SELECT 
-                team_name, 
-                AVG(win_percentage) as team1_recent_win_rate
-            FROM team_season_stats
-            WHERE season = {prediction_request.season}
-            GROUP BY team_name
-        ) t1 ON m.team1 = t1.team_name
-        LEFT JOIN (
-            SELECT 
-                team_name, 
-                AVG(win_percentage) as team2_recent_win_rate
-            FROM team_season_stats
-            WHERE season = {prediction_request.season}
-            GROUP BY team_name
-        ) t2 ON m.team2 = t2.team_name
-        LEFT JOIN (
-            SELECT 
-                venue, 
-                AVG(CASE WHEN winner = team1 THEN 1.0 ELSE 0.0 END) as venue_win_rate
-            FROM match_info
-            WHERE season = {prediction_request.season}
-            GROUP BY venue
-        ) v ON m.venue = v.venue
-        WHERE 
-            m.team1 = '{prediction_request.team1}' AND 
-            m.team2 = '{prediction_request.team2}' AND
-            m.venue = '{prediction_request.venue}' AND
-            m.season = {prediction_request.season}
-        LIMIT 1
-        """
-        
-        # Execute the query
-        features_df = pd.read_sql(query, db.bind)
-        
-        # If no exact match found, use default values
-        if features_df.empty:
-            features_df = pd.DataFrame({
-                'team1_win_percentage': [0.5],
-                'team2_win_percentage': [0.5],
-                'team1_recent_win_rate': [0.5],
-                'team2_recent_win_rate': [0.5],
-                'venue_win_rate': [0.5]
-            })
-        
-        # Prepare features
-        features = features_df[feature_columns].values
-        
-        # Predict probabilities
-        probabilities = model.predict_proba(features)[0]
-        
+        # Model and feature columns are loaded once by the registry
+        active = registry.active()
+        return predict_fixtures(store, active, [prediction_request])[0]
+    
+    except ModelNotLoadedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/predict/batch")
+def predict_match_outcomes(
+    batch_request: BatchMatchPredictionRequest,
+    store: FeatureStore = Depends(get_loaded_feature_store),
+    registry: ModelRegistry = Depends(get_model_registry)
+):
+    """Predict a whole fixture list with feature-store lookups and one predict_proba call."""
+    fixtures = batch_request.fixtures
+    if not fixtures:
+        return {"model_version": None, "count": 0, "predictions": []}
+    if len(fixtures) > MAX_BATCH_FIXTURES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_FIXTURES} fixtures per request, got {len(fixtures)}"
+        )
+
+    try:
+        active = registry.active()
+        predictions = predict_fixtures(store, active, fixtures)
         return {
-            "team1": prediction_request.team1,
-            "team2": prediction_request.team2,
-            "team1_win_probability": probabilities[1],
-            "team2_win_probability": probabilities[0],
-            "prediction": prediction_request.team1 if probabilities[1] > 0.5 else prediction_request.team2
+            "model_version": active.version,
+            "count": len(predictions),
+            "predictions": predictions
         }
-    
+
+    except ModelNotLoadedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/season-simulation")
+def simulate_season(
+    simulation_request: SeasonSimulationRequest,
+    db: Session = Depends(get_db),
+    registry: ModelRegistry = Depends(get_model_registry)
+):
+    """Playoff chances from the season's table so far and its remaining fixtures."""
+    fixtures = simulation_request.fixtures
+    if len(fixtures) > MAX_BATCH_FIXTURES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_FIXTURES} fixtures per request, got {len(fixtures)}"
+        )
+
+    try:
+        season = simulation_request.season
+        table = season_table(db, season)
+
+        # Fixtures without a given probability are scored by the active model in one batch
+        probabilities = np.array([
+            np.nan if fixture.team1_win_probability is None else fixture.team1_win_probability
+            for fixture in fixtures
+        ])
+        unscored = np.flatnonzero(np.isnan(probabilities))
+        model_version = None
+        if len(unscored):
+            active = registry.active()
+            probabilities[unscored] = fixture_probabilities(
+                get_loaded_feature_store(), active, season, [fixtures[i].model_dump() for i in unscored]
+            )
+            model_version = active.version
+
+        simulator = SeasonSimulator(table, [fixture.model_dump() for fixture in fixtures], probabilities,
+                                    season_par(db, season))
+        result = simulator.run(simulation_request.simulations, simulation_request.playoff_spots,
+                               simulation_request.seed)
+        return {"season": season, "model_version": model_version, **result}
+
+    except HTTPException:
+        raise
+    except ModelNotLoadedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/model-performance")
-def get_model_performance(db: Session = Depends(get_db)):
+def get_model_performance(
+    store: FeatureStore = Depends(get_loaded_feature_store),
+    registry: ModelRegistry = Depends(get_model_registry)
+):
     try:
-        # Load the trained model and feature columns
-        model = joblib.load('models/advanced_ipl_predictor.joblib')
-        feature_columns = joblib.load('models/feature_columns.joblib')
-        
-        # Fetch comprehensive test dataset
-        query = """
-        SELECT 
-            team1, 
-            team2, 
-            venue, 
-            season, 
-            winner,
-            team1_win_percentage, 
-            team2_win_percentage,
-            -- Add other feature columns from your advanced feature engineering
-            COALESCE(team1_recent_win_rate, 0.5) as team1_recent_win_rate,
-            COALESCE(team2_recent_win_rate, 0.5) as team2_recent_win_rate,
-            COALESCE(venue_win_rate, 0.5) as venue_win_rate
-        FROM match_info m
-        LEFT JOIN (
-            SELECT 
-                team_name, 
-                season,
-                AVG(win_percentage) as team1_recent_win_rate
-            FROM team_season_stats
-            GROUP BY team_name, season
-        ) t1 ON m.team1 = t1.team_name AND m.season = t1.season
-        LEFT JOIN (
-            SELECT 
-                team_name, 
-                season,
-                AVG(win_percentage) as team2_recent_win_rate
-            FROM team_season_stats
-            GROUP BY team_name, season
-        ) t2 ON m.team2 = t2.team_name AND m.season = t2.season
-        LEFT JOIN (
-            SELECT 
-                venue, 
-                season,
-                AVG(CASE WHEN winner = team1 THEN 1.0 ELSE 0.0 END) as venue_win_rate
-            FROM match_info
-            GROUP BY venue, season
-        ) v ON m.venue = v.venue AND m.season = v.season
-        """
+        active = registry.active()
+        model = active.model
         
-        # Execute the query
-        test_df = pd.read_sql(query, db.bind)
+        # Point-in-time features for every decided match, as used in training
+        test_df = store.training_frame()
         
         # Prepare features and target
-        X_test = test_df[feature_columns]
-        y_test = (test_df['winner'] == test_df['team1']).astype(int)
+        X_test = select_model_features(test_df, active)
+        y_test = test_df['match_result']
         
         # Predict
         y_pred = model.predict(X_test)
@@ -187,5 +221,29 @@ def get_model_performance(db: Session = Depends(get_db)):
             roc_auc=roc_auc
         )
     
+    except ModelNotLoadedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/models")
+def get_model_status(registry: ModelRegistry = Depends(get_model_registry)):
+    """Active model version, its load time and the versions known to the registry."""
+    return registry.status()
+
+@router.post("/models/reload")
+def reload_models(registry: ModelRegistry = Depends(get_model_registry)):
+    """Pick up a new training run now instead of waiting for the next poll."""
+    registry.refresh()
+    return registry.status()
+
+@router.post("/models/{version}/activate")
+def activate_model_version(version: str, registry: ModelRegistry = Depends(get_model_registry)):
+    """Pin a specific training run, e.g. to roll back a bad model."""
+    try:
+        registry.activate(version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ModelNotLoadedError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return registry.status()
\ No newline at end of file
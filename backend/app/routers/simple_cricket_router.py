@@ -1,42 +1,47 @@
 from fastapi import APIRouter, HTTPException, Query
-import requests
 from typing import Dict, Any, List, Optional
 
+from app.utils.cricket_api_service import API_KEY
+from app.utils.http_client import cricapi_client, CircuitOpenError, UpstreamError, UpstreamTimeout
+
 router = APIRouter(
     prefix="/api/cricket",
     tags=["Cricket API"],
 )
 
-# API Configuration
-API_BASE_URL = "https://api.cricapi.com/v1"
-API_KEY = "52b08390-6e7b-4233-b038-b39ed015ede7"  # Your API key
+# Handlers await the shared pooled client: every call has a deadline, is
+# retried on transient failures and fails fast while the upstream is down.
+
+
+def upstream_http_error(e: UpstreamError, what: str) -> HTTPException:
+    """Map an upstream failure to the status this API answers with"""
+    if isinstance(e, CircuitOpenError):
+        return HTTPException(status_code=503, detail=f"Cricket API unavailable, {what} not fetched: {str(e)}")
+    if isinstance(e, UpstreamTimeout):
+        return HTTPException(status_code=504, detail=f"Timed out fetching {what}: {str(e)}")
+    return HTTPException(status_code=502, detail=f"API request failed fetching {what}: {str(e)}")
+
 
 @router.get("/matches")
 async def get_matches(limit: int = Query(20, description="Number of matches to return")):
     """
     Get current and upcoming cricket matches directly from the Cricket API.
     """
-    endpoint = f"{API_BASE_URL}/matches"
     params = {
         "apikey": API_KEY,
         "offset": 0
     }
     
     try:
-        response = requests.get(endpoint, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            if "data" in data:
-                # Return only the number of matches requested
-                limited_data = data["data"][:limit] if limit > 0 else data["data"]
-                return {"matches": limited_data, "count": len(limited_data)}
-            else:
-                return {"matches": [], "count": 0, "message": "No match data found"}
+        data = await cricapi_client.get("matches", params)
+        if "data" in data:
+            # Return only the number of matches requested
+            limited_data = data["data"][:limit] if limit > 0 else data["data"]
+            return {"matches": limited_data, "count": len(limited_data)}
         else:
-            raise HTTPException(
-                status_code=response.status_code, 
-                detail=f"API request failed: {response.text}"
-            )
+            return {"matches": [], "count": 0, "message": "No match data found"}
+    except UpstreamError as e:
+        raise upstream_http_error(e, "matches")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching matches: {str(e)}")
 
@@ -45,34 +50,26 @@ async def get_match_details(match_id: str):
     """
     Get detailed information for a specific cricket match.
     """
-    endpoint = f"{API_BASE_URL}/match_info"
     params = {
         "apikey": API_KEY,
         "id": match_id
     }
     
     try:
-        response = requests.get(endpoint, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            if "data" in data:
-                return data["data"]
-            else:
-                raise HTTPException(status_code=404, detail="Match details not found")
-        else:
-            raise HTTPException(
-                status_code=response.status_code, 
-                detail=f"API request failed: {response.text}"
-            )
+        data = await cricapi_client.get("match_info", params)
+    except UpstreamError as e:
+        raise upstream_http_error(e, "match details")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching match details: {str(e)}")
+    if "data" in data:
+        return data["data"]
+    raise HTTPException(status_code=404, detail="Match details not found")
 
 @router.get("/series")
 async def get_series(search: Optional[str] = None):
     """
     Get cricket series information or search for series.
     """
-    endpoint = f"{API_BASE_URL}/series"
     params = {
         "apikey": API_KEY,
         "offset": 0
@@ -82,18 +79,13 @@ async def get_series(search: Optional[str] = None):
         params["search"] = search
     
     try:
-        response = requests.get(endpoint, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            if "data" in data:
-                return {"series": data["data"], "count": len(data["data"])}
-            else:
-                return {"series": [], "count": 0, "message": "No series data found"}
+        data = await cricapi_client.get("series", params)
+        if "data" in data:
+            return {"series": data["data"], "count": len(data["data"])}
         else:
-            raise HTTPException(
-                status_code=response.status_code, 
-                detail=f"API request failed: {response.text}"
-            )
+            return {"series": [], "count": 0, "message": "No series data found"}
+    except UpstreamError as e:
+        raise upstream_http_error(e, "series")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching series: {str(e)}")
 
@@ -102,34 +94,26 @@ async def get_series_details(series_id: str):
     """
     Get detailed information for a specific cricket series.
     """
-    endpoint = f"{API_BASE_URL}/series_info"
     params = {
         "apikey": API_KEY,
         "id": series_id
     }
     
     try:
-        response = requests.get(endpoint, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            if "data" in data:
-                return data["data"]
-            else:
-                raise HTTPException(status_code=404, detail="Series details not found")
-        else:
-            raise HTTPException(
-                status_code=response.status_code, 
-                detail=f"API request failed: {response.text}"
-            )
+        data = await cricapi_client.get("series_info", params)
+    except UpstreamError as e:
+        raise upstream_http_error(e, "series details")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching series details: {str(e)}")
+    if "data" in data:
+        return data["data"]
+    raise HTTPException(status_code=404, detail="Series details not found")
 
 @router.get("/players")
 async def search_players(search: str = Query(..., description="Player name to search for")):
     """
     Search for cricket players by name.
     """
-    endpoint = f"{API_BASE_URL}/players"
     params = {
         "apikey": API_KEY,
         "offset": 0,
@@ -137,18 +121,13 @@ async def search_players(search: str = Query(..., description="Player name to se
     }
     
     try:
-        response = requests.get(endpoint, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            if "data" in data:
-                return {"players": data["data"], "count": len(data["data"])}
-            else:
-                return {"players": [], "count": 0, "message": "No players found"}
+        data = await cricapi_client.get("players", params)
+        if "data" in data:
+            return {"players": data["data"], "count": len(data["data"])}
         else:
-            raise HTTPException(
-                status_code=response.status_code, 
-                detail=f"API request failed: {response.text}"
-            )
+            return {"players": [], "count": 0, "message": "No players found"}
+    except UpstreamError as e:
+        raise upstream_http_error(e, "players")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error searching players: {str(e)}")
 
@@ -157,24 +136,17 @@ async def get_player_details(player_id: str):
     """
     Get detailed information for a specific cricket player.
     """
-    endpoint = f"{API_BASE_URL}/players_info"
     params = {
         "apikey": API_KEY,
         "id": player_id
     }
     
     try:
-        response = requests.get(endpoint, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            if "data" in data:
-                return data["data"]
-            else:
-                raise HTTPException(status_code=404, detail="Player details not found")
-        else:
-            raise HTTPException(
-                status_code=response.status_code, 
-                detail=f"API request failed: {response.text}"
-            )
+        data = await cricapi_client.get("players_info", params)
+    except UpstreamError as e:
+        raise upstream_http_error(e, "player details")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching player details: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error fetching player details: {str(e)}")
+    if "data" in data:
+        return data["data"]
+    raise HTTPException(status_code=404, detail="Player details not found")
@@ -6,6 +6,8 @@ from datetime import datetime
 
 # Import your database connection
 from app.database import get_db
+from app.services.delivery_store import get_delivery_store
+from app.services.team_form import TeamForm, get_team_form
 # Import helper functions and models
 from app.models.team import TeamPerformance, WinPercentage, WinningStreak, RecentPerformance, HomeAwayPerformance, OpponentPerformance
 
@@ -22,6 +24,10 @@ def calculate_win_percentage(wins, total_matches):
 
 def get_all_matches(db: Session):
     """Fetch all matches data from the database"""
+    store = get_delivery_store()
+    if store is not None:
+        return store.matches_frame(columns=["filename", "match_date", "team1", "team2", "winner", "venue", "city", "season"])
+    
     # Using match_info table for match details
     query = """
     SELECT 
@@ -33,6 +39,13 @@ def get_all_matches(db: Session):
     """
     return pd.read_sql(query, db.bind)
 
+def get_form_engine(db: Session) -> TeamForm:
+    """The cached team form engine, or one built from this request's matches if it is not loaded"""
+    form = get_team_form()
+    if form is not None:
+        return form
+    return TeamForm(get_all_matches(db))
+
 def get_team_names(db: Session):
     """Get list of all team names"""
     query = """
@@ -69,120 +82,38 @@ def get_teams(db: Session = Depends(get_db)):
 @router.get("/{team}/win-percentage", response_model=WinPercentage)
 def get_team_win_percentage(team: str, season: Optional[int] = None, db: Session = Depends(get_db)):
     """Get win percentage for a specific team, optionally filtered by season"""
-    matches_df = get_all_matches(db)
-    
-    # Filter for the specific team
-    team_matches = matches_df[(matches_df['team1'] == team) | (matches_df['team2'] == team)]
-    
-    if season:
-        team_matches = team_matches[team_matches['season'] == season]
+    record = get_form_engine(db).record(team, season if season else None)
     
-    if team_matches.empty:
+    if record["matches"] == 0:
         raise HTTPException(status_code=404, detail=f"No matches found for team: {team}")
     
-    # Calculate in Python
-    total_matches = len(team_matches)
-    total_wins = len(team_matches[team_matches['winner'] == team])
-    win_percentage = calculate_win_percentage(total_wins, total_matches)
-    
     return {
         "team": team,
-        "total_matches": total_matches,
-        "wins": total_wins,
-        "win_percentage": win_percentage,
+        "total_matches": record["matches"],
+        "wins": record["wins"],
+        "win_percentage": calculate_win_percentage(record["wins"], record["matches"]),
         "season": season if season else "all"
     }
 
 @router.get("/{team}/winning-streak", response_model=WinningStreak)
 def get_team_winning_streak(team: str, db: Session = Depends(get_db)):
-    """Calculate current and longest winning streak for a team"""
-    matches_df = get_all_matches(db)
+    """Calculate current and longest winning and losing streaks for a team"""
+    streaks = get_form_engine(db).streaks(team)
     
-    # Filter for matches involving the team
-    team_matches = matches_df[(matches_df['team1'] == team) | (matches_df['team2'] == team)]
-    
-    if team_matches.empty:
+    if streaks is None:
         raise HTTPException(status_code=404, detail=f"No matches found for team: {team}")
     
-    # Sort matches by date
-    team_matches['match_date'] = pd.to_datetime(team_matches['match_date'], errors='coerce')
-    team_matches = team_matches.sort_values('match_date')
-    
-    # Create a new column indicating if the team won
-    team_matches['team_won'] = team_matches['winner'] == team
-    
-    # Calculate longest winning streak
-    max_win_streak = 0
-    current_win_streak = 0
-    
-    results = team_matches['team_won'].tolist()
-    
-    for result in results:
-        if result:  # Team won
-            current_win_streak += 1
-            max_win_streak = max(max_win_streak, current_win_streak)
-        else:  # Team lost or tied
-            current_win_streak = 0
-    
-    # Calculate current streak
-    current_streak = 0
-    current_streak_type = None
-    
-    # Reverse to get most recent matches first
-    reversed_results = results[::-1]
-    
-    if reversed_results:
-        current_streak_type = "win" if reversed_results[0] else "loss"
-        current_streak = 1
-        
-        for i in range(1, len(reversed_results)):
-            if (current_streak_type == "win" and reversed_results[i]) or \
-               (current_streak_type == "loss" and not reversed_results[i]):
-                current_streak += 1
-            else:
-                break
-    
-    return {
-        "team": team,
-        "current_streak": {
-            "type": current_streak_type if current_streak_type else "none",
-            "count": current_streak
-        },
-        "longest_winning_streak": max_win_streak
-    }
+    return {"team": team, **streaks}
 
 @router.get("/{team}/recent-performance", response_model=RecentPerformance)
 def get_team_recent_performance(team: str, matches: int = 5, db: Session = Depends(get_db)):
     """Get performance in last N matches"""
-    matches_df = get_all_matches(db)
+    form = get_form_engine(db)
     
-    # Filter for matches involving the team
-    team_matches = matches_df[(matches_df['team1'] == team) | (matches_df['team2'] == team)]
-    
-    if team_matches.empty:
+    if form.code(team) is None:
         raise HTTPException(status_code=404, detail=f"No matches found for team: {team}")
     
-    # Sort matches by date descending
-    team_matches['match_date'] = pd.to_datetime(team_matches['match_date'], errors='coerce')
-    team_matches = team_matches.sort_values('match_date', ascending=False)
-    
-    # Take only the last N matches
-    recent_matches = team_matches.head(matches)
-    
-    results = []
-    for _, match in recent_matches.iterrows():
-        opponent = match['team2'] if match['team1'] == team else match['team1']
-        match_result = "win" if match['winner'] == team else "loss"
-        
-        results.append({
-            "match_id": match['filename'],
-            "date": match['match_date'].strftime("%Y-%m-%d") if not pd.isna(match['match_date']) else None,
-            "opponent": opponent,
-            "result": match_result,
-            "venue": match['venue']
-        })
-    
-    # Calculate summary
+    results = form.recent(team, matches)
     wins = sum(1 for match in results if match['result'] == "win")
     
     return {
@@ -243,32 +174,13 @@ def get_team_home_away_performance(team: str, db: Session = Depends(get_db)):
 @router.get("/{team}/opponent-performance/{opponent}", response_model=OpponentPerformance)
 def get_team_opponent_performance(team: str, opponent: str, db: Session = Depends(get_db)):
     """Calculate performance against a specific opponent"""
-    matches_df = get_all_matches(db)
-    
-    # Filter for matches between these two teams
-    team_vs_opponent = matches_df[
-        ((matches_df['team1'] == team) & (matches_df['team2'] == opponent)) |
-        ((matches_df['team1'] == opponent) & (matches_df['team2'] == team))
-    ]
+    match_history = get_form_engine(db).against(team, opponent)
     
-    if team_vs_opponent.empty:
+    if not match_history:
         raise HTTPException(status_code=404, detail=f"No matches found between {team} and {opponent}")
     
-    # Calculate wins against this opponent
-    total_matches = len(team_vs_opponent)
-    wins = len(team_vs_opponent[team_vs_opponent['winner'] == team])
-    win_percentage = calculate_win_percentage(wins, total_matches)
-    
-    # Get history of all matches
-    match_history = []
-    for _, match in team_vs_opponent.iterrows():
-        match_history.append({
-            "match_id": match['filename'],
-            "date": match['match_date'].strftime("%Y-%m-%d") if not pd.isna(match['match_date']) else None,
-            "winner": match['winner'],
-            "venue": match['venue'],
-            "season": match['season']
-        })
+    total_matches = len(match_history)
+    wins = sum(1 for match in match_history if match['winner'] == team)
     
     return {
         "team": team,
@@ -276,7 +188,7 @@ def get_team_opponent_performance(team: str, opponent: str, db: Session = Depend
         "total_matches": total_matches,
         "wins": wins,
         "losses": total_matches - wins,
-        "win_percentage": win_percentage,
+        "win_percentage": calculate_win_percentage(wins, total_matches),
         "match_history": match_history
     }
 
@@ -284,40 +196,28 @@ def get_team_opponent_performance(team: str, opponent: str, db: Session = Depend
 def get_teams_performance_comparison(db: Session = Depends(get_db)):
     """Compare performance metrics for all teams"""
     teams = get_team_names(db)
-    matches_df = get_all_matches(db)
+    
+    # Overall and last-5 records for every team in one pass
+    form = get_form_engine(db).form(5).set_index("team")
     
     comparison = []
     for team in teams:
-        # Filter for matches involving the team
-        team_matches = matches_df[(matches_df['team1'] == team) | (matches_df['team2'] == team)]
-        
-        if team_matches.empty:
+        if team not in form.index:
             continue
-        
-        # Calculate wins
-        wins = len(team_matches[team_matches['winner'] == team])
-        total_matches = len(team_matches)
-        win_percentage = calculate_win_percentage(wins, total_matches)
-        
-        # Sort by date and get last 5 matches
-        team_matches['match_date'] = pd.to_datetime(team_matches['match_date'], errors='coerce')
-        recent_matches = team_matches.sort_values('match_date', ascending=False).head(5)
-        recent_wins = len(recent_matches[recent_matches['winner'] == team])
-        recent_win_percentage = calculate_win_percentage(recent_wins, len(recent_matches))
-        
+        row = form.loc[team].astype(int).to_dict()
         comparison.append({
             "team": team,
-            "total_matches": total_matches,
-            "wins": wins,
-            "win_percentage": win_percentage,
+            "total_matches": row["matches"],
+            "wins": row["wins"],
+            "win_percentage": calculate_win_percentage(row["wins"], row["matches"]),
             "recent_form": {
-                "matches": len(recent_matches),
-                "wins": recent_wins,
-                "win_percentage": recent_win_percentage
+                "matches": row["recent_matches"],
+                "wins": row["recent_wins"],
+                "win_percentage": calculate_win_percentage(row["recent_wins"], row["recent_matches"])
             }
         })
     
     # Sort by overall win percentage
     comparison.sort(key=lambda x: x["win_percentage"], reverse=True)
     
-    return comparison
\ No newline at end of file
+    return comparison
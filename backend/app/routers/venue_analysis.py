@@ -7,6 +7,7 @@ from datetime import datetime
 
 from app.database import get_db
 from app.utils.db_utils import query_to_dataframe, execute_raw_sql
+from app.services.venue_stats import PHASES, VenueStats, get_venue_stats
 from app.models.venue import (
     VenueBasic, 
     VenueDetailResponse, 
@@ -27,59 +28,31 @@ router = APIRouter(
 
 def get_match_data_by_venue(db: Session, venue_name: Optional[str] = None, team: Optional[str] = None, season: Optional[int] = None):
     """
-    Retrieve match data filtered by venue, team, and season
-    """
-    # Get match info data
-    match_query = """
-    SELECT filename, season, match_date, venue, city, team1, team2, 
-           toss_winner, toss_decision, winner, margin, player_of_match
-    FROM match_info
-    WHERE 1=1
-    """
-    
-    params = {}
-    
-    # Add venue filter if specified
-    if venue_name:
-        match_query += " AND venue = :venue"
-        params["venue"] = venue_name
-    
-    # Add team filter if specified
-    if team:
-        match_query += " AND (team1 = :team OR team2 = :team)"
-        params["team"] = team
+    Retrieve matches and innings-level aggregates filtered by venue, team, and season
     
-    # Add season filter if specified
-    if season:
-        match_query += " AND season = :season"
-        params["season"] = season
+    Answered from the cached venue aggregates when they are loaded; otherwise
+    the aggregation is pushed down to the database for just this filter.
     
-    # Execute match query
-    matches_df = query_to_dataframe(db, match_query, params)
+    Returns:
+        VenueSlice: matches, innings totals, batting runs and bowling wickets
+    """
+    stats = get_venue_stats()
+    if stats is None:
+        stats = VenueStats.from_database(db.bind, venue=venue_name, team=team, season=season or None)
+    data = stats.select(venue=venue_name, team=team, season=season or None)
     
-    if matches_df.empty:
+    if data.matches.empty:
         if venue_name:
             raise HTTPException(status_code=404, detail=f"No data found for venue: {venue_name}")
         else:
             raise HTTPException(status_code=404, detail="No match data found")
     
-    # Get innings data for these matches
-    filenames = matches_df['filename'].tolist()
-    filename_placeholders = ','.join([f":{i}" for i in range(len(filenames))])
-    filename_params = {str(i): filename for i, filename in enumerate(filenames)}
-    
-    innings_query = f"""
-    SELECT filename, innings_type, team, over_ball, batsman, bowler, 
-           non_striker, runs_batsman, runs_total, extras_type, 
-           extras_runs, wicket_details
-    FROM innings_data
-    WHERE filename IN ({filename_placeholders})
-    """
-    
-    # Execute innings query
-    innings_df = query_to_dataframe(db, innings_query, filename_params)
-    
-    return matches_df, innings_df
+    return data
+
+
+def innings_scores(innings_df: pd.DataFrame, innings_type: str) -> pd.Series:
+    """Total runs per match in one innings"""
+    return innings_df[innings_df["innings_type"] == innings_type].groupby("filename")["runs_total"].sum()
 
 
 @router.get("/venues", response_model=VenueListResponse)
@@ -120,7 +93,8 @@ def get_venue_details(
     Get detailed statistics for a specific venue
     """
     # Get match data for the venue
-    matches_df, innings_df = get_match_data_by_venue(db, venue_name=venue_name, season=season)
+    data = get_match_data_by_venue(db, venue_name=venue_name, season=season)
+    matches_df, innings_df = data.matches, data.innings
     
     total_matches = len(matches_df)
     city = matches_df["city"].iloc[0] if "city" in matches_df.columns else None
@@ -200,15 +174,15 @@ def get_venue_details(
     batting_first_win_percentage = batting_first_win_count / total_batting_first * 100 if total_batting_first > 0 else 0
     
     # Player stats at the venue
-    batsman_runs = innings_df.groupby("batsman")["runs_batsman"].sum().reset_index()
-    most_runs_player = batsman_runs.sort_values("runs_batsman", ascending=False).iloc[0] if not batsman_runs.empty else {"batsman": "Unknown", "runs_batsman": 0}
+    batsman_runs = data.batting.groupby("batsman")["runs"].sum().reset_index()
+    most_runs_player = batsman_runs.sort_values("runs", ascending=False).iloc[0] if not batsman_runs.empty else {"batsman": "Unknown", "runs": 0}
     
-    bowler_wickets = innings_df[innings_df["wicket_details"].notna()].groupby("bowler").size().reset_index(name="wickets")
+    bowler_wickets = data.bowling.groupby("bowler")["wickets"].sum().reset_index()
     most_wickets_player = bowler_wickets.sort_values("wickets", ascending=False).iloc[0] if not bowler_wickets.empty else {"bowler": "Unknown", "wickets": 0}
     
     most_runs = {
         "player": most_runs_player.get("batsman", "Unknown"),
-        "runs": int(most_runs_player.get("runs_batsman", 0)),
+        "runs": int(most_runs_player.get("runs", 0)),
     }
     
     most_wickets = {
@@ -246,7 +220,8 @@ def get_team_performance_at_venue(
     Get performance statistics for all teams at a specific venue
     """
     # Get match data for the venue
-    matches_df, innings_df = get_match_data_by_venue(db, venue_name=venue_name, season=season)
+    data = get_match_data_by_venue(db, venue_name=venue_name, season=season)
+    matches_df, innings_df = data.matches, data.innings
     
     total_matches = len(matches_df)
     city = matches_df["city"].iloc[0] if "city" in matches_df.columns else None
@@ -299,30 +274,27 @@ def get_team_performance_at_venue(
                 "match_date": "Unknown",
             }
         
-        # Team's bowling performance - find wickets taken against opposition
-        opposition_teams = []
-        for _, match in team_matches.iterrows():
-            if match["team1"] == team:
-                opposition_teams.append(match["team2"])
-            else:
-                opposition_teams.append(match["team1"])
-        
-        # Find innings where opposition teams were batting
+        # Team's bowling performance - wickets taken in the opposition's innings
+        team_filenames = team_matches["filename"].tolist()
         opposition_batting = innings_df[
-            (innings_df["team"].isin(opposition_teams)) & 
-            (innings_df["filename"].isin(team_matches["filename"].tolist()))
+            (innings_df["team"] != team) & 
+            (innings_df["filename"].isin(team_filenames))
         ]
         
-        # Count wickets
-        wickets_taken = opposition_batting[opposition_batting["wicket_details"].notna()]
-        wickets_by_match = wickets_taken.groupby("filename").size()
+        # Average over the matches in which the team took a wicket
+        wickets_by_match = opposition_batting.groupby("filename")["wickets"].sum()
+        wickets_by_match = wickets_by_match[wickets_by_match > 0]
         avg_wickets = wickets_by_match.mean() if not wickets_by_match.empty else 0
         
         # Find best bowling performance
         best_bowling_data = {}
+        wickets_taken = data.bowling[
+            (data.bowling["team"] != team) & 
+            (data.bowling["filename"].isin(team_filenames))
+        ]
         if not wickets_taken.empty:
-            # Group by filename and bowler to get wickets per bowler per match
-            bowler_match_wickets = wickets_taken.groupby(["filename", "bowler"]).size().reset_index(name="wickets")
+            # Wickets per bowler per match
+            bowler_match_wickets = wickets_taken.groupby(["filename", "bowler"])["wickets"].sum().reset_index()
             
             # Filter for bowlers likely from this team
             # Note: This is an approximation since we don't have direct team-bowler mapping
@@ -380,7 +352,8 @@ def get_venue_pitch_characteristics(
     Analyze pitch characteristics for a specific venue
     """
     # Get match data for the venue
-    matches_df, innings_df = get_match_data_by_venue(db, venue_name=venue_name)
+    data = get_match_data_by_venue(db, venue_name=venue_name)
+    matches_df, innings_df = data.matches, data.innings
     
     city = matches_df["city"].iloc[0] if "city" in matches_df.columns else None
     total_matches = len(matches_df)
@@ -396,33 +369,36 @@ def get_venue_pitch_characteristics(
     avg_second_innings = second_innings_scores.mean() if not second_innings_scores.empty else 0
     
     # Calculate average run rate
-    total_balls = len(innings_df)
+    total_balls = innings_df["balls"].sum()
     total_runs = innings_df["runs_total"].sum()
     avg_run_rate = (total_runs / (total_balls/6)) if total_balls > 0 else 0  # Convert to per over
     
+    # Run rate in each phase of the innings
+    phase_run_rates = {}
+    for phase, _, _ in PHASES:
+        phase_balls = innings_df[f"{phase}_balls"].sum()
+        phase_run_rates[phase] = float(innings_df[f"{phase}_runs"].sum() / (phase_balls/6)) if phase_balls > 0 else 0.0
+    
     # Count boundaries
-    fours = len(innings_df[innings_df["runs_batsman"] == 4])
-    sixes = len(innings_df[innings_df["runs_batsman"] == 6])
+    fours = innings_df["fours"].sum()
+    sixes = innings_df["sixes"].sum()
     
     avg_boundaries = {
-        "fours": fours / total_matches if total_matches > 0 else 0,
-        "sixes": sixes / total_matches if total_matches > 0 else 0
+        "fours": float(fours / total_matches) if total_matches > 0 else 0,
+        "sixes": float(sixes / total_matches) if total_matches > 0 else 0
     }
     
     # Count wickets
-    total_wickets = len(innings_df[innings_df["wicket_details"].notna()])
+    total_wickets = innings_df["wickets"].sum()
     avg_wickets = total_wickets / total_matches if total_matches > 0 else 0
     
     # Analyze spin vs pace effectiveness
-    # Assuming we can identify spinners and pacers by name patterns
-    spinners = innings_df[innings_df["bowler"].str.contains("spin|Spin|Chahal|Ashwin|Jadeja|Rashid|Tahir|Narine", case=False, na=False)]
-    pacers = innings_df[innings_df["bowler"].str.contains("pace|Pace|Bumrah|Shami|Steyn|Malinga|Cummins|Archer", case=False, na=False)]
+    # Spinners and pacers are identified by name patterns when the aggregates are built
+    spin_wickets = innings_df["spin_wickets"].sum()
+    pace_wickets = innings_df["pace_wickets"].sum()
     
-    spin_wickets = len(spinners[spinners["wicket_details"].notna()])
-    pace_wickets = len(pacers[pacers["wicket_details"].notna()])
-    
-    spin_balls = len(spinners)
-    pace_balls = len(pacers)
+    spin_balls = innings_df["spin_balls"].sum()
+    pace_balls = innings_df["pace_balls"].sum()
     
     spin_effectiveness = (spin_wickets / spin_balls * 100) if spin_balls > 0 else 0
     pace_effectiveness = (pace_wickets / pace_balls * 100) if pace_balls > 0 else 0
@@ -458,7 +434,8 @@ def get_venue_pitch_characteristics(
         pace_effectiveness=float(min(10, max(0, pace_effectiveness / 10))),
         avg_first_innings_score=float(avg_first_innings),
         avg_second_innings_score=float(avg_second_innings),
-        historic_pitch_behavior=behavior
+        historic_pitch_behavior=behavior,
+        phase_run_rates=phase_run_rates
     )
 
 
@@ -474,7 +451,8 @@ def get_venue_matches(
     Get list of matches played at a specific venue
     """
     # Get match data for the venue
-    matches_df, innings_df = get_match_data_by_venue(db, venue_name=venue_name, team=team, season=season)
+    data = get_match_data_by_venue(db, venue_name=venue_name, team=team, season=season)
+    matches_df = data.matches.copy()
     
     total_matches = len(matches_df)
     city = matches_df["city"].iloc[0] if "city" in matches_df.columns else None
@@ -490,17 +468,16 @@ def get_venue_matches(
     
     matches_df = matches_df.head(limit)
     
+    # Innings totals for the matches on this page
+    page_innings = data.innings[data.innings["filename"].isin(matches_df["filename"])]
+    first_innings_scores = innings_scores(page_innings, "1st innings")
+    second_innings_scores = innings_scores(page_innings, "2nd innings")
+    
     # Format match data
     matches = []
     for _, match in matches_df.iterrows():
-        # Calculate scores for each innings
-        match_innings = innings_df[innings_df["filename"] == match["filename"]]
-        
-        first_innings = match_innings[match_innings["innings_type"] == "1st innings"]
-        second_innings = match_innings[match_innings["innings_type"] == "2nd innings"]
-        
-        team1_score = first_innings["runs_total"].sum() if not first_innings.empty else 0
-        team2_score = second_innings["runs_total"].sum() if not second_innings.empty else 0
+        team1_score = first_innings_scores.get(match["filename"], 0)
+        team2_score = second_innings_scores.get(match["filename"], 0)
         
         match_date = match["match_date"]
         if isinstance(match_date, pd.Timestamp):
@@ -540,7 +517,8 @@ def get_venue_season_trends(
     Get season-by-season trends for a specific venue
     """
     # Get match data for the venue
-    matches_df, innings_df = get_match_data_by_venue(db, venue_name=venue_name)
+    data = get_match_data_by_venue(db, venue_name=venue_name)
+    matches_df, innings_df = data.matches, data.innings
     
     city = matches_df["city"].iloc[0] if "city" in matches_df.columns else None
     
@@ -568,11 +546,11 @@ def get_venue_season_trends(
         avg_second_innings = second_innings_scores.mean() if not second_innings_scores.empty else 0
         
         # Count boundaries
-        fours = len(season_innings[season_innings["runs_batsman"] == 4])
-        sixes = len(season_innings[season_innings["runs_batsman"] == 6])
+        fours = season_innings["fours"].sum()
+        sixes = season_innings["sixes"].sum()
         
         # Count wickets
-        wickets = len(season_innings[season_innings["wicket_details"].notna()])
+        wickets = season_innings["wickets"].sum()
         
         # Toss statistics
         toss_winner_won = len(season_matches[season_matches["toss_winner"] == season_matches["winner"]])
@@ -623,7 +601,8 @@ def get_team_performance_by_venues(
     Get a team's performance across different venues
     """
     # Get match data for the team
-    matches_df, innings_df = get_match_data_by_venue(db, team=team_name, season=season)
+    data = get_match_data_by_venue(db, team=team_name, season=season)
+    matches_df, innings_df = data.matches, data.innings
     
     # Group by venue
     venues = matches_df["venue"].unique()
@@ -652,21 +631,14 @@ def get_team_performance_by_venues(
         match_runs = team_batting.groupby("filename")["runs_batsman"].sum() if not team_batting.empty else pd.Series()
         highest_score = match_runs.max() if not match_runs.empty else 0
         
-        # Get opposition teams
-        opposition_teams = []
-        for _, match in venue_matches.iterrows():
-            opposition = match["team2"] if match["team1"] == team_name else match["team1"]
-            opposition_teams.append(opposition)
-        
-        # Find innings where opposition teams were batting
+        # Find innings where the opposition was batting
         opposition_batting = innings_df[
-            (innings_df["team"].isin(opposition_teams)) & 
+            (innings_df["team"] != team_name) & 
             (innings_df["filename"].isin(venue_filenames))
         ]
         
         # Count wickets taken against opposition
-        team_bowling_wickets = opposition_batting[opposition_batting["wicket_details"].notna()]
-        total_wickets = len(team_bowling_wickets)
+        total_wickets = int(opposition_batting["wickets"].sum())
         avg_wickets_per_match = total_wickets / total_matches if total_matches > 0 else 0
         
         # City information
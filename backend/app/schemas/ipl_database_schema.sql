@@ -199,11 +199,14 @@ CREATE TABLE player_season_stats (
     -- Bowling stats
     innings_bowled INTEGER DEFAULT 0,
     overs_bowled NUMERIC(10, 1) DEFAULT 0,
+    balls_bowled INTEGER DEFAULT 0,
     runs_conceded INTEGER DEFAULT 0,
     wickets INTEGER DEFAULT 0,
     maidens INTEGER DEFAULT 0,
     economy NUMERIC(5, 2) DEFAULT 0,
     best_bowling_figures VARCHAR(10),
+    three_wickets INTEGER DEFAULT 0,
+    five_wickets INTEGER DEFAULT 0,
     -- Fielding stats
     catches INTEGER DEFAULT 0,
     stumpings INTEGER DEFAULT 0,
@@ -214,6 +217,20 @@ CREATE TABLE player_season_stats (
     UNIQUE (player_id, team_id, season_id)
 );
 
+-- Content hash of every ingested match, used by the incremental importer
+CREATE TABLE match_ingest_state (
+    match_id INTEGER PRIMARY KEY REFERENCES matches(match_id),
+    content_hash VARCHAR(64) NOT NULL,
+    ingested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Single-row counter bumped by every import; API workers poll it to reload in-memory data
+CREATE TABLE data_version (
+    id INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Create indexes for performance optimization
 
 -- Indexes for matches table
@@ -0,0 +1,142 @@
+"""
+Import-driven refresh of the in-memory data structures.
+
+Every importer run ends in ``refresh_rollups``, which bumps the single row of
+the ``data_version`` table in the same transaction. The watcher polls that
+row (one primary-key read) and, when the version moves, re-runs the
+registered loaders -- delivery store, feature store, player-name index -- so
+a worker picks up newly imported matches without a restart.
+"""
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+
+logger = logging.getLogger(__name__)
+
+DATA_VERSION_POLL_INTERVAL = float(os.getenv("DATA_VERSION_POLL_INTERVAL", "60"))  # seconds, 0 disables polling
+
+DATA_VERSION_QUERY = "SELECT version FROM data_version WHERE id = 1"
+
+
+def read_data_version(engine=None) -> int:
+    """
+    Current version from ``data_version``.
+
+    The table is created by the first ``refresh_rollups`` after a deploy;
+    until then (no table or no row) the version is 0, so that first import
+    still counts as a change.
+    """
+    if engine is None:
+        from app.database import engine
+    try:
+        with engine.connect() as connection:
+            version = connection.execute(text(DATA_VERSION_QUERY)).scalar()
+    except ProgrammingError:
+        return 0
+    return version or 0
+
+
+class DataVersionWatcher:
+    """Polls ``data_version`` and reloads the registered in-memory data on change"""
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self._loaders: List[Callable[[], Any]] = []
+        self._stop = threading.Event()
+        self._poller: Optional[threading.Thread] = None
+        self.last_check: Optional[datetime] = None
+        self.last_reload: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+
+    def register(self, loader: Callable[[], Any]):
+        """Add a loader; loaders run in registration order on every version change"""
+        self._loaders.append(loader)
+
+    def reload(self):
+        """Run every registered loader now"""
+        for loader in self._loaders:
+            try:
+                loader()
+            except Exception as e:
+                logger.error(f"Error reloading data with {getattr(loader, '__name__', loader)}: {str(e)}")
+        self.last_reload = datetime.utcnow()
+
+    def record_baseline(self, engine=None):
+        """
+        Record the version the startup loaders are about to read.
+
+        Call it before running them, so an import that lands while they run
+        is picked up by the first check. If the read fails the baseline stays
+        unknown and the first successful check reloads.
+        """
+        try:
+            self.version = read_data_version(engine)
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            logger.warning(f"Could not read data version: {str(e)}")
+
+    def check(self, engine=None) -> bool:
+        """
+        Read the current version and reload if it changed since the last check.
+
+        Returns:
+            bool: True if a reload was triggered
+        """
+        try:
+            version = read_data_version(engine)
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            logger.warning(f"Could not read data version: {str(e)}")
+            return False
+        finally:
+            self.last_check = datetime.utcnow()
+
+        previous = self.version
+        if version == previous:
+            return False
+        logger.info(f"Data version changed from {previous} to {version}, reloading in-memory data")
+        # Publish the new version only once the reloaded data is in place, so
+        # nothing gets cached under it from the old data
+        self.reload()
+        self.version = version
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "poll_interval_seconds": DATA_VERSION_POLL_INTERVAL,
+            "last_check": self.last_check.isoformat() if self.last_check else None,
+            "last_reload": self.last_reload.isoformat() if self.last_reload else None,
+            "last_error": self.last_error,
+        }
+
+    def start(self, interval: float = DATA_VERSION_POLL_INTERVAL):
+        """Check now, then poll for changes every ``interval`` seconds"""
+        self.check()
+        if interval <= 0 or (self._poller and self._poller.is_alive()):
+            return
+        self._stop.clear()
+
+        def poll():
+            while not self._stop.wait(interval):
+                self.check()
+
+        self._poller = threading.Thread(target=poll, name="data-version-poller", daemon=True)
+        self._poller.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+data_version_watcher = DataVersionWatcher()
+
+
+def get_data_version_watcher() -> DataVersionWatcher:
+    return data_version_watcher
@@ -0,0 +1,147 @@
+"""
+On-disk snapshot format for the delivery store.
+
+A snapshot is a directory holding one ``.npy`` file per fixed-width column
+plus a ``manifest.json`` with the format version, the ``data_version`` it was
+exported at, row counts and the string dictionaries. Columns are opened with ``np.load(mmap_mode="r")`` so every
+worker on a node maps the same page-cache pages instead of building its own
+copy, and loading does no per-row work at all.
+
+Layout::
+
+    <path>/
+        manifest.json
+        matches.<column>.npy
+        deliveries.<column>.npy
+"""
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from app.services.delivery_store import DeliveryStore, StringDictionary
+
+SNAPSHOT_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is missing, corrupt or from another format version."""
+
+
+def _column_file(table: str, column: str) -> str:
+    return f"{table}.{column}.npy"
+
+
+def write_snapshot(store: DeliveryStore, path: str, data_version: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Write ``store`` to ``path`` as a versioned columnar snapshot.
+
+    The snapshot is written to a temporary sibling directory and renamed into
+    place, so readers never see a half-written snapshot.
+
+    Args:
+        store: DeliveryStore to export
+        path: Target snapshot directory
+        data_version: ``data_version`` the store was read at, checked by
+            ``load_delivery_store`` to skip snapshots older than the database
+
+    Returns:
+        dict: The manifest that was written
+    """
+    path = os.path.abspath(path)
+    parent = os.path.dirname(path)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".snapshot-", dir=parent)
+
+    try:
+        columns = {"matches": {}, "deliveries": {}}
+        for table, arrays in (("matches", store.matches), ("deliveries", store.deliveries)):
+            for column, values in arrays.items():
+                values = np.ascontiguousarray(values)
+                np.save(os.path.join(staging, _column_file(table, column)), values, allow_pickle=False)
+                columns[table][column] = {"dtype": values.dtype.str, "length": int(len(values))}
+
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "created_at": datetime.utcnow().isoformat(),
+            "data_version": data_version,
+            "n_matches": store.n_matches,
+            "n_deliveries": store.n_deliveries,
+            "columns": columns,
+            "dictionaries": {
+                name: [v.item() if isinstance(v, np.generic) else v for v in dictionary.values]
+                for name, dictionary in store.dictionaries.items()
+            },
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, default=str)
+
+        # Swap the new snapshot in; the old one is removed afterwards
+        previous = None
+        if os.path.exists(path):
+            previous = f"{staging}.old"
+            os.replace(path, previous)
+        os.replace(staging, path)
+        if previous:
+            shutil.rmtree(previous, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    return manifest
+
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    """
+    Read and validate a snapshot manifest.
+
+    Args:
+        path: Snapshot directory
+
+    Returns:
+        dict: Parsed manifest
+    """
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        raise SnapshotError(f"No snapshot manifest at {manifest_path}")
+
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    version = manifest.get("format_version")
+    if version != SNAPSHOT_FORMAT_VERSION:
+        raise SnapshotError(
+            f"Snapshot format version {version} is not supported (expected {SNAPSHOT_FORMAT_VERSION})"
+        )
+    return manifest
+
+
+def load_snapshot(path: str) -> DeliveryStore:
+    """
+    Open a snapshot as a DeliveryStore backed by memory-mapped arrays.
+
+    Args:
+        path: Snapshot directory written by ``write_snapshot``
+
+    Returns:
+        DeliveryStore: Read-only store sharing the OS page cache
+    """
+    manifest = read_manifest(path)
+
+    tables = {"matches": {}, "deliveries": {}}
+    for table, columns in manifest["columns"].items():
+        for column, meta in columns.items():
+            values = np.load(os.path.join(path, _column_file(table, column)), mmap_mode="r", allow_pickle=False)
+            if values.dtype.str != meta["dtype"] or len(values) != meta["length"]:
+                raise SnapshotError(f"Column {table}.{column} does not match the manifest")
+            tables[table][column] = values
+
+    dictionaries = {
+        name: StringDictionary(values) for name, values in manifest["dictionaries"].items()
+    }
+    return DeliveryStore(dictionaries, tables["matches"], tables["deliveries"])
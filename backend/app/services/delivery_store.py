@@ -0,0 +1,518 @@
+"""
+In-memory columnar store of every IPL delivery.
+
+The analytics routers used to pull ``innings_data`` joined to ``match_info``
+from Postgres on every request and then filter the result in pandas. The
+store loads both tables once per process into NumPy arrays, with the string
+columns (players, teams, venues, seasons, ...) dictionary encoded, so that
+filters become vectorised comparisons on integer codes and aggregates become
+``np.bincount`` calls.
+"""
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Directory of a snapshot written by scripts/export_delivery_snapshot.py
+DELIVERY_SNAPSHOT_PATH = os.getenv("DELIVERY_SNAPSHOT_PATH")
+
+# Columns pulled from match_info / innings_data, in the order the routers expect them
+MATCH_COLUMNS = [
+    "filename", "season", "match_date", "venue", "city", "team1", "team2",
+    "toss_winner", "toss_decision", "winner", "margin", "player_of_match"
+]
+DELIVERY_COLUMNS = [
+    "filename", "innings_type", "team", "over_ball", "batsman", "bowler",
+    "non_striker", "runs_batsman", "runs_total", "extras_type", "extras_runs",
+    "wicket_details"
+]
+
+# Dictionary-encoded columns and the dictionary each one is coded against
+MATCH_CODED_COLUMNS = {
+    "filename": "filename",
+    "season": "season",
+    "venue": "venue",
+    "city": "city",
+    "team1": "team",
+    "team2": "team",
+    "toss_winner": "team",
+    "toss_decision": "toss_decision",
+    "winner": "team",
+    "margin": "margin",
+    "player_of_match": "player",
+}
+DELIVERY_CODED_COLUMNS = {
+    "innings_type": "innings_type",
+    "team": "team",
+    "batsman": "player",
+    "bowler": "player",
+    "non_striker": "player",
+    "extras_type": "extras_type",
+    "wicket_details": "wicket_details",
+}
+DELIVERY_NUMERIC_COLUMNS = {
+    "over_ball": np.float64,
+    "runs_batsman": np.int16,
+    "runs_total": np.int16,
+    "extras_runs": np.int16,
+}
+
+MATCH_QUERY = f"SELECT {', '.join(MATCH_COLUMNS)} FROM match_info"
+DELIVERY_QUERY = f"""
+SELECT {', '.join(DELIVERY_COLUMNS)}
+FROM innings_data
+ORDER BY filename, innings_type, over_ball
+"""
+
+
+class StringDictionary:
+    """Sorted dictionary of distinct values; rows store an int32 code, -1 for NULL."""
+
+    def __init__(self, values: Iterable[Any]):
+        self.values = np.asarray(list(values), dtype=object)
+        self._index = {value: code for code, value in enumerate(self.values)}
+
+    def __len__(self):
+        return len(self.values)
+
+    def code(self, value: Any) -> int:
+        """Return the code for ``value``, or -1 if it never occurs."""
+        if value is None:
+            return -1
+        return self._index.get(value, -1)
+
+    def codes(self, values: Iterable[Any]) -> np.ndarray:
+        """Return the codes for several values, dropping ones that never occur."""
+        found = [self.code(value) for value in values]
+        return np.asarray([c for c in found if c >= 0], dtype=np.int32)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """Map codes back to values, with None for -1."""
+        lookup = np.append(self.values, None)
+        return lookup[np.where(codes < 0, len(self.values), codes)]
+
+
+def _encode(columns: List[pd.Series]) -> Tuple[StringDictionary, List[np.ndarray]]:
+    """Build one dictionary shared by several columns and encode each of them."""
+    distinct = pd.unique(pd.concat(columns, ignore_index=True).dropna())
+    try:
+        distinct = sorted(distinct)
+    except TypeError:
+        distinct = sorted(distinct, key=str)
+    dictionary = StringDictionary(distinct)
+    encoded = []
+    for column in columns:
+        codes = column.map(dictionary._index).fillna(-1).to_numpy(dtype=np.int32)
+        encoded.append(codes)
+    return dictionary, encoded
+
+
+class DeliveryStore:
+    """
+    Columnar, dictionary-encoded copy of ``match_info`` and ``innings_data``.
+
+    Match-level columns live in ``self.matches`` (one row per match) and
+    delivery-level columns in ``self.deliveries`` (one row per ball). Every
+    delivery carries ``match_idx`` - the row of its match - so match
+    attributes such as venue or season can be broadcast to deliveries with a
+    single gather.
+    """
+
+    def __init__(
+        self,
+        dictionaries: Dict[str, StringDictionary],
+        matches: Dict[str, np.ndarray],
+        deliveries: Dict[str, np.ndarray],
+    ):
+        self.dictionaries = dictionaries
+        self.matches = matches
+        self.deliveries = deliveries
+        self.n_matches = len(matches["filename"])
+        self.n_deliveries = len(deliveries["match_idx"])
+
+    @classmethod
+    def from_frames(cls, matches_df: pd.DataFrame, deliveries_df: pd.DataFrame) -> "DeliveryStore":
+        """
+        Build a store from ``match_info`` and ``innings_data`` DataFrames.
+
+        Args:
+            matches_df: One row per match with ``MATCH_COLUMNS``
+            deliveries_df: One row per delivery with ``DELIVERY_COLUMNS``
+
+        Returns:
+            DeliveryStore
+        """
+        # Matches are kept in date order so slices come out chronologically
+        matches_df = matches_df.copy()
+        matches_df["match_date"] = pd.to_datetime(matches_df["match_date"], errors="coerce")
+        matches_df = matches_df.sort_values(["match_date", "filename"], kind="stable").reset_index(drop=True)
+
+        # Deliveries for matches missing from match_info cannot be joined
+        deliveries_df = deliveries_df[deliveries_df["filename"].isin(matches_df["filename"])]
+        deliveries_df = deliveries_df.reset_index(drop=True)
+
+        # Group the columns by the dictionary they share
+        shared: Dict[str, List[pd.Series]] = {}
+        for column, name in MATCH_CODED_COLUMNS.items():
+            shared.setdefault(name, []).append(matches_df[column])
+        for column, name in DELIVERY_CODED_COLUMNS.items():
+            shared.setdefault(name, []).append(deliveries_df[column])
+
+        dictionaries: Dict[str, StringDictionary] = {}
+        encoded: Dict[str, List[np.ndarray]] = {}
+        for name, columns in shared.items():
+            dictionaries[name], encoded[name] = _encode(columns)
+
+        matches: Dict[str, np.ndarray] = {}
+        deliveries: Dict[str, np.ndarray] = {}
+        positions = {name: 0 for name in shared}
+        for column, name in MATCH_CODED_COLUMNS.items():
+            matches[column] = encoded[name][positions[name]]
+            positions[name] += 1
+        for column, name in DELIVERY_CODED_COLUMNS.items():
+            deliveries[column] = encoded[name][positions[name]]
+            positions[name] += 1
+
+        matches["match_date"] = matches_df["match_date"].to_numpy(dtype="datetime64[D]")
+
+        # Every filename is in the dictionary, so codes double as the join key
+        match_idx_by_code = np.full(len(dictionaries["filename"]), -1, dtype=np.int32)
+        match_idx_by_code[matches["filename"]] = np.arange(len(matches_df), dtype=np.int32)
+        delivery_file_codes = deliveries_df["filename"].map(dictionaries["filename"]._index)
+        deliveries["match_idx"] = match_idx_by_code[delivery_file_codes.to_numpy(dtype=np.int64)]
+
+        for column, dtype in DELIVERY_NUMERIC_COLUMNS.items():
+            values = pd.to_numeric(deliveries_df[column], errors="coerce").fillna(0)
+            deliveries[column] = values.to_numpy(dtype=dtype)
+
+        return cls(dictionaries, matches, deliveries)
+
+    @classmethod
+    def from_database(cls, engine) -> "DeliveryStore":
+        """
+        Load the whole ball-by-ball dataset from Postgres.
+
+        Args:
+            engine: SQLAlchemy engine bound to the IPL database
+
+        Returns:
+            DeliveryStore
+        """
+        matches_df = pd.read_sql(MATCH_QUERY, engine)
+        deliveries_df = pd.read_sql(DELIVERY_QUERY, engine)
+        return cls.from_frames(matches_df, deliveries_df)
+
+    # ---------- FILTERS ---------- #
+
+    def _values_mask(self, codes: np.ndarray, dictionary: str, values) -> np.ndarray:
+        """Boolean mask of rows whose code matches one of ``values``."""
+        if isinstance(values, (list, tuple, set, np.ndarray, pd.Series)):
+            wanted = self.dictionaries[dictionary].codes(values)
+            return np.isin(codes, wanted)
+        return codes == self.dictionaries[dictionary].code(values)
+
+    def match_mask(
+        self,
+        season=None,
+        venue=None,
+        team=None,
+        opponent=None,
+        filenames: Optional[Iterable[str]] = None,
+    ) -> np.ndarray:
+        """
+        Select matches by season, venue, team and/or exact filenames.
+
+        ``team`` matches either side; with ``opponent`` as well, only fixtures
+        between the two teams are kept. Scalars and lists are both accepted.
+
+        Returns:
+            np.ndarray: Boolean mask over ``self.matches``
+        """
+        mask = np.ones(self.n_matches, dtype=bool)
+        m = self.matches
+        if season is not None:
+            mask &= self._values_mask(m["season"], "season", season)
+        if venue is not None:
+            mask &= self._values_mask(m["venue"], "venue", venue)
+        if team is not None:
+            mask &= self._values_mask(m["team1"], "team", team) | self._values_mask(m["team2"], "team", team)
+        if opponent is not None:
+            mask &= self._values_mask(m["team1"], "team", opponent) | self._values_mask(m["team2"], "team", opponent)
+        if filenames is not None:
+            mask &= self._values_mask(m["filename"], "filename", list(filenames))
+        return mask
+
+    def delivery_mask(
+        self,
+        batsman=None,
+        bowler=None,
+        team=None,
+        innings_type=None,
+        matches: Optional[np.ndarray] = None,
+        **match_filters,
+    ) -> np.ndarray:
+        """
+        Select deliveries by player, batting team, innings and match filters.
+
+        Args:
+            batsman: Striker name(s)
+            bowler: Bowler name(s)
+            team: Batting team name(s)
+            innings_type: e.g. "1st innings"
+            matches: Precomputed boolean mask from ``match_mask``
+            **match_filters: Passed through to ``match_mask``
+
+        Returns:
+            np.ndarray: Boolean mask over ``self.deliveries``
+        """
+        d = self.deliveries
+        mask = np.ones(self.n_deliveries, dtype=bool)
+        if batsman is not None:
+            mask &= self._values_mask(d["batsman"], "player", batsman)
+        if bowler is not None:
+            mask &= self._values_mask(d["bowler"], "player", bowler)
+        if team is not None:
+            mask &= self._values_mask(d["team"], "team", team)
+        if innings_type is not None:
+            mask &= self._values_mask(d["innings_type"], "innings_type", innings_type)
+        if match_filters:
+            selected = self.match_mask(**match_filters)
+            matches = selected if matches is None else matches & selected
+        if matches is not None:
+            mask &= matches[d["match_idx"]]
+        return mask
+
+    # ---------- MATERIALISATION ---------- #
+
+    def _decode_matches(self, index: np.ndarray, columns: List[str]) -> Dict[str, Any]:
+        """Decode match-level columns for the given match rows."""
+        out = {}
+        for column in columns:
+            if column == "match_date":
+                dates = self.matches["match_date"][index]
+                out[column] = np.where(
+                    np.isnat(dates), None, np.datetime_as_string(dates, unit="D")
+                ).astype(object)
+            else:
+                dictionary = self.dictionaries[MATCH_CODED_COLUMNS[column]]
+                out[column] = dictionary.decode(self.matches[column][index])
+        return out
+
+    def matches_frame(self, mask: Optional[np.ndarray] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Return matches as a ``match_info``-shaped DataFrame, ordered by date.
+
+        Args:
+            mask: Boolean mask from ``match_mask``; all matches when omitted
+            columns: Subset of ``MATCH_COLUMNS``
+
+        Returns:
+            pandas.DataFrame
+        """
+        index = np.arange(self.n_matches) if mask is None else np.flatnonzero(mask)
+        return pd.DataFrame(self._decode_matches(index, columns or MATCH_COLUMNS))
+
+    def deliveries_frame(
+        self,
+        mask: Optional[np.ndarray] = None,
+        match_columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Return deliveries as an ``innings_data``-shaped DataFrame.
+
+        Rows come out ordered by match date, innings and over, which is the
+        order the SQL the routers used to run produced.
+
+        Args:
+            mask: Boolean mask from ``delivery_mask``; all deliveries when omitted
+            match_columns: ``match_info`` columns to join onto every delivery
+
+        Returns:
+            pandas.DataFrame
+        """
+        index = np.arange(self.n_deliveries) if mask is None else np.flatnonzero(mask)
+        d = self.deliveries
+        match_idx = d["match_idx"][index]
+        # Stable sort keeps innings/over order within a match
+        order = np.argsort(match_idx, kind="stable")
+        index, match_idx = index[order], match_idx[order]
+
+        out = {"filename": self.dictionaries["filename"].decode(self.matches["filename"][match_idx])}
+        for column in DELIVERY_COLUMNS[1:]:
+            if column in DELIVERY_NUMERIC_COLUMNS:
+                out[column] = d[column][index]
+            else:
+                out[column] = self.dictionaries[DELIVERY_CODED_COLUMNS[column]].decode(d[column][index])
+        if match_columns:
+            out.update(self._decode_matches(match_idx, match_columns))
+        return pd.DataFrame(out)
+
+    # ---------- AGGREGATES ---------- #
+
+    def sum_by(self, key: str, values: str, mask: Optional[np.ndarray] = None) -> pd.Series:
+        """
+        Sum a numeric delivery column grouped by a dictionary-encoded one.
+
+        Args:
+            key: Delivery column to group by, e.g. "batsman"
+            values: Numeric delivery column, e.g. "runs_batsman"
+            mask: Optional boolean mask from ``delivery_mask``
+
+        Returns:
+            pandas.Series: Totals indexed by decoded key, zeros dropped
+        """
+        codes = self.deliveries[key]
+        weights = self.deliveries[values].astype(np.int64)
+        valid = codes >= 0 if mask is None else mask & (codes >= 0)
+        dictionary = self.dictionaries[DELIVERY_CODED_COLUMNS[key]]
+        totals = np.bincount(codes[valid], weights=weights[valid], minlength=len(dictionary))
+        present = np.flatnonzero(totals)
+        return pd.Series(totals[present].astype(np.int64), index=dictionary.values[present], name=values)
+
+    def count_by(self, key: str, mask: Optional[np.ndarray] = None) -> pd.Series:
+        """
+        Count deliveries grouped by a dictionary-encoded delivery column.
+
+        Args:
+            key: Delivery column to group by, e.g. "bowler"
+            mask: Optional boolean mask from ``delivery_mask``
+
+        Returns:
+            pandas.Series: Counts indexed by decoded key, zeros dropped
+        """
+        codes = self.deliveries[key]
+        valid = codes >= 0 if mask is None else mask & (codes >= 0)
+        dictionary = self.dictionaries[DELIVERY_CODED_COLUMNS[key]]
+        counts = np.bincount(codes[valid], minlength=len(dictionary))
+        present = np.flatnonzero(counts)
+        return pd.Series(counts[present], index=dictionary.values[present], name="count")
+
+    def wicket_mask(self) -> np.ndarray:
+        """Deliveries on which a wicket fell."""
+        return self.deliveries["wicket_details"] >= 0
+
+
+# Process-wide instance, swapped atomically on reload
+_store: Optional[DeliveryStore] = None
+_store_lock = threading.Lock()
+
+
+def get_delivery_store() -> Optional[DeliveryStore]:
+    """Return the loaded store, or None if it has not been loaded."""
+    return _store
+
+
+def _snapshot_is_current(manifest: Dict[str, Any], engine=None) -> bool:
+    """False if the database's ``data_version`` is newer than the snapshot's"""
+    from app.services.data_version import read_data_version
+
+    try:
+        current = read_data_version(engine)
+    except Exception as e:
+        logger.warning(f"Could not read data version, using the snapshot as is: {str(e)}")
+        return True
+    # Snapshots from before the version was recorded count as version 0
+    return (manifest.get("data_version") or 0) >= current
+
+
+def load_delivery_store(engine=None, snapshot_path: Optional[str] = None) -> Optional[DeliveryStore]:
+    """
+    (Re)load the process-wide store.
+
+    A snapshot at ``snapshot_path`` (default ``DELIVERY_SNAPSHOT_PATH``) is
+    memory-mapped when present and exported at the database's current
+    ``data_version``; otherwise the store is built from the database, so
+    matches imported since the export are not lost. Failures are logged
+    rather than raised so the API still starts, with the routers falling back
+    to querying Postgres directly.
+
+    Args:
+        engine: SQLAlchemy engine; defaults to ``app.database.engine``
+        snapshot_path: Snapshot directory to map instead of querying Postgres
+
+    Returns:
+        DeliveryStore or None
+    """
+    global _store
+    snapshot_path = snapshot_path or DELIVERY_SNAPSHOT_PATH
+    with _store_lock:
+        store = None
+        if snapshot_path and os.path.exists(snapshot_path):
+            from app.services.delivery_snapshot import load_snapshot, read_manifest
+            try:
+                if _snapshot_is_current(read_manifest(snapshot_path), engine):
+                    store = load_snapshot(snapshot_path)
+                    logger.info(f"Mapped delivery snapshot at {snapshot_path}")
+                else:
+                    logger.warning(f"Delivery snapshot at {snapshot_path} predates the latest import; "
+                                   f"loading from the database until it is re-exported")
+            except Exception as e:
+                logger.error(f"Error loading delivery snapshot {snapshot_path}: {str(e)}")
+
+        if store is None:
+            if engine is None:
+                from app.database import engine
+            try:
+                store = DeliveryStore.from_database(engine)
+            except Exception as e:
+                logger.error(f"Error loading delivery store: {str(e)}")
+                return _store
+        _store = store
+    logger.info(f"Loaded delivery store: {store.n_matches} matches, {store.n_deliveries} deliveries")
+    return store
+
+
+def load_match_frame(columns: List[str], engine=None) -> pd.DataFrame:
+    """
+    Return ``columns`` of every match in date order.
+
+    Reads the in-memory store when it is loaded, otherwise ``match_info``.
+
+    Args:
+        columns: Subset of ``MATCH_COLUMNS``
+        engine: SQLAlchemy engine; defaults to ``app.database.engine``
+
+    Returns:
+        pandas.DataFrame
+    """
+    store = get_delivery_store()
+    if store is not None:
+        return store.matches_frame(columns=columns)
+    if engine is None:
+        from app.database import engine
+    return pd.read_sql(f"SELECT {', '.join(columns)} FROM match_info ORDER BY match_date, filename", engine)
+
+
+class MatchEngineSlot:
+    """
+    Process-wide instance of an engine built from the match list.
+
+    ``load`` rebuilds it from ``load_match_frame`` and swaps it in atomically;
+    failures are logged and the previous instance is kept.
+    """
+
+    def __init__(self, label: str, build, columns: List[str]):
+        self.label = label
+        self._build = build
+        self._columns = columns
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        return self._instance
+
+    def load(self, engine=None):
+        with self._lock:
+            try:
+                instance = self._build(load_match_frame(self._columns, engine))
+            except Exception as e:
+                logger.error(f"Error building {self.label}: {str(e)}")
+                return self._instance
+            self._instance = instance
+        logger.info(f"Built {self.label} from {instance.n_matches} matches")
+        return instance
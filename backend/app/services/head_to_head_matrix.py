@@ -0,0 +1,437 @@
+"""
+Precomputed head-to-head results for every pair of teams.
+
+Each head-to-head endpoint used to fetch every match between two teams and
+iterate over it for wins, venue splits, season trends and margins.
+``HeadToHeadMatrix`` computes all of that once per data version:
+
+* a sparse pair x season x venue tensor of results -- matches, wins by the
+  lower- and higher-coded team of the pair, and how often each was listed
+  as ``team1`` -- stored as cells sorted by (pair, season, venue) with
+  per-pair offsets, so one pair's cells are a contiguous slice,
+* per-pair totals, margin sums and victory margins bucketed by size, and
+* the pair's matches in date order, for match lists and streaks.
+
+Pair summaries are then constant-time lookups and the all-pairs matrix is a
+single dense array.
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.services.delivery_store import MatchEngineSlot
+
+logger = logging.getLogger(__name__)
+
+MATCH_COLUMNS = ["filename", "match_date", "team1", "team2", "winner", "venue", "season", "margin"]
+MATCH_QUERY = f"SELECT {', '.join(MATCH_COLUMNS)} FROM match_info ORDER BY match_date"
+
+# Victory margin buckets: (label, margin type, smallest margin in the bucket)
+MARGIN_BUCKETS = [
+    ("runs 1-9", "runs", 1),
+    ("runs 10-29", "runs", 10),
+    ("runs 30-59", "runs", 30),
+    ("runs 60+", "runs", 60),
+    ("wickets 1-3", "wickets", 1),
+    ("wickets 4-6", "wickets", 4),
+    ("wickets 7-10", "wickets", 7),
+    ("super over", "super over", 0),
+    ("other", "other", 0),
+]
+MARGIN_TYPES = ["runs", "wickets", "super over", "other"]
+
+# Result of a match from the point of view of its pair
+LOWER_WON, HIGHER_WON, NO_RESULT = 0, 1, 2
+
+
+def _format_date(value) -> Optional[str]:
+    return None if pd.isna(value) else pd.Timestamp(value).strftime("%Y-%m-%d")
+
+
+def _optional(value):
+    """None for a missing value, numpy scalars as plain Python values"""
+    if pd.isna(value):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def classify_margins(margins: pd.Series):
+    """
+    Type, leading number and bucket of each margin string.
+
+    Returns:
+        tuple: (type codes into MARGIN_TYPES with -1 for a missing margin,
+        numeric values with 0 where there is no number, bucket codes into
+        MARGIN_BUCKETS with -1 for a missing margin)
+    """
+    text = margins.astype("string").str.lower()
+    missing = text.isna().to_numpy()
+    text = text.fillna("")
+    kinds = np.select(
+        [
+            text.str.contains("super over").to_numpy(),
+            text.str.contains("run").to_numpy(),
+            text.str.contains("wicket").to_numpy(),
+        ],
+        [2, 0, 1],
+        default=3,
+    )
+    kinds[missing] = -1
+    values = pd.to_numeric(text.str.extract(r"(\d+)", expand=False), errors="coerce").fillna(0).to_numpy(np.float64)
+
+    buckets = np.full(len(text), -1, dtype=np.int64)
+    for kind_code, kind in enumerate(MARGIN_TYPES):
+        codes = [i for i, (_, bucket_kind, _) in enumerate(MARGIN_BUCKETS) if bucket_kind == kind]
+        lows = np.array([MARGIN_BUCKETS[i][2] for i in codes])
+        rows = kinds == kind_code
+        position = np.clip(np.searchsorted(lows, values[rows], side="right") - 1, 0, None)
+        buckets[rows] = np.array(codes)[position]
+    return kinds, values, buckets
+
+
+class HeadToHeadMatrix:
+    """Results tensor and per-pair match index for every pair of teams"""
+
+    # Columns of the cell table
+    CELL_COLUMNS = ["matches", "lower_wins", "higher_wins", "lower_first", "lower_first_wins",
+                    "higher_first", "higher_first_wins"]
+
+    def __init__(self, matches: pd.DataFrame):
+        # Chronological, undated matches last
+        matches = matches.copy()
+        matches["match_date"] = pd.to_datetime(matches["match_date"], errors="coerce")
+        matches = matches.sort_values(["match_date", "filename"], na_position="last", kind="stable")
+        matches = matches[matches["team1"].notna() & matches["team2"].notna()]
+        self.matches = matches.reset_index(drop=True)
+        n = len(self.matches)
+
+        team_codes, self.teams = pd.factorize(
+            pd.concat([self.matches["team1"], self.matches["team2"]], ignore_index=True), sort=True
+        )
+        self._team_index = {team: code for code, team in enumerate(self.teams)}
+        n_teams = len(self.teams)
+        code1, code2 = team_codes[:n], team_codes[n:]
+        lower, higher = np.minimum(code1, code2), np.maximum(code1, code2)
+        lower_first = code1 == lower
+
+        winner = self.matches["winner"]
+        won1 = (winner == self.matches["team1"]).to_numpy()
+        won2 = (winner == self.matches["team2"]).to_numpy()
+        lower_won = np.where(lower_first, won1, won2)
+        higher_won = np.where(lower_first, won2, won1)
+        self.outcome = np.where(lower_won, LOWER_WON, np.where(higher_won, HIGHER_WON, NO_RESULT))
+
+        pair_keys, self.pairs = pd.factorize(lower * n_teams + higher, sort=True)
+        self.pair_lower = self.pairs // max(n_teams, 1)
+        self.pair_higher = self.pairs % max(n_teams, 1)
+        self._pair_index = {int(key): code for code, key in enumerate(self.pairs)}
+        n_pairs = len(self.pairs)
+
+        season_codes, self.seasons = pd.factorize(self.matches["season"], sort=True, use_na_sentinel=False)
+        venue_codes, self.venues = pd.factorize(self.matches["venue"], sort=True, use_na_sentinel=False)
+        n_seasons, n_venues = max(len(self.seasons), 1), max(len(self.venues), 1)
+        self._season_index = {season: code for code, season in enumerate(self.seasons)}
+
+        # Pair x season x venue cells
+        keys = (pair_keys.astype(np.int64) * n_seasons + season_codes) * n_venues + venue_codes
+        cell_keys, first_rows, cell_of_match = np.unique(keys, return_index=True, return_inverse=True)
+        cell_of_match = cell_of_match.reshape(-1)
+        self.cell_pair = cell_keys // (n_seasons * n_venues)
+        self.cell_season = (cell_keys // n_venues) % n_seasons
+        self.cell_venue = cell_keys % n_venues
+        self.cell_first_row = first_rows
+
+        def cell_sum(mask):
+            return np.bincount(cell_of_match, weights=mask, minlength=len(cell_keys)).astype(np.int64)
+
+        ones = np.ones(n)
+        self.cells = np.column_stack([
+            cell_sum(ones),
+            cell_sum(self.outcome == LOWER_WON),
+            cell_sum(self.outcome == HIGHER_WON),
+            cell_sum(lower_first),
+            cell_sum(lower_first & (self.outcome == LOWER_WON)),
+            cell_sum(~lower_first),
+            cell_sum(~lower_first & (self.outcome == HIGHER_WON)),
+        ]) if n else np.zeros((0, len(self.CELL_COLUMNS)), dtype=np.int64)
+        self.cell_starts = np.searchsorted(self.cell_pair, np.arange(n_pairs), side="left")
+        self.cell_ends = np.searchsorted(self.cell_pair, np.arange(n_pairs), side="right")
+
+        # Per-pair totals: matches, lower wins, higher wins
+        self.pair_totals = np.column_stack([
+            np.bincount(pair_keys, minlength=n_pairs),
+            np.bincount(pair_keys, weights=self.outcome == LOWER_WON, minlength=n_pairs).astype(np.int64),
+            np.bincount(pair_keys, weights=self.outcome == HIGHER_WON, minlength=n_pairs).astype(np.int64),
+        ])
+
+        # Victory margins per (pair, winning side)
+        self.margin_type, self.margin_value, margin_bucket = classify_margins(self.matches["margin"])
+        decided = self.outcome != NO_RESULT
+        slot = pair_keys * 2 + np.where(decided, self.outcome, 0)
+        self.margin_sum = np.bincount(slot[decided], weights=self.margin_value[decided],
+                                      minlength=n_pairs * 2).reshape(n_pairs, 2)
+        bucketed = decided & (margin_bucket >= 0)
+        self.margin_buckets = np.bincount(slot[bucketed] * len(MARGIN_BUCKETS) + margin_bucket[bucketed],
+                                          minlength=n_pairs * 2 * len(MARGIN_BUCKETS)
+                                          ).reshape(n_pairs, 2, len(MARGIN_BUCKETS))
+        # Biggest margin per side; the earliest match wins ties
+        self.margin_best = np.full(n_pairs * 2, -1, dtype=np.int64)
+        if decided.any():
+            rows = np.flatnonzero(decided)
+            rows = rows[np.lexsort((rows, -self.margin_value[rows], slot[rows]))]
+            first = np.ones(len(rows), dtype=bool)
+            first[1:] = slot[rows][1:] != slot[rows][:-1]
+            self.margin_best[slot[rows][first]] = rows[first]
+        self.margin_best = self.margin_best.reshape(n_pairs, 2)
+
+        # Each pair's matches in date order
+        self.pair_rows = np.lexsort((np.arange(n), pair_keys))
+        self.pair_row_starts = np.searchsorted(pair_keys[self.pair_rows], np.arange(n_pairs), side="left")
+        self.pair_row_ends = np.searchsorted(pair_keys[self.pair_rows], np.arange(n_pairs), side="right")
+
+        self.n_matches = n
+        self.built_at = datetime.utcnow()
+
+    def _pair(self, team1: str, team2: str):
+        """(pair code, whether team1 is the pair's lower-coded team), or None"""
+        code1, code2 = self._team_index.get(team1), self._team_index.get(team2)
+        if code1 is None or code2 is None or code1 == code2:
+            return None
+        lower, higher = min(code1, code2), max(code1, code2)
+        pair = self._pair_index.get(lower * len(self.teams) + higher)
+        if pair is None:
+            return None
+        return pair, code1 == lower
+
+    @staticmethod
+    def _sides(team1_lower: bool):
+        """Indexes of (team1, team2) into per-side arrays ordered (lower, higher)"""
+        return (0, 1) if team1_lower else (1, 0)
+
+    def summary(self, team1: str, team2: str, season=None) -> Optional[Dict[str, int]]:
+        """Matches, wins for each side and no-results, overall or in one season"""
+        found = self._pair(team1, team2)
+        if found is None:
+            return None
+        pair, team1_lower = found
+        if season is None:
+            matches, lower_wins, higher_wins = (int(x) for x in self.pair_totals[pair])
+        else:
+            cells = self._cells(pair)
+            season_code = self._season_index.get(season)
+            chosen = self.cell_season[cells] == season_code
+            matches, lower_wins, higher_wins = (int(x) for x in self.cells[cells][chosen][:, :3].sum(axis=0))
+        if matches == 0:
+            return None
+        wins = (lower_wins, higher_wins)
+        first, second = self._sides(team1_lower)
+        return {
+            "matches": matches,
+            "team1_wins": wins[first],
+            "team2_wins": wins[second],
+            "no_results": matches - lower_wins - higher_wins,
+        }
+
+    def _cells(self, pair: int) -> slice:
+        return slice(self.cell_starts[pair], self.cell_ends[pair])
+
+    def by_venue(self, team1: str, team2: str) -> List[Dict[str, Any]]:
+        """
+        Results per venue, in the order the pair first played at each.
+
+        ``team1_listed_first`` counts the matches recorded with team1 as
+        ``team1`` (and ``team1_listed_first_wins`` how many of those it won).
+        """
+        found = self._pair(team1, team2)
+        if found is None:
+            return []
+        pair, team1_lower = found
+        cells = self._cells(pair)
+        codes, first_rows, counts = self.cell_venue[cells], self.cell_first_row[cells], self.cells[cells]
+        venues = np.unique(codes)
+        totals = np.zeros((len(venues), counts.shape[1]), dtype=np.int64)
+        position = np.searchsorted(venues, codes)
+        np.add.at(totals, position, counts)
+        first_seen = np.full(len(venues), np.iinfo(np.int64).max)
+        np.minimum.at(first_seen, position, first_rows)
+
+        lower = {"wins": 1, "first": 3, "first_wins": 4}
+        higher = {"wins": 2, "first": 5, "first_wins": 6}
+        side1, side2 = (lower, higher) if team1_lower else (higher, lower)
+        return [
+            {
+                "venue": _optional(self.venues[venues[i]]),
+                "matches": int(totals[i, 0]),
+                "team1_wins": int(totals[i, side1["wins"]]),
+                "team2_wins": int(totals[i, side2["wins"]]),
+                "team1_listed_first": int(totals[i, side1["first"]]),
+                "team1_listed_first_wins": int(totals[i, side1["first_wins"]]),
+                "team2_listed_first": int(totals[i, side2["first"]]),
+                "team2_listed_first_wins": int(totals[i, side2["first_wins"]]),
+            }
+            for i in np.argsort(first_seen, kind="stable")
+        ]
+
+    def by_season(self, team1: str, team2: str) -> List[Dict[str, Any]]:
+        """Results per season, in season order"""
+        found = self._pair(team1, team2)
+        if found is None:
+            return []
+        pair, team1_lower = found
+        cells = self._cells(pair)
+        codes, counts = self.cell_season[cells], self.cells[cells]
+        seasons = np.unique(codes)
+        totals = np.zeros((len(seasons), 3), dtype=np.int64)
+        np.add.at(totals, np.searchsorted(seasons, codes), counts[:, :3])
+        first, second = (1, 2) if team1_lower else (2, 1)
+        return [
+            {
+                "season": _optional(self.seasons[code]),
+                "matches": int(total[0]),
+                "team1_wins": int(total[first]),
+                "team2_wins": int(total[second]),
+            }
+            for code, total in zip(seasons, totals)
+        ]
+
+    def margins(self, team1: str, team2: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Victory margins for each side.
+
+        ``average_margin`` is the mean leading number of the winner's margins
+        (runs and wickets alike, 0 where there is none); ``buckets`` counts
+        victories per MARGIN_BUCKETS label and ``largest`` is the match with
+        the biggest margin.
+        """
+        found = self._pair(team1, team2)
+        if found is None:
+            return None
+        pair, team1_lower = found
+        result = {}
+        for name, side in zip(("team1", "team2"), self._sides(team1_lower)):
+            wins = int(self.pair_totals[pair, 1 + side])
+            best = self.margin_best[pair, side]
+            result[name] = {
+                "wins": wins,
+                "average_margin": float(self.margin_sum[pair, side] / wins) if wins else None,
+                "buckets": {label: int(count) for (label, _, _), count
+                            in zip(MARGIN_BUCKETS, self.margin_buckets[pair, side])},
+                "largest": self._record(best) if best >= 0 else None,
+            }
+        return result
+
+    def _record(self, row: int) -> Dict[str, Any]:
+        match = self.matches.iloc[row]
+        kind = self.margin_type[row]
+        return {
+            "match_id": match["filename"],
+            "date": _format_date(match["match_date"]),
+            "venue": _optional(match["venue"]),
+            "winner": _optional(match["winner"]),
+            "margin": _optional(match["margin"]),
+            "margin_type": MARGIN_TYPES[kind] if kind >= 0 else None,
+            "season": _optional(match["season"]),
+        }
+
+    def match_rows(self, team1: str, team2: str) -> np.ndarray:
+        """Row numbers into ``matches`` of the pair's matches, oldest first"""
+        found = self._pair(team1, team2)
+        if found is None:
+            return np.array([], dtype=np.int64)
+        pair = found[0]
+        return self.pair_rows[self.pair_row_starts[pair]:self.pair_row_ends[pair]]
+
+    def history(self, team1: str, team2: str, limit: Optional[int] = None,
+                recent_first: bool = True) -> List[Dict[str, Any]]:
+        """
+        The pair's matches with date, venue, winner, margin and season.
+
+        Args:
+            limit: Keep only the most recent ``limit`` matches
+            recent_first: Most recent match first rather than oldest first
+        """
+        rows = self.match_rows(team1, team2)
+        if limit is not None:
+            rows = rows[max(len(rows) - limit, 0):]
+        if recent_first:
+            rows = rows[::-1]
+        return [self._record(row) for row in rows]
+
+    def streaks(self, team1: str, team2: str) -> Dict[str, int]:
+        """
+        Longest and current winning runs of each side against the other.
+
+        A no-result neither extends nor breaks a run; the current streak is
+        the winner of the most recent decided match's run.
+        """
+        rows = self.match_rows(team1, team2)
+        found = self._pair(team1, team2)
+        result = {"team1_longest_streak": 0, "team2_longest_streak": 0,
+                  "team1_current_streak": 0, "team2_current_streak": 0}
+        if found is None:
+            return result
+        outcome = self.outcome[rows]
+        outcome = outcome[outcome != NO_RESULT]
+        if len(outcome) == 0:
+            return result
+
+        change = np.ones(len(outcome), dtype=bool)
+        change[1:] = outcome[1:] != outcome[:-1]
+        run_starts = np.flatnonzero(change)
+        run_lengths = np.diff(np.append(run_starts, len(outcome)))
+        run_side = outcome[run_starts]
+        for name, side in zip(("team1", "team2"), self._sides(found[1])):
+            lengths = run_lengths[run_side == side]
+            result[f"{name}_longest_streak"] = int(lengths.max()) if len(lengths) else 0
+        # Only the side that won the most recent decided match has a current streak
+        current = "team1" if run_side[-1] == self._sides(found[1])[0] else "team2"
+        result[f"{current}_current_streak"] = int(run_lengths[-1])
+        return result
+
+    def matrix(self, season=None) -> Dict[str, Any]:
+        """
+        All-pairs results: ``wins[i][j]`` is how often ``teams[i]`` beat
+        ``teams[j]`` and ``matches[i][j]`` how often they met.
+        """
+        n_teams = len(self.teams)
+        if season is None:
+            totals = self.pair_totals
+        else:
+            season_code = self._season_index.get(season, -1)
+            chosen = self.cell_season == season_code
+            totals = np.zeros((len(self.pairs), 3), dtype=np.int64)
+            np.add.at(totals, self.cell_pair[chosen], self.cells[chosen][:, :3])
+
+        matches = np.zeros((n_teams, n_teams), dtype=np.int64)
+        wins = np.zeros((n_teams, n_teams), dtype=np.int64)
+        matches[self.pair_lower, self.pair_higher] = totals[:, 0]
+        matches[self.pair_higher, self.pair_lower] = totals[:, 0]
+        wins[self.pair_lower, self.pair_higher] = totals[:, 1]
+        wins[self.pair_higher, self.pair_lower] = totals[:, 2]
+        return {"teams": list(self.teams), "matches": matches.tolist(), "wins": wins.tolist()}
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "matches": self.n_matches,
+            "teams": len(self.teams),
+            "pairs": len(self.pairs),
+            "cells": len(self.cell_pair),
+            "built_at": self.built_at.isoformat(),
+        }
+
+
+# Process-wide instance, swapped atomically on reload
+_head_to_head_matrix = MatchEngineSlot("head-to-head matrix", HeadToHeadMatrix, MATCH_COLUMNS)
+
+
+def get_head_to_head_matrix() -> Optional[HeadToHeadMatrix]:
+    """Return the loaded head-to-head matrix, or None if it has not been built."""
+    return _head_to_head_matrix.get()
+
+
+def load_head_to_head_matrix(engine=None) -> Optional[HeadToHeadMatrix]:
+    """(Re)build the process-wide head-to-head matrix from the current match list."""
+    return _head_to_head_matrix.load(engine)
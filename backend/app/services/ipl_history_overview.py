@@ -0,0 +1,350 @@
+"""
+Section-aware engine behind ``/api/ipl-history/overview``.
+
+The overview is the homepage request and used to run all seven section
+queries in sequence on every call, whatever ``category`` asked for.
+``IPLHistoryOverview`` instead
+
+* runs only the sections a request needs,
+* runs those that are not memoized yet concurrently, each on its own
+  connection from the shared pool (at most ``IPL_HISTORY_SECTION_WORKERS``
+  at a time, so one request cannot drain the pool), and
+* memoizes every section per (season, data version), so an import
+  invalidates them all and different ``category`` requests share the work.
+
+``metadata`` and ``seasons`` describe the whole history and ignore the season
+filter; the other sections are restricted to the requested season. Match
+results come from ``match_info.margin`` ("23 runs", "5 wickets", a tie or a
+super over). ``player_analytics`` lists the ``IPL_HISTORY_TOP_PLAYERS`` best
+batsmen and bowlers of each season and ``record_books`` the best of each.
+"""
+import contextvars
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+IPL_HISTORY_SECTION_WORKERS = int(os.getenv("IPL_HISTORY_SECTION_WORKERS", "3"))
+# Batsmen and bowlers listed per season in ``player_analytics``
+IPL_HISTORY_TOP_PLAYERS = int(os.getenv("IPL_HISTORY_TOP_PLAYERS", "5"))
+
+# Short names accepted by ``category``, as documented on the endpoint
+CATEGORY_ALIASES = {
+    "toss": "toss_analytics",
+    "venue": "venue_analytics",
+    "team": "team_analytics",
+    "player": "player_analytics",
+    "match": "match_analytics",
+    "records": "record_books",
+}
+
+METADATA_QUERY = """
+SELECT
+    COUNT(DISTINCT season) as total_seasons,
+    COUNT(*) as total_matches,
+    (SELECT COUNT(*) FROM (SELECT team1 FROM match_info UNION SELECT team2 FROM match_info) t) as total_teams,
+    MIN(match_date) as first_match,
+    MAX(match_date) as last_match
+FROM match_info
+"""
+
+SEASONS_QUERY = """
+SELECT
+    season,
+    COUNT(*) as matches_played,
+    MIN(match_date) as first_match,
+    MAX(match_date) as last_match,
+    COUNT(DISTINCT venue) as venues_used,
+    COUNT(DISTINCT winner) as teams_participated
+FROM match_info
+GROUP BY season
+ORDER BY season
+"""
+
+TOSS_QUERY = """
+SELECT
+    season,
+    toss_winner,
+    COUNT(*) as total_tosses,
+    ROUND(SUM(CASE WHEN toss_decision = 'bat' THEN 1.0 ELSE 0 END) / COUNT(*) * 100, 2) as bat_percentage,
+    ROUND(SUM(CASE WHEN toss_decision = 'field' THEN 1.0 ELSE 0 END) / COUNT(*) * 100, 2) as field_percentage,
+    ROUND(SUM(CASE WHEN winner = toss_winner THEN 1.0 ELSE 0 END) / COUNT(*) * 100, 2) as toss_win_match_percentage
+FROM match_info
+{where}
+GROUP BY season, toss_winner
+ORDER BY season, total_tosses DESC
+"""
+
+VENUE_QUERY = """
+SELECT
+    season,
+    venue,
+    COUNT(*) as matches_hosted,
+    ROUND(AVG(CASE WHEN toss_decision = 'bat' THEN 1.0 ELSE 0 END) * 100, 2) as avg_bat_first_percentage,
+    ROUND(AVG(CASE WHEN winner = team1 THEN 1.0 ELSE 0 END) * 100, 2) as team1_win_percentage
+FROM match_info
+{where}
+GROUP BY season, venue
+ORDER BY season, matches_hosted DESC
+"""
+
+TEAM_QUERY = """
+WITH appearances AS (
+    SELECT season, team1 as team, winner FROM match_info {where}
+    UNION ALL
+    SELECT season, team2 as team, winner FROM match_info {where}
+)
+SELECT
+    season,
+    team,
+    COUNT(*) as matches_played,
+    SUM(CASE WHEN winner = team THEN 1 ELSE 0 END) as matches_won,
+    ROUND(SUM(CASE WHEN winner = team THEN 1.0 ELSE 0 END) / COUNT(*) * 100, 2) as win_percentage
+FROM appearances
+GROUP BY season, team
+ORDER BY season, win_percentage DESC
+"""
+
+# Per-season batting and bowling totals, ranked within the season. Bowling
+# counts every delivery bowled: byes and leg byes are not charged to the
+# bowler, and wides and no-balls are not legal balls for the economy rate.
+PLAYER_RANKINGS = """
+WITH batting_stats AS (
+    SELECT
+        m.season,
+        i.batsman as player,
+        SUM(i.runs_batsman) as total_runs,
+        COUNT(DISTINCT i.filename) as matches,
+        ROW_NUMBER() OVER (PARTITION BY m.season ORDER BY SUM(i.runs_batsman) DESC, i.batsman) as season_rank
+    FROM innings_data i
+    JOIN match_info m ON i.filename = m.filename
+    {where}
+    GROUP BY m.season, i.batsman
+),
+bowling_totals AS (
+    SELECT
+        m.season,
+        i.bowler as player,
+        SUM(CASE WHEN i.wicket_details IS NOT NULL AND i.wicket_details != '' THEN 1 ELSE 0 END) as wickets,
+        SUM(i.runs_total - CASE WHEN i.extras_type IN ('byes', 'legbyes') THEN i.extras_runs ELSE 0 END)
+            as runs_conceded,
+        SUM(CASE WHEN i.extras_type IN ('wides', 'noballs') THEN 0 ELSE 1 END) as legal_balls
+    FROM innings_data i
+    JOIN match_info m ON i.filename = m.filename
+    {where}
+    GROUP BY m.season, i.bowler
+),
+bowling_stats AS (
+    SELECT
+        season,
+        player,
+        wickets,
+        runs_conceded,
+        ROUND(runs_conceded::numeric / NULLIF(legal_balls / 6.0, 0), 2) as economy_rate,
+        ROW_NUMBER() OVER (PARTITION BY season ORDER BY wickets DESC, runs_conceded, player) as season_rank
+    FROM bowling_totals
+)
+"""
+
+# The n-th best batsman and bowler of each season share a row
+PLAYER_QUERY = PLAYER_RANKINGS + """
+SELECT
+    COALESCE(b.season, w.season) as season,
+    b.player as top_batsman,
+    b.total_runs,
+    b.matches as batting_matches,
+    w.player as top_bowler,
+    w.wickets,
+    w.runs_conceded,
+    w.economy_rate
+FROM (SELECT * FROM batting_stats WHERE season_rank <= {top_players}) b
+FULL JOIN (SELECT * FROM bowling_stats WHERE season_rank <= {top_players}) w
+    ON w.season = b.season AND w.season_rank = b.season_rank
+ORDER BY 1, COALESCE(b.season_rank, w.season_rank)
+"""
+
+MATCH_QUERY = """
+SELECT
+    season,
+    COUNT(*) as total_matches,
+    SUM(CASE WHEN LOWER(margin) LIKE '%run%' OR LOWER(margin) LIKE '%wicket%' THEN 1 ELSE 0 END) as normal_matches,
+    SUM(CASE WHEN LOWER(margin) LIKE '%tie%' OR LOWER(margin) LIKE '%super over%' THEN 1 ELSE 0 END) as tie_matches,
+    SUM(CASE WHEN LOWER(margin) LIKE '%super over%' THEN 1 ELSE 0 END) as super_over_matches,
+    ROUND(AVG(CAST(SUBSTRING(margin FROM '^[0-9]+') AS numeric)), 2) as avg_margin
+FROM match_info
+{where}
+GROUP BY season
+ORDER BY season
+"""
+
+RECORD_QUERY = PLAYER_RANKINGS + """
+SELECT
+    COALESCE(b.season, w.season) as season,
+    b.player as top_run_scorer,
+    b.total_runs,
+    w.player as top_wicket_taker,
+    w.wickets
+FROM (SELECT * FROM batting_stats WHERE season_rank = 1) b
+FULL JOIN (SELECT * FROM bowling_stats WHERE season_rank = 1) w ON w.season = b.season
+ORDER BY 1
+"""
+
+# section -> (query, output fields, whether the season filter applies)
+SECTIONS: Dict[str, Tuple[str, List[str], bool]] = {
+    "metadata": (METADATA_QUERY, ["total_seasons", "total_matches", "total_teams", "first_match", "last_match"], False),
+    "seasons": (SEASONS_QUERY, ["year", "matches_played", "first_match", "last_match", "venues_used",
+                                "teams_participated"], False),
+    "toss_analytics": (TOSS_QUERY, ["season", "toss_winner", "total_tosses", "bat_percentage", "field_percentage",
+                                    "toss_win_match_percentage"], True),
+    "venue_analytics": (VENUE_QUERY, ["season", "venue", "matches_hosted", "avg_bat_first_percentage",
+                                      "team1_win_percentage"], True),
+    "team_analytics": (TEAM_QUERY, ["season", "team", "matches_played", "matches_won", "win_percentage"], True),
+    "player_analytics": (PLAYER_QUERY, ["season", "top_batsman", "total_runs", "batting_matches", "top_bowler",
+                                        "wickets", "runs_conceded", "economy_rate"], True),
+    "match_analytics": (MATCH_QUERY, ["season", "total_matches", "normal_matches", "tie_matches",
+                                      "super_over_matches", "avg_margin"], True),
+    "record_books": (RECORD_QUERY, ["season", "top_run_scorer", "total_runs", "top_wicket_taker", "wickets"], True),
+}
+
+
+def resolve_category(category: Optional[str]) -> Optional[List[str]]:
+    """
+    Sections needed for ``category``; None means all of them.
+
+    Raises:
+        ValueError: For an unknown category
+    """
+    if not category:
+        return None
+    name = category.lower()
+    name = CATEGORY_ALIASES.get(name, name)
+    if name not in SECTIONS:
+        valid = ", ".join(list(CATEGORY_ALIASES) + ["seasons", "metadata"])
+        raise ValueError(f"Invalid category: {category}. Use one of: {valid}")
+    return [name]
+
+
+def _section_sql(section: str, season: Optional[int]) -> str:
+    query, _, filtered = SECTIONS[section]
+    if not filtered or season is None:
+        return query.format(where="", top_players=IPL_HISTORY_TOP_PLAYERS)
+    # Every filtered query reads match_info either directly or as "m"
+    column = "m.season" if "JOIN match_info m" in query else "season"
+    return query.format(where=f"WHERE {column} = :season", top_players=IPL_HISTORY_TOP_PLAYERS)
+
+
+class IPLHistoryOverview:
+    """Runs and memoizes the overview sections"""
+
+    def __init__(self, max_workers: int = IPL_HISTORY_SECTION_WORKERS):
+        self.max_workers = max_workers
+        self._sections: Dict[Tuple[str, Optional[int]], List[Dict[str, Any]]] = {}
+        self._version: Any = None
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple[str, Optional[int]], threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _sync_version(self, version: Any):
+        """Drop sections memoized for an older data version"""
+        with self._lock:
+            if version != self._version:
+                self._sections.clear()
+                self._key_locks.clear()
+                self._version = version
+
+    def _key_lock(self, key) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _run_section(self, section: str, season: Optional[int], engine) -> List[Dict[str, Any]]:
+        _, fields, filtered = SECTIONS[section]
+        key = (section, season if filtered else None)
+        # One thread computes a missing section; others asking for it wait and reuse it
+        with self._key_lock(key):
+            rows = self._sections.get(key)
+            if rows is not None:
+                self.hits += 1
+                return rows
+            self.misses += 1
+            params = {"season": season} if filtered and season is not None else {}
+            with engine.connect() as connection:
+                result = connection.execute(text(_section_sql(section, season)), params).fetchall()
+            rows = [dict(zip(fields, row)) for row in result]
+            with self._lock:
+                self._sections[key] = rows
+            return rows
+
+    def sections(self, names: List[str], season: Optional[int] = None, engine=None,
+                 version: Any = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Rows of each named section, concurrently for the ones not memoized.
+
+        Args:
+            names: Section names from ``SECTIONS``
+            season: Season filter for the per-season sections
+            engine: SQLAlchemy engine whose pool the sections draw from
+            version: Data version the memoized sections belong to
+
+        Returns:
+            dict: Section name -> list of row dictionaries
+        """
+        if engine is None:
+            from app.database import engine
+        self._sync_version(version)
+        if len(names) == 1 or self.max_workers <= 1:
+            return {name: self._run_section(name, season, engine) for name in names}
+
+        # Copy the request context so section queries count towards its Server-Timing
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(names)),
+                                thread_name_prefix="ipl-history") as executor:
+            futures = {
+                name: executor.submit(contextvars.copy_context().run, self._run_section, name, season, engine)
+                for name in names
+            }
+            return {name: future.result() for name, future in futures.items()}
+
+    def overview(self, season: Optional[int] = None, category: Optional[str] = None, engine=None,
+                 version: Any = None) -> Dict[str, Any]:
+        """
+        The overview payload, or only the requested category.
+
+        Raises:
+            ValueError: For an unknown category
+        """
+        names = resolve_category(category) or list(SECTIONS)
+        results = self.sections(names, season, engine, version)
+        if category:
+            name = names[0]
+            return {name: self._metadata(results[name]) if name == "metadata" else results[name]}
+
+        payload = {"metadata": self._metadata(results["metadata"])}
+        payload.update({name: results[name] for name in names if name != "metadata"})
+        return payload
+
+    @staticmethod
+    def _metadata(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        row = rows[0] if rows else {}
+        return {
+            "total_seasons": row.get("total_seasons") or 0,
+            "total_matches": row.get("total_matches") or 0,
+            "total_teams": row.get("total_teams") or 0,
+            "date_range": {"first_match": row["first_match"], "last_match": row["last_match"]}
+                          if row.get("first_match") is not None else {},
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {"data_version": self._version, "sections": len(self._sections), "hits": self.hits,
+                "misses": self.misses}
+
+
+ipl_history_overview = IPLHistoryOverview()
+
+
+def get_ipl_history_overview() -> IPLHistoryOverview:
+    return ipl_history_overview
@@ -0,0 +1,358 @@
+"""
+In-memory player-name search index.
+
+Name lookups used to run ``LIKE``/``ILIKE`` patterns over a ``UNION ALL`` of
+every batsman, bowler and player-of-the-match row, which scans the whole
+delivery table per request. The index is built once per process from the
+appearance counts of every player and answers three kinds of match:
+
+* prefix -- a trie over name tokens, so "koh", "v koh" and "kohli v" all
+  find "V Kohli";
+* trigram -- token trigrams shared with the query, for substrings and
+  misspellings that share most of their letters;
+* edit distance -- single-edit deletion neighbours of every token, verified
+  with an optimal-string-alignment distance, so typos such as "kholi" or
+  "dhoini" still resolve.
+
+Within each kind of match, players with more appearances rank first.
+"""
+import logging
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Set
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Appearances per player name when the delivery store is not loaded
+PLAYER_APPEARANCES_QUERY = """
+WITH player_names AS (
+    SELECT batsman as player_name, COUNT(*) as appearances FROM innings_data GROUP BY batsman
+    UNION ALL
+    SELECT bowler as player_name, COUNT(*) as appearances FROM innings_data GROUP BY bowler
+    UNION ALL
+    SELECT player_of_match as player_name, COUNT(*) as appearances FROM match_info GROUP BY player_of_match
+)
+SELECT player_name, SUM(appearances) as appearances
+FROM player_names
+WHERE player_name IS NOT NULL
+GROUP BY player_name
+"""
+
+# Match kinds, best first; search results are ordered by kind, then score, then appearances
+EXACT, NAME_PREFIX, TOKEN_PREFIX, SUBSTRING, FUZZY = 4, 3, 2, 1, 0
+MATCH_KIND_NAMES = {
+    EXACT: "exact", NAME_PREFIX: "prefix", TOKEN_PREFIX: "token_prefix",
+    SUBSTRING: "substring", FUZZY: "fuzzy",
+}
+
+# Minimum similarity (0-1) for a fuzzy search result
+FUZZY_MIN_SCORE = 0.6
+# Minimum similarity for resolve() to accept a fuzzy match for a name
+RESOLVE_MIN_SCORE = 0.75
+
+
+class PlayerMatch(NamedTuple):
+    player_name: str
+    appearances: int
+    kind: int
+    score: float
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "player_name": self.player_name,
+            "appearances": self.appearances,
+            "match_type": MATCH_KIND_NAMES[self.kind],
+            "score": round(self.score, 3),
+        }
+
+
+def normalize_name(name: str) -> str:
+    """Lower-case, accent-free, punctuation-free form of a name with single spaces"""
+    name = unicodedata.normalize("NFKD", str(name))
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", name.lower()).split())
+
+
+def _trigrams(token: str) -> Set[str]:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _deletions(token: str) -> Set[str]:
+    """The token plus every string one deletion away from it"""
+    return {token} | {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def _osa_distance(a: str, b: str) -> int:
+    """Optimal string alignment distance (Levenshtein plus adjacent transpositions)"""
+    if a == b:
+        return 0
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.ids: List[int] = []
+
+
+class PlayerNameIndex:
+    """Prefix, trigram and edit-distance search over player names"""
+
+    def __init__(self, appearances: Dict[str, int]):
+        # Ids are assigned by descending appearances, so every posting list is
+        # already in ranking order and prefix results need no sort
+        ranked = sorted(
+            ((name, int(count)) for name, count in appearances.items() if name and normalize_name(name)),
+            key=lambda item: (-item[1], item[0])
+        )
+        self.names = [name for name, _ in ranked]
+        self.appearances = [count for _, count in ranked]
+        self.normalized = [normalize_name(name) for name in self.names]
+        self.tokens = [normalized.split() for normalized in self.normalized]
+        self.name_trigrams: List[Set[str]] = []
+
+        self._trie = _TrieNode()
+        self._trigram_postings: Dict[str, List[int]] = {}
+        self._deletion_postings: Dict[str, List[int]] = {}
+
+        for name_id, (normalized, tokens) in enumerate(zip(self.normalized, self.tokens)):
+            trigrams = set()
+            for token in tokens:
+                self._insert_prefixes(token, name_id)
+                trigrams |= _trigrams(token)
+                if len(token) >= 3:
+                    for variant in _deletions(token):
+                        self._add_posting(self._deletion_postings, variant, name_id)
+            for trigram in trigrams:
+                self._trigram_postings.setdefault(trigram, []).append(name_id)
+            self.name_trigrams.append(trigrams)
+
+    @staticmethod
+    def _add_posting(postings: Dict[str, List[int]], key: str, name_id: int):
+        ids = postings.setdefault(key, [])
+        if not ids or ids[-1] != name_id:
+            ids.append(name_id)
+
+    def _insert_prefixes(self, token: str, name_id: int):
+        node = self._trie
+        for char in token:
+            node = node.children.setdefault(char, _TrieNode())
+            if not node.ids or node.ids[-1] != name_id:
+                node.ids.append(name_id)
+
+    def _prefix_ids(self, prefix: str) -> List[int]:
+        node = self._trie
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.ids
+
+    @classmethod
+    def from_store(cls, store) -> "PlayerNameIndex":
+        """Appearances from the in-memory delivery store"""
+        counts = store.count_by("batsman").add(store.count_by("bowler"), fill_value=0)
+        player_of_match = store.matches_frame(columns=["player_of_match"])["player_of_match"]
+        counts = counts.add(player_of_match.dropna().value_counts(), fill_value=0)
+        return cls(counts.astype(int).to_dict())
+
+    @classmethod
+    def from_database(cls, engine) -> "PlayerNameIndex":
+        appearances = pd.read_sql(PLAYER_APPEARANCES_QUERY, engine)
+        return cls(dict(zip(appearances["player_name"], appearances["appearances"])))
+
+    def __len__(self):
+        return len(self.names)
+
+    # ---------- SEARCH ---------- #
+
+    def _token_prefix_ids(self, query_tokens: List[str]) -> List[int]:
+        """Names in which every query token is a prefix of some name token, in ranking order"""
+        postings = sorted((self._prefix_ids(token) for token in query_tokens), key=len)
+        if not postings or not postings[0]:
+            return []
+        ids = postings[0]
+        for other in postings[1:]:
+            allowed = set(other)
+            ids = [name_id for name_id in ids if name_id in allowed]
+        return ids
+
+    def _edit_similarity(self, query_tokens: List[str], name_id: int) -> float:
+        """Mean over query tokens of 1 - (edit distance / length) to the closest name token"""
+        return sum(
+            max(1 - _osa_distance(token, name_token) / max(len(token), len(name_token))
+                for name_token in self.tokens[name_id])
+            for token in query_tokens
+        ) / len(query_tokens)
+
+    def _fuzzy_matches(self, normalized: str, query_tokens: List[str], exclude: Set[int]) -> List[PlayerMatch]:
+        """
+        Substring and misspelling matches outside ``exclude``.
+
+        Trigram overlap counts give the Dice similarity of every name sharing a
+        trigram without any per-name set work; the comparatively expensive
+        edit distance is only computed for the deletion neighbours of the
+        query tokens, which are the names within a single edit of some token.
+        """
+        query_trigrams = set().union(*(_trigrams(token) for token in query_tokens))
+        shared = Counter()
+        for trigram in query_trigrams:
+            shared.update(self._trigram_postings.get(trigram, ()))
+
+        neighbours = set()
+        for token in query_tokens:
+            if len(token) >= 3:
+                for variant in _deletions(token):
+                    neighbours.update(self._deletion_postings.get(variant, ()))
+
+        matches = []
+        for name_id in neighbours.union(shared) - exclude:
+            count = shared.get(name_id, 0)
+            # Every trigram of a substring except the two padded leading ones is shared
+            if count >= len(query_trigrams) - 2 and normalized in self.normalized[name_id]:
+                matches.append(PlayerMatch(self.names[name_id], self.appearances[name_id], SUBSTRING, 1.0))
+                continue
+            score = 2 * count / (len(query_trigrams) + len(self.name_trigrams[name_id]))
+            if name_id in neighbours:
+                score = max(score, self._edit_similarity(query_tokens, name_id))
+            if score >= FUZZY_MIN_SCORE:
+                matches.append(PlayerMatch(self.names[name_id], self.appearances[name_id], FUZZY, score))
+        return matches
+
+    def search(self, query: str, limit: int = 10) -> List[PlayerMatch]:
+        """
+        Best-matching players for a free-text query.
+
+        Args:
+            query: Full or partial name, any case, typos allowed
+            limit: Maximum number of results
+
+        Returns:
+            list[PlayerMatch]: Ordered by match kind, score, then appearances
+        """
+        normalized = normalize_name(query)
+        if not normalized or limit <= 0:
+            return []
+        query_tokens = normalized.split()
+
+        results: List[PlayerMatch] = []
+        seen: Set[int] = set()
+        for name_id in self._token_prefix_ids(query_tokens):
+            name = self.normalized[name_id]
+            kind = EXACT if name == normalized else NAME_PREFIX if name.startswith(normalized) else TOKEN_PREFIX
+            results.append(PlayerMatch(self.names[name_id], self.appearances[name_id], kind, 1.0))
+            seen.add(name_id)
+        results.sort(key=lambda match: -match.kind)  # stable: appearances order within a kind
+
+        if len(results) < limit:
+            fuzzy = self._fuzzy_matches(normalized, query_tokens, seen)
+            # Round scores so near-equal matches are ordered by appearances
+            fuzzy.sort(key=lambda match: (-match.kind, -round(match.score, 1), -match.appearances))
+            results.extend(fuzzy)
+
+        return results[:limit]
+
+    def resolve(self, name: str) -> Optional[str]:
+        """
+        Canonical player name for a user-supplied one, or None if it is ambiguous.
+
+        An exact (case, accent and whitespace-insensitive) match is accepted
+        as it is. Otherwise the name must pick out exactly one player: one
+        prefix or substring match, or, failing those, one fuzzy match with a
+        similarity of at least ``RESOLVE_MIN_SCORE``. "Jadeja" with both
+        "B Jadeja" and "K Jadeja" indexed resolves to neither; ``search``
+        lists the candidates.
+        """
+        matches = self.search(name, limit=2)
+        if not matches:
+            return None
+        exact = [match.player_name for match in matches if match.kind == EXACT]
+        if exact:
+            if len(exact) == 1:
+                return exact[0]
+            return name if name in exact else None
+        candidates = [match for match in matches if match.kind != FUZZY]
+        if not candidates:
+            candidates = [match for match in matches if match.score >= RESOLVE_MIN_SCORE]
+        return candidates[0].player_name if len(candidates) == 1 else None
+
+    def describe(self) -> Dict[str, int]:
+        return {
+            "players": len(self.names),
+            "trigrams": len(self._trigram_postings),
+            "deletion_keys": len(self._deletion_postings),
+        }
+
+
+# Process-wide instance, swapped atomically on reload
+_player_index: Optional[PlayerNameIndex] = None
+_player_index_lock = threading.Lock()
+
+
+def get_player_index() -> Optional[PlayerNameIndex]:
+    """Return the loaded index, or None if it has not been built."""
+    return _player_index
+
+
+def load_player_index(engine=None) -> Optional[PlayerNameIndex]:
+    """
+    (Re)build the process-wide player-name index.
+
+    Uses the in-memory delivery store when it is loaded, otherwise one
+    aggregate query. Failures are logged rather than raised, leaving the
+    routers on their SQL fallbacks.
+
+    Returns:
+        PlayerNameIndex or None
+    """
+    global _player_index
+    from app.services.delivery_store import get_delivery_store
+
+    with _player_index_lock:
+        try:
+            store = get_delivery_store()
+            if store is not None:
+                index = PlayerNameIndex.from_store(store)
+            else:
+                if engine is None:
+                    from app.database import engine
+                index = PlayerNameIndex.from_database(engine)
+        except Exception as e:
+            logger.error(f"Error building player name index: {str(e)}")
+            return _player_index
+        _player_index = index
+    logger.info(f"Built player name index: {len(index)} players")
+    return index
+
+
+def resolve_player_name(name: str) -> str:
+    """Canonical name for ``name`` if the index is loaded and finds exactly one, else ``name`` unchanged"""
+    index = _player_index
+    if index is None:
+        return name
+    return index.resolve(name) or name
+
+
+def search_player_names(query: str, limit: int = 10) -> Optional[List[PlayerMatch]]:
+    """Index search results, or None when the index is not loaded"""
+    index = _player_index
+    if index is None:
+        return None
+    return index.search(query, limit)
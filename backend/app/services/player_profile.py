@@ -0,0 +1,343 @@
+"""
+Single-pass player profile engine.
+
+The player performance endpoints used to loop over ``groupby('filename')``
+and call ``iterrows()`` inside every group, and the opponent splits re-scanned
+the player's deliveries once per opponent. ``PlayerProfile`` instead flags
+dismissals, wickets and boundaries on the whole delivery frame at once and
+collapses it to one row per innings with a single groupby. Every summary,
+split and highlight is then a projection of those innings tables (or, for
+the over-phase splits, one more groupby over the deliveries), so building a
+profile is O(n) in the player's deliveries.
+"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Per-match context carried from the first delivery of each innings
+INNINGS_CONTEXT_COLUMNS = ["team", "team1", "team2", "winner", "match_date", "venue", "season"]
+
+# Over-phase splits: (label, first over inclusive, last over exclusive) on over_ball
+MATCH_SITUATIONS = [
+    ("PowerPlay (1-6)", 0, 6),
+    ("Middle Overs (7-15)", 6, 15),
+    ("Death Overs (16-20)", 15, 20),
+]
+
+
+def _rate(numerator, denominator, scale: float = 1.0) -> np.ndarray:
+    """``numerator / denominator * scale`` rounded to 2 places, 0.0 where the denominator is 0"""
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    safe = np.where(denominator == 0, 1.0, denominator)
+    ratio = np.where(denominator == 0, 0.0, numerator / safe * scale)
+    # Python's round (exact decimal halves) so figures match the per-row calculate_* helpers;
+    # the arrays here are per-innings or per-split, never per-delivery
+    return np.array([round(value, 2) for value in ratio.ravel().tolist()]).reshape(ratio.shape)
+
+
+def _optional(value: Any) -> Any:
+    return None if pd.isna(value) else value
+
+
+def _figures(wickets: np.ndarray, runs: np.ndarray) -> List[str]:
+    return [f"{w}/{r}" for w, r in zip(wickets.tolist(), runs.tolist())]
+
+
+def _by_best_figures(innings: pd.DataFrame) -> pd.DataFrame:
+    """Innings ordered most wickets first, then fewest runs; ties keep match order"""
+    return innings.sort_values(["wickets", "runs"], ascending=[False, True], kind="stable")
+
+
+def _best_figures(innings: pd.DataFrame, key: str) -> pd.Series:
+    """Best ``wickets/runs`` per ``key`` value, "0/0" if no wicket was taken"""
+    best = _by_best_figures(innings).drop_duplicates(key).set_index(key)
+    figures = pd.Series(_figures(best["wickets"].to_numpy(), best["runs"].to_numpy()), index=best.index)
+    return figures.where(best["wickets"] > 0, "0/0")
+
+
+class PlayerProfile:
+    """Batting and bowling summaries, splits and highlights for one player"""
+
+    def __init__(self, player_name: str, batting_data: Optional[pd.DataFrame] = None,
+                 bowling_data: Optional[pd.DataFrame] = None):
+        self.player_name = player_name
+        self.batting_data = batting_data if batting_data is not None else pd.DataFrame()
+        self.bowling_data = bowling_data if bowling_data is not None else pd.DataFrame()
+        self.batting_innings = self._batting_innings() if self.has_batting else None
+        self.bowling_innings = self._bowling_innings() if self.has_bowling else None
+
+    @property
+    def has_batting(self) -> bool:
+        return not self.batting_data.empty
+
+    @property
+    def has_bowling(self) -> bool:
+        return not self.bowling_data.empty
+
+    # ---------- INNINGS TABLES ---------- #
+
+    @staticmethod
+    def _innings(data: pd.DataFrame, batting: bool, **aggregations) -> pd.DataFrame:
+        """
+        One row per match (the player bats or bowls once per match), sorted by filename.
+
+        ``team`` is the batting side of the deliveries, so it is the player's
+        own team when batting and the opponent when bowling.
+        """
+        totals = data.groupby("filename", sort=True).agg(**aggregations)
+        context = data.drop_duplicates("filename").set_index("filename")[INNINGS_CONTEXT_COLUMNS]
+        innings = totals.join(context)
+        fielding = innings["team2"].where(innings["team"] == innings["team1"], innings["team1"])
+        own_team, opponent = (innings["team"], fielding) if batting else (fielding, innings["team"])
+        innings["opponent"] = opponent
+        innings["won"] = (innings["winner"] == own_team).to_numpy()
+        return innings
+
+    def _batting_innings(self) -> pd.DataFrame:
+        data = self.batting_data
+        runs = data["runs_batsman"]
+        wicket_details = data["wicket_details"]
+        dismissed = wicket_details.notna() & wicket_details.astype(str).str.contains(self.player_name, regex=False)
+        flagged = data.assign(four=runs.eq(4), six=runs.eq(6), dismissed=dismissed)
+        innings = self._innings(
+            flagged,
+            batting=True,
+            runs=("runs_batsman", "sum"),
+            balls=("runs_batsman", "size"),
+            fours=("four", "sum"),
+            sixes=("six", "sum"),
+            dismissed=("dismissed", "any"),
+        )
+        innings["strike_rate"] = _rate(innings["runs"], innings["balls"], 100)
+        return innings
+
+    def _bowling_innings(self) -> pd.DataFrame:
+        flagged = self.bowling_data.assign(wicket=self.bowling_data["wicket_details"].notna())
+        return self._innings(
+            flagged,
+            batting=False,
+            wickets=("wicket", "sum"),
+            runs=("runs_total", "sum"),
+            balls=("runs_total", "size"),
+        )
+
+    # ---------- SUMMARIES ---------- #
+
+    def batting_summary(self) -> Optional[Dict[str, Any]]:
+        if not self.has_batting:
+            return None
+        innings = self.batting_innings
+        runs = innings["runs"]
+        matches_played = len(innings)
+        total_runs = int(runs.sum())
+        total_balls = int(innings["balls"].sum())
+        not_outs = int((~innings["dismissed"]).sum())
+        return {
+            "matches_played": matches_played,
+            "innings_batted": matches_played,  # Assuming 1 innings per match
+            "runs_scored": total_runs,
+            "balls_faced": total_balls,
+            "highest_score": int(runs.max()),
+            "average": float(_rate(total_runs, matches_played - not_outs)),
+            "strike_rate": float(_rate(total_runs, total_balls, 100)),
+            "centuries": int((runs >= 100).sum()),
+            "half_centuries": int(((runs >= 50) & (runs < 100)).sum()),
+            "fours": int(innings["fours"].sum()),
+            "sixes": int(innings["sixes"].sum()),
+            "not_outs": not_outs,
+        }
+
+    def bowling_summary(self) -> Optional[Dict[str, Any]]:
+        if not self.has_bowling:
+            return None
+        innings = self.bowling_innings
+        wickets = innings["wickets"]
+        matches_played = len(innings)
+        total_wickets = int(wickets.sum())
+        total_runs = int(innings["runs"].sum())
+        total_balls = int(innings["balls"].sum())
+        total_overs = total_balls / 6
+        best = _by_best_figures(innings).iloc[0]
+        return {
+            "matches_played": matches_played,
+            "innings_bowled": matches_played,  # Assuming 1 innings per match
+            "overs_bowled": round(total_overs, 1),
+            "runs_conceded": total_runs,
+            "wickets": total_wickets,
+            "best_bowling_figures": f"{best['wickets']}/{best['runs']}" if best["wickets"] > 0 else "0/0",
+            "average": float(_rate(total_runs, total_wickets)),
+            "economy_rate": float(_rate(total_runs, total_overs)),
+            "strike_rate": float(_rate(total_balls, total_wickets)),
+            "four_wickets": int((wickets == 4).sum()),
+            "five_wickets": int((wickets >= 5).sum()),
+        }
+
+    # ---------- HIGHLIGHTS ---------- #
+
+    @staticmethod
+    def _highlight_context(innings: pd.DataFrame) -> List[Dict[str, Any]]:
+        return [
+            {
+                "match_id": match_id,
+                "date": str(date) if not pd.isna(date) else None,
+                "opponent": opponent,
+                "result": "Win" if won else "Loss",
+                "venue": _optional(venue),
+                "season": int(season) if not pd.isna(season) else None,
+            }
+            for match_id, date, opponent, won, venue, season in zip(
+                innings.index, innings["match_date"], innings["opponent"], innings["won"],
+                innings["venue"], innings["season"]
+            )
+        ]
+
+    def highest_scores(self, limit: int = 5) -> List[Dict[str, Any]]:
+        if not self.has_batting:
+            return []
+        top = self.batting_innings.sort_values(
+            ["runs", "strike_rate"], ascending=False, kind="stable"
+        ).head(limit)
+        return [
+            dict(context, score=score, balls_faced=balls, strike_rate=strike_rate,
+                 fours=fours, sixes=sixes, not_out=not dismissed)
+            for context, score, balls, strike_rate, fours, sixes, dismissed in zip(
+                self._highlight_context(top), top["runs"].tolist(), top["balls"].tolist(),
+                top["strike_rate"].tolist(), top["fours"].tolist(), top["sixes"].tolist(),
+                top["dismissed"].tolist()
+            )
+        ]
+
+    def best_bowling(self, limit: int = 5) -> List[Dict[str, Any]]:
+        if not self.has_bowling:
+            return []
+        top = _by_best_figures(self.bowling_innings).head(limit)
+        balls = top["balls"].to_numpy()
+        overs = balls // 6 + (balls % 6) / 10  # Format as 4.3 for 4 overs and 3 balls
+        economy = _rate(top["runs"], overs)
+        figures = _figures(top["wickets"].to_numpy(), top["runs"].to_numpy())
+        return [
+            dict(context, overs=round(o, 1), wickets=w, runs_conceded=r, economy=e, bowling_figures=f)
+            for context, o, w, r, e, f in zip(
+                self._highlight_context(top), overs.tolist(), top["wickets"].tolist(),
+                top["runs"].tolist(), economy.tolist(), figures
+            )
+        ]
+
+    # ---------- SPLITS ---------- #
+
+    @staticmethod
+    def _records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Rows of ``frame`` (index included) as dicts of plain Python values"""
+        frame = frame.reset_index()
+        columns = [frame[c].tolist() for c in frame.columns]
+        return [dict(zip(frame.columns, row)) for row in zip(*columns)]
+
+    def _batting_split(self, key: str) -> pd.DataFrame:
+        grouped = self.batting_innings.dropna(subset=[key]).groupby(key, sort=True).agg(
+            matches=("runs", "size"),
+            runs=("runs", "sum"),
+            balls=("balls", "sum"),
+            best_score=("runs", "max"),
+        )
+        grouped["innings"] = grouped["matches"]
+        grouped["average"] = _rate(grouped["runs"], grouped["matches"])
+        grouped["strike_rate"] = _rate(grouped["runs"], grouped["balls"], 100)
+        return grouped
+
+    def _bowling_split(self, key: str) -> pd.DataFrame:
+        innings = self.bowling_innings.dropna(subset=[key])
+        grouped = innings.groupby(key, sort=True).agg(
+            matches=("runs", "size"),
+            wickets=("wickets", "sum"),
+            runs=("runs", "sum"),
+            balls=("balls", "sum"),
+        )
+        grouped["innings"] = grouped["matches"]
+        grouped["economy"] = _rate(grouped["runs"], grouped["balls"] / 6)
+        grouped["bowling_strike_rate"] = _rate(grouped["balls"], grouped["wickets"])
+        grouped["best_bowling"] = _best_figures(innings, key)
+        return grouped
+
+    def batting_against_teams(self) -> List[Dict[str, Any]]:
+        if not self.has_batting:
+            return []
+        split = self._batting_split("opponent").rename_axis("team")
+        split = split.sort_values("runs", ascending=False, kind="stable")
+        return self._records(
+            split[["matches", "innings", "runs", "average", "strike_rate", "best_score"]]
+        )
+
+    def bowling_against_teams(self) -> List[Dict[str, Any]]:
+        if not self.has_bowling:
+            return []
+        split = self._bowling_split("opponent").rename_axis("team")
+        split = split.sort_values("wickets", ascending=False, kind="stable")
+        return self._records(
+            split[["matches", "innings", "wickets", "economy", "bowling_strike_rate", "best_bowling"]]
+        )
+
+    def batting_by_season(self) -> List[Dict[str, Any]]:
+        if not self.has_batting:
+            return []
+        split = self._batting_split("season")
+        split.index = split.index.astype(int)
+        return self._records(split.sort_index()[["matches", "runs", "average", "strike_rate"]])
+
+    def bowling_by_season(self) -> List[Dict[str, Any]]:
+        if not self.has_bowling:
+            return []
+        split = self._bowling_split("season")
+        split.index = split.index.astype(int)
+        return self._records(
+            split.sort_index()[["matches", "wickets", "economy", "bowling_strike_rate"]]
+        )
+
+    def batting_by_venue(self) -> List[Dict[str, Any]]:
+        if not self.has_batting:
+            return []
+        split = self._batting_split("venue").sort_values("matches", ascending=False, kind="stable")
+        return self._records(split[["matches", "innings", "runs", "average", "strike_rate"]])
+
+    def bowling_by_venue(self) -> List[Dict[str, Any]]:
+        if not self.has_bowling:
+            return []
+        split = self._bowling_split("venue").sort_values("matches", ascending=False, kind="stable")
+        return self._records(
+            split[["matches", "innings", "wickets", "economy", "bowling_strike_rate"]]
+        )
+
+    @staticmethod
+    def _situation_codes(data: pd.DataFrame) -> np.ndarray:
+        """Index into MATCH_SITUATIONS for every delivery, -1 outside all of them"""
+        over_ball = data["over_ball"].to_numpy(dtype=np.float64)
+        codes = np.full(len(data), -1)
+        for code, (_, low, high) in enumerate(MATCH_SITUATIONS):
+            codes[(over_ball >= low) & (over_ball < high)] = code
+        return codes
+
+    def _situation_split(self, data: pd.DataFrame, **aggregations) -> pd.DataFrame:
+        codes = self._situation_codes(data)
+        selected = codes >= 0
+        grouped = data[selected].assign(situation=codes[selected]).groupby("situation", sort=True).agg(
+            innings=("filename", "nunique"), balls=("filename", "size"), **aggregations
+        )
+        grouped.index = [MATCH_SITUATIONS[code][0] for code in grouped.index]
+        return grouped.rename_axis("situation")
+
+    def batting_match_situations(self) -> List[Dict[str, Any]]:
+        if not self.has_batting:
+            return []
+        split = self._situation_split(self.batting_data, runs=("runs_batsman", "sum"))
+        split["strike_rate"] = _rate(split["runs"], split["balls"], 100)
+        return self._records(split[["innings", "runs", "strike_rate"]])
+
+    def bowling_match_situations(self) -> List[Dict[str, Any]]:
+        if not self.has_bowling:
+            return []
+        data = self.bowling_data.assign(wicket=self.bowling_data["wicket_details"].notna())
+        split = self._situation_split(data, runs=("runs_total", "sum"), wickets=("wicket", "sum"))
+        split["economy"] = _rate(split["runs"], split["balls"] / 6)
+        split["bowling_strike_rate"] = _rate(split["balls"], split["wickets"])
+        return self._records(split[["innings", "wickets", "economy", "bowling_strike_rate"]])
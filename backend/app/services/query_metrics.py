@@ -0,0 +1,371 @@
+"""
+Per-request SQL instrumentation.
+
+SQLAlchemy cursor events on the sync (psycopg2) and async (asyncpg) engines
+time every statement and add it to the stats of the request being served,
+which the middleware keeps in a context variable. For each request the
+middleware then
+
+* reports query count, DB time, rows fetched and bytes transferred in a
+  ``Server-Timing`` response header, and
+* folds them into per-route histograms (keyed by the route template, so
+  ``/api/teams/{team_name}`` is one series however many teams are asked for).
+
+Statements slower than ``SLOW_QUERY_THRESHOLD_MS`` are logged with their
+fingerprint -- literals and placeholders replaced by ``?`` -- and their
+parameters, and kept in a bounded in-memory log.
+
+Bytes are approximate: bytes sent is the statement plus the rendered
+parameters, bytes received is the number of result rows times the text size
+of the first row.
+"""
+import contextvars
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import event
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.routing import Match
+
+logger = logging.getLogger(__name__)
+
+QUERY_METRICS_ENABLED = os.getenv("QUERY_METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "500"))
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "200"))  # slow queries kept for the metrics endpoint
+SLOW_QUERY_MAX_PARAMS_CHARS = 500  # longer parameter lists are truncated in the log
+
+# Histogram upper bounds; observations above the last bound land in "+Inf"
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+DB_TIME_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+_EXECUTE_STARTED = "query_metrics_started_at"
+
+
+class RequestQueryStats:
+    """Database work done while serving one request"""
+
+    __slots__ = ("queries", "db_seconds", "rows", "bytes_sent", "bytes_received", "route")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.rows = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.route: Optional[str] = None
+
+    @property
+    def bytes_transferred(self) -> int:
+        return self.bytes_sent + self.bytes_received
+
+    def server_timing(self, total_seconds: float) -> str:
+        """``Server-Timing`` header value for these stats"""
+        return ", ".join([
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.queries} queries"',
+            f'db-rows;desc="{self.rows}"',
+            f'db-bytes;desc="{self.bytes_transferred}"',
+            f"app;dur={total_seconds * 1000:.1f}",
+        ])
+
+
+_current_stats: contextvars.ContextVar[Optional[RequestQueryStats]] = contextvars.ContextVar(
+    "request_query_stats", default=None
+)
+
+
+def current_query_stats() -> Optional[RequestQueryStats]:
+    """Stats of the request being served, or None outside a request"""
+    return _current_stats.get()
+
+
+class Histogram:
+    """Cumulative-style histogram over fixed upper bounds"""
+
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def to_dict(self) -> Dict[str, Any]:
+        buckets, running = {}, 0
+        for bound, count in zip(list(self.bounds) + ["+Inf"], self.counts):
+            running += count
+            buckets[str(bound)] = running
+        return {"count": self.count, "sum": round(self.sum, 3), "buckets": buckets}
+
+
+class RouteMetrics:
+    """Aggregated request and query stats for one route"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.latency_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.db_time_ms = Histogram(DB_TIME_BUCKETS_MS)
+        self.rows = 0
+        self.bytes_transferred = 0
+
+    def observe(self, stats: RequestQueryStats, total_seconds: float, status_code: int):
+        self.requests += 1
+        if status_code >= 500:
+            self.errors += 1
+        self.latency_ms.observe(total_seconds * 1000)
+        self.queries.observe(stats.queries)
+        self.db_time_ms.observe(stats.db_seconds * 1000)
+        self.rows += stats.rows
+        self.bytes_transferred += stats.bytes_transferred
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "latency_ms": self.latency_ms.to_dict(),
+            "queries": self.queries.to_dict(),
+            "db_time_ms": self.db_time_ms.to_dict(),
+            "rows": self.rows,
+            "bytes_transferred": self.bytes_transferred,
+        }
+
+
+# Quoted strings, numbers and every placeholder style the routers use
+_FINGERPRINT_LITERALS = re.compile(
+    r"'(?:[^']|'')*'"                 # string literals
+    r"|%\([^)]+\)s|%s|\$\d+|:\w+"     # pyformat, positional, asyncpg and named placeholders
+    r"|\b\d+(?:\.\d+)?\b"             # numbers
+)
+_FINGERPRINT_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_FINGERPRINT_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_FINGERPRINT_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Statement with comments removed, literals and placeholders replaced by
+    ``?`` and lists of them collapsed, so runs with different values group.
+    """
+    normalized = _FINGERPRINT_COMMENTS.sub(" ", statement)
+    normalized = _FINGERPRINT_LITERALS.sub("?", normalized)
+    normalized = _FINGERPRINT_LISTS.sub("(?...)", normalized)
+    return _FINGERPRINT_SPACE.sub(" ", normalized).strip()
+
+
+def _row_size(row) -> int:
+    values = row.values() if isinstance(row, dict) else row
+    return sum(len(str(value)) for value in values if value is not None)
+
+
+def _result_shape(cursor) -> Tuple[int, int]:
+    """
+    Rows in the statement's result and their estimated size in bytes.
+
+    asyncpg results are already buffered by SQLAlchemy's adapter; for a
+    psycopg2 client-side cursor the first row is read and the cursor
+    scrolled back, so the caller still fetches every row.
+    """
+    if cursor.description is None:
+        return 0, 0
+    buffered = getattr(cursor, "_rows", None)
+    if buffered is not None:
+        rows = len(buffered)
+        return rows, rows * _row_size(buffered[0]) if rows else 0
+    rows = max(cursor.rowcount, 0)
+    if not rows or getattr(cursor, "name", None) or not hasattr(cursor, "scroll"):
+        return rows, 0
+    first = cursor.fetchone()
+    cursor.scroll(0, mode="absolute")
+    return rows, rows * _row_size(first) if first is not None else 0
+
+
+class QueryMetrics:
+    """Per-route histograms, background query totals and the slow-query log"""
+
+    def __init__(self, slow_threshold_ms: float = SLOW_QUERY_THRESHOLD_MS, slow_log_size: int = SLOW_QUERY_LOG_SIZE):
+        self.slow_threshold_ms = slow_threshold_ms
+        self.routes: Dict[str, RouteMetrics] = {}
+        self.background = RequestQueryStats()  # queries run outside any request (loaders, pollers)
+        self.slow_queries = deque(maxlen=slow_log_size)
+        self.slow_fingerprints: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def instrument(self, sync_engine):
+        """Time every statement executed on ``sync_engine``"""
+
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault(_EXECUTE_STARTED, []).append(time.perf_counter())
+
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info[_EXECUTE_STARTED].pop()
+            self.record_query(statement, parameters, time.perf_counter() - started, cursor)
+
+        @event.listens_for(sync_engine, "handle_error")
+        def handle_error(exception_context):
+            connection = exception_context.connection
+            if connection is not None and connection.info.get(_EXECUTE_STARTED):
+                connection.info[_EXECUTE_STARTED].pop()
+
+    def record_query(self, statement: str, parameters, seconds: float, cursor=None):
+        try:
+            rows, bytes_received = _result_shape(cursor) if cursor is not None else (0, 0)
+        except Exception as e:
+            logger.debug(f"Could not size query result: {str(e)}")
+            rows, bytes_received = 0, 0
+        rendered_params = repr(parameters) if parameters else ""
+
+        stats = current_query_stats() or self.background
+        with self._lock:
+            stats.queries += 1
+            stats.db_seconds += seconds
+            stats.rows += rows
+            stats.bytes_sent += len(statement) + len(rendered_params)
+            stats.bytes_received += bytes_received
+
+        if seconds * 1000 >= self.slow_threshold_ms:
+            self._record_slow_query(statement, rendered_params, seconds, rows, stats.route)
+
+    def _record_slow_query(self, statement: str, rendered_params: str, seconds: float, rows: int,
+                           route: Optional[str]):
+        statement_fingerprint = fingerprint(statement)
+        if len(rendered_params) > SLOW_QUERY_MAX_PARAMS_CHARS:
+            rendered_params = rendered_params[:SLOW_QUERY_MAX_PARAMS_CHARS] + "..."
+        duration_ms = round(seconds * 1000, 1)
+        logger.warning(
+            f"Slow query ({duration_ms} ms, {rows} rows, route {route or 'background'}): "
+            f"{statement_fingerprint} params={rendered_params}"
+        )
+        with self._lock:
+            self.slow_queries.append({
+                "at": datetime.utcnow().isoformat(),
+                "route": route,
+                "duration_ms": duration_ms,
+                "rows": rows,
+                "fingerprint": statement_fingerprint,
+                "parameters": rendered_params,
+            })
+            summary = self.slow_fingerprints.setdefault(
+                statement_fingerprint, {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+            )
+            summary["count"] += 1
+            summary["total_ms"] = round(summary["total_ms"] + duration_ms, 1)
+            summary["max_ms"] = max(summary["max_ms"], duration_ms)
+
+    def observe_request(self, route: str, stats: RequestQueryStats, total_seconds: float, status_code: int):
+        with self._lock:
+            metrics = self.routes.get(route)
+            if metrics is None:
+                metrics = self.routes[route] = RouteMetrics()
+            metrics.observe(stats, total_seconds, status_code)
+
+    def reset(self):
+        with self._lock:
+            self.routes.clear()
+            self.background = RequestQueryStats()
+            self.slow_queries.clear()
+            self.slow_fingerprints.clear()
+
+    def snapshot(self, route_prefix: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Metrics as a JSON-ready dict, routes ordered by total DB time.
+
+        Args:
+            route_prefix: Only include routes whose path starts with this
+        """
+        with self._lock:
+            routes = {
+                route: metrics.to_dict() for route, metrics in self.routes.items()
+                if route_prefix is None or route.split(" ", 1)[-1].startswith(route_prefix)
+            }
+            background = {
+                "queries": self.background.queries,
+                "db_seconds": round(self.background.db_seconds, 3),
+                "rows": self.background.rows,
+                "bytes_transferred": self.background.bytes_transferred,
+            }
+            slow_queries = list(self.slow_queries)
+            slow_fingerprints = sorted(
+                ({"fingerprint": fp, **summary} for fp, summary in self.slow_fingerprints.items()),
+                key=lambda item: item["total_ms"], reverse=True,
+            )
+        return {
+            "enabled": QUERY_METRICS_ENABLED,
+            "slow_query_threshold_ms": self.slow_threshold_ms,
+            "routes": dict(sorted(routes.items(), key=lambda item: item[1]["db_time_ms"]["sum"], reverse=True)),
+            "background": background,
+            "slow_fingerprints": slow_fingerprints,
+            "slow_queries": slow_queries,
+        }
+
+
+def _route_template(request: Request) -> str:
+    """``METHOD /path/{param}`` for the route that served (or would serve) the request"""
+    route = request.scope.get("route")
+    if route is None:
+        # Responses answered before routing (e.g. response-cache hits) still
+        # belong to a route; find it the way the router would
+        for candidate in request.app.router.routes:
+            match, _ = candidate.matches(request.scope)
+            if match == Match.FULL:
+                route = candidate
+                break
+    path = getattr(route, "path", None) or "unmatched"
+    return f"{request.method} {path}"
+
+
+class QueryMetricsMiddleware(BaseHTTPMiddleware):
+    """Collect per-request query stats, emit ``Server-Timing`` and feed the route histograms"""
+
+    def __init__(self, app, metrics: "QueryMetrics"):
+        super().__init__(app)
+        self.metrics = metrics
+
+    async def dispatch(self, request: Request, call_next):
+        if not QUERY_METRICS_ENABLED:
+            return await call_next(request)
+
+        stats = RequestQueryStats()
+        stats.route = request.url.path
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            _current_stats.reset(token)
+        total_seconds = time.perf_counter() - started
+
+        stats.route = _route_template(request)
+        response.headers["Server-Timing"] = stats.server_timing(total_seconds)
+        self.metrics.observe_request(stats.route, stats, total_seconds, response.status_code)
+        return response
+
+
+query_metrics = QueryMetrics()
+
+
+def instrument_engines():
+    """Attach the cursor event hooks to the shared sync and async engines"""
+    from app.database import engine, async_engine
+    query_metrics.instrument(engine)
+    query_metrics.instrument(async_engine.sync_engine)
+
+
+def get_query_metrics() -> QueryMetrics:
+    return query_metrics
@@ -0,0 +1,351 @@
+"""
+Response cache for the historical-data endpoints.
+
+IPL history only changes when an import runs, so a GET on one of the
+analytics routers returns the same body until the data version moves. The
+middleware keys each response on method, path, normalized query string and
+that data version, and keeps it in:
+
+* an in-process LRU bounded by entry count and total body bytes, and
+* optionally a shared backend (Redis, or ``LocalSharedClient`` standing in
+  for it) so that workers and replicas reuse each other's responses.
+
+Every cacheable response carries an ``ETag`` and ``Cache-Control`` header,
+and a request whose ``If-None-Match`` matches gets a bodiless 304. The data
+version is part of both the key and the ETag, so an import invalidates
+every entry at once; the local LRU is also cleared when the version moves.
+"""
+import base64
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2048"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "86400"))  # seconds an entry may live in the cache
+RESPONSE_CACHE_MAX_AGE = int(os.getenv("RESPONSE_CACHE_MAX_AGE", "300"))  # seconds clients may reuse a response
+# "redis://..." for a shared Redis, "local" for the in-process stand-in, unset for LRU only
+RESPONSE_CACHE_SHARED_URL = os.getenv("RESPONSE_CACHE_SHARED_URL")
+
+# Routers whose GET responses depend only on the imported data
+CACHEABLE_PREFIXES = (
+    "/api/ipl-history",
+    "/api/ipl-records",
+    "/api/toss",
+    "/api/venues",
+    "/api/teams",
+    "/api/players",
+    "/api/matches",
+    "/api/head-to-head",
+    "/api/player-performance",
+    "/entities",
+)
+
+# Response headers stored with a cached body
+STORED_HEADERS = ("content-type",)
+
+
+class CachedResponse:
+    """A cached response body with the headers needed to replay it"""
+
+    __slots__ = ("status_code", "headers", "body", "etag", "expires_at")
+
+    def __init__(self, status_code: int, headers: Dict[str, str], body: bytes, etag: str, expires_at: float):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+        self.etag = etag
+        self.expires_at = expires_at
+
+    @property
+    def expired(self) -> bool:
+        return time.time() >= self.expires_at
+
+    def to_bytes(self) -> bytes:
+        return json.dumps({
+            "status_code": self.status_code,
+            "headers": self.headers,
+            "body": base64.b64encode(self.body).decode("ascii"),
+            "etag": self.etag,
+            "expires_at": self.expires_at,
+        }).encode("utf-8")
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CachedResponse":
+        fields = json.loads(data)
+        return cls(fields["status_code"], fields["headers"], base64.b64decode(fields["body"]),
+                   fields["etag"], fields["expires_at"])
+
+
+class LRUCache:
+    """Thread-safe LRU bounded by entry count and total body bytes"""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expired:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CachedResponse):
+        if len(entry.body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += len(entry.body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str):
+        self._bytes -= len(self._entries.pop(key).body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "bytes": self._bytes,
+                "max_entries": self.max_entries, "max_bytes": self.max_bytes}
+
+
+class LocalSharedClient:
+    """
+    In-process stand-in for the subset of the Redis client the cache uses
+    (``get``, ``set(..., ex=)``, ``ping``), for development and tests.
+    """
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[bytes, float]] = {}
+        self._lock = threading.Lock()
+
+    def ping(self) -> bool:
+        return True
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._values.get(key)
+            if value is None:
+                return None
+            if time.time() >= value[1]:
+                del self._values[key]
+                return None
+            return value[0]
+
+    def set(self, key: str, value: bytes, ex: Optional[int] = None):
+        with self._lock:
+            self._values[key] = (value, time.time() + ex if ex else float("inf"))
+
+
+class SharedCache:
+    """Cache entries in a Redis-compatible client; errors degrade to misses"""
+
+    def __init__(self, client, prefix: str = "ipl:response:"):
+        self.client = client
+        self.prefix = prefix
+        self.errors = 0
+
+    @classmethod
+    def from_url(cls, url: str) -> "SharedCache":
+        if url == "local":
+            return cls(LocalSharedClient())
+        import redis  # optional dependency, only needed for a shared Redis cache
+        client = redis.Redis.from_url(url, socket_timeout=0.05, socket_connect_timeout=0.5)
+        client.ping()
+        return cls(client)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        try:
+            data = self.client.get(self.prefix + key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Shared response cache get failed: {str(e)}")
+            return None
+        if data is None:
+            return None
+        entry = CachedResponse.from_bytes(data)
+        return None if entry.expired else entry
+
+    def set(self, key: str, entry: CachedResponse, ttl: int):
+        try:
+            self.client.set(self.prefix + key, entry.to_bytes(), ex=ttl)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Shared response cache set failed: {str(e)}")
+
+
+class ResponseCache:
+    """Local LRU in front of an optional shared cache, keyed by data version"""
+
+    def __init__(self, local: Optional[LRUCache] = None, shared: Optional[SharedCache] = None,
+                 ttl: int = RESPONSE_CACHE_TTL, max_age: int = RESPONSE_CACHE_MAX_AGE):
+        self.local = local or LRUCache()
+        self.shared = shared
+        self.ttl = ttl
+        self.max_age = max_age
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self._version: Optional[int] = None
+
+    @staticmethod
+    def normalize_query(query_string: str) -> str:
+        """Sorted query parameters with blank values dropped, so equivalent URLs share a key"""
+        params = [(k, v) for k, v in parse_qsl(query_string, keep_blank_values=True) if v != ""]
+        return urlencode(sorted(params))
+
+    def key(self, method: str, path: str, query_string: str, version: Any) -> str:
+        raw = f"{version}|{method}|{path.rstrip('/') or '/'}?{self.normalize_query(query_string)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def sync_version(self, version: Any):
+        """Drop local entries built from an older data version"""
+        if version != self._version:
+            if self._version is not None:
+                self.local.clear()
+            self._version = version
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self.local.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        if self.shared is not None:
+            entry = self.shared.get(key)
+            if entry is not None:
+                self.shared_hits += 1
+                self.local.set(key, entry)
+                return entry
+        self.misses += 1
+        return None
+
+    def set(self, key: str, entry: CachedResponse):
+        self.local.set(key, entry)
+        if self.shared is not None:
+            self.shared.set(key, entry, self.ttl)
+
+    def clear(self):
+        self.local.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": RESPONSE_CACHE_ENABLED,
+            "data_version": self._version,
+            "local": self.local.stats(),
+            "shared": type(self.shared.client).__name__ if self.shared else None,
+            "shared_errors": self.shared.errors if self.shared else 0,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "ttl_seconds": self.ttl,
+            "max_age_seconds": self.max_age,
+        }
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+class ResponseCacheMiddleware(BaseHTTPMiddleware):
+    """Serve cacheable GETs from ``ResponseCache`` and answer conditional requests with 304"""
+
+    def __init__(self, app, cache: "ResponseCache", prefixes: Tuple[str, ...] = CACHEABLE_PREFIXES):
+        super().__init__(app)
+        self.cache = cache
+        self.prefixes = prefixes
+
+    def _cacheable(self, request: Request) -> bool:
+        path = request.url.path
+        return request.method in ("GET", "HEAD") and any(
+            path == prefix or path.startswith(prefix + "/") for prefix in self.prefixes
+        )
+
+    def _replay(self, request: Request, entry: CachedResponse, status: str) -> Response:
+        headers = {
+            "ETag": entry.etag,
+            "Cache-Control": f"public, max-age={self.cache.max_age}",
+            "X-Cache": status,
+        }
+        if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+            self.cache.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, status_code=entry.status_code, headers={**entry.headers, **headers})
+
+    async def dispatch(self, request: Request, call_next):
+        if not RESPONSE_CACHE_ENABLED or not self._cacheable(request):
+            return await call_next(request)
+
+        from app.services.data_version import data_version_watcher
+        version = data_version_watcher.version
+        self.cache.sync_version(version)
+        key = self.cache.key("GET", request.url.path, request.url.query, version)
+
+        no_cache = "no-cache" in request.headers.get("cache-control", "")
+        entry = None if no_cache else self.cache.get(key)
+        if entry is not None:
+            return self._replay(request, entry, "HIT")
+
+        response = await call_next(request)
+        if response.status_code != 200 or request.method != "GET":
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        entry = CachedResponse(
+            status_code=response.status_code,
+            headers={k: v for k, v in response.headers.items() if k.lower() in STORED_HEADERS},
+            body=body,
+            etag=f'"{version if version is not None else 0}-{digest}"',
+            expires_at=time.time() + self.cache.ttl,
+        )
+        self.cache.set(key, entry)
+        return self._replay(request, entry, "MISS")
+
+
+def build_response_cache() -> ResponseCache:
+    """Response cache configured from the environment; a failing shared backend falls back to LRU only"""
+    shared = None
+    if RESPONSE_CACHE_SHARED_URL:
+        try:
+            shared = SharedCache.from_url(RESPONSE_CACHE_SHARED_URL)
+        except Exception as e:
+            logger.error(f"Shared response cache unavailable, using in-process cache only: {str(e)}")
+    return ResponseCache(shared=shared)
+
+
+response_cache = build_response_cache()
+
+
+def get_response_cache() -> ResponseCache:
+    return response_cache
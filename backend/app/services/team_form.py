@@ -0,0 +1,217 @@
+"""
+Team form engine: results, streaks and recent form for every team at once.
+
+The team-performance endpoints used to pull every match and loop over them
+per team and per request. ``TeamForm`` lays all results out once as a single
+array of (team, match) rows sorted by team and date, so that
+
+* a team's matches are one contiguous slice,
+* win/loss streaks are the runs of a run-length encoding of that array,
+* wins in any window are a difference of one cumulative-wins array, and
+* season records are a ``bincount`` over (team, season) codes.
+
+It is rebuilt whenever the data version changes, so a request costs a
+lookup per team rather than a scan of every match.
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.services.delivery_store import MatchEngineSlot
+
+logger = logging.getLogger(__name__)
+
+MATCH_COLUMNS = ["filename", "match_date", "team1", "team2", "winner", "venue", "season"]
+
+
+def _format_date(value) -> Optional[str]:
+    return None if pd.isna(value) else pd.Timestamp(value).strftime("%Y-%m-%d")
+
+
+class TeamForm:
+    """
+    Every team's results in date order, with run-length-encoded streaks.
+
+    A tie or no-result counts as a loss for both sides, as the team
+    endpoints always have.
+    """
+
+    def __init__(self, matches: pd.DataFrame):
+        # Chronological, undated matches last
+        matches = matches.copy()
+        matches["match_date"] = pd.to_datetime(matches["match_date"], errors="coerce")
+        matches = matches.sort_values(["match_date", "filename"], na_position="last", kind="stable")
+        self.matches = matches.reset_index(drop=True)
+        n = len(self.matches)
+
+        team_codes, self.teams = pd.factorize(
+            pd.concat([self.matches["team1"], self.matches["team2"]], ignore_index=True), sort=True
+        )
+        self._team_index = {team: code for code, team in enumerate(self.teams)}
+        opponent_codes = np.concatenate([team_codes[n:], team_codes[:n]])
+        match_rows = np.concatenate([np.arange(n), np.arange(n)])
+        won = np.concatenate([
+            (self.matches["winner"] == self.matches["team1"]).to_numpy(),
+            (self.matches["winner"] == self.matches["team2"]).to_numpy(),
+        ])
+
+        # One row per (team, match), grouped by team and chronological within it;
+        # rows of matches with a missing team are dropped
+        valid = team_codes >= 0
+        order = np.lexsort((match_rows[valid], team_codes[valid]))
+        self.team = team_codes[valid][order]
+        self.opponent = opponent_codes[valid][order]
+        self.match_row = match_rows[valid][order]
+        self.won = won[valid][order]
+
+        n_teams = len(self.teams)
+        self.starts = np.searchsorted(self.team, np.arange(n_teams), side="left")
+        self.ends = np.searchsorted(self.team, np.arange(n_teams), side="right")
+        self.cumulative_wins = np.concatenate([[0], np.cumsum(self.won)])
+
+        # Run-length encoding of results; runs never cross a team boundary
+        rows = len(self.team)
+        change = np.ones(rows, dtype=bool)
+        change[1:] = (self.won[1:] != self.won[:-1]) | (self.team[1:] != self.team[:-1])
+        run_starts = np.flatnonzero(change)
+        run_lengths = np.diff(np.append(run_starts, rows))
+        run_team = self.team[run_starts]
+        run_won = self.won[run_starts]
+
+        self.longest_win_streak = np.zeros(n_teams, dtype=np.int64)
+        self.longest_loss_streak = np.zeros(n_teams, dtype=np.int64)
+        np.maximum.at(self.longest_win_streak, run_team[run_won], run_lengths[run_won])
+        np.maximum.at(self.longest_loss_streak, run_team[~run_won], run_lengths[~run_won])
+
+        played = self.ends > self.starts
+        last_run = np.searchsorted(run_starts, np.maximum(self.ends - 1, 0), side="right") - 1
+        self.current_streak_won = np.where(played, run_won[last_run] if rows else False, False)
+        self.current_streak = np.where(played, run_lengths[last_run] if rows else 0, 0)
+
+        # Season records
+        season_codes, self.seasons = pd.factorize(self.matches["season"].to_numpy()[self.match_row])
+        self._season_index = {season: code for code, season in enumerate(self.seasons)}
+        cells = self.team * len(self.seasons) + season_codes
+        size = n_teams * len(self.seasons)
+        self.season_played = np.bincount(cells, minlength=size).reshape(n_teams, -1)
+        self.season_wins = np.bincount(cells, weights=self.won, minlength=size).astype(np.int64).reshape(n_teams, -1)
+
+        self.n_matches = n
+        self.built_at = datetime.utcnow()
+
+    def code(self, team: str) -> Optional[int]:
+        """Team code, or None for a team without matches"""
+        return self._team_index.get(team)
+
+    def record(self, team: str, season=None) -> Dict[str, int]:
+        """Matches played and won, overall or in one season"""
+        code = self.code(team)
+        if code is None:
+            return {"matches": 0, "wins": 0}
+        if season is None:
+            start, end = self.starts[code], self.ends[code]
+            return {"matches": int(end - start), "wins": int(self.cumulative_wins[end] - self.cumulative_wins[start])}
+        season_code = self._season_index.get(season)
+        if season_code is None:
+            return {"matches": 0, "wins": 0}
+        return {"matches": int(self.season_played[code, season_code]),
+                "wins": int(self.season_wins[code, season_code])}
+
+    def streaks(self, team: str) -> Optional[Dict[str, Any]]:
+        """Current streak plus the longest winning and losing streaks"""
+        code = self.code(team)
+        if code is None:
+            return None
+        return {
+            "current_streak": {
+                "type": "win" if self.current_streak_won[code] else "loss",
+                "count": int(self.current_streak[code]),
+            },
+            "longest_winning_streak": int(self.longest_win_streak[code]),
+            "longest_losing_streak": int(self.longest_loss_streak[code]),
+        }
+
+    def recent(self, team: str, n: int) -> List[Dict[str, Any]]:
+        """The team's last ``n`` matches, most recent first"""
+        code = self.code(team)
+        if code is None or n <= 0:
+            return []
+        start, end = self.starts[code], self.ends[code]
+        rows = np.arange(end - 1, max(start, end - n) - 1, -1)
+        matches = self.matches.iloc[self.match_row[rows]]
+        return [
+            {
+                "match_id": filename,
+                "date": _format_date(match_date),
+                "opponent": self.teams[opponent],
+                "result": "win" if won else "loss",
+                "venue": venue,
+            }
+            for filename, match_date, venue, opponent, won in zip(
+                matches["filename"].tolist(), matches["match_date"], matches["venue"].tolist(),
+                self.opponent[rows], self.won[rows]
+            )
+        ]
+
+    def form(self, n: int) -> pd.DataFrame:
+        """
+        Every team's overall record and record over its last ``n`` matches.
+
+        Returns:
+            pandas.DataFrame: team, matches, wins, recent_matches, recent_wins
+        """
+        lo = np.maximum(self.starts, self.ends - n)
+        return pd.DataFrame({
+            "team": self.teams,
+            "matches": self.ends - self.starts,
+            "wins": self.cumulative_wins[self.ends] - self.cumulative_wins[self.starts],
+            "recent_matches": self.ends - lo,
+            "recent_wins": self.cumulative_wins[self.ends] - self.cumulative_wins[lo],
+        })
+
+    def against(self, team: str, opponent: str) -> List[Dict[str, Any]]:
+        """Matches between ``team`` and ``opponent`` in date order"""
+        code, opponent_code = self.code(team), self.code(opponent)
+        if code is None or opponent_code is None:
+            return []
+        start, end = self.starts[code], self.ends[code]
+        rows = start + np.flatnonzero(self.opponent[start:end] == opponent_code)
+        matches = self.matches.iloc[self.match_row[rows]]
+        return [
+            {
+                "match_id": filename,
+                "date": _format_date(match_date),
+                "winner": winner,
+                "venue": venue,
+                "season": season,
+            }
+            for filename, match_date, winner, venue, season in zip(
+                matches["filename"].tolist(), matches["match_date"], matches["winner"].tolist(),
+                matches["venue"].tolist(), matches["season"].tolist()
+            )
+        ]
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "matches": self.n_matches,
+            "teams": len(self.teams),
+            "seasons": len(self.seasons),
+            "built_at": self.built_at.isoformat(),
+        }
+
+
+# Process-wide instance, swapped atomically on reload
+_team_form = MatchEngineSlot("team form engine", TeamForm, MATCH_COLUMNS)
+
+
+def get_team_form() -> Optional[TeamForm]:
+    """Return the loaded team form engine, or None if it has not been built."""
+    return _team_form.get()
+
+
+def load_team_form(engine=None) -> Optional[TeamForm]:
+    """(Re)build the process-wide team form engine from the current match list."""
+    return _team_form.load(engine)
@@ -2,6 +2,9 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 from typing import List, Optional, Dict, Any
 import json
+import pandas as pd
+
+from app.services.head_to_head_matrix import HeadToHeadMatrix, MATCH_QUERY as H2H_MATCH_QUERY, get_head_to_head_matrix
 
 class TeamPerformanceService:
     def __init__(self, db: Session):
@@ -152,6 +155,9 @@ class TeamPerformanceService:
         """
         Retrieve comprehensive head-to-head performance between two teams
         
+        Answered from the precomputed head-to-head matrix; when it is not
+        loaded, one is built from match_info for this call.
+        
         Args:
             team1: First team name
             team2: Second team name
@@ -160,88 +166,14 @@ class TeamPerformanceService:
             Head-to-head performance metrics
         """
         try:
-            query = text("""
-                WITH head_to_head AS (
-                    SELECT 
-                        COUNT(*) AS total_matches,
-                        SUM(CASE WHEN winner = :team1 THEN 1 ELSE 0 END) AS team1_wins,
-                        SUM(CASE WHEN winner = :team2 THEN 1 ELSE 0 END) AS team2_wins,
-                        
-                        -- Seasonal Breakdown
-                        (
-                            SELECT json_agg(
-                                json_build_object(
-                                    'season', season,
-                                    'total_matches', COUNT(*),
-                                    'team1_wins', SUM(CASE WHEN winner = :team1 THEN 1 ELSE 0 END),
-                                    'team2_wins', SUM(CASE WHEN winner = :team2 THEN 1 ELSE 0 END)
-                                )
-                            )
-                            FROM match_info
-                            WHERE 
-                                (team1 = :team1 AND team2 = :team2) OR 
-                                (team1 = :team2 AND team2 = :team1)
-                            GROUP BY season
-                        ) AS season_breakdown,
-                        
-                        -- Average Margin of Victory
-                        ROUND(AVG(CASE WHEN winner = :team1 THEN 
-                            CASE 
-                                WHEN margin ~ '^[0-9]+ runs$' THEN CAST(SPLIT_PART(margin, ' ', 1) AS INTEGER)
-                                WHEN margin ~ '^[0-9]+ wickets$' THEN CAST(SPLIT_PART(margin, ' ', 1) AS INTEGER)
-                                ELSE 0 
-                            END
-                        ELSE NULL END), 2) AS avg_margin_team1,
-                        
-                        ROUND(AVG(CASE WHEN winner = :team2 THEN 
-                            CASE 
-                                WHEN margin ~ '^[0-9]+ runs$' THEN CAST(SPLIT_PART(margin, ' ', 1) AS INTEGER)
-                                WHEN margin ~ '^[0-9]+ wickets$' THEN CAST(SPLIT_PART(margin, ' ', 1) AS INTEGER)
-                                ELSE 0 
-                            END
-                        ELSE NULL END), 2) AS avg_margin_team2,
-                        
-                        -- Recent Matches
-                        (
-                            SELECT json_agg(
-                                json_build_object(
-                                    'match_date', match_date,
-                                    'winner', winner,
-                                    'margin', margin,
-                                    'season', season
-                                )
-                                ORDER BY match_date DESC
-                                LIMIT 5
-                            )
-                            FROM match_info
-                            WHERE 
-                                (team1 = :team1 AND team2 = :team2) OR 
-                                (team1 = :team2 AND team2 = :team1)
-                        ) AS recent_matches
-                    FROM match_info
-                    WHERE 
-                        (team1 = :team1 AND team2 = :team2) OR 
-                        (team1 = :team2 AND team2 = :team1)
-                )
-                SELECT 
-                    total_matches,
-                    team1_wins,
-                    team2_wins,
-                    avg_margin_team1,
-                    avg_margin_team2,
-                    season_breakdown,
-                    recent_matches
-                FROM head_to_head
-            """)
+            matrix = get_head_to_head_matrix()
+            if matrix is None:
+                matrix = HeadToHeadMatrix(pd.read_sql(H2H_MATCH_QUERY, self.db.bind))
             
-            # Execute query
-            result = self.db.execute(query, {
-                'team1': team1,
-                'team2': team2
-            }).fetchone()
+            summary = matrix.summary(team1, team2)
             
             # If no matches found, return empty result
-            if not result:
+            if summary is None:
                 return {
                     "team1": team1,
                     "team2": team2,
@@ -254,17 +186,38 @@ class TeamPerformanceService:
                     "recent_matches": []
                 }
             
-            # Convert to dictionary
+            margins = matrix.margins(team1, team2)
+            avg_margin_team1, avg_margin_team2 = (
+                round(margins[side]["average_margin"], 2) if margins[side]["average_margin"] is not None else None
+                for side in ("team1", "team2")
+            )
+            
             return {
                 "team1": team1,
                 "team2": team2,
-                "total_matches": result.total_matches,
-                "team1_wins": result.team1_wins,
-                "team2_wins": result.team2_wins,
-                "avg_margin_team1": result.avg_margin_team1,
-                "avg_margin_team2": result.avg_margin_team2,
-                "season_breakdown": result.season_breakdown or [],
-                "recent_matches": result.recent_matches or []
+                "total_matches": summary["matches"],
+                "team1_wins": summary["team1_wins"],
+                "team2_wins": summary["team2_wins"],
+                "avg_margin_team1": avg_margin_team1,
+                "avg_margin_team2": avg_margin_team2,
+                "season_breakdown": [
+                    {
+                        "season": season["season"],
+                        "total_matches": season["matches"],
+                        "team1_wins": season["team1_wins"],
+                        "team2_wins": season["team2_wins"]
+                    }
+                    for season in matrix.by_season(team1, team2)
+                ],
+                "recent_matches": [
+                    {
+                        "match_date": match["date"],
+                        "winner": match["winner"],
+                        "margin": match["margin"],
+                        "season": match["season"]
+                    }
+                    for match in matrix.history(team1, team2, limit=5)
+                ]
             }
         
         except Exception as e:
@@ -0,0 +1,323 @@
+"""
+Upcoming IPL matches, polled from cricapi in the background.
+
+``/api/ipl/upcoming-matches`` used to call cricapi and re-upsert every match
+inside each page view. ``UpcomingMatchesPoller`` now owns every call to the
+upstream ``/matches`` endpoint:
+
+* a daemon thread refreshes the snapshot every
+  ``UPCOMING_MATCHES_POLL_INTERVAL`` seconds,
+* each refresh replaces the ``ipl_upcoming_matches`` rows in one transaction
+  and swaps the formatted, date-sorted snapshot in memory,
+* concurrent refreshes are coalesced, so one upstream call serves every
+  caller waiting on it, and
+* calls are drawn from a token bucket of ``CRICAPI_CALL_BUDGET`` calls per
+  ``CRICAPI_BUDGET_PERIOD`` seconds; with the budget spent the previous
+  snapshot keeps being served.
+
+Requests read the in-memory snapshot and only wait for a refresh when it is
+older than ``UPCOMING_MATCHES_MAX_STALENESS``. Workers share the table, so a
+worker that finds a snapshot written by another within the poll interval
+adopts it instead of calling the API itself.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, func, select
+
+from app.models.upcoming_matches import UpcomingMatch
+
+logger = logging.getLogger(__name__)
+
+UPCOMING_MATCHES_POLL_INTERVAL = float(os.getenv("UPCOMING_MATCHES_POLL_INTERVAL", "900"))  # seconds, 0 disables polling
+UPCOMING_MATCHES_MAX_STALENESS = float(os.getenv("UPCOMING_MATCHES_MAX_STALENESS", "1800"))  # seconds
+UPCOMING_MATCHES_MIN_REFRESH_INTERVAL = float(os.getenv("UPCOMING_MATCHES_MIN_REFRESH_INTERVAL", "60"))  # seconds between on-demand refreshes
+UPCOMING_MATCHES_REFRESH_WAIT = float(os.getenv("UPCOMING_MATCHES_REFRESH_WAIT", "15"))  # seconds a request waits on a refresh
+
+# cricapi's free plan allows 100 calls a day
+CRICAPI_CALL_BUDGET = float(os.getenv("CRICAPI_CALL_BUDGET", "100"))
+CRICAPI_BUDGET_PERIOD = float(os.getenv("CRICAPI_BUDGET_PERIOD", "86400"))  # seconds
+CRICAPI_CALL_BURST = float(os.getenv("CRICAPI_CALL_BURST", "5"))
+
+IPL_SERIES = "Indian Premier League"
+
+
+def is_ipl_match(match: Dict[str, Any]) -> bool:
+    return IPL_SERIES in (match.get("series") or "")
+
+
+def parse_match_datetime(match: Dict[str, Any]) -> Optional[datetime]:
+    try:
+        return datetime.strptime(match.get("dateTimeGMT") or "", "%Y-%m-%dT%H:%M:%S")
+    except ValueError:
+        return None
+
+
+def format_match_data(match: Dict[str, Any]) -> Dict[str, Any]:
+    """Format match data for frontend consumption"""
+    # Parse date and time
+    match_datetime = parse_match_datetime(match)
+    if match_datetime is not None:
+        match_date = match_datetime.strftime("%d %b %Y")
+        match_time = match_datetime.strftime("%H:%M")
+    elif match.get("dateTimeGMT"):
+        match_date = match["dateTimeGMT"].split("T")[0]
+        match_time = "TBD"
+    else:
+        match_date = "TBD"
+        match_time = "TBD"
+
+    # Extract team names without brackets if present
+    def split_team(team: str):
+        if "[" in team:
+            return team.split("[")[0].strip(), team.split("[")[1].replace("]", "").strip()
+        return team, ""
+
+    team1_name, team1_code = split_team(match.get("t1", ""))
+    team2_name, team2_code = split_team(match.get("t2", ""))
+
+    return {
+        "id": match.get("id", ""),
+        "match_date": match_date,
+        "match_time": match_time,
+        "match_type": match.get("matchType", ""),
+        "status": match.get("status", ""),
+        "match_state": match.get("ms", ""),
+        "team1": {
+            "name": team1_name,
+            "code": team1_code,
+            "score": match.get("t1s", ""),
+            "image": match.get("t1img", "")
+        },
+        "team2": {
+            "name": team2_name,
+            "code": team2_code,
+            "score": match.get("t2s", ""),
+            "image": match.get("t2img", "")
+        },
+        "series": match.get("series", ""),
+        "venue": match.get("venue", ""),
+        "raw_data": match
+    }
+
+
+class RateBudget:
+    """Token bucket: ``calls`` per ``period`` seconds, at most ``burst`` at once"""
+
+    def __init__(self, calls: float = CRICAPI_CALL_BUDGET, period: float = CRICAPI_BUDGET_PERIOD,
+                 burst: float = CRICAPI_CALL_BURST):
+        self.rate = calls / period if period > 0 else float("inf")
+        self.capacity = max(burst, 1.0)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        """Take one call from the budget, or return False if it is spent"""
+        with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def available(self) -> float:
+        with self._lock:
+            self._refill()
+            return self.tokens
+
+
+class UpcomingMatchesSnapshot:
+    """Formatted IPL matches, closest first, as of ``fetched_at`` (UTC)"""
+
+    def __init__(self, matches: List[Dict[str, Any]], fetched_at: datetime, source: str):
+        self.matches = sorted(
+            (format_match_data(match) for match in matches if is_ipl_match(match)),
+            key=lambda m: m["raw_data"].get("dateTimeGMT") or ""
+        )
+        self.fetched_at = fetched_at
+        self.source = source
+
+    def age(self) -> float:
+        """Seconds since the snapshot was fetched"""
+        return (datetime.utcnow() - self.fetched_at).total_seconds()
+
+
+class UpcomingMatchesPoller:
+    """Owns the upstream calls for upcoming matches and the snapshot built from them"""
+
+    def __init__(self, budget: Optional[RateBudget] = None):
+        self.snapshot: Optional[UpcomingMatchesSnapshot] = None
+        self.budget = budget or RateBudget()
+        self._lock = threading.Lock()
+        self._refreshing: Optional[threading.Event] = None
+        self._stop = threading.Event()
+        self._poller: Optional[threading.Thread] = None
+        self.api_calls = 0
+        self.coalesced = 0
+        self.budget_skips = 0
+        self.last_refresh: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+
+    def load_from_database(self, session_factory=None) -> Optional[UpcomingMatchesSnapshot]:
+        """Adopt the snapshot in ``ipl_upcoming_matches`` if it is newer than the one in memory"""
+        if session_factory is None:
+            from app.database import SessionLocal as session_factory
+        try:
+            with session_factory() as db:
+                fetched_at = db.execute(select(func.max(UpcomingMatch.created_at))).scalar()
+                if fetched_at is None or (self.snapshot is not None and fetched_at <= self.snapshot.fetched_at):
+                    return self.snapshot
+                rows = db.execute(select(UpcomingMatch.raw_data)).scalars().all()
+        except Exception as e:
+            logger.warning(f"Could not read upcoming matches from the database: {str(e)}")
+            return self.snapshot
+        self.snapshot = UpcomingMatchesSnapshot([row for row in rows if row], fetched_at, "database")
+        return self.snapshot
+
+    def save_to_database(self, matches: List[Dict[str, Any]], fetched_at: datetime, session_factory=None) -> int:
+        """Replace the stored snapshot with ``matches`` in one transaction"""
+        if session_factory is None:
+            from app.database import SessionLocal as session_factory
+        with session_factory() as db:
+            try:
+                db.execute(delete(UpcomingMatch))
+                db.add_all([
+                    UpcomingMatch(
+                        id=match.get("id"),
+                        match_date=parse_match_datetime(match),
+                        team1=match.get("t1", ""),
+                        team2=match.get("t2", ""),
+                        series=match.get("series", ""),
+                        raw_data=match,
+                        created_at=fetched_at,
+                    )
+                    for match in matches
+                ])
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+        return len(matches)
+
+    def _fetch(self, session_factory=None) -> Optional[UpcomingMatchesSnapshot]:
+        from app.utils.cricket_api_service import CricketAPIService
+
+        if not self.budget.try_acquire():
+            self.budget_skips += 1
+            logger.warning("cricapi call budget spent, keeping the current upcoming matches")
+            return self.snapshot
+
+        self.api_calls += 1
+        response = CricketAPIService().fetch_upcoming_matches()
+        # Keep every IPL match with an id; one snapshot replaces the last
+        matches = [match for match in response.get("data") or [] if is_ipl_match(match) and match.get("id")]
+        fetched_at = datetime.utcnow()
+        snapshot = UpcomingMatchesSnapshot(matches, fetched_at, "api")
+        self.snapshot = snapshot
+        try:
+            self.save_to_database(matches, fetched_at, session_factory)
+        except Exception as e:
+            logger.error(f"Error saving upcoming matches: {str(e)}")
+        return snapshot
+
+    def refresh(self, min_age: float = 0, wait: Optional[float] = UPCOMING_MATCHES_REFRESH_WAIT,
+                session_factory=None) -> Optional[UpcomingMatchesSnapshot]:
+        """
+        Fetch a new snapshot unless the current one is younger than ``min_age`` seconds.
+
+        Only one refresh runs at a time; callers arriving while one is in
+        flight wait up to ``wait`` seconds for it and share its result.
+
+        Returns:
+            UpcomingMatchesSnapshot or None: The newest snapshot available
+        """
+        if self.snapshot is not None and self.snapshot.age() < min_age:
+            return self.snapshot
+
+        with self._lock:
+            in_flight = self._refreshing
+            if in_flight is None:
+                self._refreshing = threading.Event()
+        if in_flight is not None:
+            self.coalesced += 1
+            in_flight.wait(wait)
+            return self.snapshot
+
+        try:
+            # Another worker may have refreshed the shared table recently
+            self.load_from_database(session_factory)
+            if self.snapshot is not None and self.snapshot.age() < max(min_age, UPCOMING_MATCHES_MIN_REFRESH_INTERVAL):
+                return self.snapshot
+            snapshot = self._fetch(session_factory)
+            self.last_error = None
+            return snapshot
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"Error refreshing upcoming matches: {str(e)}")
+            return self.snapshot
+        finally:
+            self.last_refresh = datetime.utcnow()
+            with self._lock:
+                done, self._refreshing = self._refreshing, None
+            done.set()
+
+    def get(self, max_staleness: float = UPCOMING_MATCHES_MAX_STALENESS) -> Optional[UpcomingMatchesSnapshot]:
+        """The current snapshot, refreshed first if it is older than ``max_staleness`` seconds"""
+        snapshot = self.snapshot
+        if snapshot is not None and snapshot.age() <= max_staleness:
+            return snapshot
+        return self.refresh(min_age=max_staleness)
+
+    def status(self) -> Dict[str, Any]:
+        snapshot = self.snapshot
+        return {
+            "matches": len(snapshot.matches) if snapshot else None,
+            "source": snapshot.source if snapshot else None,
+            "fetched_at": snapshot.fetched_at.isoformat() if snapshot else None,
+            "poll_interval_seconds": UPCOMING_MATCHES_POLL_INTERVAL,
+            "max_staleness_seconds": UPCOMING_MATCHES_MAX_STALENESS,
+            "api_calls": self.api_calls,
+            "coalesced_refreshes": self.coalesced,
+            "budget_skips": self.budget_skips,
+            "budget_available": round(self.budget.available(), 2),
+            "last_refresh": self.last_refresh.isoformat() if self.last_refresh else None,
+            "last_error": self.last_error,
+        }
+
+    def start(self, interval: float = UPCOMING_MATCHES_POLL_INTERVAL):
+        """Serve the stored snapshot now and refresh it every ``interval`` seconds"""
+        self.load_from_database()
+        if interval <= 0 or (self._poller and self._poller.is_alive()):
+            return
+        self._stop.clear()
+
+        def poll():
+            # Refresh when the snapshot expires; after a failed refresh wait a full interval
+            delay = 0.0
+            while not self._stop.wait(delay):
+                self.refresh(min_age=interval)
+                remaining = interval - self.snapshot.age() if self.snapshot else 0
+                delay = max(remaining, 1.0) if remaining > 0 else interval
+
+        self._poller = threading.Thread(target=poll, name="upcoming-matches-poller", daemon=True)
+        self._poller.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+upcoming_matches_poller = UpcomingMatchesPoller()
+
+
+def get_upcoming_matches_poller() -> UpcomingMatchesPoller:
+    return upcoming_matches_poller
@@ -0,0 +1,309 @@
+"""
+Innings-level aggregates behind the venue analysis endpoints.
+
+The venue endpoints used to fetch every delivery bowled at a venue (via a
+``WHERE filename IN (...)`` list with one bind parameter per match) and then
+reduce them in pandas to innings totals, boundaries and wickets. They never
+look at an individual ball, so ``VenueStats`` keeps only the reductions:
+
+* ``innings``: one row per (match, innings, batting team) with runs, balls,
+  boundaries, wickets, spin/pace balls and wickets, and runs and balls in
+  each phase of the innings,
+* ``batting``: runs per (match, batsman), and
+* ``bowling``: wickets per (match, batting team, bowler).
+
+Matches are sorted by venue and date, and every table by match, so a venue's
+rows in each table are one contiguous slice. The process-wide instance is
+built from the delivery store (or, without one, from aggregate SQL) once per
+data version; when it is not loaded, ``VenueStats.from_database`` pushes the
+same aggregation into Postgres for just the requested venue, team or season.
+"""
+import logging
+import threading
+from collections import namedtuple
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+MATCH_COLUMNS = [
+    "filename", "season", "match_date", "venue", "city", "team1", "team2",
+    "toss_winner", "toss_decision", "winner", "margin", "player_of_match"
+]
+
+# Phases of an innings as [first over, last over + 1), overs counted from 0;
+# INNINGS_AGGREGATE_QUERY spells out the same boundaries
+PHASES = [("powerplay", 0, 6), ("middle", 6, 15), ("death", 15, 20)]
+
+# Bowlers are classed by name, as the venue endpoints always have
+SPIN_PATTERN = "spin|Chahal|Ashwin|Jadeja|Rashid|Tahir|Narine"
+PACE_PATTERN = "pace|Bumrah|Shami|Steyn|Malinga|Cummins|Archer"
+
+VenueSlice = namedtuple("VenueSlice", ["matches", "innings", "batting", "bowling"])
+
+INNINGS_AGGREGATE_QUERY = """
+SELECT
+    i.filename, i.innings_type, i.team,
+    SUM(i.runs_total) AS runs_total,
+    SUM(i.runs_batsman) AS runs_batsman,
+    COUNT(*) AS balls,
+    SUM(CASE WHEN i.runs_batsman = 4 THEN 1 ELSE 0 END) AS fours,
+    SUM(CASE WHEN i.runs_batsman = 6 THEN 1 ELSE 0 END) AS sixes,
+    SUM(CASE WHEN i.wicket_details IS NOT NULL THEN 1 ELSE 0 END) AS wickets,
+    SUM(CASE WHEN i.bowler ~* :spin THEN 1 ELSE 0 END) AS spin_balls,
+    SUM(CASE WHEN i.bowler ~* :spin AND i.wicket_details IS NOT NULL THEN 1 ELSE 0 END) AS spin_wickets,
+    SUM(CASE WHEN i.bowler ~* :pace THEN 1 ELSE 0 END) AS pace_balls,
+    SUM(CASE WHEN i.bowler ~* :pace AND i.wicket_details IS NOT NULL THEN 1 ELSE 0 END) AS pace_wickets,
+    SUM(CASE WHEN FLOOR(i.over_ball) < 6 THEN i.runs_total ELSE 0 END) AS powerplay_runs,
+    SUM(CASE WHEN FLOOR(i.over_ball) < 6 THEN 1 ELSE 0 END) AS powerplay_balls,
+    SUM(CASE WHEN FLOOR(i.over_ball) >= 6 AND FLOOR(i.over_ball) < 15 THEN i.runs_total ELSE 0 END) AS middle_runs,
+    SUM(CASE WHEN FLOOR(i.over_ball) >= 6 AND FLOOR(i.over_ball) < 15 THEN 1 ELSE 0 END) AS middle_balls,
+    SUM(CASE WHEN FLOOR(i.over_ball) >= 15 AND FLOOR(i.over_ball) < 20 THEN i.runs_total ELSE 0 END) AS death_runs,
+    SUM(CASE WHEN FLOOR(i.over_ball) >= 15 AND FLOOR(i.over_ball) < 20 THEN 1 ELSE 0 END) AS death_balls
+FROM innings_data i
+JOIN match_info m ON m.filename = i.filename
+WHERE 1=1 {filters}
+GROUP BY i.filename, i.innings_type, i.team
+"""
+
+BATTING_AGGREGATE_QUERY = """
+SELECT i.filename, i.batsman, SUM(i.runs_batsman) AS runs
+FROM innings_data i
+JOIN match_info m ON m.filename = i.filename
+WHERE i.batsman IS NOT NULL {filters}
+GROUP BY i.filename, i.batsman
+"""
+
+BOWLING_AGGREGATE_QUERY = """
+SELECT i.filename, i.team, i.bowler, COUNT(*) AS wickets
+FROM innings_data i
+JOIN match_info m ON m.filename = i.filename
+WHERE i.wicket_details IS NOT NULL AND i.bowler IS NOT NULL {filters}
+GROUP BY i.filename, i.team, i.bowler
+"""
+
+
+def _match_filters(venue=None, team=None, season=None):
+    """WHERE fragment on ``match_info m`` and its parameters"""
+    clauses, params = [], {}
+    if venue:
+        clauses.append("AND m.venue = :venue")
+        params["venue"] = venue
+    if team:
+        clauses.append("AND (m.team1 = :team OR m.team2 = :team)")
+        params["team"] = team
+    if season:
+        clauses.append("AND m.season = :season")
+        params["season"] = season
+    return " ".join(clauses), params
+
+
+def _group(keys: np.ndarray, columns: Dict[str, np.ndarray]):
+    """Unique keys and the per-key sum of every column"""
+    unique, inverse = np.unique(keys, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    sums = {
+        name: np.bincount(inverse, weights=values, minlength=len(unique)).astype(np.int64)
+        for name, values in columns.items()
+    }
+    return unique, sums
+
+
+class VenueStats:
+    """Innings, batting and bowling aggregates with per-venue slices"""
+
+    def __init__(self, matches: pd.DataFrame, innings: pd.DataFrame, batting: pd.DataFrame, bowling: pd.DataFrame):
+        # Match columns are kept as loaded; dates are only parsed for sorting
+        order = matches.assign(_date=pd.to_datetime(matches["match_date"], errors="coerce")).sort_values(
+            ["venue", "_date", "filename"], na_position="last", kind="stable"
+        ).index
+        self.matches = matches.loc[order].reset_index(drop=True)
+        self.n_matches = len(self.matches)
+
+        venue_codes, self.venues = pd.factorize(self.matches["venue"], use_na_sentinel=False)
+        self._venue_index = {venue: code for code, venue in enumerate(self.venues)}
+        self.venue_starts = np.searchsorted(venue_codes, np.arange(len(self.venues)), side="left")
+        self.venue_ends = np.searchsorted(venue_codes, np.arange(len(self.venues)), side="right")
+
+        row_of_file = pd.Series(np.arange(self.n_matches), index=self.matches["filename"].to_numpy())
+        self.innings = self._by_match(innings, row_of_file)
+        self.batting = self._by_match(batting, row_of_file)
+        self.bowling = self._by_match(bowling, row_of_file)
+        self.built_at = datetime.utcnow()
+
+    def _by_match(self, table: pd.DataFrame, row_of_file: pd.Series) -> pd.DataFrame:
+        """Attach the match row and sort by it; rows of unknown matches are dropped"""
+        table = table.assign(match_row=table["filename"].map(row_of_file))
+        table = table[table["match_row"].notna()].astype({"match_row": np.int64})
+        return table.sort_values("match_row", kind="stable").reset_index(drop=True)
+
+    @staticmethod
+    def _rows(table: pd.DataFrame, start: int, end: int) -> pd.DataFrame:
+        rows = table["match_row"].to_numpy()
+        return table.iloc[np.searchsorted(rows, start, side="left"):np.searchsorted(rows, end, side="left")]
+
+    def select(self, venue: Optional[str] = None, team: Optional[str] = None, season=None) -> VenueSlice:
+        """
+        Matches and aggregates for one venue and/or team and/or season.
+
+        A venue is a contiguous slice of every table; team and season are
+        filtered within it.
+        """
+        start, end = 0, self.n_matches
+        if venue:
+            code = self._venue_index.get(venue)
+            if code is None:
+                empty = self.matches.iloc[0:0]
+                return VenueSlice(empty, self.innings.iloc[0:0], self.batting.iloc[0:0], self.bowling.iloc[0:0])
+            start, end = self.venue_starts[code], self.venue_ends[code]
+
+        matches = self.matches.iloc[start:end]
+        tables = [self._rows(table, start, end) for table in (self.innings, self.batting, self.bowling)]
+        if team or season:
+            keep = np.ones(len(matches), dtype=bool)
+            if team:
+                keep &= ((matches["team1"] == team) | (matches["team2"] == team)).to_numpy()
+            if season:
+                keep &= (matches["season"] == season).to_numpy()
+            rows = np.arange(start, end)[keep]
+            matches = matches[keep]
+            tables = [table[np.isin(table["match_row"].to_numpy(), rows)] for table in tables]
+        return VenueSlice(matches, *tables)
+
+    @classmethod
+    def from_store(cls, store) -> "VenueStats":
+        """Aggregate the in-memory delivery store"""
+        d = store.deliveries
+        valid = d["match_idx"] >= 0
+        match_idx = d["match_idx"][valid].astype(np.int64)
+        innings_type = d["innings_type"][valid].astype(np.int64) + 1
+        team = d["team"][valid].astype(np.int64) + 1
+        batsman = d["batsman"][valid].astype(np.int64)
+        bowler = d["bowler"][valid].astype(np.int64)
+        runs_total = d["runs_total"][valid].astype(np.int64)
+        runs_batsman = d["runs_batsman"][valid].astype(np.int64)
+        wicket = d["wicket_details"][valid] >= 0
+        over = np.floor(d["over_ball"][valid])
+
+        players = pd.Series(store.dictionaries["player"].values, dtype=object)
+        spin_players = np.append(players.str.contains(SPIN_PATTERN, case=False, na=False).to_numpy(), False)
+        pace_players = np.append(players.str.contains(PACE_PATTERN, case=False, na=False).to_numpy(), False)
+        spin, pace = spin_players[bowler], pace_players[bowler]  # code -1 reads the trailing False
+
+        n_types = len(store.dictionaries["innings_type"]) + 1
+        n_teams = len(store.dictionaries["team"]) + 1
+        columns = {
+            "runs_total": runs_total,
+            "runs_batsman": runs_batsman,
+            "balls": np.ones(len(match_idx)),
+            "fours": runs_batsman == 4,
+            "sixes": runs_batsman == 6,
+            "wickets": wicket,
+            "spin_balls": spin,
+            "spin_wickets": spin & wicket,
+            "pace_balls": pace,
+            "pace_wickets": pace & wicket,
+        }
+        for phase, phase_start, phase_end in PHASES:
+            in_phase = (over >= phase_start) & (over < phase_end)
+            columns[f"{phase}_runs"] = np.where(in_phase, runs_total, 0)
+            columns[f"{phase}_balls"] = in_phase
+        keys, sums = _group((match_idx * n_types + innings_type) * n_teams + team, columns)
+
+        filenames = store.dictionaries["filename"].decode(store.matches["filename"])
+        innings = pd.DataFrame({
+            "filename": filenames[keys // (n_types * n_teams)],
+            "innings_type": store.dictionaries["innings_type"].decode(keys // n_teams % n_types - 1),
+            "team": store.dictionaries["team"].decode(keys % n_teams - 1),
+            **sums,
+        })
+
+        n_players = len(store.dictionaries["player"])
+        has_batsman = batsman >= 0
+        keys, sums = _group(match_idx[has_batsman] * n_players + batsman[has_batsman],
+                            {"runs": runs_batsman[has_batsman]})
+        batting = pd.DataFrame({
+            "filename": filenames[keys // n_players],
+            "batsman": store.dictionaries["player"].decode(keys % n_players),
+            "runs": sums["runs"],
+        })
+
+        taken = wicket & (bowler >= 0)
+        keys, sums = _group((match_idx[taken] * n_teams + team[taken]) * n_players + bowler[taken],
+                            {"wickets": np.ones(int(taken.sum()))})
+        bowling = pd.DataFrame({
+            "filename": filenames[keys // (n_teams * n_players)],
+            "team": store.dictionaries["team"].decode(keys // n_players % n_teams - 1),
+            "bowler": store.dictionaries["player"].decode(keys % n_players),
+            "wickets": sums["wickets"],
+        })
+        return cls(store.matches_frame(columns=MATCH_COLUMNS), innings, batting, bowling)
+
+    @classmethod
+    def from_database(cls, engine, venue: Optional[str] = None, team: Optional[str] = None,
+                      season=None) -> "VenueStats":
+        """
+        Aggregate in Postgres, joined to ``match_info`` and optionally
+        restricted to one venue, team and/or season.
+        """
+        filters, params = _match_filters(venue, team, season)
+        match_query = f"SELECT {', '.join(MATCH_COLUMNS)} FROM match_info m WHERE 1=1 {filters}"
+        with engine.connect() as connection:
+            matches = pd.read_sql(text(match_query), connection, params=params)
+            innings = pd.read_sql(text(INNINGS_AGGREGATE_QUERY.format(filters=filters)), connection,
+                                  params={**params, "spin": SPIN_PATTERN, "pace": PACE_PATTERN})
+            batting = pd.read_sql(text(BATTING_AGGREGATE_QUERY.format(filters=filters)), connection, params=params)
+            bowling = pd.read_sql(text(BOWLING_AGGREGATE_QUERY.format(filters=filters)), connection, params=params)
+        return cls(matches, innings, batting, bowling)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "matches": self.n_matches,
+            "venues": len(self.venues),
+            "innings": len(self.innings),
+            "built_at": self.built_at.isoformat(),
+        }
+
+
+# Process-wide instance, swapped atomically on reload
+_venue_stats: Optional[VenueStats] = None
+_venue_stats_lock = threading.Lock()
+
+
+def get_venue_stats() -> Optional[VenueStats]:
+    """Return the loaded venue aggregates, or None if they have not been built."""
+    return _venue_stats
+
+
+def load_venue_stats(engine=None) -> Optional[VenueStats]:
+    """
+    (Re)build the process-wide venue aggregates.
+
+    Uses the in-memory delivery store when it is loaded, otherwise aggregates
+    in Postgres. Failures are logged rather than raised.
+
+    Returns:
+        VenueStats or None
+    """
+    global _venue_stats
+    from app.services.delivery_store import get_delivery_store
+
+    with _venue_stats_lock:
+        try:
+            delivery_store = get_delivery_store()
+            if delivery_store is not None:
+                stats = VenueStats.from_store(delivery_store)
+            else:
+                if engine is None:
+                    from app.database import engine
+                stats = VenueStats.from_database(engine)
+        except Exception as e:
+            logger.error(f"Error building venue stats: {str(e)}")
+            return _venue_stats
+        _venue_stats = stats
+    logger.info(f"Built venue stats from {stats.n_matches} matches")
+    return stats
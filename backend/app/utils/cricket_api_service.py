@@ -1,310 +1,277 @@
-import requests
+import os
+import re
 import json
 from sqlalchemy.orm import Session
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 import pandas as pd
 from app.database import get_db, engine
+from app.utils.http_client import cricapi_client, CRICAPI_BASE_URL
 from sqlalchemy import text
 
-# API Configuration
-API_BASE_URL = "https://api.cricapi.com/v1"
-API_KEY = "52b08390-6e7b-4233-b038-b39ed015ede7"  # Your API key
+# API Configuration; point CRICAPI_BASE_URL at scripts/fake_cricapi.py to run without the real API
+API_BASE_URL = CRICAPI_BASE_URL
+API_KEY = os.getenv("CRICAPI_KEY", "52b08390-6e7b-4233-b038-b39ed015ede7")  # Your API key
 
 class CricketAPIService:
+    """
+    Blocking wrapper over the shared upstream client, for scripts and
+    background threads. Calls are pooled, have a deadline and are retried;
+    failures raise ``UpstreamError`` (an ``Exception``).
+    """
     def __init__(self, api_key: str = API_KEY):
         self.api_key = api_key
         self.base_url = API_BASE_URL
+        self.client = cricapi_client
+
+    def _get(self, endpoint: str, **params) -> Dict[str, Any]:
+        return self.client.get_sync(endpoint, {"apikey": self.api_key, **params})
     
     def fetch_current_matches(self, offset: int = 0) -> Dict[str, Any]:
         """
         Fetch current/recent matches from the Cricket API
         """
-        endpoint = f"{self.base_url}/currentMatches"
-        params = {
-            "apikey": self.api_key,
-            "offset": offset
-        }
-        
-        response = requests.get(endpoint, params=params)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"API Request failed with status code {response.status_code}: {response.text}")
+        return self._get("currentMatches", offset=offset)
             
     def fetch_upcoming_matches(self) -> Dict[str, Any]:
         """
         Fetch upcoming matches from the Cricket API
         """
-        endpoint = f"{self.base_url}/matches"
-        params = {
-            "apikey": self.api_key
-        }
-        
-        response = requests.get(endpoint, params=params)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"API Request failed with status code {response.status_code}: {response.text}")
+        return self._get("matches")
     
     def fetch_match_info(self, match_id: str) -> Dict[str, Any]:
         """
         Fetch detailed information for a specific match
         """
-        endpoint = f"{self.base_url}/match_info"
-        params = {
-            "apikey": self.api_key,
-            "id": match_id
-        }
-        
-        response = requests.get(endpoint, params=params)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"API Request failed with status code {response.status_code}: {response.text}")
+        return self._get("match_info", id=match_id)
     
     def fetch_series_info(self, series_id: str) -> Dict[str, Any]:
         """
         Fetch detailed information for a specific series
         """
-        endpoint = f"{self.base_url}/series_info"
-        params = {
-            "apikey": self.api_key,
-            "id": series_id
-        }
-        
-        response = requests.get(endpoint, params=params)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"API Request failed with status code {response.status_code}: {response.text}")
+        return self._get("series_info", id=series_id)
     
     def fetch_player_info(self, player_id: str) -> Dict[str, Any]:
         """
         Fetch detailed information for a specific player
         """
-        endpoint = f"{self.base_url}/players_info"
-        params = {
-            "apikey": self.api_key,
-            "id": player_id
-        }
-        
-        response = requests.get(endpoint, params=params)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"API Request failed with status code {response.status_code}: {response.text}")
+        return self._get("players_info", id=player_id)
     
     def search_players(self, name: str, offset: int = 0) -> Dict[str, Any]:
         """
         Search for players by name
         """
-        endpoint = f"{self.base_url}/players"
-        params = {
-            "apikey": self.api_key,
-            "offset": offset,
-            "search": name
-        }
-        
-        response = requests.get(endpoint, params=params)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"API Request failed with status code {response.status_code}: {response.text}")
+        return self._get("players", offset=offset, search=name)
     
     def search_series(self, name: str, offset: int = 0) -> Dict[str, Any]:
         """
         Search for series by name
         """
-        endpoint = f"{self.base_url}/series"
-        params = {
-            "apikey": self.api_key,
-            "offset": offset,
-            "search": name
-        }
-        
-        response = requests.get(endpoint, params=params)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"API Request failed with status code {response.status_code}: {response.text}")
+        return self._get("series", offset=offset, search=name)
 
 # Database operations
-def save_matches_to_db(db: Session, matches_data: List[Dict[str, Any]]) -> int:
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", "500"))  # rows per multi-row INSERT
+
+# Named parameters in a VALUES tuple
+_PARAMETER = re.compile(r":(\w+)")
+
+MATCH_UPSERT_SQL = """
+    INSERT INTO cricket_matches 
+    (id, name, match_type, status, venue, date, date_time_gmt, 
+     series_id, teams, score, toss, result, year, raw_data, created_at)
+    VALUES {values}
+    ON CONFLICT (id) DO UPDATE
+    SET 
+        status = EXCLUDED.status,
+        score = EXCLUDED.score,
+        raw_data = EXCLUDED.raw_data,
+        result = EXCLUDED.result
+"""
+MATCH_ROW = """(:id, :name, :match_type, :status, :venue, :date, :date_time_gmt,
+     :series_id, CAST(:teams AS jsonb), CAST(:score AS jsonb), CAST(:toss AS jsonb),
+     :result, :year, CAST(:raw_data AS jsonb), NOW())"""
+
+SERIES_UPSERT_SQL = """
+    INSERT INTO cricket_series 
+    (id, name, start_date, end_date, odi, t20, test, squads, matches, year, raw_data, created_at)
+    VALUES {values}
+    ON CONFLICT (id) DO UPDATE
+    SET 
+        name = EXCLUDED.name,
+        start_date = EXCLUDED.start_date,
+        end_date = EXCLUDED.end_date,
+        raw_data = EXCLUDED.raw_data
+"""
+SERIES_ROW = """(:id, :name, :start_date, :end_date, :odi, :t20, :test, :squads, :matches, :year,
+     CAST(:raw_data AS jsonb), NOW())"""
+
+PLAYER_UPSERT_SQL = """
+    INSERT INTO ipl_players 
+    (id, name, country, playing_role, batting_style, bowling_style, raw_data)
+    VALUES {values}
+    ON CONFLICT (id) DO UPDATE
+    SET 
+        name = EXCLUDED.name,
+        country = EXCLUDED.country,
+        playing_role = EXCLUDED.playing_role,
+        batting_style = EXCLUDED.batting_style,
+        bowling_style = EXCLUDED.bowling_style,
+        raw_data = EXCLUDED.raw_data
+"""
+PLAYER_ROW = "(:id, :name, :country, :playing_role, :batting_style, :bowling_style, CAST(:raw_data AS jsonb))"
+
+
+def _year(value: Optional[str]) -> Optional[int]:
+    """Year of a "YYYY-MM-DD" date, or None"""
+    try:
+        return int(value.split("-")[0]) if value else None
+    except (ValueError, IndexError):
+        return None
+
+
+def _match_row(match: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": match.get("id"),
+        "name": match.get("name"),
+        "match_type": match.get("matchType"),
+        "status": match.get("status"),
+        "venue": match.get("venue"),
+        "date": match.get("date"),
+        "date_time_gmt": match.get("dateTimeGMT"),
+        "series_id": match.get("series_id"),
+        "teams": json.dumps(match.get("teams", [])),
+        "score": json.dumps(match.get("score", [])),
+        "toss": json.dumps(match.get("toss", {})),
+        "result": match.get("status"),  # Using status as result
+        "year": _year(match.get("date")),
+        "raw_data": json.dumps(match)
+    }
+
+
+def _series_row(series: Dict[str, Any]) -> Dict[str, Any]:
+    # series_info answers {"info": {...}, "matchList": [...]}; the series list answers the info alone
+    info = series.get("info", series)
+    return {
+        "id": info.get("id"),
+        "name": info.get("name"),
+        "start_date": info.get("startDate"),
+        "end_date": info.get("endDate"),
+        "odi": info.get("odi", 0),
+        "t20": info.get("t20", 0),
+        "test": info.get("test", 0),
+        "squads": info.get("squads", 0),
+        "matches": info.get("matches", 0),
+        "year": _year(info.get("startDate")),
+        "raw_data": json.dumps(series)
+    }
+
+
+def _player_row(player: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": player.get("id"),
+        "name": player.get("name"),
+        "country": player.get("country"),
+        "playing_role": player.get("playingRole"),
+        "batting_style": player.get("battingStyle"),
+        "bowling_style": player.get("bowlingStyle"),
+        "raw_data": json.dumps(player)
+    }
+
+
+def upsert_rows(db: Session, upsert_sql: str, row_sql: str, rows: List[Dict[str, Any]], label: str,
+                commit: bool = True, batch_size: int = UPSERT_BATCH_SIZE) -> Dict[str, int]:
     """
-    Save match data to the database
-    
+    Upsert ``rows`` with one multi-row INSERT ... ON CONFLICT per batch.
+
+    All batches share one transaction; each runs in a savepoint, so a batch
+    that fails is rolled back and reported without losing the others. Rows
+    without an id are skipped, and a repeated id keeps its last row (one
+    statement cannot update the same row twice).
+
     Args:
         db: Database session
-        matches_data: List of match data dictionaries from API
-        
+        upsert_sql: INSERT statement with a ``{values}`` placeholder
+        row_sql: VALUES tuple with named parameters
+        rows: Parameter dictionaries, one per record
+        label: Record kind for log messages
+        commit: Commit the transaction; pass False to group several calls into one
+
     Returns:
-        Number of matches saved
+        dict: saved, failed, skipped, batches and failed_batches counts
     """
-    saved_count = 0
-    
-    for match in matches_data:
-        # Extract year from the match date
-        match_year = None
-        if "date" in match and match["date"]:
-            try:
-                match_year = int(match["date"].split("-")[0])
-            except (ValueError, IndexError):
-                pass
-        
-        # Convert teams and score to JSONB
-        teams_json = json.dumps(match.get("teams", []))
-        score_json = json.dumps(match.get("score", []))
-        toss_json = json.dumps(match.get("toss", {}))
-        
-        # Create SQL statement to insert match
-        sql = text("""
-            INSERT INTO cricket_matches 
-            (id, name, match_type, status, venue, date, date_time_gmt, 
-             series_id, teams, score, toss, result, year, raw_data, created_at)
-            VALUES 
-            (:id, :name, :match_type, :status, :venue, :date, :date_time_gmt,
-             :series_id, :teams::jsonb, :score::jsonb, :toss::jsonb, :result, :year, :raw_data::jsonb, NOW())
-            ON CONFLICT (id) DO UPDATE
-            SET 
-                status = EXCLUDED.status,
-                score = EXCLUDED.score::jsonb,
-                raw_data = EXCLUDED.raw_data::jsonb,
-                result = EXCLUDED.result
-            RETURNING id
-        """)
-        
+    unique = {row["id"]: row for row in rows if row.get("id")}
+    records = list(unique.values())
+    report = {"saved": 0, "failed": 0, "skipped": len(rows) - len(records), "batches": 0, "failed_batches": 0}
+
+    for start in range(0, len(records), batch_size):
+        batch = records[start:start + batch_size]
+        values = ",\n    ".join(_PARAMETER.sub(rf":\1_{i}", row_sql) for i in range(len(batch)))
+        params = {f"{key}_{i}": value for i, row in enumerate(batch) for key, value in row.items()}
+        report["batches"] += 1
+        savepoint = db.begin_nested()
+        try:
+            db.execute(text(upsert_sql.format(values=values)), params)
+            savepoint.commit()
+            report["saved"] += len(batch)
+        except Exception as e:
+            savepoint.rollback()
+            report["failed"] += len(batch)
+            report["failed_batches"] += 1
+            print(f"Error saving {len(batch)} {label} (batch {report['batches']}): {str(getattr(e, 'orig', e))}")
+
+    if commit:
         try:
-            result = db.execute(sql, {
-                "id": match.get("id"),
-                "name": match.get("name"),
-                "match_type": match.get("matchType"),
-                "status": match.get("status"),
-                "venue": match.get("venue"),
-                "date": match.get("date"),
-                "date_time_gmt": match.get("dateTimeGMT"),
-                "series_id": match.get("series_id"),
-                "teams": teams_json,
-                "score": score_json,
-                "toss": toss_json,
-                "result": match.get("status"),  # Using status as result
-                "year": match_year,
-                "raw_data": json.dumps(match)
-            })
-            
             db.commit()
-            saved_count += 1
         except Exception as e:
             db.rollback()
-            print(f"Error saving match {match.get('id')}: {str(e)}")
-    
-    return saved_count
+            print(f"Error committing {label}: {str(e)}")
+            report["failed"] += report["saved"]
+            report["saved"] = 0
+    return report
 
-def save_series_to_db(db: Session, series_data: Dict[str, Any]) -> bool:
+def save_matches_to_db(db: Session, matches_data: List[Dict[str, Any]], commit: bool = True) -> Dict[str, int]:
     """
-    Save series data to the database
+    Save match data to the database
     
     Args:
         db: Database session
-        series_data: Series data dictionary from API
+        matches_data: List of match data dictionaries from API
+        commit: Commit the transaction; pass False to group with other saves
         
     Returns:
-        Boolean indicating success
+        Per-batch report: saved, failed, skipped, batches and failed_batches
     """
-    # Extract year from start_date if available
-    series_year = None
-    if "startDate" in series_data and series_data["startDate"]:
-        try:
-            series_year = int(series_data["startDate"].split("-")[0])
-        except (ValueError, IndexError):
-            pass
-    
-    # Create SQL statement to insert series
-    sql = text("""
-        INSERT INTO cricket_series 
-        (id, name, start_date, end_date, odi, t20, test, squads, matches, year, raw_data, created_at)
-        VALUES 
-        (:id, :name, :start_date, :end_date, :odi, :t20, :test, :squads, :matches, :year, :raw_data::jsonb, NOW())
-        ON CONFLICT (id) DO UPDATE
-        SET 
-            name = EXCLUDED.name,
-            start_date = EXCLUDED.start_date,
-            end_date = EXCLUDED.end_date,
-            raw_data = EXCLUDED.raw_data::jsonb
-        RETURNING id
-    """)
+    return upsert_rows(db, MATCH_UPSERT_SQL, MATCH_ROW, [_match_row(m) for m in matches_data], "matches", commit)
+
+def save_series_to_db(db: Session, series_data: Union[Dict[str, Any], List[Dict[str, Any]]],
+                      commit: bool = True) -> Dict[str, int]:
+    """
+    Save series data to the database
     
-    try:
-        db.execute(sql, {
-            "id": series_data.get("id"),
-            "name": series_data.get("name"),
-            "start_date": series_data.get("startDate"),
-            "end_date": series_data.get("endDate"),
-            "odi": series_data.get("odi", 0),
-            "t20": series_data.get("t20", 0),
-            "test": series_data.get("test", 0),
-            "squads": series_data.get("squads", 0),
-            "matches": series_data.get("matches", 0),
-            "year": series_year,
-            "raw_data": json.dumps(series_data)
-        })
+    Args:
+        db: Database session
+        series_data: Series data dictionary from API, or a list of them
+        commit: Commit the transaction; pass False to group with other saves
         
-        db.commit()
-        return True
-    except Exception as e:
-        db.rollback()
-        print(f"Error saving series {series_data.get('id')}: {str(e)}")
-        return False
+    Returns:
+        Per-batch report: saved, failed, skipped, batches and failed_batches
+    """
+    series_list = [series_data] if isinstance(series_data, dict) else series_data
+    return upsert_rows(db, SERIES_UPSERT_SQL, SERIES_ROW, [_series_row(s) for s in series_list], "series", commit)
 
-def save_players_to_db(db: Session, players_data: List[Dict[str, Any]]) -> int:
+def save_players_to_db(db: Session, players_data: List[Dict[str, Any]], commit: bool = True) -> Dict[str, int]:
     """
     Save player data to the database
     
     Args:
         db: Database session
         players_data: List of player data dictionaries from API
+        commit: Commit the transaction; pass False to group with other saves
         
     Returns:
-        Number of players saved
+        Per-batch report: saved, failed, skipped, batches and failed_batches
     """
-    saved_count = 0
-    
-    for player in players_data:
-        # Create SQL statement to insert player
-        sql = text("""
-            INSERT INTO ipl_players 
-            (id, name, country, playing_role, batting_style, bowling_style, raw_data)
-            VALUES 
-            (:id, :name, :country, :playing_role, :batting_style, :bowling_style, :raw_data::jsonb)
-            ON CONFLICT (id) DO UPDATE
-            SET 
-                name = EXCLUDED.name,
-                country = EXCLUDED.country,
-                playing_role = EXCLUDED.playing_role,
-                batting_style = EXCLUDED.batting_style,
-                bowling_style = EXCLUDED.bowling_style,
-                raw_data = EXCLUDED.raw_data::jsonb
-            RETURNING id
-        """)
-        
-        try:
-            result = db.execute(sql, {
-                "id": player.get("id"),
-                "name": player.get("name"),
-                "country": player.get("country"),
-                "playing_role": player.get("playingRole"),
-                "batting_style": player.get("battingStyle"),
-                "bowling_style": player.get("bowlingStyle"),
-                "raw_data": json.dumps(player)
-            })
-            
-            db.commit()
-            saved_count += 1
-        except Exception as e:
-            db.rollback()
-            print(f"Error saving player {player.get('id')}: {str(e)}")
-    
-    return saved_count
+    return upsert_rows(db, PLAYER_UPSERT_SQL, PLAYER_ROW, [_player_row(p) for p in players_data], "players", commit)
 
 # Usage example - to be used in a script or API endpoint
 def fetch_and_save_current_matches(db: Session = None):
@@ -324,25 +291,29 @@ def fetch_and_save_current_matches(db: Session = None):
         matches_response = api_service.fetch_current_matches()
         
         if "data" in matches_response and matches_response["data"]:
-            # Save matches to database
-            saved_count = save_matches_to_db(db, matches_response["data"])
-            print(f"Saved {saved_count} matches to database")
+            # Fetch each related series once
+            series_list = []
+            for series_id in dict.fromkeys(m["series_id"] for m in matches_response["data"] if m.get("series_id")):
+                try:
+                    series_response = api_service.fetch_series_info(series_id)
+                    if "data" in series_response:
+                        series_list.append(series_response["data"])
+                except Exception as e:
+                    print(f"Error fetching series {series_id}: {str(e)}")
             
-            # Fetch and save related series
-            for match in matches_response["data"]:
-                if "series_id" in match and match["series_id"]:
-                    try:
-                        series_response = api_service.fetch_series_info(match["series_id"])
-                        if "data" in series_response:
-                            save_series_to_db(db, series_response["data"])
-                    except Exception as e:
-                        print(f"Error fetching series {match['series_id']}: {str(e)}")
+            # Save matches and series in one transaction
+            matches_report = save_matches_to_db(db, matches_response["data"], commit=False)
+            series_report = save_series_to_db(db, series_list, commit=False)
+            db.commit()
+            print(f"Saved {matches_report['saved']} matches ({matches_report['failed']} failed) and "
+                  f"{series_report['saved']} series ({series_report['failed']} failed) to database")
             
-            return saved_count
+            return matches_report["saved"]
         else:
             print("No matches data found in API response")
             return 0
     except Exception as e:
+        db.rollback()
         print(f"Error in fetch_and_save_current_matches: {str(e)}")
         return 0
     finally:
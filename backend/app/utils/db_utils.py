@@ -1,7 +1,12 @@
+import re
 from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import pandas as pd
 
+# psycopg2 "pyformat" placeholders: %s binds a parameter, %% is a literal percent sign
+_PYFORMAT_PLACEHOLDER = re.compile(r"%s|%%")
+
 def execute_raw_sql(db: Session, query: str, params: dict = None):
     """
     Execute raw SQL query and return results.
@@ -139,4 +144,67 @@ def get_players(db: Session):
     ORDER BY player
     """
     result = db.execute(text(query))
-    return [row[0] for row in result.fetchall()]
\ No newline at end of file
+    return [row[0] for row in result.fetchall()]
+
+async def execute_raw_sql_async(db: AsyncSession, query: str, params: dict = None):
+    """
+    Execute raw SQL query on an async session and return results.
+    
+    Args:
+        db (AsyncSession): SQLAlchemy async database session
+        query (str): SQL query string
+        params (dict, optional): Parameters for the SQL query
+        
+    Returns:
+        List[dict]: Query results as list of dictionaries
+    """
+    result = await db.execute(text(query), params or {})
+    return [dict(row) for row in result.mappings().all()]
+
+class AsyncDictCursor:
+    """
+    psycopg2-style cursor over an AsyncSession.
+    
+    Lets code written against ``RealDictCursor`` (``%s`` placeholders,
+    ``fetchone``/``fetchall`` returning dicts) run on the async engine by
+    awaiting ``execute``. Rows are buffered when the statement runs.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self._rows = []
+    
+    @staticmethod
+    def _to_named_params(query: str, params):
+        """
+        Rewrite %s placeholders as :p0, :p1, ... bind parameters.
+        
+        Like psycopg2, the query is only interpolated (``%%`` unescaped) when
+        parameters are passed; with ``params=None`` it runs as written.
+        """
+        if params is None:
+            return query, {}
+        values = list(params)
+        counter = iter(range(len(values)))
+        
+        def replace(match):
+            if match.group(0) == "%%":
+                return "%"
+            return f":p{next(counter)}"
+        
+        named_query = _PYFORMAT_PLACEHOLDER.sub(replace, query)
+        return named_query, {f"p{i}": value for i, value in enumerate(values)}
+    
+    async def execute(self, query: str, params=None):
+        named_query, bind_params = self._to_named_params(query, params)
+        self._rows = await execute_raw_sql_async(self.db, named_query, bind_params)
+    
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+    
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+    
+    def close(self):
+        self._rows = []
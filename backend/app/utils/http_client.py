@@ -0,0 +1,324 @@
+"""
+Shared, pooled HTTP client for the upstream cricket API.
+
+Every cricapi call used to be a bare ``requests.get`` with a new connection
+and no timeout, so one hung upstream response pinned a worker thread
+forever. ``UpstreamClient`` wraps a single ``httpx.AsyncClient`` that
+
+* keeps connections alive in a bounded pool,
+* gives every call a deadline (``CRICAPI_TIMEOUT``) that covers all of its
+  attempts, and each attempt at most ``CRICAPI_ATTEMPT_TIMEOUT``,
+* retries connection errors, timeouts, 429s and 5xx responses with jittered
+  exponential backoff while the deadline allows,
+* trips a circuit breaker after ``CRICAPI_BREAKER_FAILURES`` consecutive
+  failed attempts and fails fast for ``CRICAPI_BREAKER_COOLDOWN`` seconds
+  before letting one probe through,
+* coalesces identical calls in flight into one upstream request, and
+* records per-endpoint latency, retries and errors for ``/upstream-metrics``.
+
+The client runs on its own event loop in a daemon thread, so async handlers
+(``await client.get(...)``) and sync callers such as the upcoming-matches
+poller (``client.get_sync(...)``) share one pool, breaker and in-flight table.
+"""
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from app.services.query_metrics import Histogram, LATENCY_BUCKETS_MS
+
+logger = logging.getLogger(__name__)
+
+CRICAPI_BASE_URL = os.getenv("CRICAPI_BASE_URL", "https://api.cricapi.com/v1")
+CRICAPI_TIMEOUT = float(os.getenv("CRICAPI_TIMEOUT", "10"))  # seconds per call, retries included
+CRICAPI_ATTEMPT_TIMEOUT = float(os.getenv("CRICAPI_ATTEMPT_TIMEOUT", "5"))  # seconds per attempt
+CRICAPI_CONNECT_TIMEOUT = float(os.getenv("CRICAPI_CONNECT_TIMEOUT", "3"))
+CRICAPI_RETRIES = int(os.getenv("CRICAPI_RETRIES", "2"))
+CRICAPI_RETRY_BACKOFF = float(os.getenv("CRICAPI_RETRY_BACKOFF", "0.25"))  # seconds, doubled per retry
+CRICAPI_MAX_CONNECTIONS = int(os.getenv("CRICAPI_MAX_CONNECTIONS", "20"))
+CRICAPI_MAX_KEEPALIVE = int(os.getenv("CRICAPI_MAX_KEEPALIVE", "10"))
+CRICAPI_KEEPALIVE_EXPIRY = float(os.getenv("CRICAPI_KEEPALIVE_EXPIRY", "30"))  # seconds
+CRICAPI_BREAKER_FAILURES = int(os.getenv("CRICAPI_BREAKER_FAILURES", "5"))
+CRICAPI_BREAKER_COOLDOWN = float(os.getenv("CRICAPI_BREAKER_COOLDOWN", "30"))  # seconds
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class UpstreamError(Exception):
+    """The upstream API could not answer; ``status_code`` is its HTTP status if it sent one"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class UpstreamTimeout(UpstreamError):
+    """The call's deadline passed before the upstream API answered"""
+
+
+class CircuitOpenError(UpstreamError):
+    """The circuit breaker is open; the call was not sent"""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker: closed -> open after ``failure_threshold``
+    failures, half-open after ``cooldown`` seconds, closed again once the
+    single half-open probe succeeds.
+
+    Only touched from the client's event loop, so it needs no lock.
+    """
+
+    def __init__(self, failure_threshold: int = CRICAPI_BREAKER_FAILURES, cooldown: float = CRICAPI_BREAKER_COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trips = 0
+
+    def allow(self) -> bool:
+        """Whether an attempt may be sent now"""
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = "half_open"
+            return True
+        # Open, or half-open with the probe already in flight
+        return False
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.trips += 1
+                logger.warning(f"Upstream circuit opened after {self.failures} consecutive failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def to_dict(self) -> Dict[str, Any]:
+        retry_in = None
+        if self.state == "open":
+            retry_in = round(max(self.cooldown - (time.monotonic() - self.opened_at), 0.0), 2)
+        return {"state": self.state, "consecutive_failures": self.failures, "trips": self.trips,
+                "retry_in_seconds": retry_in}
+
+
+class EndpointMetrics:
+    """Calls, attempts and outcomes for one upstream endpoint"""
+
+    def __init__(self):
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.status_codes: Dict[str, int] = {}
+        self.latency_ms = Histogram(LATENCY_BUCKETS_MS)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.calls, 4) if self.calls else 0.0,
+            "timeouts": self.timeouts,
+            "coalesced": self.coalesced,
+            "circuit_rejections": self.rejected,
+            "status_codes": dict(self.status_codes),
+            "latency_ms": self.latency_ms.to_dict(),
+        }
+
+
+class UpstreamClient:
+    """Pooled client with deadlines, retries, a circuit breaker and in-flight coalescing"""
+
+    def __init__(self, base_url: str = CRICAPI_BASE_URL, timeout: float = CRICAPI_TIMEOUT,
+                 retries: int = CRICAPI_RETRIES, breaker: Optional[CircuitBreaker] = None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.breaker = breaker or CircuitBreaker()
+        self._metrics: Dict[str, EndpointMetrics] = {}
+        self._metrics_lock = threading.Lock()
+        self._in_flight: Dict[Tuple, asyncio.Future] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="upstream-http-client", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def _endpoint_metrics(self, endpoint: str) -> EndpointMetrics:
+        with self._metrics_lock:
+            metrics = self._metrics.get(endpoint)
+            if metrics is None:
+                metrics = self._metrics[endpoint] = EndpointMetrics()
+            return metrics
+
+    def _http_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=httpx.Limits(max_connections=CRICAPI_MAX_CONNECTIONS,
+                                    max_keepalive_connections=CRICAPI_MAX_KEEPALIVE,
+                                    keepalive_expiry=CRICAPI_KEEPALIVE_EXPIRY),
+            )
+        return self._client
+
+    async def _attempt(self, endpoint: str, params: Dict[str, Any], remaining: float,
+                       metrics: EndpointMetrics) -> httpx.Response:
+        attempt_timeout = min(CRICAPI_ATTEMPT_TIMEOUT, remaining)
+        timeout = httpx.Timeout(attempt_timeout, connect=min(CRICAPI_CONNECT_TIMEOUT, attempt_timeout))
+        started = time.perf_counter()
+        try:
+            response = await self._http_client().get(f"/{endpoint}", params=params, timeout=timeout)
+        finally:
+            metrics.attempts += 1
+            metrics.latency_ms.observe((time.perf_counter() - started) * 1000)
+        code = str(response.status_code)
+        metrics.status_codes[code] = metrics.status_codes.get(code, 0) + 1
+        return response
+
+    async def _fetch(self, endpoint: str, params: Dict[str, Any], timeout: float,
+                     metrics: EndpointMetrics) -> Dict[str, Any]:
+        deadline = time.monotonic() + timeout
+        last_error: Optional[UpstreamError] = None
+        for attempt in range(self.retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if not self.breaker.allow():
+                metrics.rejected += 1
+                raise last_error or CircuitOpenError(f"Upstream circuit open, not calling /{endpoint}")
+            if attempt:
+                metrics.retries += 1
+
+            try:
+                response = await self._attempt(endpoint, params, remaining, metrics)
+            except httpx.TimeoutException as e:
+                self.breaker.record_failure()
+                metrics.timeouts += 1
+                last_error = UpstreamTimeout(f"Upstream /{endpoint} timed out: {type(e).__name__}")
+            except httpx.RequestError as e:
+                # Transport errors, bad encodings, redirect loops, ...
+                self.breaker.record_failure()
+                last_error = UpstreamError(f"Upstream /{endpoint} request failed: {str(e) or type(e).__name__}")
+            except BaseException:
+                # Anything else (including cancellation) still settles the
+                # breaker, so a half-open probe can never leave it stuck
+                self.breaker.record_failure()
+                raise
+            else:
+                if response.status_code == 200:
+                    self.breaker.record_success()
+                    return response.json()
+                message = f"API Request failed with status code {response.status_code}: {response.text}"
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    # The upstream is up and answered; a 4xx is the caller's problem
+                    self.breaker.record_success()
+                    raise UpstreamError(message, response.status_code)
+                self.breaker.record_failure()
+                last_error = UpstreamError(message, response.status_code)
+
+            # Full-jitter exponential backoff, never sleeping past the deadline
+            backoff = random.uniform(0, CRICAPI_RETRY_BACKOFF * 2 ** attempt)
+            if attempt == self.retries or time.monotonic() + backoff >= deadline:
+                break
+            await asyncio.sleep(backoff)
+
+        raise last_error or UpstreamTimeout(f"Upstream /{endpoint} deadline of {timeout}s passed")
+
+    async def _get(self, endpoint: str, params: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        metrics = self._endpoint_metrics(endpoint)
+        key = (endpoint, tuple(sorted((name, str(value)) for name, value in params.items())))
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            metrics.coalesced += 1
+            return await asyncio.shield(in_flight)
+
+        metrics.calls += 1
+        task = asyncio.ensure_future(self._fetch(endpoint, params, timeout, metrics))
+        self._in_flight[key] = task
+
+        def finished(done: asyncio.Future):
+            self._in_flight.pop(key, None)
+            if done.cancelled() or done.exception() is not None:
+                metrics.errors += 1
+
+        task.add_done_callback(finished)
+        # Shielded so one caller giving up does not cancel the call for the others
+        return await asyncio.shield(task)
+
+    async def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                  timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        GET ``/{endpoint}`` and return the decoded JSON body.
+
+        Raises:
+            CircuitOpenError: The breaker is open
+            UpstreamTimeout: The deadline passed first
+            UpstreamError: The upstream failed or answered with an error status
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self._get(endpoint, params or {}, timeout or self.timeout), self._ensure_loop()
+        )
+        return await asyncio.wrap_future(future)
+
+    def get_sync(self, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                 timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Blocking ``get`` for threads outside the event loop"""
+        future = asyncio.run_coroutine_threadsafe(
+            self._get(endpoint, params or {}, timeout or self.timeout), self._ensure_loop()
+        )
+        return future.result()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._metrics_lock:
+            endpoints = {endpoint: metrics.to_dict() for endpoint, metrics in sorted(self._metrics.items())}
+        return {
+            "base_url": self.base_url,
+            "timeout_seconds": self.timeout,
+            "retries": self.retries,
+            "circuit": self.breaker.to_dict(),
+            "in_flight": len(self._in_flight),
+            "endpoints": endpoints,
+        }
+
+    def close(self):
+        """Close pooled connections and stop the client's event loop"""
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self._client is not None:
+            client, self._client = self._client, None
+            try:
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop).result(timeout=5)
+            except Exception as e:
+                logger.warning(f"Error closing upstream HTTP client: {str(e)}")
+        loop.call_soon_threadsafe(loop.stop)
+
+
+cricapi_client = UpstreamClient()
+
+
+def get_cricapi_client() -> UpstreamClient:
+    return cricapi_client
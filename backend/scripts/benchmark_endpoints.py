@@ -0,0 +1,330 @@
+"""
+Endpoint benchmark suite.
+
+Drives every route registered in ``app.main:app`` in process, through
+Starlette's TestClient, against the database configured by DB_HOST /
+DB_NAME / ... -- normally a scratch database filled by
+``generate_synthetic_data.py --load``. For each route it reports latency
+percentiles, the DB time, query count, rows and bytes from the
+``Server-Timing`` header, and the peak Python memory allocated while serving
+one request.
+
+Results are written as JSON with sorted keys, one entry per route template,
+so runs from two commits diff cleanly; ``--compare`` reports the routes that
+got slower or started running more queries and exits non-zero if any did.
+
+Usage (from the backend directory):
+    python scripts/generate_synthetic_data.py --scale 1 --load --create-schema
+    python scripts/benchmark_endpoints.py --output benchmarks/$(git rev-parse --short HEAD).json
+    python scripts/benchmark_endpoints.py --compare benchmarks/main.json
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the upcoming-matches poller from calling cricapi while benchmarking
+os.environ.setdefault("UPCOMING_MATCHES_POLL_INTERVAL", "0")
+
+# Routes that call third-party APIs or change server state are not benchmarked
+SKIPPED_PREFIXES = ("/api/cricket", "/api/ipl/upcoming-matches")
+SKIPPED_ROUTES = {
+    "POST /api/match-prediction/models/reload",
+    "POST /api/match-prediction/models/{version}/activate",
+}
+
+# The most recent decided match supplies teams, venue, season and players
+SAMPLE_MATCH_QUERY = """
+SELECT filename, season, venue, team1, team2, player_of_match
+FROM match_info
+WHERE winner IS NOT NULL AND player_of_match IS NOT NULL
+ORDER BY match_date DESC, filename DESC
+LIMIT 1
+"""
+SAMPLE_VENUES_QUERY = "SELECT venue FROM match_info GROUP BY venue ORDER BY COUNT(*) DESC LIMIT 2"
+
+SERVER_TIMING_METRIC = re.compile(r'([\w-]+)(?:;dur=([\d.]+))?(?:;desc="([^"]*)")?')
+
+
+def sample_parameters(engine):
+    """Values for every path and required query parameter the routers declare"""
+    from sqlalchemy import text
+
+    with engine.connect() as connection:
+        match = connection.execute(text(SAMPLE_MATCH_QUERY)).mappings().first()
+        venues = [row[0] for row in connection.execute(text(SAMPLE_VENUES_QUERY))]
+    if match is None:
+        raise RuntimeError("match_info is empty; load a dataset first")
+
+    player = match["player_of_match"]
+    return {
+        "team": match["team1"],
+        "team_name": match["team1"],
+        "team1": match["team1"],
+        "team2": match["team2"],
+        "opponent": match["team2"],
+        "season": match["season"],
+        "venue": match["venue"],
+        "venue_name": match["venue"],
+        "venues": ",".join(venues),
+        "filename": match["filename"],
+        "player_name": player,
+        "query": player.split()[-1][:4],
+        "search": player.split()[-1][:4],
+        "category": "runs",
+    }
+
+
+def request_body(route_key, params):
+    """JSON body for the routes that take one"""
+    fixture = {
+        "team1": params["team1"],
+        "team2": params["team2"],
+        "venue": params["venue"],
+        "season": int(params["season"]),
+        "toss_winner": params["team1"],
+        "toss_decision": "field",
+    }
+    if route_key == "POST /api/match-prediction/predict":
+        return fixture
+    if route_key == "POST /api/match-prediction/predict/batch":
+        return {"fixtures": [fixture] * 8}
+    return None
+
+
+def build_requests(app, params, include=None):
+    """
+    One request per benchmarked route.
+
+    Returns:
+        tuple: (requests, skipped) -- requests are dicts with the route key,
+        method, URL and JSON body; skipped maps route keys to the reason
+    """
+    from fastapi.routing import APIRoute
+    from urllib.parse import quote, urlencode
+
+    requests, skipped = [], {}
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        for method in sorted(route.methods):
+            key = f"{method} {route.path}"
+            if include and not any(route.path.startswith(prefix) for prefix in include):
+                continue
+            if key in SKIPPED_ROUTES or route.path.startswith(SKIPPED_PREFIXES):
+                skipped[key] = "excluded"
+                continue
+
+            missing = [p.name for p in route.dependant.path_params if p.name not in params]
+            missing += [q.name for q in route.dependant.query_params if q.required and q.name not in params]
+            if missing:
+                skipped[key] = f"no sample value for {', '.join(missing)}"
+                continue
+
+            path = route.path
+            for p in route.dependant.path_params:
+                path = path.replace(f"{{{p.name}}}", quote(str(params[p.name]), safe=""))
+            query = {q.name: params[q.name] for q in route.dependant.query_params if q.required}
+            body = request_body(key, params)
+            if method == "POST" and body is None:
+                skipped[key] = "no sample body"
+                continue
+            requests.append({
+                "key": key,
+                "method": method,
+                "url": path + (f"?{urlencode(query)}" if query else ""),
+                "body": body,
+            })
+    return requests, skipped
+
+
+def parse_server_timing(header):
+    """DB milliseconds, queries, rows and bytes from our Server-Timing header"""
+    metrics = {}
+    for name, duration, description in SERVER_TIMING_METRIC.findall(header or ""):
+        metrics[name] = (float(duration) if duration else None, description)
+    db_ms, db_desc = metrics.get("db", (0.0, "0 queries"))
+    return {
+        "db_ms": db_ms or 0.0,
+        "queries": int(db_desc.split()[0]) if db_desc else 0,
+        "rows": int(metrics.get("db-rows", (None, "0"))[1] or 0),
+        "bytes": int(metrics.get("db-bytes", (None, "0"))[1] or 0),
+    }
+
+
+def benchmark_request(client, request, iterations, warmup, headers):
+    """Time ``iterations`` calls of one request after ``warmup`` untimed ones"""
+    def send():
+        return client.request(request["method"], request["url"], json=request["body"], headers=headers)
+
+    for _ in range(warmup):
+        send()
+
+    latencies, timings, status = [], [], None
+    for _ in range(iterations):
+        started = time.perf_counter()
+        response = send()
+        latencies.append((time.perf_counter() - started) * 1000)
+        timings.append(parse_server_timing(response.headers.get("server-timing")))
+        status = response.status_code
+
+    # Separate pass: tracing allocations slows the request down
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    send()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = np.asarray(latencies)
+    return {
+        "url": request["url"],
+        "status": status,
+        "latency_ms": {
+            "p50": round(float(np.percentile(latencies, 50)), 2),
+            "p90": round(float(np.percentile(latencies, 90)), 2),
+            "p99": round(float(np.percentile(latencies, 99)), 2),
+            "mean": round(float(latencies.mean()), 2),
+            "max": round(float(latencies.max()), 2),
+        },
+        "db_ms": round(float(np.median([t["db_ms"] for t in timings])), 2),
+        "queries": int(np.median([t["queries"] for t in timings])),
+        "rows": int(np.median([t["rows"] for t in timings])),
+        "bytes": int(np.median([t["bytes"] for t in timings])),
+        "peak_memory_kb": int(peak / 1024),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_benchmark(iterations=20, warmup=2, cached=False, include=None):
+    """Start the app, benchmark every route and return the results document"""
+    from fastapi.testclient import TestClient
+
+    from app.database import engine
+    from app.main import app
+    from app.services.data_version import data_version_watcher
+    from app.services.delivery_store import get_delivery_store
+
+    headers = {} if cached else {"Cache-Control": "no-cache"}
+    with TestClient(app) as client:
+        params = sample_parameters(engine)
+        requests, skipped = build_requests(app, params, include)
+        store = get_delivery_store()
+
+        routes = {}
+        for number, request in enumerate(requests, 1):
+            print(f"[{number}/{len(requests)}] {request['key']}")
+            try:
+                routes[request["key"]] = benchmark_request(client, request, iterations, warmup, headers)
+            except Exception as e:
+                skipped[request["key"]] = f"error: {e}"
+
+    return {
+        "commit": git_commit(),
+        "dataset": {
+            "data_version": data_version_watcher.version,
+            "matches": store.n_matches if store else None,
+            "deliveries": store.n_deliveries if store else None,
+        },
+        "settings": {"iterations": iterations, "warmup": warmup, "cached": cached},
+        "routes": routes,
+        "skipped": skipped,
+    }
+
+
+def print_report(results):
+    """Routes by median latency, slowest first"""
+    print(f"\n{'route':<70} {'status':>6} {'p50 ms':>9} {'p99 ms':>9} {'db ms':>8} {'queries':>7} {'peak KB':>9}")
+    for key, route in sorted(results["routes"].items(), key=lambda item: -item[1]["latency_ms"]["p50"]):
+        print(f"{key:<70} {route['status']:>6} {route['latency_ms']['p50']:>9.2f} {route['latency_ms']['p99']:>9.2f} "
+              f"{route['db_ms']:>8.2f} {route['queries']:>7} {route['peak_memory_kb']:>9}")
+    for key, reason in sorted(results["skipped"].items()):
+        print(f"skipped {key}: {reason}")
+
+
+def compare(baseline, current, threshold=0.25, min_ms=2.0):
+    """
+    Routes that regressed between two result documents.
+
+    A route regresses when its median latency grows by more than
+    ``threshold`` (and at least ``min_ms``), when it runs more queries, or
+    when it stopped returning its baseline status code.
+
+    Returns:
+        list[str]: One line per regression
+    """
+    regressions = []
+    for key, route in sorted(current["routes"].items()):
+        before = baseline.get("routes", {}).get(key)
+        if before is None:
+            continue
+        p50, base_p50 = route["latency_ms"]["p50"], before["latency_ms"]["p50"]
+        if p50 > base_p50 * (1 + threshold) and p50 - base_p50 >= min_ms:
+            regressions.append(f"{key}: p50 {base_p50:.2f} -> {p50:.2f} ms")
+        if route["queries"] > before["queries"]:
+            regressions.append(f"{key}: queries {before['queries']} -> {route['queries']}")
+        if route["status"] != before["status"]:
+            regressions.append(f"{key}: status {before['status']} -> {route['status']}")
+    return regressions
+
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Benchmark every route of app.main:app")
+    parser.add_argument("--iterations", type=int, default=20, help="Timed requests per route")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed requests per route before timing")
+    parser.add_argument("--cached", action="store_true", help="Let the response cache answer repeated requests")
+    parser.add_argument("--include", nargs="*", help="Only benchmark routes under these path prefixes")
+    parser.add_argument("--output", help="Write the results JSON here")
+    parser.add_argument("--compare", help="Baseline results JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Relative p50 slowdown counted as a regression (default 0.25)")
+    return parser.parse_args()
+
+
+def main():
+    """Run the benchmark, save it and compare it with a baseline"""
+    args = parse_args()
+    try:
+        results = run_benchmark(args.iterations, args.warmup, args.cached, args.include)
+        print_report(results)
+
+        if args.output:
+            os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+            with open(args.output, "w") as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+                f.write("\n")
+            print(f"\nWrote {args.output}")
+
+        if args.compare:
+            with open(args.compare) as f:
+                baseline = json.load(f)
+            regressions = compare(baseline, results, args.threshold)
+            print(f"\nCompared with {args.compare} (commit {baseline.get('commit')}): "
+                  f"{len(regressions)} regression(s)")
+            for line in regressions:
+                print(f"  {line}")
+            return 1 if regressions else 0
+        return 0
+
+    except Exception as e:
+        print(f"Error running benchmark: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+"""
+Export innings_data + match_info to a memory-mappable delivery snapshot.
+
+Usage (from the backend directory):
+    python scripts/export_delivery_snapshot.py /var/lib/ipl-analytics/snapshot
+
+Point DELIVERY_SNAPSHOT_PATH at the output directory and every API worker on
+the node will map it at startup instead of pulling the tables from Postgres.
+The snapshot records the data version it was exported at; once an import
+moves the version past it, workers load from Postgres until it is re-exported.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine
+from app.services.delivery_store import DeliveryStore, DELIVERY_SNAPSHOT_PATH
+from app.services.delivery_snapshot import write_snapshot
+from app.services.data_version import read_data_version
+
+
+def main():
+    """Build the store from the database and write it as a snapshot"""
+    path = sys.argv[1] if len(sys.argv) > 1 else DELIVERY_SNAPSHOT_PATH
+    if not path:
+        print("Usage: export_delivery_snapshot.py <snapshot_dir> (or set DELIVERY_SNAPSHOT_PATH)")
+        return 1
+
+    try:
+        start = time.time()
+        # Read the version first: an import landing during the export leaves the
+        # snapshot marked older than the database, so workers skip it
+        data_version = read_data_version(engine)
+        print("Loading match_info and innings_data from the database...")
+        store = DeliveryStore.from_database(engine)
+        print(f"Loaded {store.n_matches} matches and {store.n_deliveries} deliveries in {time.time() - start:.1f}s")
+
+        manifest = write_snapshot(store, path, data_version)
+        print(f"Wrote snapshot format v{manifest['format_version']} at data version {data_version} to {path}")
+        return 0
+
+    except Exception as e:
+        print(f"Error exporting delivery snapshot: {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""
+Local fake of the cricapi v1 endpoints the backend calls.
+
+Serves a generated IPL fixture list from ``/matches`` and ``/currentMatches``
+(plus minimal ``/match_info``, ``/series``, ``/series_info``, ``/players``
+and ``/players_info`` answers) so the upcoming-matches poller and the cricket
+router can be exercised without spending the real API's daily budget.
+Latency and failures can be injected, and ``/_stats`` returns how many calls
+each endpoint received.
+
+Usage (from the backend directory):
+    python scripts/fake_cricapi.py --port 8765 --delay 0.5 --error-rate 0.1
+    export CRICAPI_BASE_URL=http://127.0.0.1:8765
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from generate_synthetic_data import TEAMS
+
+SERIES_ID = "fake-ipl-series"
+SERIES_NAME = f"Indian Premier League {datetime.utcnow().year}"
+
+
+def build_fixtures(n_matches, seed=0, start=None):
+    """``n_matches`` upcoming IPL matches in cricapi's ``/matches`` format, one a day at 14:00 GMT"""
+    rng = random.Random(seed)
+    start = (start or datetime.utcnow()).replace(hour=14, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    fixtures = []
+    for number in range(n_matches):
+        (name1, short1, venue), (name2, short2, _) = rng.sample(TEAMS, 2)
+        fixtures.append({
+            "id": f"fake-match-{number + 1:04d}",
+            "dateTimeGMT": (start + timedelta(days=number)).strftime("%Y-%m-%dT%H:%M:%S"),
+            "matchType": "t20",
+            "status": "Match not started",
+            "ms": "fixture",
+            "t1": f"{name1} [{short1}]",
+            "t2": f"{name2} [{short2}]",
+            "t1s": "",
+            "t2s": "",
+            "t1img": "",
+            "t2img": "",
+            "series": SERIES_NAME,
+            "series_id": SERIES_ID,
+            "venue": venue,
+        })
+    return fixtures
+
+
+class FakeCricAPI:
+    """Fixtures plus the fault-injection settings and call counters shared by the handler"""
+
+    def __init__(self, fixtures, delay=0.0, error_rate=0.0, seed=0):
+        self.fixtures = fixtures
+        self.delay = delay
+        self.error_rate = error_rate
+        self.calls = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def respond(self, endpoint, params):
+        """(status, body) for one call"""
+        with self._lock:
+            self.calls[endpoint] += 1
+            fail = self._rng.random() < self.error_rate
+        if self.delay:
+            time.sleep(self.delay)
+        if endpoint == "_stats":
+            return 200, {"calls": dict(self.calls)}
+        if fail:
+            return 503, {"status": "failure", "reason": "injected failure"}
+
+        if endpoint in ("matches", "currentMatches"):
+            offset = int(params.get("offset", 0))
+            data = self.fixtures[offset:offset + 25]
+        elif endpoint == "match_info":
+            data = next((match for match in self.fixtures if match["id"] == params.get("id")), None)
+            if data is None:
+                return 200, {"status": "failure", "reason": "match not found"}
+        elif endpoint == "series":
+            data = [{"id": SERIES_ID, "name": SERIES_NAME, "t20": len(self.fixtures)}]
+        elif endpoint == "series_info":
+            data = {"info": {"id": SERIES_ID, "name": SERIES_NAME}, "matchList": self.fixtures}
+        elif endpoint == "players":
+            search = params.get("search", "").lower()
+            data = [{"id": short, "name": name} for name, short, _ in TEAMS if search in name.lower()]
+        elif endpoint == "players_info":
+            data = {"id": params.get("id"), "name": params.get("id")}
+        else:
+            return 404, {"status": "failure", "reason": f"unknown endpoint {endpoint}"}
+        return 200, {"apikey": params.get("apikey"), "data": data, "status": "success",
+                     "info": {"hitsToday": sum(self.calls.values())}}
+
+
+def make_handler(api):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            status, body = api.respond(url.path.rstrip("/").rsplit("/", 1)[-1], params)
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(api, host="127.0.0.1", port=0):
+    """Start the fake in a daemon thread; returns the server, whose base URL is ``server.url``"""
+    server = ThreadingHTTPServer((host, port), make_handler(api))
+    server.url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, name="fake-cricapi", daemon=True).start()
+    return server
+
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Serve a local fake of the cricapi v1 endpoints")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--matches", type=int, default=20, help="Number of upcoming fixtures")
+    parser.add_argument("--fixtures", help="JSON file with a list of matches to serve instead")
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before every response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls answered with a 503")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    """Serve until interrupted"""
+    args = parse_args()
+    if args.fixtures:
+        with open(args.fixtures) as f:
+            fixtures = json.load(f)
+    else:
+        fixtures = build_fixtures(args.matches, args.seed)
+    api = FakeCricAPI(fixtures, args.delay, args.error_rate, args.seed)
+    server = serve(api, args.host, args.port)
+    print(f"Fake cricapi serving {len(fixtures)} matches at {server.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,862 @@
+"""
+Synthetic IPL dataset generator.
+
+Simulates whole seasons ball by ball -- toss, playing XIs, both innings with
+phase-dependent scoring, chases that stop at the target, all-outs, ties,
+no-results, a league table and the four playoff matches -- and emits the
+same rows the importers produce:
+
+    match_info, innings_data                       (the tables the API reads)
+    teams, venues, players, seasons, team_players,
+    matches, innings, deliveries                   (schemas/ipl_database_schema.sql)
+
+``--scale`` multiplies the number of seasons (1x is 17 seasons, 2008-2024).
+Deliveries are simulated and written in chunks of matches, so 100x (1,700
+seasons, about 26M deliveries) runs in bounded memory.
+
+Usage (from the backend directory):
+    python scripts/generate_synthetic_data.py --scale 1 --output /tmp/ipl-synthetic
+    python scripts/generate_synthetic_data.py --scale 10 --load --create-schema
+
+``--load`` replaces the contents of the database configured by DB_HOST /
+DB_NAME / ... -- point it at a scratch database, never at production.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SEASONS_PER_SCALE = 17
+FIRST_SEASON = 2008
+FIRST_MATCH_ID = 1000001
+SQUAD_SIZE = 16
+NEW_PLAYERS_PER_SEASON = 3
+NO_RESULT_PROBABILITY = 0.01
+MATCHES_PER_CHUNK = 1000
+MAX_DELIVERIES_PER_INNINGS = 150  # 120 legal balls plus room for extras
+MIN_SEASON_GAP_DAYS = 53  # 45 days of league matches for 10 teams plus a week of playoffs
+LAST_SUPPORTED_DATE = date(2262, 1, 1)  # datetime64[ns] upper bound used by the API
+
+# (name, short name, home venue)
+TEAMS = [
+    ("Chennai Super Kings", "CSK", "MA Chidambaram Stadium"),
+    ("Mumbai Indians", "MI", "Wankhede Stadium"),
+    ("Royal Challengers Bangalore", "RCB", "M Chinnaswamy Stadium"),
+    ("Kolkata Knight Riders", "KKR", "Eden Gardens"),
+    ("Rajasthan Royals", "RR", "Sawai Mansingh Stadium"),
+    ("Delhi Capitals", "DC", "Arun Jaitley Stadium"),
+    ("Punjab Kings", "PBKS", "Punjab Cricket Association Stadium"),
+    ("Sunrisers Hyderabad", "SRH", "Rajiv Gandhi International Stadium"),
+    ("Gujarat Titans", "GT", "Narendra Modi Stadium"),
+    ("Lucknow Super Giants", "LSG", "Ekana Cricket Stadium"),
+]
+# Seasons cycle through the real format: 8 teams for 14 seasons, then 10
+TEAMS_PER_SEASON = [8] * 14 + [10] * 3
+
+# (name, city, capacity); home grounds first, then neutral playoff venues
+VENUES = [
+    ("MA Chidambaram Stadium", "Chennai", 50000),
+    ("Wankhede Stadium", "Mumbai", 33000),
+    ("M Chinnaswamy Stadium", "Bengaluru", 40000),
+    ("Eden Gardens", "Kolkata", 68000),
+    ("Sawai Mansingh Stadium", "Jaipur", 30000),
+    ("Arun Jaitley Stadium", "Delhi", 41000),
+    ("Punjab Cricket Association Stadium", "Mohali", 26000),
+    ("Rajiv Gandhi International Stadium", "Hyderabad", 55000),
+    ("Narendra Modi Stadium", "Ahmedabad", 132000),
+    ("Ekana Cricket Stadium", "Lucknow", 50000),
+    ("Dr DY Patil Sports Academy", "Navi Mumbai", 55000),
+    ("Brabourne Stadium", "Mumbai", 20000),
+    ("Maharashtra Cricket Association Stadium", "Pune", 37000),
+    ("Himachal Pradesh Cricket Association Stadium", "Dharamsala", 23000),
+]
+PLAYOFF_VENUES = list(range(8, len(VENUES)))
+
+SURNAMES = [
+    "Sharma", "Kohli", "Dhoni", "Pandya", "Jadeja", "Ashwin", "Rahul", "Iyer", "Pant", "Gill",
+    "Kishan", "Yadav", "Chahal", "Bumrah", "Shami", "Siraj", "Thakur", "Patel", "Samson", "Gaikwad",
+    "Warner", "Smith", "Maxwell", "Cummins", "Starc", "Buttler", "Stokes", "Archer", "Curran", "Livingstone",
+    "Russell", "Narine", "Pollard", "Hetmyer", "Pooran", "Rashid", "Nabi", "Rabada", "Nortje", "Miller",
+    "de Kock", "Markram", "Boult", "Williamson", "Conway", "Ferguson", "Hasaranga", "Theekshana", "Pathirana",
+    "Shanaka", "Raina", "Dhawan", "Karthik", "Uthappa", "Rayudu", "Saha", "Bhuvneshwar", "Chawla", "Mishra",
+    "Harbhajan",
+]
+COUNTRIES = ["India"] * 7 + ["Australia", "England", "South Africa", "West Indies", "New Zealand", "Afghanistan", "Sri Lanka"]
+UMPIRES = [f"{initials} {surname}" for initials, surname in [
+    ("AK", "Chaudhary"), ("S", "Ravi"), ("N", "Menon"), ("CB", "Gaffaney"), ("M", "Erasmus"), ("BNJ", "Oxenford"),
+    ("KN", "Ananthapadmanabhan"), ("VK", "Sharma"), ("RJ", "Tucker"), ("J", "Madanagopal"),
+]]
+
+# Squad slots: 0 keeper, 1-7 batters and all-rounders, 8-15 bowlers
+SQUAD_ROLES = ["Wicketkeeper"] + ["Batsman"] * 5 + ["All-rounder"] * 2 + ["Bowler"] * 8
+BOWLING_STYLES = ["Right-arm fast", "Right-arm medium", "Left-arm fast", "Right-arm offbreak",
+                  "Legbreak googly", "Slow left-arm orthodox"]
+
+# Scoring per phase (powerplay, middle, death) over batsman runs 0, 1, 2, 3, 4, 6
+RUN_OUTCOMES = np.array([0, 1, 2, 3, 4, 6], dtype=np.int16)
+RUN_PROBABILITIES = np.array([
+    [0.48, 0.30, 0.06, 0.005, 0.12, 0.035],
+    [0.38, 0.42, 0.08, 0.005, 0.085, 0.03],
+    [0.33, 0.34, 0.09, 0.005, 0.14, 0.095],
+])
+WICKET_PROBABILITIES = np.array([0.045, 0.04, 0.075])
+
+# Extras codes: 0 none, then one per extras_type value
+EXTRAS_TYPES = np.array([None, "wides", "noballs", "legbyes", "byes"], dtype=object)
+EXTRAS_CUMULATIVE = np.array([0.03, 0.035, 0.05, 0.055])
+
+DISMISSAL_KINDS = np.array(["caught", "bowled", "lbw", "run out", "stumped", "caught and bowled"], dtype=object)
+DISMISSAL_PROBABILITIES = np.array([0.6, 0.18, 0.1, 0.07, 0.03, 0.02])
+
+PLAYOFF_STAGES = ["Qualifier 1", "Eliminator", "Qualifier 2", "Final"]
+
+MATCH_INFO_COLUMNS = [
+    "filename", "data_version", "created_date", "competition", "match_date", "venue", "city", "match_type",
+    "toss_winner", "toss_decision", "winner", "margin", "player_of_match", "team1", "team2", "season",
+]
+INNINGS_DATA_COLUMNS = [
+    "filename", "innings_type", "team", "over_ball", "batsman", "bowler", "non_striker",
+    "runs_batsman", "runs_total", "extras_type", "extras_runs", "wicket_details",
+]
+MATCHES_COLUMNS = [
+    "match_id", "season_id", "match_date", "venue_id", "team1_id", "team2_id", "toss_winner_id", "toss_decision",
+    "winner_id", "result", "result_margin", "player_of_match_id", "match_type", "target_runs", "target_overs",
+    "is_super_over", "dl_method", "umpire1", "umpire2",
+]
+INNINGS_COLUMNS = [
+    "inning_id", "match_id", "inning_number", "batting_team_id", "bowling_team_id",
+    "total_runs", "total_wickets", "total_overs", "extras",
+]
+DELIVERIES_COLUMNS = [
+    "match_id", "inning_id", "over_number", "ball_number", "batsman_id", "bowler_id", "non_striker_id",
+    "batsman_runs", "extra_runs", "total_runs", "extras_type", "is_wicket", "player_dismissed_id",
+    "dismissal_kind", "fielder_id",
+]
+
+# Tables emptied before a load, children first
+LOAD_TABLES = [
+    "innings_data", "match_info", "deliveries", "innings", "team_players", "matches",
+    "players", "seasons", "venues", "teams",
+]
+# Tables whose SERIAL ids the generator assigns, so their sequences are moved past them
+SERIAL_TABLES = {"teams": "team_id", "venues": "venue_id", "players": "player_id",
+                 "seasons": "season_id", "innings": "inning_id"}
+
+
+def player_name(index):
+    """Unique, realistic-looking name for player ``index``: initials plus a surname"""
+    surname = SURNAMES[index % len(SURNAMES)]
+    n = index // len(SURNAMES)
+    initials = ""
+    while True:
+        initials = chr(ord("A") + n % 26) + initials
+        n = n // 26 - 1
+        if n < 0:
+            break
+    return f"{initials} {surname}"
+
+
+def simulate_innings(rng, bat_xi, bowl_xi, target, bat_strength, bowl_strength):
+    """
+    Simulate a batch of innings ball by ball.
+
+    Every innings is a row of ``MAX_DELIVERIES_PER_INNINGS`` candidate
+    deliveries; running counts of legal balls, wickets and runs decide where
+    the innings ends (20 overs, all out, or target reached), which is a prefix
+    of the row.
+
+    Args:
+        bat_xi, bowl_xi: (B, 11) player ids in batting order; bowlers are
+            positions 6-10 of the bowling XI and position 0 keeps wicket
+        target: (B,) runs needed to win, ``np.inf`` for a first innings
+        bat_strength, bowl_strength: (B,) log-scale team strength for the season
+
+    Returns:
+        dict: Flat delivery arrays (``innings`` is the batch row) and
+        per-innings ``runs``, ``wickets``, ``balls`` and ``extras`` totals
+    """
+    batch, slots = len(target), MAX_DELIVERIES_PER_INNINGS
+    rows = np.arange(batch)[:, None]
+
+    extras_code = np.searchsorted(EXTRAS_CUMULATIVE, rng.random((batch, slots)), side="right") + 1
+    extras_code[extras_code > len(EXTRAS_CUMULATIVE)] = 0
+    legal = (extras_code != 1) & (extras_code != 2)
+    legal_before = np.cumsum(legal, axis=1) - legal
+    over = np.minimum(legal_before // 6, 19)
+    phase = (over >= 6).astype(np.int8) + (over >= 15)
+
+    # Stronger batting sides hit more boundaries and lose fewer wickets
+    edge = np.exp(bat_strength - bowl_strength)
+    probabilities = np.broadcast_to(RUN_PROBABILITIES, (batch, 3, 6)).copy()
+    probabilities[:, :, 4:] *= edge[:, None, None]
+    probabilities[:, :, 0] = 1 - probabilities[:, :, 1:].sum(axis=2)
+    cumulative = np.cumsum(probabilities, axis=2)[rows, phase]
+    batsman_runs = RUN_OUTCOMES[(rng.random((batch, slots))[..., None] > cumulative[..., :-1]).sum(axis=2)]
+
+    extras_runs = np.zeros((batch, slots), dtype=np.int16)
+    extras_runs[extras_code > 0] = 1
+    boundary_extras = rng.random((batch, slots)) < 0.1
+    extras_runs[(extras_code >= 3) & boundary_extras] = 4
+    extras_runs[(extras_code == 1) & boundary_extras] = 5
+    batsman_runs[(extras_code == 1) | (extras_code >= 3)] = 0
+
+    wicket_probability = WICKET_PROBABILITIES[phase] / edge[:, None]
+    wicket = (extras_code == 0) & (rng.random((batch, slots)) < wicket_probability)
+    batsman_runs[wicket] = 0
+
+    total_runs = batsman_runs + extras_runs
+    wickets_before = np.cumsum(wicket, axis=1) - wicket
+    runs_before = np.cumsum(total_runs, axis=1) - total_runs
+    alive = (legal_before < 120) & (wickets_before < 10) & (runs_before < target[:, None])
+
+    # Batters cross on odd runs and swap ends every over; the next batter in
+    # comes in at the dismissed end, so order[w] is always the one out next
+    ran = np.where(extras_code >= 3, extras_runs, batsman_runs) % 2
+    crossed = (np.cumsum(ran, axis=1) - ran + over) % 2
+    striker_pos = np.where(wicket, wickets_before, wickets_before + crossed)
+    non_striker_pos = np.where(wicket, wickets_before + 1, wickets_before + 1 - crossed)
+    bowler_order = np.argsort(rng.random((batch, 5)), axis=1) + 6
+    bowler_pos = bowler_order[rows, over % 5]
+
+    b, s = np.nonzero(alive)
+    n = len(b)
+    is_wicket = wicket[b, s]
+    kind = np.full(n, -1, dtype=np.int8)
+    fielder = np.full(n, -1, dtype=np.int64)
+    w = np.flatnonzero(is_wicket)
+    kind[w] = rng.choice(len(DISMISSAL_KINDS), size=len(w), p=DISMISSAL_PROBABILITIES)
+    bowler = bowl_xi[b, bowler_pos[b, s]]
+    random_fielder = bowl_xi[b[w], rng.integers(0, 11, size=len(w))]
+    fielder[w] = np.select(
+        [np.isin(kind[w], (0, 3)), kind[w] == 4, kind[w] == 5],
+        [random_fielder, bowl_xi[b[w], 0], bowler[w]],
+        -1,
+    )
+
+    runs = np.bincount(b, weights=total_runs[b, s], minlength=batch).astype(np.int64)
+    return {
+        "innings": b,
+        "over": over[b, s],
+        "ball": legal_before[b, s] % 6 + 1,
+        "batsman": bat_xi[b, striker_pos[b, s]],
+        "non_striker": bat_xi[b, non_striker_pos[b, s]],
+        "bowler": bowler,
+        "batsman_runs": batsman_runs[b, s],
+        "extras_runs": extras_runs[b, s],
+        "total_runs": total_runs[b, s],
+        "extras_code": extras_code[b, s],
+        "is_wicket": is_wicket,
+        "dismissal_kind": kind,
+        "fielder": fielder,
+        "runs": runs,
+        "wickets": np.bincount(b, weights=is_wicket, minlength=batch).astype(np.int64),
+        "balls": np.bincount(b, weights=legal[b, s], minlength=batch).astype(np.int64),
+        "extras": np.bincount(b, weights=extras_runs[b, s], minlength=batch).astype(np.int64),
+    }
+
+
+class SyntheticLeague:
+    """Teams, venues, seasons and season-by-season squads of a synthetic IPL"""
+
+    def __init__(self, scale=1, seed=2008):
+        self.rng = np.random.default_rng(seed)
+        self.n_seasons = SEASONS_PER_SCALE * scale
+        self.season_years = np.arange(FIRST_SEASON, FIRST_SEASON + self.n_seasons)
+
+        # Real yearly cadence while it fits, compressed for large scales so
+        # every match date stays representable in the API's datetime64[ns]
+        first_day = date(FIRST_SEASON, 3, 22)
+        self.season_gap_days = min(365, (LAST_SUPPORTED_DATE - first_day).days // self.n_seasons)
+        if self.season_gap_days < MIN_SEASON_GAP_DAYS:
+            raise ValueError(f"Scale {scale} needs more seasons than fit before {LAST_SUPPORTED_DATE}")
+        self.season_starts = [first_day + timedelta(days=i * self.season_gap_days) for i in range(self.n_seasons)]
+
+        self.teams = pd.DataFrame(TEAMS, columns=["team_name", "team_short_name", "home_venue"])
+        self.teams.insert(0, "team_id", np.arange(1, len(TEAMS) + 1))
+        self.venues = pd.DataFrame(VENUES, columns=["venue_name", "city", "capacity"])
+        self.venues.insert(0, "venue_id", np.arange(1, len(VENUES) + 1))
+        self.venues.insert(3, "country", "India")
+        self.home_venue = np.arange(len(TEAMS))  # team i plays at home in venue i
+
+        self._build_squads()
+
+    def _build_squads(self):
+        """Squads per (season, team); a few players are replaced every season"""
+        n_teams = len(TEAMS)
+        self.squads = np.empty((self.n_seasons, n_teams, SQUAD_SIZE), dtype=np.int64)
+        squads = np.arange(n_teams * SQUAD_SIZE).reshape(n_teams, SQUAD_SIZE)
+        next_player = n_teams * SQUAD_SIZE
+        for season in range(self.n_seasons):
+            if season:
+                squads = squads.copy()
+                for team in range(n_teams):
+                    out = self.rng.choice(SQUAD_SIZE, size=NEW_PLAYERS_PER_SEASON, replace=False)
+                    squads[team, out] = np.arange(next_player, next_player + NEW_PLAYERS_PER_SEASON)
+                    next_player += NEW_PLAYERS_PER_SEASON
+            self.squads[season] = squads
+        n_players = next_player
+
+        # A player's role follows the squad slot they first appear in
+        first_slot = np.full(n_players, -1)
+        for season in range(self.n_seasons):
+            for team in range(n_teams):
+                unseen = first_slot[self.squads[season, team]] < 0
+                first_slot[self.squads[season, team][unseen]] = np.flatnonzero(unseen)
+        roles = np.asarray(SQUAD_ROLES, dtype=object)[first_slot]
+        self.player_names = np.asarray([player_name(i) for i in range(n_players)], dtype=object)
+        self.players = pd.DataFrame({
+            "player_id": np.arange(1, n_players + 1),
+            "player_name": self.player_names,
+            "country": self.rng.choice(COUNTRIES, size=n_players),
+            "playing_role": roles,
+            "batting_style": np.where(self.rng.random(n_players) < 0.7, "Right-handed bat", "Left-handed bat"),
+            "bowling_style": np.where(roles == "Wicketkeeper", None, self.rng.choice(BOWLING_STYLES, size=n_players)),
+        })
+
+        # Team strength drifts from season to season but reverts to the mean,
+        # so no franchise dominates a long simulation
+        shocks = self.rng.normal(0, 0.1, size=(self.n_seasons, n_teams))
+        self.strength = np.empty((self.n_seasons, n_teams))
+        self.strength[0] = shocks[0]
+        for season in range(1, self.n_seasons):
+            self.strength[season] = 0.6 * self.strength[season - 1] + shocks[season]
+
+    def seasons_frame(self, schedule):
+        span = schedule.groupby("season_index")["match_date"].agg(["min", "max"])
+        return pd.DataFrame({
+            "season_id": np.arange(1, self.n_seasons + 1),
+            "season_name": self.season_years.astype(str),
+            "season_year": self.season_years,
+            "start_date": span["min"].to_numpy(),
+            "end_date": span["max"].to_numpy(),
+        })
+
+    def team_players_frame(self):
+        season, team, slot = np.meshgrid(np.arange(self.n_seasons), np.arange(len(TEAMS)), np.arange(SQUAD_SIZE),
+                                         indexing="ij")
+        active = team < np.asarray(self.teams_in_season())[season]
+        return pd.DataFrame({
+            "team_id": team[active] + 1,
+            "player_id": self.squads[season, team, slot][active] + 1,
+            "season_id": season[active] + 1,
+            "is_captain": slot[active] == 1,
+        })
+
+    def teams_in_season(self):
+        return [TEAMS_PER_SEASON[i % len(TEAMS_PER_SEASON)] for i in range(self.n_seasons)]
+
+    def league_schedule(self):
+        """Double round robin per season, two matches a day, at the home team's ground"""
+        parts = []
+        for season, n_teams in enumerate(self.teams_in_season()):
+            home, away = np.nonzero(~np.eye(n_teams, dtype=bool))
+            order = self.rng.permutation(len(home))
+            day = np.arange(len(home)) // 2
+            parts.append(pd.DataFrame({
+                "season_index": season,
+                "home": home[order],
+                "away": away[order],
+                "venue": self.home_venue[home[order]],
+                "match_date": [self.season_starts[season] + timedelta(days=int(d)) for d in day],
+                "match_type": "League",
+            }))
+        return pd.concat(parts, ignore_index=True)
+
+    def simulate(self, fixtures, chunk_size=MATCHES_PER_CHUNK):
+        """
+        Play ``fixtures`` (season_index, home, away, venue, match_date,
+        match_type) in chunks, yielding ``(results, deliveries)`` per chunk.
+        ``results`` has one row per match; ``deliveries`` one row per ball.
+        """
+        for start in range(0, len(fixtures), chunk_size):
+            yield self._play(fixtures.iloc[start:start + chunk_size].reset_index(drop=True))
+
+    def _play(self, fixtures):
+        rng = self.rng
+        n = len(fixtures)
+        season = fixtures["season_index"].to_numpy()
+        home = fixtures["home"].to_numpy()
+        away = fixtures["away"].to_numpy()
+
+        toss_home = rng.random(n) < 0.5
+        toss_winner = np.where(toss_home, home, away)
+        toss_decision = np.where(rng.random(n) < 0.6, "field", "bat")
+        bats_first = np.where(toss_decision == "bat", toss_winner, np.where(toss_home, away, home))
+        chases = np.where(bats_first == home, away, home)
+        no_result = (fixtures["match_type"].to_numpy() == "League") & (rng.random(n) < NO_RESULT_PROBABILITY)
+
+        # Playing XI: keeper, five of the seven batters, five of the eight bowlers
+        def playing_xi(team):
+            batters = np.sort(np.argsort(rng.random((n, 7)), axis=1)[:, :5], axis=1) + 1
+            bowlers = np.sort(np.argsort(rng.random((n, 8)), axis=1)[:, :5], axis=1) + 8
+            slots = np.hstack([np.zeros((n, 1), dtype=np.int64), batters, bowlers])
+            return self.squads[season[:, None], team[:, None], slots]
+
+        xi_first, xi_second = playing_xi(bats_first), playing_xi(chases)
+        strength_first = self.strength[season, bats_first]
+        strength_second = self.strength[season, chases]
+
+        played = np.flatnonzero(~no_result)
+        first = simulate_innings(rng, xi_first[played], xi_second[played], np.full(len(played), np.inf),
+                                 strength_first[played], strength_second[played])
+        target = first["runs"] + 1
+        second = simulate_innings(rng, xi_second[played], xi_first[played], target.astype(float),
+                                  strength_second[played], strength_first[played])
+
+        first_runs, second_runs = first["runs"], second["runs"]
+        chased = second_runs >= target
+        tied = second_runs == first_runs
+        # Ties go to a super over, decided here by a coin toss
+        super_over_first = rng.random(len(played)) < 0.5
+        first_wins = ~chased & (~tied | super_over_first)
+
+        winner = np.full(n, -1)
+        winner[played] = np.where(first_wins, bats_first[played], chases[played])
+        result = np.full(n, "no result", dtype=object)
+        result[played] = np.where(tied, "tie", np.where(chased, "wickets", "runs"))
+        margin = np.full(n, np.nan)
+        margin[played] = np.where(tied, np.nan, np.where(chased, 10 - second["wickets"], first_runs - second_runs))
+
+        results = fixtures.copy()
+        results["toss_winner"] = toss_winner
+        results["toss_decision"] = toss_decision
+        results["bats_first"] = bats_first
+        results["chases"] = chases
+        results["winner"] = winner
+        results["result"] = result
+        results["result_margin"] = margin
+        results["is_super_over"] = False
+        results.loc[played[tied], "is_super_over"] = True
+        results["target_runs"] = np.nan
+        results.loc[played, "target_runs"] = target
+        for column, innings in (("first", first), ("second", second)):
+            for total in ("runs", "wickets", "balls", "extras"):
+                results[f"{column}_{total}"] = 0
+                results.loc[played, f"{column}_{total}"] = innings[total]
+        umpires = rng.choice(len(UMPIRES), size=(n, 2), replace=True)
+        results["umpire1"] = np.asarray(UMPIRES, dtype=object)[umpires[:, 0]]
+        results["umpire2"] = np.asarray(UMPIRES, dtype=object)[(umpires[:, 0] + 1 + umpires[:, 1] % 9) % len(UMPIRES)]
+
+        deliveries = []
+        for number, innings, batting in ((1, first, bats_first), (2, second, chases)):
+            match_row = played[innings["innings"]]
+            frame = pd.DataFrame({k: v for k, v in innings.items() if k not in ("runs", "wickets", "balls", "extras")})
+            frame["match_row"] = match_row
+            frame["inning_number"] = number
+            frame["batting_team"] = batting[match_row]
+            frame["bowling_team"] = np.where(batting == bats_first, chases, bats_first)[match_row]
+            deliveries.append(frame.drop(columns="innings"))
+        deliveries = pd.concat(deliveries, ignore_index=True)
+        deliveries.sort_values(["match_row", "inning_number"], kind="stable", inplace=True)
+        deliveries.reset_index(drop=True, inplace=True)
+
+        results["player_of_match"] = self._player_of_match(results, deliveries)
+        return results, deliveries
+
+    @staticmethod
+    def _player_of_match(results, deliveries):
+        """Most runs plus 25 per wicket on the winning side (either side after a tie)"""
+        batting = deliveries.groupby(["match_row", "batting_team", "batsman"])["batsman_runs"].sum()
+        wickets = deliveries[deliveries["is_wicket"] & (deliveries["dismissal_kind"] != 3)]
+        bowling = wickets.groupby(["match_row", "bowling_team", "bowler"]).size() * 25
+        batting.index.names = bowling.index.names = ["match_row", "team", "player"]
+        impact = batting.add(bowling, fill_value=0).rename("impact").reset_index()
+
+        match_row = impact["match_row"].to_numpy()
+        on_winning_side = (impact["team"].to_numpy() == results["winner"].to_numpy()[match_row]) | (
+            results["result"].to_numpy()[match_row] == "tie"
+        )
+        best = impact[on_winning_side].sort_values(["match_row", "impact"], ascending=[True, False], kind="stable")
+        best = best.drop_duplicates("match_row")
+        player = np.full(len(results), -1)
+        player[best["match_row"].to_numpy()] = best["player"].to_numpy()
+        return player
+
+    def playoff_fixtures(self, league_results, stage):
+        """
+        Fixtures of one playoff round for every season.
+
+        Qualifier 1 is 1st v 2nd and the Eliminator 3rd v 4th of the league
+        table (points, then net run rate); Qualifier 2 is the Qualifier 1 loser
+        v the Eliminator winner, and the Final the two qualifier winners.
+        """
+        if stage in ("Qualifier 1", "Eliminator"):
+            table = league_table(league_results)
+            top = table.groupby("season_index")["team"].apply(lambda teams: teams.to_numpy()[:4])
+            top = np.stack(top.to_numpy())
+            home, away = (top[:, 0], top[:, 1]) if stage == "Qualifier 1" else (top[:, 2], top[:, 3])
+            seasons = table["season_index"].unique()
+        else:
+            played = league_results.set_index(["season_index", "match_type"])
+            seasons = np.arange(self.n_seasons)
+
+            def teams(match_type, column):
+                return played.xs(match_type, level="match_type")[column].reindex(seasons).to_numpy()
+
+            q1_loser = np.where(teams("Qualifier 1", "winner") == teams("Qualifier 1", "home"),
+                                teams("Qualifier 1", "away"), teams("Qualifier 1", "home"))
+            if stage == "Qualifier 2":
+                home, away = q1_loser, teams("Eliminator", "winner")
+            else:
+                home, away = teams("Qualifier 1", "winner"), teams("Qualifier 2", "winner")
+
+        offset = {"Qualifier 1": 2, "Eliminator": 3, "Qualifier 2": 5, "Final": 7}[stage]
+        last_league_day = league_results[league_results["match_type"] == "League"].groupby("season_index")["match_date"].max()
+        return pd.DataFrame({
+            "season_index": seasons,
+            "home": home,
+            "away": away,
+            "venue": self.rng.choice(PLAYOFF_VENUES, size=len(seasons)),
+            "match_date": [day + timedelta(days=offset) for day in last_league_day.reindex(seasons)],
+            "match_type": stage,
+        })
+
+
+def league_table(results):
+    """Final league standings per season: points, then net run rate"""
+    league = results[results["match_type"] == "League"]
+    rows = []
+    for team_column, runs_for, balls_for, wickets_for, runs_against, balls_against, wickets_against in (
+        ("bats_first", "first_runs", "first_balls", "first_wickets", "second_runs", "second_balls", "second_wickets"),
+        ("chases", "second_runs", "second_balls", "second_wickets", "first_runs", "first_balls", "first_wickets"),
+    ):
+        # An all-out side is charged its full 20 overs, as in the real NRR
+        rows.append(pd.DataFrame({
+            "season_index": league["season_index"].to_numpy(),
+            "team": league[team_column].to_numpy(),
+            "points": np.where(league["winner"] == league[team_column], 2, np.where(league["winner"] < 0, 1, 0)),
+            "runs_for": league[runs_for].to_numpy(),
+            "balls_for": np.where(league[wickets_for] >= 10, 120, league[balls_for]),
+            "runs_against": league[runs_against].to_numpy(),
+            "balls_against": np.where(league[wickets_against] >= 10, 120, league[balls_against]),
+        }))
+    table = pd.concat(rows).groupby(["season_index", "team"], as_index=False).sum()
+    table["net_run_rate"] = (
+        6 * table["runs_for"] / table["balls_for"].clip(lower=1)
+        - 6 * table["runs_against"] / table["balls_against"].clip(lower=1)
+    )
+    return table.sort_values(["season_index", "points", "net_run_rate"], ascending=[True, False, False])
+
+
+def assign_match_ids(league, fixtures):
+    """
+    Chronological match ids: each season's league matches, then its four
+    playoff slots, so ids are known before any match has been simulated.
+    """
+    league_counts = fixtures.groupby("season_index").size().reindex(range(league.n_seasons), fill_value=0)
+    season_first_id = FIRST_MATCH_ID + np.concatenate([[0], np.cumsum(league_counts.to_numpy() + 4)[:-1]])
+    fixtures = fixtures.copy()
+    fixtures["match_id"] = season_first_id[fixtures["season_index"]] + fixtures.groupby("season_index").cumcount()
+    playoff_first_id = season_first_id + league_counts.to_numpy()
+    return fixtures, playoff_first_id
+
+
+def _names(values, lookup):
+    """Names for index codes, None where the code is -1"""
+    lookup = np.append(np.asarray(lookup, dtype=object), None)
+    return lookup[np.where(np.asarray(values) < 0, len(lookup) - 1, values)]
+
+
+def _ids(values):
+    """1-based ids for index codes as a nullable integer column"""
+    values = np.asarray(values)
+    ids = pd.array(values + 1, dtype="Int64")
+    ids[values < 0] = pd.NA
+    return ids
+
+
+def match_frames(league, results):
+    """``match_info``, ``matches`` and ``innings`` rows for a chunk of results"""
+    team_names = league.teams["team_name"].to_numpy()
+    venue_names = league.venues["venue_name"].to_numpy()
+    played = results["result"] != "no result"
+    match_date = pd.to_datetime(results["match_date"])
+    margin = results["result_margin"]
+    margin_text = np.where(
+        results["result"] == "runs", margin.fillna(0).astype(int).astype(str) + " runs",
+        np.where(results["result"] == "wickets", margin.fillna(0).astype(int).astype(str) + " wickets", None),
+    )
+
+    match_info = pd.DataFrame({
+        "filename": results["match_id"].astype(str) + ".json",
+        "data_version": 1.0,
+        "created_date": (match_date + pd.Timedelta(days=1)).dt.strftime("%Y-%m-%d"),
+        "competition": "IPL",
+        "match_date": match_date.dt.strftime("%Y-%m-%d"),
+        "venue": venue_names[results["venue"]],
+        "city": league.venues["city"].to_numpy()[results["venue"]],
+        "match_type": "T20",
+        "toss_winner": team_names[results["toss_winner"]],
+        "toss_decision": results["toss_decision"],
+        "winner": _names(results["winner"], team_names),
+        "margin": margin_text,
+        "player_of_match": _names(results["player_of_match"], league.player_names),
+        "team1": team_names[results["home"]],
+        "team2": team_names[results["away"]],
+        "season": league.season_years[results["season_index"]],
+    })
+
+    matches = pd.DataFrame({
+        "match_id": results["match_id"],
+        "season_id": results["season_index"] + 1,
+        "match_date": match_info["match_date"],
+        "venue_id": results["venue"] + 1,
+        "team1_id": results["home"] + 1,
+        "team2_id": results["away"] + 1,
+        "toss_winner_id": results["toss_winner"] + 1,
+        "toss_decision": results["toss_decision"],
+        "winner_id": _ids(results["winner"]),
+        "result": results["result"],
+        "result_margin": margin,
+        "player_of_match_id": _ids(results["player_of_match"]),
+        "match_type": results["match_type"],
+        "target_runs": results["target_runs"],
+        "target_overs": np.where(played, 20.0, np.nan),
+        "is_super_over": results["is_super_over"],
+        "dl_method": None,
+        "umpire1": results["umpire1"],
+        "umpire2": results["umpire2"],
+    })
+
+    innings = []
+    for number, prefix, batting, bowling in ((1, "first", "bats_first", "chases"), (2, "second", "chases", "bats_first")):
+        chunk = results[played]
+        balls = chunk[f"{prefix}_balls"]
+        innings.append(pd.DataFrame({
+            "inning_id": inning_ids(chunk["match_id"], number),
+            "match_id": chunk["match_id"],
+            "inning_number": number,
+            "batting_team_id": chunk[batting] + 1,
+            "bowling_team_id": chunk[bowling] + 1,
+            "total_runs": chunk[f"{prefix}_runs"],
+            "total_wickets": chunk[f"{prefix}_wickets"],
+            "total_overs": balls // 6 + (balls % 6) / 10,
+            "extras": chunk[f"{prefix}_extras"],
+        }))
+    innings = pd.concat(innings).sort_values("inning_id", kind="stable")
+    return match_info[MATCH_INFO_COLUMNS], matches[MATCHES_COLUMNS], innings[INNINGS_COLUMNS]
+
+
+def inning_ids(match_ids, inning_number):
+    return (np.asarray(match_ids) - FIRST_MATCH_ID) * 2 + inning_number
+
+
+def delivery_frames(league, results, deliveries):
+    """``innings_data`` and ``deliveries`` rows for a chunk of simulated balls"""
+    names = league.player_names
+    match_id = results["match_id"].to_numpy()[deliveries["match_row"].to_numpy()]
+    inning_number = deliveries["inning_number"].to_numpy()
+    is_wicket = deliveries["is_wicket"].to_numpy()
+    kind = deliveries["dismissal_kind"].to_numpy()
+    fielder = deliveries["fielder"].to_numpy()
+    batsman = deliveries["batsman"].to_numpy()
+    extras_type = EXTRAS_TYPES[deliveries["extras_code"].to_numpy()]
+
+    # Cricsheet-style wicket record: who was out, how, and the fielders involved
+    wicket_details = np.full(len(deliveries), None, dtype=object)
+    out = np.flatnonzero(is_wicket)
+    wicket_details[out] = [
+        json.dumps([{"player_out": player, "kind": how, **({"fielders": [{"name": by}]} if by else {})}])
+        for player, how, by in zip(names[batsman[out]], DISMISSAL_KINDS[kind[out]], _names(fielder[out], names))
+    ]
+
+    innings_data = pd.DataFrame({
+        "filename": pd.Series(match_id).astype(str) + ".json",
+        "innings_type": np.where(inning_number == 1, "1st innings", "2nd innings"),
+        "team": league.teams["team_name"].to_numpy()[deliveries["batting_team"].to_numpy()],
+        "over_ball": np.round(deliveries["over"].to_numpy() + deliveries["ball"].to_numpy() / 10, 1),
+        "batsman": names[batsman],
+        "bowler": names[deliveries["bowler"].to_numpy()],
+        "non_striker": names[deliveries["non_striker"].to_numpy()],
+        "runs_batsman": deliveries["batsman_runs"].to_numpy(),
+        "runs_total": deliveries["total_runs"].to_numpy(),
+        "extras_type": extras_type,
+        "extras_runs": deliveries["extras_runs"].to_numpy(),
+        "wicket_details": wicket_details,
+    })
+
+    normalized = pd.DataFrame({
+        "match_id": match_id,
+        "inning_id": inning_ids(match_id, inning_number),
+        "over_number": deliveries["over"].to_numpy(),
+        "ball_number": deliveries["ball"].to_numpy(),
+        "batsman_id": batsman + 1,
+        "bowler_id": deliveries["bowler"].to_numpy() + 1,
+        "non_striker_id": deliveries["non_striker"].to_numpy() + 1,
+        "batsman_runs": deliveries["batsman_runs"].to_numpy(),
+        "extra_runs": deliveries["extras_runs"].to_numpy(),
+        "total_runs": deliveries["total_runs"].to_numpy(),
+        "extras_type": extras_type,
+        "is_wicket": is_wicket,
+        "player_dismissed_id": _ids(np.where(is_wicket, batsman, -1)),
+        "dismissal_kind": _names(np.where(is_wicket, kind, -1), DISMISSAL_KINDS),
+        "fielder_id": _ids(fielder),
+    })
+    return innings_data[INNINGS_DATA_COLUMNS], normalized[DELIVERIES_COLUMNS]
+
+
+class CsvSink:
+    """Write every table to ``<directory>/<table>.csv``, appending chunk by chunk"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._started = set()
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, table, frame):
+        path = os.path.join(self.directory, f"{table}.csv")
+        first = table not in self._started
+        frame.to_csv(path, mode="w" if first else "a", header=first, index=False)
+        self._started.add(table)
+
+    def finish(self, manifest):
+        with open(os.path.join(self.directory, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        print(f"Wrote {len(self._started)} tables to {self.directory}")
+
+
+class DatabaseSink:
+    """COPY every table into the configured database, replacing its contents"""
+
+    def __init__(self, create_schema=False):
+        from app.database import Base, engine
+        from app.models.cricket import MatchInfo, InningsData
+        from ipl_bulk_load import copy_frame
+
+        self._copy_frame = copy_frame
+        self.conn = engine.raw_connection()
+        cursor = self.conn.cursor()
+        if create_schema:
+            schema_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                       "app", "schemas", "ipl_database_schema.sql")
+            with open(schema_path) as f:
+                # Drop psql meta-commands such as \c
+                cursor.execute("".join(line for line in f if not line.startswith("\\")))
+            self.conn.commit()
+        Base.metadata.create_all(engine, tables=[MatchInfo.__table__, InningsData.__table__])
+        cursor.execute(f"TRUNCATE {', '.join(LOAD_TABLES)} RESTART IDENTITY CASCADE")
+        self.conn.commit()
+        cursor.close()
+
+    def write(self, table, frame):
+        cursor = self.conn.cursor()
+        self._copy_frame(cursor, frame, table)
+        self.conn.commit()
+        cursor.close()
+
+    def finish(self, manifest):
+        from ipl_rollups import refresh_rollups
+
+        cursor = self.conn.cursor()
+        for table, column in SERIAL_TABLES.items():
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), "
+                f"COALESCE((SELECT MAX({column}) FROM {table}), 1))"
+            )
+        cursor.execute("ANALYZE")
+        self.conn.commit()
+        cursor.close()
+        refresh_rollups(self.conn)
+        self.conn.close()
+
+
+def generate(league, sinks, chunk_size=MATCHES_PER_CHUNK):
+    """
+    Simulate every season of ``league`` and write all tables to ``sinks``.
+
+    Returns:
+        dict: Row counts per table
+    """
+    counts = {}
+
+    def write(table, frame):
+        counts[table] = counts.get(table, 0) + len(frame)
+        for sink in sinks:
+            sink.write(table, frame)
+
+    write("teams", league.teams)
+    write("venues", league.venues)
+    write("players", league.players)
+
+    # team_players references seasons, so seasons go first when loading
+    fixtures, playoff_first_id = assign_match_ids(league, league.league_schedule())
+    write("seasons", league.seasons_frame(fixtures))
+    write("team_players", league.team_players_frame())
+
+    def play(fixtures):
+        played = []
+        for results, deliveries in league.simulate(fixtures, chunk_size):
+            match_info, matches, innings = match_frames(league, results)
+            innings_data, normalized = delivery_frames(league, results, deliveries)
+            write("match_info", match_info)
+            write("matches", matches)
+            write("innings", innings)
+            write("innings_data", innings_data)
+            write("deliveries", normalized)
+            played.append(results)
+            print(f"  {counts['matches']:,} matches, {counts['deliveries']:,} deliveries")
+        return pd.concat(played, ignore_index=True)
+
+    results = play(fixtures)
+    for stage_number, stage in enumerate(PLAYOFF_STAGES):
+        stage_fixtures = league.playoff_fixtures(results, stage)
+        stage_fixtures["match_id"] = playoff_first_id[stage_fixtures["season_index"]] + stage_number
+        results = pd.concat([results, play(stage_fixtures)], ignore_index=True)
+    return counts
+
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Generate a synthetic IPL dataset")
+    parser.add_argument("--scale", type=int, default=1,
+                        help=f"Number of {SEASONS_PER_SCALE}-season blocks to simulate (1, 10, 100, ...)")
+    parser.add_argument("--seed", type=int, default=2008, help="Random seed; the same seed and --chunk-size give the same dataset")
+    parser.add_argument("--output", help="Directory to write one CSV per table to")
+    parser.add_argument("--load", action="store_true",
+                        help="Replace the data in the configured database (DB_HOST, DB_NAME, ...) with the synthetic data")
+    parser.add_argument("--create-schema", action="store_true",
+                        help="With --load, create the tables of ipl_database_schema.sql first (empty database)")
+    parser.add_argument("--chunk-size", type=int, default=MATCHES_PER_CHUNK, help="Matches simulated per batch")
+    args = parser.parse_args()
+    if not args.output and not args.load:
+        parser.error("Give --output and/or --load")
+    return args
+
+
+def main():
+    """Generate the dataset and write it to the requested destinations"""
+    args = parse_args()
+    try:
+        started = time.time()
+        league = SyntheticLeague(scale=args.scale, seed=args.seed)
+        print(f"Simulating {league.n_seasons} seasons with {len(league.players):,} players...")
+
+        sinks = []
+        if args.output:
+            sinks.append(CsvSink(args.output))
+        if args.load:
+            sinks.append(DatabaseSink(create_schema=args.create_schema))
+
+        counts = generate(league, sinks, args.chunk_size)
+        manifest = {"scale": args.scale, "seed": args.seed, "seasons": league.n_seasons, "rows": counts}
+        for sink in sinks:
+            sink.finish(manifest)
+
+        print(f"Generated {counts['matches']:,} matches and {counts['deliveries']:,} deliveries "
+              f"in {time.time() - started:.1f}s")
+        return 0
+
+    except Exception as e:
+        print(f"Error generating synthetic data: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,304 @@
+"""
+COPY-based bulk loader for matches, innings and deliveries.
+
+The row-by-row path in ipl_import_data.py converts every CSV row in Python and
+pushes it through execute_batch. This loader instead:
+
+    1. builds the ID-mapped columns with vectorized pandas operations,
+    2. streams them with COPY FROM STDIN into temporary staging tables,
+    3. merges each staging table into its target with one set-based statement.
+
+Each table is merged in its own short transaction, so the target tables are
+only locked for the merge rather than for the whole conversion.
+"""
+import io
+import time
+
+import pandas as pd
+
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%Y/%m/%d')
+
+MATCH_COLUMNS = [
+    'match_id', 'season_id', 'match_date', 'venue_id', 'team1_id', 'team2_id',
+    'toss_winner_id', 'toss_decision', 'winner_id', 'result', 'result_margin',
+    'player_of_match_id', 'match_type', 'target_runs', 'target_overs',
+    'is_super_over', 'dl_method', 'umpire1', 'umpire2'
+]
+
+INNINGS_COLUMNS = ['match_id', 'inning_number', 'batting_team_id', 'bowling_team_id']
+
+DELIVERY_COLUMNS = [
+    'match_id', 'inning_number', 'over_number', 'ball_number',
+    'batsman_id', 'bowler_id', 'non_striker_id',
+    'batsman_runs', 'extra_runs', 'total_runs',
+    'extras_type', 'is_wicket', 'player_dismissed_id',
+    'dismissal_kind', 'fielder_id'
+]
+
+
+def _clean_text(series):
+    """Treat the dataset's 'NA' strings as missing"""
+    return series.where(series.notna() & (series != 'NA'))
+
+
+def _map_ids(series, id_map):
+    """Map names to database IDs as a nullable integer column"""
+    return _clean_text(series).map(id_map).astype('Int64')
+
+
+def _to_int(series, default=None):
+    values = pd.to_numeric(series, errors='coerce')
+    if default is not None:
+        values = values.fillna(default)
+    return values.astype('Int64')
+
+
+def _parse_dates(series):
+    """Vectorized parse_date: first matching format wins, unparseable dates become NULL"""
+    parsed = pd.Series(pd.NaT, index=series.index)
+    text = series.astype(str)
+    for fmt in DATE_FORMATS:
+        parsed = parsed.fillna(pd.to_datetime(text, format=fmt, errors='coerce'))
+    return parsed.dt.strftime('%Y-%m-%d')
+
+
+def _report(label, rows, started):
+    elapsed = max(time.time() - started, 1e-6)
+    print(f"Loaded {rows} {label} in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/sec)")
+
+
+def copy_frame(cursor, frame, table):
+    """
+    Stream ``frame`` into ``table`` with COPY FROM STDIN.
+
+    Args:
+        cursor: psycopg2 cursor
+        frame: DataFrame whose columns match the target column names
+        table: Target (usually staging) table
+
+    Returns:
+        int: Number of rows copied
+    """
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False, header=False, na_rep='')
+    buffer.seek(0)
+    columns = ', '.join(frame.columns)
+    cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '')", buffer)
+    return len(frame)
+
+
+def _create_staging_table(cursor, name, source_table, columns):
+    """Temporary table with the column types of ``source_table`` but none of its constraints"""
+    cursor.execute(
+        f"CREATE TEMP TABLE {name} ON COMMIT DROP AS "
+        f"SELECT {', '.join(columns)} FROM {source_table} WITH NO DATA"
+    )
+
+
+def build_matches_frame(matches_df, team_id_map, venue_id_map, season_id_map, player_id_map):
+    """ID-mapped matches frame in MATCH_COLUMNS order"""
+    toss_decision = _clean_text(matches_df['toss_decision']).str.lower()
+    frame = pd.DataFrame({
+        'match_id': _to_int(matches_df['id']),
+        'season_id': matches_df['season'].astype(str).map(season_id_map).astype('Int64'),
+        'match_date': _parse_dates(matches_df['date']),
+        'venue_id': _map_ids(matches_df['venue'], venue_id_map),
+        'team1_id': _map_ids(matches_df['team1'], team_id_map),
+        'team2_id': _map_ids(matches_df['team2'], team_id_map),
+        'toss_winner_id': _map_ids(matches_df['toss_winner'], team_id_map),
+        'toss_decision': toss_decision,
+        'winner_id': _map_ids(matches_df['winner'], team_id_map),
+        'result': _clean_text(matches_df['result']),
+        'result_margin': pd.to_numeric(matches_df['result_margin'], errors='coerce'),
+        'player_of_match_id': _map_ids(matches_df['player_of_match'], player_id_map),
+        'match_type': _clean_text(matches_df['match_type']),
+        'target_runs': pd.to_numeric(matches_df['target_runs'], errors='coerce'),
+        'target_overs': pd.to_numeric(matches_df['target_overs'], errors='coerce'),
+        'is_super_over': matches_df['super_over'] == 'Y',
+        'dl_method': _clean_text(matches_df['method']),
+        'umpire1': _clean_text(matches_df['umpire1']),
+        'umpire2': _clean_text(matches_df['umpire2']),
+    })
+    return frame[frame['match_id'].notna()][MATCH_COLUMNS]
+
+
+def build_innings_frame(deliveries_df, team_id_map):
+    """One row per (match, inning) with the batting/bowling team IDs seen in deliveries"""
+    innings = deliveries_df[['match_id', 'inning', 'batting_team', 'bowling_team']].drop_duplicates(
+        subset=['match_id', 'inning']
+    )
+    frame = pd.DataFrame({
+        'match_id': _to_int(innings['match_id']),
+        'inning_number': _to_int(innings['inning']),
+        'batting_team_id': _map_ids(innings['batting_team'], team_id_map),
+        'bowling_team_id': _map_ids(innings['bowling_team'], team_id_map),
+    })
+    return frame[frame['match_id'].notna() & frame['inning_number'].notna()][INNINGS_COLUMNS]
+
+
+def build_deliveries_frame(deliveries_df, player_id_map):
+    """ID-mapped deliveries frame; inning_id is resolved in SQL during the merge"""
+    frame = pd.DataFrame({
+        'match_id': _to_int(deliveries_df['match_id']),
+        'inning_number': _to_int(deliveries_df['inning']),
+        'over_number': _to_int(deliveries_df['over']),
+        'ball_number': _to_int(deliveries_df['ball']),
+        'batsman_id': _map_ids(deliveries_df['batter'], player_id_map),
+        'bowler_id': _map_ids(deliveries_df['bowler'], player_id_map),
+        'non_striker_id': _map_ids(deliveries_df['non_striker'], player_id_map),
+        'batsman_runs': _to_int(deliveries_df['batsman_runs'], default=0),
+        'extra_runs': _to_int(deliveries_df['extra_runs'], default=0),
+        'total_runs': _to_int(deliveries_df['total_runs'], default=0),
+        'extras_type': _clean_text(deliveries_df['extras_type']),
+        'is_wicket': _to_int(deliveries_df['is_wicket'], default=0) == 1,
+        'player_dismissed_id': _map_ids(deliveries_df['player_dismissed'], player_id_map),
+        'dismissal_kind': _clean_text(deliveries_df['dismissal_kind']),
+        'fielder_id': _map_ids(deliveries_df['fielder'], player_id_map),
+    })
+    return frame[frame['match_id'].notna() & frame['inning_number'].notna()][DELIVERY_COLUMNS]
+
+
+def bulk_load_matches(conn, matches_df, team_id_map, venue_id_map, season_id_map, player_id_map):
+    """COPY matches into staging and upsert them into matches"""
+    try:
+        started = time.time()
+        frame = build_matches_frame(matches_df, team_id_map, venue_id_map, season_id_map, player_id_map)
+        cursor = conn.cursor()
+
+        _create_staging_table(cursor, 'stage_matches', 'matches', MATCH_COLUMNS)
+        copy_frame(cursor, frame, 'stage_matches')
+
+        columns = ', '.join(MATCH_COLUMNS)
+        updates = ',\n            '.join(f"{c} = EXCLUDED.{c}" for c in MATCH_COLUMNS if c != 'match_id')
+        cursor.execute(f"""
+        INSERT INTO matches ({columns})
+        SELECT DISTINCT ON (match_id) {columns} FROM stage_matches
+        ON CONFLICT (match_id) DO UPDATE
+        SET
+            {updates};
+        """)
+
+        conn.commit()
+        cursor.close()
+        _report("matches", len(frame), started)
+        return len(frame)
+
+    except Exception as e:
+        conn.rollback()
+        print(f"Error bulk loading matches: {e}")
+        return None
+
+
+def bulk_load_innings(conn, deliveries_df, team_id_map):
+    """COPY innings into staging and upsert them, filling missing teams from the match"""
+    try:
+        started = time.time()
+        frame = build_innings_frame(deliveries_df, team_id_map)
+        cursor = conn.cursor()
+
+        _create_staging_table(cursor, 'stage_innings', 'innings', INNINGS_COLUMNS)
+        copy_frame(cursor, frame, 'stage_innings')
+
+        # Innings seen in deliveries; teams missing from the CSV fall back to the
+        # match record (team1 bats first, team2 second)
+        cursor.execute("""
+        INSERT INTO innings (match_id, inning_number, batting_team_id, bowling_team_id)
+        SELECT
+            s.match_id,
+            s.inning_number,
+            COALESCE(s.batting_team_id, CASE s.inning_number WHEN 1 THEN m.team1_id WHEN 2 THEN m.team2_id END),
+            COALESCE(s.bowling_team_id, CASE s.inning_number WHEN 1 THEN m.team2_id WHEN 2 THEN m.team1_id END)
+        FROM stage_innings s
+        JOIN matches m ON m.match_id = s.match_id
+        ON CONFLICT (match_id, inning_number) DO UPDATE
+        SET
+            batting_team_id = EXCLUDED.batting_team_id,
+            bowling_team_id = EXCLUDED.bowling_team_id;
+        """)
+
+        # Default innings for matches that have no deliveries at all
+        cursor.execute("""
+        INSERT INTO innings (match_id, inning_number, batting_team_id, bowling_team_id)
+        SELECT m.match_id, n.inning_number,
+               CASE n.inning_number WHEN 1 THEN m.team1_id ELSE m.team2_id END,
+               CASE n.inning_number WHEN 1 THEN m.team2_id ELSE m.team1_id END
+        FROM matches m
+        CROSS JOIN (VALUES (1), (2)) AS n(inning_number)
+        WHERE NOT EXISTS (SELECT 1 FROM innings i WHERE i.match_id = m.match_id)
+        ON CONFLICT (match_id, inning_number) DO NOTHING;
+        """)
+
+        conn.commit()
+        cursor.close()
+        _report("innings", len(frame), started)
+        return len(frame)
+
+    except Exception as e:
+        conn.rollback()
+        print(f"Error bulk loading innings: {e}")
+        return None
+
+
+def bulk_load_deliveries(conn, deliveries_df, player_id_map, replace_match_ids=None):
+    """
+    COPY deliveries into staging and replace the deliveries of every staged match.
+
+    Deliveries have no natural key, so the merge deletes the existing rows for
+    the staged matches and inserts the new ones in the same transaction. Running
+    the load twice leaves the table unchanged.
+
+    Args:
+        replace_match_ids: Matches whose deliveries are replaced even if none are
+            staged for them, so a match whose deliveries were removed is cleared
+    """
+    try:
+        started = time.time()
+        frame = build_deliveries_frame(deliveries_df, player_id_map)
+        cursor = conn.cursor()
+
+        cursor.execute(f"""
+        CREATE TEMP TABLE stage_deliveries ON COMMIT DROP AS
+        SELECT d.match_id, i.inning_number, {', '.join(f'd.{c}' for c in DELIVERY_COLUMNS if c not in ('match_id', 'inning_number'))}
+        FROM deliveries d JOIN innings i ON i.inning_id = d.inning_id
+        WITH NO DATA
+        """)
+        copy_frame(cursor, frame, 'stage_deliveries')
+        cursor.execute("ANALYZE stage_deliveries")
+
+        cursor.execute("""
+        DELETE FROM deliveries
+        WHERE match_id IN (SELECT DISTINCT match_id FROM stage_deliveries)
+           OR match_id = ANY(%s)
+        """, ([int(match_id) for match_id in replace_match_ids or []],))
+
+        cursor.execute("""
+        INSERT INTO deliveries (
+            match_id, inning_id, over_number, ball_number,
+            batsman_id, bowler_id, non_striker_id,
+            batsman_runs, extra_runs, total_runs,
+            extras_type, is_wicket, player_dismissed_id,
+            dismissal_kind, fielder_id
+        )
+        SELECT
+            s.match_id, i.inning_id, s.over_number, s.ball_number,
+            s.batsman_id, s.bowler_id, s.non_striker_id,
+            s.batsman_runs, s.extra_runs, s.total_runs,
+            s.extras_type, s.is_wicket, s.player_dismissed_id,
+            s.dismissal_kind, s.fielder_id
+        FROM stage_deliveries s
+        JOIN innings i ON i.match_id = s.match_id AND i.inning_number = s.inning_number
+        """)
+        inserted = cursor.rowcount
+        skipped = len(frame) - inserted
+        if skipped:
+            print(f"Warning: {skipped} deliveries had no matching innings and were skipped")
+
+        conn.commit()
+        cursor.close()
+        _report("deliveries", inserted, started)
+        return inserted
+
+    except Exception as e:
+        conn.rollback()
+        print(f"Error bulk loading deliveries: {e}")
+        return None
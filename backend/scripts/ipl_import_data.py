@@ -4,6 +4,12 @@ from psycopg2.extras import execute_batch
 import numpy as np
 from datetime import datetime
 import re
+import sys
+import argparse
+
+from ipl_rollups import refresh_rollups
+from ipl_bulk_load import bulk_load_matches, bulk_load_innings, bulk_load_deliveries
+from ipl_incremental import incremental_import
 
 # Database connection parameters
 DB_PARAMS = {
@@ -504,187 +510,41 @@ def insert_deliveries(conn, deliveries_df, innings_map, player_id_map):
     except Exception as e:
         conn.rollback()
         print(f"Error inserting deliveries: {e}")
-def update_match_stats(conn):
-    """Update the statistics tables after inserting all the basic data"""
-    try:
-        cursor = conn.cursor()
-        
-        # Update toss_stats table
-        cursor.execute("""
-        INSERT INTO toss_stats (team_id, season_id, toss_wins, chose_bat, chose_field, won_after_batting, won_after_fielding)
-        SELECT 
-            toss_winner_id as team_id, 
-            season_id, 
-            COUNT(*) as toss_wins,
-            SUM(CASE WHEN toss_decision = 'bat' THEN 1 ELSE 0 END) as chose_bat,
-            SUM(CASE WHEN toss_decision = 'field' THEN 1 ELSE 0 END) as chose_field,
-            SUM(CASE WHEN toss_decision = 'bat' AND winner_id = toss_winner_id THEN 1 ELSE 0 END) as won_after_batting,
-            SUM(CASE WHEN toss_decision = 'field' AND winner_id = toss_winner_id THEN 1 ELSE 0 END) as won_after_fielding
-        FROM 
-            matches
-        WHERE 
-            toss_winner_id IS NOT NULL
-        GROUP BY 
-            toss_winner_id, season_id
-        ON CONFLICT (team_id, season_id) DO UPDATE SET
-            toss_wins = EXCLUDED.toss_wins,
-            chose_bat = EXCLUDED.chose_bat,
-            chose_field = EXCLUDED.chose_field,
-            won_after_batting = EXCLUDED.won_after_batting,
-            won_after_fielding = EXCLUDED.won_after_fielding;
-        """)
-        
-        # Update head_to_head table
-        cursor.execute("""
-        INSERT INTO head_to_head (team1_id, team2_id, season_id, matches_played, team1_wins, team2_wins, no_results)
-        WITH team_matchups AS (
-            SELECT 
-                CASE WHEN team1_id < team2_id THEN team1_id ELSE team2_id END as team1_id,
-                CASE WHEN team1_id < team2_id THEN team2_id ELSE team1_id END as team2_id,
-                season_id,
-                COUNT(*) as matches_played,
-                SUM(CASE 
-                    WHEN (team1_id < team2_id AND winner_id = team1_id) OR 
-                         (team1_id > team2_id AND winner_id = team2_id) 
-                    THEN 1 ELSE 0 END) as team1_wins,
-                SUM(CASE 
-                    WHEN (team1_id < team2_id AND winner_id = team2_id) OR 
-                         (team1_id > team2_id AND winner_id = team1_id) 
-                    THEN 1 ELSE 0 END) as team2_wins,
-                SUM(CASE WHEN winner_id IS NULL THEN 1 ELSE 0 END) as no_results
-            FROM 
-                matches
-            WHERE 
-                team1_id IS NOT NULL AND 
-                team2_id IS NOT NULL
-            GROUP BY 
-                CASE WHEN team1_id < team2_id THEN team1_id ELSE team2_id END,
-                CASE WHEN team1_id < team2_id THEN team2_id ELSE team1_id END,
-                season_id
-        )
-        SELECT * FROM team_matchups
-        ON CONFLICT (team1_id, team2_id, season_id) DO UPDATE SET
-            matches_played = EXCLUDED.matches_played,
-            team1_wins = EXCLUDED.team1_wins,
-            team2_wins = EXCLUDED.team2_wins,
-            no_results = EXCLUDED.no_results;
-        """)
-        
-        # Update team_season_stats table - FIX COLUMN COUNT MISMATCH
-        cursor.execute("""
-        INSERT INTO team_season_stats (
-            team_id, season_id, matches_played, matches_won,
-            home_matches_played, home_matches_won,
-            away_matches_played, away_matches_won,
-            batting_first_played, batting_first_won,
-            bowling_first_played, bowling_first_won
-        )
-        WITH team_seasons AS (
-            -- Get all teams in each season
-            SELECT DISTINCT m.team_id, m.season_id
-            FROM (
-                SELECT team1_id as team_id, season_id FROM matches WHERE team1_id IS NOT NULL
-                UNION
-                SELECT team2_id as team_id, season_id FROM matches WHERE team2_id IS NOT NULL
-            ) m
-            JOIN teams t ON m.team_id = t.team_id
-            JOIN seasons s ON m.season_id = s.season_id
-        ),
-        team_stats AS (
-            -- Calculate stats for each team in each season
-            SELECT 
-                ts.team_id,
-                ts.season_id,
-                -- Matches played
-                COUNT(DISTINCT CASE WHEN m.team1_id = ts.team_id OR m.team2_id = ts.team_id THEN m.match_id END) as matches_played,
-                -- Matches won
-                COUNT(DISTINCT CASE WHEN m.winner_id = ts.team_id THEN m.match_id END) as matches_won,
-                -- Home matches using venue as proxy
-                COUNT(DISTINCT CASE 
-                    WHEN (m.team1_id = ts.team_id AND v.venue_name = t.home_venue) OR 
-                         (m.team2_id = ts.team_id AND v.venue_name = t.home_venue) 
-                    THEN m.match_id END) as home_matches_played,
-                -- Home matches won
-                COUNT(DISTINCT CASE 
-                    WHEN m.winner_id = ts.team_id AND 
-                        ((m.team1_id = ts.team_id AND v.venue_name = t.home_venue) OR 
-                         (m.team2_id = ts.team_id AND v.venue_name = t.home_venue))
-                    THEN m.match_id END) as home_matches_won,
-                -- Batting first
-                COUNT(DISTINCT CASE 
-                    WHEN (m.team1_id = ts.team_id AND m.toss_winner_id = ts.team_id AND m.toss_decision = 'bat') OR
-                         (m.team2_id = ts.team_id AND m.toss_winner_id = ts.team_id AND m.toss_decision = 'bat') OR
-                         (m.team1_id = ts.team_id AND m.toss_winner_id != ts.team_id AND m.toss_decision = 'field') OR
-                         (m.team2_id = ts.team_id AND m.toss_winner_id != ts.team_id AND m.toss_decision = 'field')
-                    THEN m.match_id END) as batting_first_played,
-                -- Batting first and won
-                COUNT(DISTINCT CASE 
-                    WHEN m.winner_id = ts.team_id AND (
-                        (m.team1_id = ts.team_id AND m.toss_winner_id = ts.team_id AND m.toss_decision = 'bat') OR
-                        (m.team2_id = ts.team_id AND m.toss_winner_id = ts.team_id AND m.toss_decision = 'bat') OR
-                        (m.team1_id = ts.team_id AND m.toss_winner_id != ts.team_id AND m.toss_decision = 'field') OR
-                        (m.team2_id = ts.team_id AND m.toss_winner_id != ts.team_id AND m.toss_decision = 'field')
-                    )
-                    THEN m.match_id END) as batting_first_won
-            FROM 
-                team_seasons ts
-                JOIN teams t ON ts.team_id = t.team_id
-                LEFT JOIN matches m ON 
-                    (m.team1_id = ts.team_id OR m.team2_id = ts.team_id) AND 
-                    m.season_id = ts.season_id
-                LEFT JOIN venues v ON m.venue_id = v.venue_id
-            GROUP BY ts.team_id, ts.season_id
-        )
-        SELECT 
-            team_id, 
-            season_id, 
-            matches_played, 
-            matches_won,
-            home_matches_played, 
-            home_matches_won,
-            matches_played - home_matches_played as away_matches_played,
-            matches_won - home_matches_won as away_matches_won,
-            batting_first_played, 
-            batting_first_won,
-            matches_played - batting_first_played as bowling_first_played,
-            matches_won - batting_first_won as bowling_first_won
-        FROM 
-            team_stats
-        ON CONFLICT (team_id, season_id) DO UPDATE SET
-            matches_played = EXCLUDED.matches_played,
-            matches_won = EXCLUDED.matches_won,
-            home_matches_played = EXCLUDED.home_matches_played,
-            home_matches_won = EXCLUDED.home_matches_won,
-            away_matches_played = EXCLUDED.away_matches_played,
-            away_matches_won = EXCLUDED.away_matches_won,
-            batting_first_played = EXCLUDED.batting_first_played,
-            batting_first_won = EXCLUDED.batting_first_won,
-            bowling_first_played = EXCLUDED.bowling_first_played,
-            bowling_first_won = EXCLUDED.bowling_first_won;
-        """)
-        
-        conn.commit()
-        cursor.close()
-        print("Successfully updated statistics tables.")
-    
-    except Exception as e:
-        conn.rollback()
-        print(f"Error updating statistics: {e}")
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Import the IPL matches/deliveries CSVs into PostgreSQL")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--bulk", action="store_true",
+        help="Load matches, innings and deliveries with COPY into staging tables and a set-based merge"
+    )
+    mode.add_argument(
+        "--incremental", action="store_true",
+        help="Load only matches whose content hash changed and refresh the rollups for their seasons"
+    )
+    return parser.parse_args()
+
 def main():
-    """Main function to execute the data import process"""
+    """
+    Main function to execute the data import process
+
+    Returns:
+        int: Exit status, non-zero if any step failed
+    """
+    args = parse_args()
     try:
         # Step 1: Connect to database
         print("Step 1: Connecting to database...")
         conn = connect_to_db()
         if not conn:
-            return
+            return 1
         
         # Step 2: Load data from CSV files
         print("\nStep 2: Loading data from CSV files...")
         matches_df, deliveries_df = load_data()
         if matches_df is None or deliveries_df is None:
             conn.close()
-            return
+            return 1
         
         # Step 3: Extract unique data entities
         print("\nStep 3: Extracting unique data entities...")
@@ -708,27 +568,61 @@ def main():
         print("\nStep 7: Inserting seasons...")
         season_id_map = insert_seasons(conn, seasons, season_year_map)
         
-        # Step 8: Insert matches
-        print("\nStep 8: Inserting matches...")
-        insert_matches(conn, matches_df, team_id_map, venue_id_map, season_id_map, player_id_map)
-        
-        # Step 9: Insert innings
-        print("\nStep 9: Inserting innings...")
-        innings_map = insert_innings(conn, deliveries_df, team_id_map)
-        
-        # Step 10: Insert deliveries
-        print("\nStep 10: Inserting deliveries...")
-        insert_deliveries(conn, deliveries_df, innings_map, player_id_map)
+        if args.incremental:
+            # Steps 8-11: load new/changed matches only and refresh their seasons
+            print("\nStep 8: Ingesting new or changed matches...")
+            if not incremental_import(conn, matches_df, deliveries_df, team_id_map, venue_id_map, season_id_map, player_id_map):
+                print("\nData import failed; the changed matches will be retried on the next run.")
+                conn.close()
+                return 1
+            
+            print("\nData import process completed successfully!")
+            conn.close()
+            return 0
+        
+        if args.bulk:
+            # Steps 8-10: COPY into staging tables and merge
+            # Each step depends on the previous one; stop at the first failure
+            # rather than building rollups over a partial load
+            print("\nStep 8: Bulk loading matches...")
+            loaded = bulk_load_matches(conn, matches_df, team_id_map, venue_id_map, season_id_map, player_id_map)
+            
+            if loaded is not None:
+                print("\nStep 9: Bulk loading innings...")
+                loaded = bulk_load_innings(conn, deliveries_df, team_id_map)
+            
+            if loaded is not None:
+                print("\nStep 10: Bulk loading deliveries...")
+                loaded = bulk_load_deliveries(conn, deliveries_df, player_id_map)
+            
+            if loaded is None:
+                print("\nData import failed; rollup tables were not refreshed.")
+                conn.close()
+                return 1
+        else:
+            # Step 8: Insert matches
+            print("\nStep 8: Inserting matches...")
+            insert_matches(conn, matches_df, team_id_map, venue_id_map, season_id_map, player_id_map)
+            
+            # Step 9: Insert innings
+            print("\nStep 9: Inserting innings...")
+            innings_map = insert_innings(conn, deliveries_df, team_id_map)
+            
+            # Step 10: Insert deliveries
+            print("\nStep 10: Inserting deliveries...")
+            insert_deliveries(conn, deliveries_df, innings_map, player_id_map)
         
-        # Step 11: Update statistics tables
-        print("\nStep 11: Updating statistics tables...")
-        update_match_stats(conn)
+        # Step 11: Build the rollup tables read by the records/leaderboard endpoints
+        print("\nStep 11: Refreshing rollup tables...")
+        refresh_rollups(conn)
         
         print("\nData import process completed successfully!")
         conn.close()
+        return 0
         
     except Exception as e:
         print(f"Error in data import process: {e}")
+        return 1
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""
+Incremental, idempotent match ingestion.
+
+Every match gets a content hash over its matches.csv row and all of its
+deliveries.csv rows. The hashes of ingested matches are kept in
+match_ingest_state, so a run only loads the matches whose hash is new or
+changed. It reloads those through the COPY loader, which replaces their
+deliveries, and then refreshes the rollups for the affected seasons only.
+Running it twice on the same CSVs does nothing the second time.
+"""
+import hashlib
+import time
+
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from ipl_bulk_load import bulk_load_matches, bulk_load_innings, bulk_load_deliveries
+from ipl_rollups import refresh_rollups
+
+
+def ensure_ingest_state_table(conn):
+    """Create match_ingest_state on databases created with an older schema"""
+    cursor = conn.cursor()
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS match_ingest_state (
+        match_id INTEGER PRIMARY KEY REFERENCES matches(match_id),
+        content_hash VARCHAR(64) NOT NULL,
+        ingested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """)
+    conn.commit()
+    cursor.close()
+
+
+def compute_match_hashes(matches_df, deliveries_df):
+    """
+    SHA-256 per match over its match row and its deliveries, in file order.
+
+    Rows are hashed with the vectorized pandas row hash; only the per-match
+    digest loop runs in Python.
+
+    Returns:
+        dict: match_id -> hex digest
+    """
+    match_ids = pd.to_numeric(matches_df['id'], errors='coerce')
+    match_row_hashes = pd.util.hash_pandas_object(matches_df, index=False).to_numpy()
+    delivery_row_hashes = pd.util.hash_pandas_object(deliveries_df, index=False).to_numpy()
+    delivery_positions = deliveries_df.groupby(
+        pd.to_numeric(deliveries_df['match_id'], errors='coerce')
+    ).indices
+
+    hashes = {}
+    for position, match_id in enumerate(match_ids):
+        if pd.isna(match_id):
+            continue
+        match_id = int(match_id)
+        digest = hashlib.sha256(match_row_hashes[position].tobytes())
+        rows = delivery_positions.get(match_id)
+        if rows is not None:
+            digest.update(delivery_row_hashes[rows].tobytes())
+        hashes[match_id] = digest.hexdigest()
+    return hashes
+
+
+def get_stored_hashes(conn):
+    """Content hashes recorded by previous runs"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT match_id, content_hash FROM match_ingest_state")
+    stored = dict(cursor.fetchall())
+    cursor.close()
+    return stored
+
+
+def get_match_seasons(conn, match_ids):
+    """season_id currently stored for each of ``match_ids``"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT season_id FROM matches WHERE match_id = ANY(%s)", (list(match_ids),))
+    season_ids = {season_id for (season_id,) in cursor.fetchall() if season_id is not None}
+    cursor.close()
+    return season_ids
+
+
+def save_hashes(conn, hashes):
+    """Record the content hash of every successfully ingested match"""
+    cursor = conn.cursor()
+    execute_values(cursor, """
+    INSERT INTO match_ingest_state (match_id, content_hash)
+    VALUES %s
+    ON CONFLICT (match_id) DO UPDATE
+    SET
+        content_hash = EXCLUDED.content_hash,
+        ingested_at = CURRENT_TIMESTAMP
+    """, list(hashes.items()))
+    conn.commit()
+    cursor.close()
+
+
+def incremental_import(conn, matches_df, deliveries_df, team_id_map, venue_id_map, season_id_map, player_id_map):
+    """
+    Load only new or changed matches and refresh the rollups they affect.
+
+    Returns:
+        bool: True if the database is up to date with the CSVs
+    """
+    try:
+        started = time.time()
+        ensure_ingest_state_table(conn)
+
+        hashes = compute_match_hashes(matches_df, deliveries_df)
+        stored = get_stored_hashes(conn)
+        changed = {match_id: h for match_id, h in hashes.items() if stored.get(match_id) != h}
+        print(f"{len(changed)} of {len(hashes)} matches are new or changed.")
+
+        if not changed:
+            print("Database is already up to date.")
+            return True
+
+        # Seasons a changed match belonged to before and after this load
+        affected_seasons = get_match_seasons(conn, changed)
+
+        match_ids = pd.to_numeric(matches_df['id'], errors='coerce')
+        delivery_match_ids = pd.to_numeric(deliveries_df['match_id'], errors='coerce')
+        changed_ids = list(changed)
+        changed_matches = matches_df[match_ids.isin(changed_ids)]
+        changed_deliveries = deliveries_df[delivery_match_ids.isin(changed_ids)]
+
+        if bulk_load_matches(conn, changed_matches, team_id_map, venue_id_map, season_id_map, player_id_map) is None:
+            return False
+        if bulk_load_innings(conn, changed_deliveries, team_id_map) is None:
+            return False
+        # Every changed match is cleared, including ones that now have no deliveries
+        if bulk_load_deliveries(conn, changed_deliveries, player_id_map, replace_match_ids=changed_ids) is None:
+            return False
+
+        affected_seasons |= get_match_seasons(conn, changed)
+        if not refresh_rollups(conn, sorted(affected_seasons)):
+            return False
+
+        # Only record hashes once everything derived from them is in place, so a
+        # failed run is retried in full next time
+        save_hashes(conn, changed)
+        print(f"Ingested {len(changed)} matches in {time.time() - started:.1f}s.")
+        return True
+
+    except Exception as e:
+        conn.rollback()
+        print(f"Error in incremental import: {e}")
+        return False
@@ -0,0 +1,511 @@
+"""
+Build and refresh the rollup tables declared in ipl_database_schema.sql.
+
+The records and leaderboard endpoints read player_season_stats instead of
+scanning every delivery, so these tables have to be kept current by whatever
+loads data. Every refresh is set-based SQL over matches/innings/deliveries and
+can be limited to a list of season_ids, so an import that only touched one
+season only recomputes that season's rows.
+
+Rollups maintained here:
+    innings             total_runs, total_wickets, total_overs, extras
+    player_season_stats batting, bowling, fielding and player-of-match totals
+    team_season_stats   results split plus runs/balls for and against
+    venue_stats         results and first/second innings scores per venue
+    toss_stats          toss decisions and outcomes
+    head_to_head        results per team pair
+
+Every refresh also bumps data_version, which running API workers poll to
+reload their in-memory copies of the data.
+"""
+
+# Dismissals that are not credited to the bowler
+NON_BOWLER_DISMISSALS = ('run out', 'retired hurt', 'retired out', 'obstructing the field')
+
+# Columns added to player_season_stats after the original schema was deployed
+PLAYER_SEASON_STATS_COLUMNS = (
+    ("balls_bowled", "INTEGER DEFAULT 0"),
+    ("three_wickets", "INTEGER DEFAULT 0"),
+    ("five_wickets", "INTEGER DEFAULT 0"),
+)
+
+LEGAL_BALL = "(d.extras_type IS NULL OR d.extras_type NOT IN ('wides', 'noballs'))"
+
+
+def _season_clause(season_ids, column="m.season_id"):
+    """SQL fragment limiting a query to ``season_ids`` (no-op for a full refresh)"""
+    return f"AND {column} = ANY(%(season_ids)s)" if season_ids else ""
+
+
+def _delete_scoped(cursor, table, season_ids):
+    """
+    Delete the rows of ``table`` for ``season_ids`` (every row for a full refresh).
+
+    Rollups are deleted and re-inserted rather than upserted: a corrected
+    venue, team or toss winner moves a match to another key, which an upsert
+    would leave behind as a stale row.
+    """
+    cursor.execute(
+        f"DELETE FROM {table} WHERE 1=1 {_season_clause(season_ids, 'season_id')}",
+        {"season_ids": season_ids},
+    )
+
+
+def ensure_rollup_schema(cursor):
+    """Add rollup columns and tables missing from databases created with an older schema"""
+    for column, definition in PLAYER_SEASON_STATS_COLUMNS:
+        cursor.execute(f"ALTER TABLE player_season_stats ADD COLUMN IF NOT EXISTS {column} {definition}")
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS data_version (
+        id INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+        version BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+
+def bump_data_version(cursor):
+    """Increment the data version so API workers reload their in-memory data"""
+    cursor.execute("""
+    INSERT INTO data_version (id, version) VALUES (1, 1)
+    ON CONFLICT (id) DO UPDATE
+    SET
+        version = data_version.version + 1,
+        updated_at = CURRENT_TIMESTAMP
+    """)
+
+
+def refresh_innings_totals(cursor, season_ids=None):
+    """Fill innings.total_runs/total_wickets/total_overs/extras from deliveries"""
+    cursor.execute(f"""
+    UPDATE innings i SET
+        total_runs = t.runs,
+        total_wickets = t.wickets,
+        total_overs = t.legal_balls / 6 + (t.legal_balls %% 6) / 10.0,
+        extras = t.extras
+    FROM (
+        SELECT
+            d.inning_id,
+            SUM(d.total_runs) as runs,
+            COUNT(*) FILTER (WHERE d.is_wicket) as wickets,
+            COUNT(*) FILTER (WHERE {LEGAL_BALL}) as legal_balls,
+            SUM(d.extra_runs) as extras
+        FROM deliveries d
+        JOIN matches m ON m.match_id = d.match_id
+        WHERE 1=1 {_season_clause(season_ids)}
+        GROUP BY d.inning_id
+    ) t
+    WHERE i.inning_id = t.inning_id;
+    """, {"season_ids": season_ids})
+
+
+def refresh_player_season_stats(cursor, season_ids=None):
+    """Rebuild player_season_stats rows for ``season_ids`` (all seasons if None)"""
+    _delete_scoped(cursor, "player_season_stats", season_ids)
+
+    cursor.execute(f"""
+    INSERT INTO player_season_stats (
+        player_id, team_id, season_id, matches_played,
+        innings_batted, runs_scored, balls_faced, fours, sixes,
+        highest_score, fifties, hundreds, not_outs,
+        innings_bowled, overs_bowled, balls_bowled, runs_conceded, wickets, maidens,
+        economy, best_bowling_figures, three_wickets, five_wickets,
+        catches, stumpings, run_outs, player_of_match_count
+    )
+    WITH scoped AS (
+        SELECT
+            d.*,
+            m.season_id,
+            i.batting_team_id,
+            i.bowling_team_id,
+            {LEGAL_BALL} as is_legal
+        FROM deliveries d
+        JOIN matches m ON m.match_id = d.match_id
+        JOIN innings i ON i.inning_id = d.inning_id
+        WHERE 1=1 {_season_clause(season_ids)}
+    ),
+    dismissed AS (
+        SELECT DISTINCT inning_id, player_dismissed_id as player_id
+        FROM scoped
+        WHERE is_wicket AND player_dismissed_id IS NOT NULL
+          AND COALESCE(dismissal_kind, '') != 'retired hurt'
+    ),
+    batting_innings AS (
+        SELECT
+            batsman_id as player_id,
+            batting_team_id as team_id,
+            season_id,
+            match_id,
+            inning_id,
+            SUM(batsman_runs) as runs,
+            COUNT(*) FILTER (WHERE extras_type IS DISTINCT FROM 'wides') as balls,
+            COUNT(*) FILTER (WHERE batsman_runs = 4) as fours,
+            COUNT(*) FILTER (WHERE batsman_runs = 6) as sixes
+        FROM scoped
+        WHERE batsman_id IS NOT NULL
+        GROUP BY batsman_id, batting_team_id, season_id, match_id, inning_id
+    ),
+    batting AS (
+        SELECT
+            b.player_id, b.team_id, b.season_id,
+            COUNT(*) as innings_batted,
+            SUM(b.runs) as runs_scored,
+            SUM(b.balls) as balls_faced,
+            SUM(b.fours) as fours,
+            SUM(b.sixes) as sixes,
+            MAX(b.runs) as highest_score,
+            COUNT(*) FILTER (WHERE b.runs >= 50 AND b.runs < 100) as fifties,
+            COUNT(*) FILTER (WHERE b.runs >= 100) as hundreds,
+            COUNT(*) FILTER (WHERE dm.player_id IS NULL) as not_outs
+        FROM batting_innings b
+        LEFT JOIN dismissed dm ON dm.inning_id = b.inning_id AND dm.player_id = b.player_id
+        GROUP BY b.player_id, b.team_id, b.season_id
+    ),
+    bowling_overs AS (
+        SELECT
+            bowler_id as player_id,
+            bowling_team_id as team_id,
+            season_id,
+            match_id,
+            inning_id,
+            COUNT(*) FILTER (WHERE is_legal) as balls,
+            COALESCE(SUM(total_runs) FILTER (WHERE extras_type IS NULL OR extras_type NOT IN ('byes', 'legbyes')), 0) as runs,
+            COUNT(*) FILTER (WHERE is_wicket AND COALESCE(dismissal_kind, '') NOT IN %(non_bowler_dismissals)s) as wickets
+        FROM scoped
+        WHERE bowler_id IS NOT NULL
+        GROUP BY bowler_id, bowling_team_id, season_id, match_id, inning_id, over_number
+    ),
+    bowling_innings AS (
+        SELECT
+            player_id, team_id, season_id, match_id, inning_id,
+            SUM(balls) as balls,
+            SUM(runs) as runs,
+            SUM(wickets) as wickets,
+            COUNT(*) FILTER (WHERE balls = 6 AND runs = 0) as maidens
+        FROM bowling_overs
+        GROUP BY player_id, team_id, season_id, match_id, inning_id
+    ),
+    bowling AS (
+        SELECT
+            player_id, team_id, season_id,
+            COUNT(*) as innings_bowled,
+            SUM(balls) as balls_bowled,
+            SUM(runs) as runs_conceded,
+            SUM(wickets) as wickets,
+            SUM(maidens) as maidens,
+            COUNT(*) FILTER (WHERE wickets >= 3 AND wickets < 5) as three_wickets,
+            COUNT(*) FILTER (WHERE wickets >= 5) as five_wickets,
+            (ARRAY_AGG(wickets || '/' || runs ORDER BY wickets DESC, runs ASC))[1] as best_bowling_figures
+        FROM bowling_innings
+        GROUP BY player_id, team_id, season_id
+    ),
+    fielding_events AS (
+        SELECT
+            CASE WHEN dismissal_kind = 'caught and bowled' THEN COALESCE(fielder_id, bowler_id) ELSE fielder_id END as player_id,
+            bowling_team_id as team_id,
+            season_id,
+            match_id,
+            dismissal_kind
+        FROM scoped
+        WHERE is_wicket AND dismissal_kind IN ('caught', 'caught and bowled', 'stumped', 'run out')
+    ),
+    fielding AS (
+        SELECT
+            player_id, team_id, season_id,
+            COUNT(*) FILTER (WHERE dismissal_kind IN ('caught', 'caught and bowled')) as catches,
+            COUNT(*) FILTER (WHERE dismissal_kind = 'stumped') as stumpings,
+            COUNT(*) FILTER (WHERE dismissal_kind = 'run out') as run_outs
+        FROM fielding_events
+        WHERE player_id IS NOT NULL
+        GROUP BY player_id, team_id, season_id
+    ),
+    appearances AS (
+        SELECT player_id, team_id, season_id, match_id FROM batting_innings
+        UNION
+        SELECT player_id, team_id, season_id, match_id FROM bowling_innings
+        UNION
+        SELECT player_id, team_id, season_id, match_id FROM fielding_events WHERE player_id IS NOT NULL
+        UNION
+        SELECT non_striker_id, batting_team_id, season_id, match_id FROM scoped WHERE non_striker_id IS NOT NULL
+    ),
+    player_teams AS (
+        SELECT player_id, team_id, season_id, COUNT(DISTINCT match_id) as matches_played
+        FROM appearances
+        WHERE team_id IS NOT NULL
+        GROUP BY player_id, team_id, season_id
+    ),
+    player_of_match AS (
+        SELECT a.player_id, a.team_id, a.season_id, COUNT(*) as player_of_match_count
+        FROM appearances a
+        JOIN matches m ON m.match_id = a.match_id AND m.player_of_match_id = a.player_id
+        GROUP BY a.player_id, a.team_id, a.season_id
+    )
+    SELECT
+        pt.player_id,
+        pt.team_id,
+        pt.season_id,
+        pt.matches_played,
+        COALESCE(b.innings_batted, 0),
+        COALESCE(b.runs_scored, 0),
+        COALESCE(b.balls_faced, 0),
+        COALESCE(b.fours, 0),
+        COALESCE(b.sixes, 0),
+        COALESCE(b.highest_score, 0),
+        COALESCE(b.fifties, 0),
+        COALESCE(b.hundreds, 0),
+        COALESCE(b.not_outs, 0),
+        COALESCE(bw.innings_bowled, 0),
+        COALESCE(bw.balls_bowled / 6 + (bw.balls_bowled %% 6) / 10.0, 0),
+        COALESCE(bw.balls_bowled, 0),
+        COALESCE(bw.runs_conceded, 0),
+        COALESCE(bw.wickets, 0),
+        COALESCE(bw.maidens, 0),
+        COALESCE(ROUND(bw.runs_conceded * 6.0 / NULLIF(bw.balls_bowled, 0), 2), 0),
+        bw.best_bowling_figures,
+        COALESCE(bw.three_wickets, 0),
+        COALESCE(bw.five_wickets, 0),
+        COALESCE(f.catches, 0),
+        COALESCE(f.stumpings, 0),
+        COALESCE(f.run_outs, 0),
+        COALESCE(pom.player_of_match_count, 0)
+    FROM player_teams pt
+    LEFT JOIN batting b ON b.player_id = pt.player_id AND b.team_id = pt.team_id AND b.season_id = pt.season_id
+    LEFT JOIN bowling bw ON bw.player_id = pt.player_id AND bw.team_id = pt.team_id AND bw.season_id = pt.season_id
+    LEFT JOIN fielding f ON f.player_id = pt.player_id AND f.team_id = pt.team_id AND f.season_id = pt.season_id
+    LEFT JOIN player_of_match pom ON pom.player_id = pt.player_id AND pom.team_id = pt.team_id AND pom.season_id = pt.season_id;
+    """, {"season_ids": season_ids, "non_bowler_dismissals": NON_BOWLER_DISMISSALS})
+
+
+def refresh_team_season_stats(cursor, season_ids=None):
+    """Rebuild team_season_stats results and runs/balls totals for ``season_ids``"""
+    _delete_scoped(cursor, "team_season_stats", season_ids)
+    team_season_clause = _season_clause(season_ids, "season_id")
+
+    cursor.execute(f"""
+    INSERT INTO team_season_stats (
+        team_id, season_id, matches_played, matches_won,
+        home_matches_played, home_matches_won,
+        away_matches_played, away_matches_won,
+        batting_first_played, batting_first_won,
+        bowling_first_played, bowling_first_won
+    )
+    WITH team_seasons AS (
+        -- Get all teams in each season
+        SELECT DISTINCT m.team_id, m.season_id
+        FROM (
+            SELECT team1_id as team_id, season_id FROM matches WHERE team1_id IS NOT NULL {team_season_clause}
+            UNION
+            SELECT team2_id as team_id, season_id FROM matches WHERE team2_id IS NOT NULL {team_season_clause}
+        ) m
+        JOIN teams t ON m.team_id = t.team_id
+        JOIN seasons s ON m.season_id = s.season_id
+    ),
+    team_stats AS (
+        -- Calculate stats for each team in each season
+        SELECT
+            ts.team_id,
+            ts.season_id,
+            COUNT(DISTINCT m.match_id) as matches_played,
+            COUNT(DISTINCT CASE WHEN m.winner_id = ts.team_id THEN m.match_id END) as matches_won,
+            -- Home matches using venue as proxy
+            COUNT(DISTINCT CASE WHEN v.venue_name = t.home_venue THEN m.match_id END) as home_matches_played,
+            COUNT(DISTINCT CASE
+                WHEN m.winner_id = ts.team_id AND v.venue_name = t.home_venue
+                THEN m.match_id END) as home_matches_won,
+            -- Batting first: won the toss and batted, or lost it and the opponent fielded
+            COUNT(DISTINCT CASE
+                WHEN (m.toss_winner_id = ts.team_id AND m.toss_decision = 'bat') OR
+                     (m.toss_winner_id != ts.team_id AND m.toss_decision = 'field')
+                THEN m.match_id END) as batting_first_played,
+            COUNT(DISTINCT CASE
+                WHEN m.winner_id = ts.team_id AND (
+                    (m.toss_winner_id = ts.team_id AND m.toss_decision = 'bat') OR
+                    (m.toss_winner_id != ts.team_id AND m.toss_decision = 'field')
+                )
+                THEN m.match_id END) as batting_first_won
+        FROM
+            team_seasons ts
+            JOIN teams t ON ts.team_id = t.team_id
+            LEFT JOIN matches m ON
+                (m.team1_id = ts.team_id OR m.team2_id = ts.team_id) AND
+                m.season_id = ts.season_id
+            LEFT JOIN venues v ON m.venue_id = v.venue_id
+        GROUP BY ts.team_id, ts.season_id
+    )
+    SELECT
+        team_id,
+        season_id,
+        matches_played,
+        matches_won,
+        home_matches_played,
+        home_matches_won,
+        matches_played - home_matches_played as away_matches_played,
+        matches_won - home_matches_won as away_matches_won,
+        batting_first_played,
+        batting_first_won,
+        matches_played - batting_first_played as bowling_first_played,
+        matches_won - batting_first_won as bowling_first_won
+    FROM
+        team_stats;
+    """, {"season_ids": season_ids})
+
+    cursor.execute(f"""
+    WITH innings_totals AS (
+        SELECT
+            i.batting_team_id,
+            i.bowling_team_id,
+            m.season_id,
+            SUM(d.total_runs) as runs,
+            COUNT(*) FILTER (WHERE {LEGAL_BALL}) as balls
+        FROM deliveries d
+        JOIN innings i ON i.inning_id = d.inning_id
+        JOIN matches m ON m.match_id = d.match_id
+        WHERE 1=1 {_season_clause(season_ids)}
+        GROUP BY i.inning_id, i.batting_team_id, i.bowling_team_id, m.season_id
+    ),
+    sides AS (
+        SELECT batting_team_id as team_id, season_id, runs as runs_scored, balls as balls_faced,
+               0 as runs_conceded, 0 as balls_bowled
+        FROM innings_totals
+        UNION ALL
+        SELECT bowling_team_id, season_id, 0, 0, runs, balls
+        FROM innings_totals
+    )
+    UPDATE team_season_stats ts SET
+        total_runs_scored = t.runs_scored,
+        total_balls_faced = t.balls_faced,
+        total_runs_conceded = t.runs_conceded,
+        total_balls_bowled = t.balls_bowled,
+        last_updated = CURRENT_TIMESTAMP
+    FROM (
+        SELECT team_id, season_id,
+               SUM(runs_scored) as runs_scored, SUM(balls_faced) as balls_faced,
+               SUM(runs_conceded) as runs_conceded, SUM(balls_bowled) as balls_bowled
+        FROM sides
+        GROUP BY team_id, season_id
+    ) t
+    WHERE ts.team_id = t.team_id AND ts.season_id = t.season_id;
+    """, {"season_ids": season_ids})
+
+
+def refresh_venue_stats(cursor, season_ids=None):
+    """Rebuild venue_stats for ``season_ids`` from match results and first/second innings totals"""
+    _delete_scoped(cursor, "venue_stats", season_ids)
+    cursor.execute(f"""
+    INSERT INTO venue_stats (
+        venue_id, season_id, matches_played,
+        batting_first_wins, batting_second_wins,
+        avg_first_innings_score, avg_second_innings_score,
+        highest_total, lowest_total
+    )
+    WITH innings_totals AS (
+        SELECT
+            i.match_id,
+            i.inning_number,
+            i.batting_team_id,
+            SUM(d.total_runs) as runs
+        FROM innings i
+        JOIN deliveries d ON d.inning_id = i.inning_id
+        JOIN matches m ON m.match_id = i.match_id
+        WHERE i.inning_number IN (1, 2) {_season_clause(season_ids)}
+        GROUP BY i.inning_id, i.match_id, i.inning_number, i.batting_team_id
+    )
+    SELECT
+        m.venue_id,
+        m.season_id,
+        COUNT(DISTINCT m.match_id) as matches_played,
+        COUNT(DISTINCT m.match_id) FILTER (WHERE it.inning_number = 1 AND m.winner_id = it.batting_team_id) as batting_first_wins,
+        COUNT(DISTINCT m.match_id) FILTER (WHERE it.inning_number = 2 AND m.winner_id = it.batting_team_id) as batting_second_wins,
+        COALESCE(ROUND(AVG(it.runs) FILTER (WHERE it.inning_number = 1)), 0) as avg_first_innings_score,
+        COALESCE(ROUND(AVG(it.runs) FILTER (WHERE it.inning_number = 2)), 0) as avg_second_innings_score,
+        COALESCE(MAX(it.runs), 0) as highest_total,
+        COALESCE(MIN(it.runs), 0) as lowest_total
+    FROM matches m
+    LEFT JOIN innings_totals it ON it.match_id = m.match_id
+    WHERE m.venue_id IS NOT NULL {_season_clause(season_ids)}
+    GROUP BY m.venue_id, m.season_id;
+    """, {"season_ids": season_ids})
+
+
+def refresh_toss_stats(cursor, season_ids=None):
+    """Rebuild toss_stats per toss winner for ``season_ids``"""
+    _delete_scoped(cursor, "toss_stats", season_ids)
+    cursor.execute(f"""
+    INSERT INTO toss_stats (team_id, season_id, toss_wins, chose_bat, chose_field, won_after_batting, won_after_fielding)
+    SELECT
+        toss_winner_id as team_id,
+        season_id,
+        COUNT(*) as toss_wins,
+        SUM(CASE WHEN toss_decision = 'bat' THEN 1 ELSE 0 END) as chose_bat,
+        SUM(CASE WHEN toss_decision = 'field' THEN 1 ELSE 0 END) as chose_field,
+        SUM(CASE WHEN toss_decision = 'bat' AND winner_id = toss_winner_id THEN 1 ELSE 0 END) as won_after_batting,
+        SUM(CASE WHEN toss_decision = 'field' AND winner_id = toss_winner_id THEN 1 ELSE 0 END) as won_after_fielding
+    FROM
+        matches
+    WHERE
+        toss_winner_id IS NOT NULL {_season_clause(season_ids, 'season_id')}
+    GROUP BY
+        toss_winner_id, season_id;
+    """, {"season_ids": season_ids})
+
+
+def refresh_head_to_head(cursor, season_ids=None):
+    """Rebuild head_to_head per (lower team id, higher team id, season) for ``season_ids``"""
+    _delete_scoped(cursor, "head_to_head", season_ids)
+    cursor.execute(f"""
+    INSERT INTO head_to_head (team1_id, team2_id, season_id, matches_played, team1_wins, team2_wins, no_results)
+    SELECT
+        LEAST(team1_id, team2_id) as team1_id,
+        GREATEST(team1_id, team2_id) as team2_id,
+        season_id,
+        COUNT(*) as matches_played,
+        SUM(CASE WHEN winner_id = LEAST(team1_id, team2_id) THEN 1 ELSE 0 END) as team1_wins,
+        SUM(CASE WHEN winner_id = GREATEST(team1_id, team2_id) THEN 1 ELSE 0 END) as team2_wins,
+        SUM(CASE WHEN winner_id IS NULL THEN 1 ELSE 0 END) as no_results
+    FROM
+        matches
+    WHERE
+        team1_id IS NOT NULL AND
+        team2_id IS NOT NULL
+        {_season_clause(season_ids, 'season_id')}
+    GROUP BY
+        LEAST(team1_id, team2_id),
+        GREATEST(team1_id, team2_id),
+        season_id;
+    """, {"season_ids": season_ids})
+
+
+def refresh_rollups(conn, season_ids=None):
+    """
+    Refresh every rollup table in one transaction.
+
+    Args:
+        conn: psycopg2 connection
+        season_ids: Seasons to recompute; None rebuilds everything
+
+    Returns:
+        bool: True if the refresh was committed
+    """
+    season_ids = sorted(set(season_ids)) if season_ids else None
+    try:
+        cursor = conn.cursor()
+        ensure_rollup_schema(cursor)
+
+        refresh_innings_totals(cursor, season_ids)
+        refresh_player_season_stats(cursor, season_ids)
+        refresh_team_season_stats(cursor, season_ids)
+        refresh_venue_stats(cursor, season_ids)
+        refresh_toss_stats(cursor, season_ids)
+        refresh_head_to_head(cursor, season_ids)
+        bump_data_version(cursor)
+
+        conn.commit()
+        cursor.close()
+        scope = f"seasons {season_ids}" if season_ids else "all seasons"
+        print(f"Successfully refreshed rollup tables for {scope}.")
+        return True
+
+    except Exception as e:
+        conn.rollback()
+        print(f"Error refreshing rollup tables: {e}")
+        return False
@@ -1,3 +1,5 @@
+import argparse
+import sys
 import psycopg2
 from psycopg2.extras import execute_batch
 import pandas as pd
@@ -5,6 +7,9 @@ import numpy as np
 from datetime import datetime
 import time
 
+from ipl_import_data import extract_unique_data, insert_teams, insert_venues, insert_players, insert_seasons
+from ipl_incremental import incremental_import
+
 # Database connection parameters
 DB_PARAMS = {
     'dbname': 'ipl_2008_2024',
@@ -31,6 +36,14 @@ def load_data():
         print(f"Error loading CSV files: {e}")
         return None
 
+def load_matches():
+    """Load the matches CSV used to hash matches in incremental mode"""
+    try:
+        return pd.read_csv('F:/Skye_analytics_2.0/backend/data/matches.csv')
+    except Exception as e:
+        print(f"Error loading CSV files: {e}")
+        return None
+
 def fix_innings_table(conn):
     """Create innings records for all matches"""
     try:
@@ -506,8 +519,54 @@ def verify_data_integrity(conn):
         print(f"Error during integrity check: {e}")
         return False
 
+def repair_incremental(conn):
+    """
+    Reload only the matches whose CSV content changed since the last ingest.
+
+    Missing teams, venues, players and seasons are upserted first, then the
+    changed matches go through the hash-keyed incremental loader, which
+    replaces their innings and deliveries and refreshes the rollups of the
+    affected seasons only.
+
+    Returns:
+        bool: True if the database is up to date with the CSVs
+    """
+    print("\nStep 2: Loading data from CSV files...")
+    matches_df = load_matches()
+    deliveries_df = load_data()
+    if matches_df is None or deliveries_df is None:
+        return False
+    
+    print("\nStep 3: Upserting teams, venues, players and seasons...")
+    teams, team_short_names, venues, venue_city_map, seasons, season_year_map, players = extract_unique_data(
+        matches_df, deliveries_df
+    )
+    team_id_map = insert_teams(conn, teams, team_short_names)
+    venue_id_map = insert_venues(conn, venues, venue_city_map)
+    player_id_map = insert_players(conn, players)
+    season_id_map = insert_seasons(conn, seasons, season_year_map)
+    
+    print("\nStep 4: Reloading new or changed matches...")
+    return incremental_import(conn, matches_df, deliveries_df, team_id_map, venue_id_map, season_id_map, player_id_map)
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Repair the innings, deliveries and statistics tables")
+    parser.add_argument(
+        "--full", action="store_true",
+        help="Rebuild innings and deliveries for every match and recompute every statistic "
+             "instead of reloading only new or changed matches"
+    )
+    return parser.parse_args()
+
 def main():
-    """Main function to repair the database"""
+    """
+    Main function to repair the database
+
+    Returns:
+        int: Exit status, non-zero if any step failed
+    """
+    args = parse_args()
     try:
         print("=== IPL Database Repair Tool ===")
         print("This script will fix issues with innings and deliveries tables.")
@@ -516,20 +575,31 @@ def main():
         print("\nStep 1: Connecting to database...")
         conn = connect_to_db()
         if not conn:
-            return
+            return 1
+        
+        if not args.full:
+            if not repair_incremental(conn):
+                print("\nDatabase repair failed.")
+                conn.close()
+                return 1
+            print("\nStep 5: Verifying data integrity...")
+            verify_data_integrity(conn)
+            print("\nDatabase repair completed successfully!")
+            conn.close()
+            return 0
         
         # Step 2: Fix innings table
         print("\nStep 2: Fixing innings table...")
         if not fix_innings_table(conn):
             conn.close()
-            return
+            return 1
         
         # Step 3: Load deliveries data
         print("\nStep 3: Loading deliveries data...")
         deliveries_df = load_data()
         if deliveries_df is None:
             conn.close()
-            return
+            return 1
             
         # Step 4: Get mapping data
         print("\nStep 4: Getting mapping data...")
@@ -540,19 +610,19 @@ def main():
         print("\nStep 5: Inserting deliveries data...")
         if not insert_deliveries(conn, deliveries_df, innings_map, player_id_map):
             conn.close()
-            return
+            return 1
         
         # Step 6: Update innings statistics
         print("\nStep 6: Updating innings statistics...")
         if not update_innings_statistics(conn):
             conn.close()
-            return
+            return 1
         
         # Step 7: Update statistics tables
         print("\nStep 7: Updating statistics tables...")
         if not update_match_stats(conn):
             conn.close()
-            return
+            return 1
         
         # Step 8: Verify data integrity
         print("\nStep 8: Verifying data integrity...")
@@ -560,9 +630,11 @@ def main():
         
         print("\nDatabase repair completed successfully!")
         conn.close()
+        return 0
         
     except Exception as e:
         print(f"Error in database repair process: {e}")
+        return 1
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file